@@ -0,0 +1,292 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext
+from dataclasses import asdict, fields
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import exportacion
+import importador
+from nucleo import Repositorio, ReporteCliente, sin_entrenador
+
+# Administración por lotes, sin ventana, para scripts y tareas nocturnas. Cada subcomando llama al
+# Repositorio directamente y confirma las escrituras en transacciones de --bloque cambios, no una por cliente:
+#
+#   python admin.py --db gym.db registrar clientes nuevos.csv
+#   python admin.py --db gym.db vincular ent7 --de clientes.txt
+#   python admin.py --db gym.db reporte --sin-control 30 --formato ids | python admin.py --db gym.db plan-auto --de -
+
+BLOQUE = importador.TAMANO_BLOQUE
+
+
+def abrir(args, parser: argparse.ArgumentParser) -> Repositorio:
+    if args.db:
+        from almacenamiento_sqlite import RepositorioSQLite
+        return RepositorioSQLite(args.db)
+    if args.diario:
+        from diario import RepositorioDiario
+        return RepositorioDiario(args.diario)
+    if args.replica:
+        # sólo para consultar (reporte, exportar) sin cargar al primario
+        from replicacion import RepositorioReplica
+        repo = RepositorioReplica(args.replica)
+        if not repo.esperar_al_dia(args.espera):
+            repo.cerrar()
+            parser.error(f"la réplica no se sincronizó con {args.replica} en {args.espera:g} s")
+        return repo
+    parser.error("indicar --db, --diario o --replica: en memoria no quedaría nada guardado")
+
+
+def por_bloques(items: list, tamano: int) -> Iterator[list]:
+    for i in range(0, len(items), tamano):
+        yield items[i:i + tamano]
+
+
+def referencias(rutas: Iterable[str]) -> Iterator[str]:
+    # Un id o username por línea; "-" es la entrada estándar. Se saltan las líneas vacías y los comentarios
+    for ruta in rutas:
+        with nullcontext(sys.stdin) if ruta == "-" else open(ruta, encoding="utf-8") as f:
+            for linea in f:
+                ref = linea.strip()
+                if ref and not ref.startswith("#"):
+                    yield ref
+
+
+def resolver(repo: Repositorio, ref: str, coleccion) -> Optional[str]:
+    usr = coleccion.get(ref) or repo.find_by_username(ref)
+    return usr.id if usr is not None and usr.id in coleccion else None
+
+
+def faltantes(refs: List[str]) -> int:
+    for ref in refs:
+        print(f"cliente {ref!r} no encontrado", file=sys.stderr)
+    return 1 if refs else 0
+
+
+def sin_control(filas: Iterable[ReporteCliente], dias: float) -> List[ReporteCliente]:
+    # nunca controlados o con el último control de hace más de `dias` días
+    return [r for r in filas if r.dias_sin_control is None or r.dias_sin_control > dias]
+
+
+def seleccionar(repo: Repositorio, args) -> Tuple[List[str], List[str]]:
+    # (ids elegidos, referencias que no son clientes). Las referencias dadas o, sin ellas, todo el
+    # gimnasio; los filtros se aplican encima
+    faltan = []
+    if args.clientes or args.de:
+        ids = []
+        for ref in itertools.chain(args.clientes, referencias(args.de)):
+            id_ = resolver(repo, ref, repo.clientes)
+            if id_ is None:
+                faltan.append(ref)
+            else:
+                ids.append(id_)
+        ids = list(dict.fromkeys(ids))
+    elif args.todos or args.sin_entrenador or args.sin_control is not None or args.sin_plan is not None:
+        ids = list(repo.clientes)
+    else:
+        raise ValueError("sin clientes: indicar ids o usernames, --de ARCHIVO o --todos")
+    if args.sin_entrenador:
+        ids = [i for i in ids if sin_entrenador(repo.clientes[i])]
+    if args.sin_plan is not None:
+        filtro = repo.plan_anterior_a(args.sin_plan)
+        ids = [i for i in ids if filtro(repo.clientes[i])]
+    if args.sin_control is not None:
+        # un solo reporte para todo el gimnasio en vez de un historial por cliente
+        elegidos = {r.id for r in sin_control(repo.reporte_progreso(), args.sin_control)}
+        ids = [i for i in ids if i in elegidos]
+    return ids, faltan
+
+
+def importar(repo: Repositorio, tipo: str, rutas: List[str], args) -> int:
+    imp = importador.Importador(repo, tamano_bloque=args.bloque)
+    errores = 0
+    for ruta in rutas:
+        res = imp.importar(tipo, ruta, args.formato)
+        origen = "entrada estándar" if ruta == "-" else ruta
+        print(f"{origen}: {res.importadas:,} {tipo} importados, {res.con_error:,} con error de {res.leidas:,} filas "
+              f"en {res.segundos:.1f} s")
+        for err in res.errores:
+            print(f"  línea {err.linea}: {err.mensaje}", file=sys.stderr)
+        errores += res.con_error
+    return 1 if errores else 0
+
+
+def cmd_registrar(repo: Repositorio, args) -> int:
+    return importar(repo, args.tipo, args.archivos or ["-"], args)
+
+
+def cmd_progreso(repo: Repositorio, args) -> int:
+    return importar(repo, "progresos", args.archivos or ["-"], args)
+
+
+def cmd_importar(repo: Repositorio, args) -> int:
+    return importar(repo, args.tipo, args.archivos, args)
+
+
+def cmd_vincular(repo: Repositorio, args) -> int:
+    entrenador_id = resolver(repo, args.entrenador, repo.entrenadores)
+    if entrenador_id is None:
+        raise ValueError(f"entrenador {args.entrenador!r} no encontrado")
+    ids, faltan = seleccionar(repo, args)
+    inicio = time.perf_counter()
+    vinculados = ya = 0
+    for bloque in por_bloques(ids, args.bloque):
+        with repo.transaccion():
+            for id_ in bloque:
+                cli = repo.clientes.get(id_)
+                if cli is None:
+                    continue  # dado de baja mientras tanto
+                if cli.entrenador_id == entrenador_id:
+                    ya += 1  # sin evento: el diario y las vistas no se enteran de un no-cambio
+                elif repo.vincular_cliente_a_entrenador(id_, entrenador_id):
+                    vinculados += 1
+    print(f"{vinculados:,} clientes vinculados a {args.entrenador} ({ya:,} ya lo estaban) "
+          f"en {time.perf_counter() - inicio:.1f} s")
+    return faltantes(faltan)
+
+
+def cmd_automaticos(repo: Repositorio, args) -> int:
+    ids, faltan = seleccionar(repo, args)
+    elegidos = set(ids)
+    inicio = time.perf_counter()
+    res = repo.asignar_automaticos(lambda cli: cli.id in elegidos, planes=args.planes, rutinas=args.rutinas,
+                                   tamano_bloque=args.bloque)
+    print(f"{res['planes']:,} planes y {res['rutinas']:,} rutinas para {res['clientes']:,} clientes "
+          f"en {time.perf_counter() - inicio:.1f} s")
+    return faltantes(faltan)
+
+
+def _valor(v) -> str:
+    return "-" if v is None else f"{v:g}"
+
+
+def cmd_reporte(repo: Repositorio, args) -> int:
+    filas = repo.reporte_progreso(args.hoy, args.controles_por_semana)
+    if args.sin_control is not None:
+        filas = sin_control(filas, args.sin_control)
+    salida = sys.stdout
+    if args.formato == "ids":
+        salida.writelines(f"{r.id}\n" for r in filas)
+    elif args.formato == "jsonl":
+        salida.writelines(json.dumps(asdict(r), ensure_ascii=False) + "\n" for r in filas)
+    elif args.formato == "csv":
+        escritor = csv.writer(salida)
+        escritor.writerow([c.name for c in fields(ReporteCliente)])
+        escritor.writerows(["" if v is None else v for v in asdict(r).values()] for r in filas)
+    else:
+        salida.write(f"{'cliente':<30} {'controles':>9} {'Δ peso':>8} {'kg/sem':>7} {'días sin':>8} "
+                     f"{'Δ cintura':>9} {'adherencia':>10}\n")
+        salida.writelines(f"{r.nombre[:30]:<30} {r.controles:>9} {_valor(r.delta_peso):>8} "
+                          f"{_valor(r.kg_por_semana):>7} {_valor(r.dias_sin_control):>8} "
+                          f"{_valor(r.delta_cintura):>9} {_valor(r.adherencia):>10}\n" for r in filas)
+    return 0
+
+
+def cmd_exportar(repo: Repositorio, args) -> int:
+    cliente_id = entrenador_id = None
+    if args.cliente:
+        cliente_id = resolver(repo, args.cliente, repo.clientes)
+        if cliente_id is None:
+            raise ValueError(f"cliente {args.cliente!r} no encontrado")
+    if args.entrenador:
+        entrenador_id = resolver(repo, args.entrenador, repo.entrenadores)
+        if entrenador_id is None:
+            raise ValueError(f"entrenador {args.entrenador!r} no encontrado")
+    res = exportacion.exportar(repo, args.archivo, args.formato, args.tipos, cliente_id, entrenador_id)
+    print(f"{args.archivo}: {res.documentos:,} documentos de {res.clientes:,} clientes en {res.segundos:.1f} s")
+    return 0
+
+
+def argumentos_seleccion(parser: argparse.ArgumentParser):
+    parser.add_argument("clientes", nargs="*", help="ids o usernames de clientes")
+    parser.add_argument("--de", action="append", default=[], metavar="ARCHIVO",
+                        help='ids o usernames, uno por línea; "-" lee la entrada estándar')
+    parser.add_argument("--todos", action="store_true", help="todos los clientes del gimnasio")
+    parser.add_argument("--sin-entrenador", action="store_true", help="sólo los que no tienen entrenador")
+    parser.add_argument("--sin-control", type=float, metavar="DIAS", help="sólo los sin controles en DIAS días")
+    parser.add_argument("--sin-plan", type=int, metavar="DIAS",
+                        help="sólo los sin plan o con el último de hace más de DIAS días")
+
+
+def construir_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Operaciones de administración por lotes sobre el gimnasio")
+    parser.add_argument("--db", default=os.environ.get("GESTORGYM_DB"), help="base SQLite")
+    parser.add_argument("--diario", help="directorio del diario")
+    parser.add_argument("--replica", metavar="ORIGEN",
+                        help='réplica de sólo lectura: "host:puerto" o socket de un primario, o su diario')
+    parser.add_argument("--espera", type=float, default=30.0, help="segundos para sincronizar la réplica")
+    parser.add_argument("--bloque", type=int, default=BLOQUE, help="cambios por transacción")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("registrar", help="alta de clientes o entrenadores desde CSV/JSONL")
+    p.add_argument("tipo", choices=("clientes", "entrenadores"))
+    p.add_argument("archivos", nargs="*", help="por defecto, la entrada estándar")
+    p.add_argument("--formato", choices=("csv", "jsonl"))
+    p.set_defaults(funcion=cmd_registrar)
+
+    p = sub.add_parser("progreso", help="controles de progreso desde CSV/JSONL")
+    p.add_argument("archivos", nargs="*", help="por defecto, la entrada estándar")
+    p.add_argument("--formato", choices=("csv", "jsonl"))
+    p.set_defaults(funcion=cmd_progreso)
+
+    p = sub.add_parser("importar", help="importación de archivos (ver importador.py)")
+    p.add_argument("tipo", choices=importador.TIPOS)
+    p.add_argument("archivos", nargs="+")
+    p.add_argument("--formato", choices=("csv", "jsonl"))
+    p.set_defaults(funcion=cmd_importar)
+
+    p = sub.add_parser("vincular", help="asigna clientes a un entrenador")
+    p.add_argument("entrenador", help="id o username")
+    argumentos_seleccion(p)
+    p.set_defaults(funcion=cmd_vincular)
+
+    p = sub.add_parser("plan-auto", help="plan de alimentación automático para los clientes elegidos")
+    argumentos_seleccion(p)
+    p.set_defaults(funcion=cmd_automaticos, planes=True, rutinas=False)
+
+    p = sub.add_parser("rutina-auto", help="rutina automática para los clientes elegidos")
+    argumentos_seleccion(p)
+    p.set_defaults(funcion=cmd_automaticos, planes=False, rutinas=True)
+
+    p = sub.add_parser("reporte", help="evolución de los clientes")
+    p.add_argument("--formato", choices=("tabla", "csv", "jsonl", "ids"), default="tabla")
+    p.add_argument("--sin-control", type=float, metavar="DIAS", help="sólo los sin controles en DIAS días")
+    p.add_argument("--hoy", help="fecha de referencia (AAAA-MM-DD)")
+    p.add_argument("--controles-por-semana", type=float, default=1.0)
+    p.set_defaults(funcion=cmd_reporte)
+
+    p = sub.add_parser("exportar", help="rutinas, planes y progresos a CSV/JSONL/texto/HTML")
+    p.add_argument("archivo", help="destino; el formato sale de la extensión si no se indica")
+    p.add_argument("--formato", choices=exportacion.FORMATOS)
+    p.add_argument("--tipos", nargs="+", choices=exportacion.TIPOS, default=list(exportacion.TIPOS))
+    alcance = p.add_mutually_exclusive_group()
+    alcance.add_argument("--cliente", help="id o username de un cliente")
+    alcance.add_argument("--entrenador", help="id o username de un entrenador: exporta todos sus clientes")
+    p.set_defaults(funcion=cmd_exportar)
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = construir_parser()
+    args = parser.parse_args(argv)
+    repo = abrir(args, parser)
+    try:
+        return args.funcion(repo, args)
+    except (ValueError, PermissionError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    except BrokenPipeError:
+        # la salida se cerró antes de tiempo (`| head`): el resto se descarta sin otro error al salir
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        if hasattr(repo, "cerrar"):
+            repo.cerrar()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
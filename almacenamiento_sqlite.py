@@ -0,0 +1,574 @@
+import json
+import sqlite3
+import threading
+import weakref
+from collections.abc import Mapping
+from contextlib import contextmanager
+from dataclasses import fields
+from typing import List, Optional
+
+from nucleo import (Repositorio, COLECCIONES, DictCongelado, a_epoch, en_lectura, Usuario, Entrenador, Cliente,
+                  RutinaEjercicio, PlanAlimentacion, ProgresoFisico, ResumenCliente)
+
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    id TEXT PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL,
+    tipo TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entrenadores (
+    id TEXT PRIMARY KEY REFERENCES usuarios(id),
+    nombre TEXT NOT NULL DEFAULT '',
+    nivel_experiencia TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS clientes (
+    id TEXT PRIMARY KEY REFERENCES usuarios(id),
+    nombre TEXT NOT NULL DEFAULT '',
+    objetivos TEXT NOT NULL DEFAULT '',
+    estado_fisico_inicial TEXT NOT NULL DEFAULT '',
+    entrenador_id TEXT REFERENCES entrenadores(id)
+);
+CREATE INDEX IF NOT EXISTS ix_clientes_entrenador ON clientes(entrenador_id);
+CREATE INDEX IF NOT EXISTS ix_clientes_nombre ON clientes(nombre COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS rutinas (
+    id TEXT PRIMARY KEY,
+    cliente_id TEXT NOT NULL REFERENCES clientes(id),
+    entrenador_id TEXT NOT NULL DEFAULT '',
+    ejercicios_semana TEXT NOT NULL,
+    fecha_creacion TEXT NOT NULL,
+    intensidad TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_rutinas_cliente ON rutinas(cliente_id, fecha_creacion);
+CREATE TABLE IF NOT EXISTS planes (
+    id TEXT PRIMARY KEY,
+    cliente_id TEXT NOT NULL REFERENCES clientes(id),
+    comidas_por_dia INTEGER NOT NULL,
+    calorias_diarias INTEGER NOT NULL,
+    detalle_comidas TEXT NOT NULL,
+    fecha_creacion TEXT NOT NULL,
+    observaciones TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS ix_planes_cliente ON planes(cliente_id, fecha_creacion);
+CREATE TABLE IF NOT EXISTS progresos (
+    id TEXT PRIMARY KEY,
+    cliente_id TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    peso REAL NOT NULL,
+    medidas TEXT NOT NULL,
+    repeticiones TEXT NOT NULL,
+    observaciones TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS ix_progresos_cliente ON progresos(cliente_id, fecha);
+CREATE INDEX IF NOT EXISTS ix_progresos_fecha ON progresos(fecha);
+CREATE INDEX IF NOT EXISTS ix_progresos_peso ON progresos(peso);
+"""
+
+# altas y modificaciones usan el mismo evento: los usuarios se guardan con upsert
+SQL_INSERT_USUARIO = ("INSERT INTO usuarios (id, username, password, tipo) VALUES (?, ?, ?, ?) "
+                      "ON CONFLICT(id) DO UPDATE SET username = excluded.username, password = excluded.password")
+SQL_INSERT_ENTRENADOR = ("INSERT INTO entrenadores (id, nombre, nivel_experiencia) VALUES (?, ?, ?) "
+                         "ON CONFLICT(id) DO UPDATE SET nombre = excluded.nombre, "
+                         "nivel_experiencia = excluded.nivel_experiencia")
+SQL_INSERT_CLIENTE = ("INSERT INTO clientes (id, nombre, objetivos, estado_fisico_inicial, entrenador_id) VALUES (?, ?, ?, ?, ?) "
+                      "ON CONFLICT(id) DO UPDATE SET nombre = excluded.nombre, objetivos = excluded.objetivos, "
+                      "estado_fisico_inicial = excluded.estado_fisico_inicial, entrenador_id = excluded.entrenador_id")
+SQL_INSERT_RUTINA = "INSERT INTO rutinas (id, cliente_id, entrenador_id, ejercicios_semana, fecha_creacion, intensidad) VALUES (?, ?, ?, ?, ?, ?)"
+SQL_INSERT_PLAN = "INSERT INTO planes (id, cliente_id, comidas_por_dia, calorias_diarias, detalle_comidas, fecha_creacion, observaciones) VALUES (?, ?, ?, ?, ?, ?, ?)"
+SQL_INSERT_PROGRESO = "INSERT INTO progresos (id, cliente_id, fecha, peso, medidas, repeticiones, observaciones) VALUES (?, ?, ?, ?, ?, ?, ?)"
+SQL_VINCULAR = "UPDATE clientes SET entrenador_id = ? WHERE id = ?"
+SQL_BAJA_CLIENTE = [
+    "DELETE FROM progresos WHERE cliente_id = ?",
+    "DELETE FROM rutinas WHERE cliente_id = ?",
+    "DELETE FROM planes WHERE cliente_id = ?",
+    "DELETE FROM clientes WHERE id = ?",
+    "DELETE FROM usuarios WHERE id = ?",
+]
+SQL_BAJA_ENTRENADOR = [
+    "UPDATE clientes SET entrenador_id = NULL WHERE entrenador_id = ?",
+    "DELETE FROM entrenadores WHERE id = ?",
+    "DELETE FROM usuarios WHERE id = ?",
+]
+
+SQL_ENTRENADOR = ("SELECT u.id, u.username, u.password, e.nombre, e.nivel_experiencia "
+                  "FROM entrenadores e JOIN usuarios u ON u.id = e.id")
+SQL_CLIENTE = ("SELECT u.id, u.username, u.password, c.nombre, c.objetivos, c.estado_fisico_inicial, c.entrenador_id "
+               "FROM clientes c JOIN usuarios u ON u.id = c.id")
+SQL_RUTINA = "SELECT id, cliente_id, entrenador_id, ejercicios_semana, fecha_creacion, intensidad FROM rutinas"
+SQL_PLAN = "SELECT id, cliente_id, comidas_por_dia, calorias_diarias, detalle_comidas, fecha_creacion, observaciones FROM planes"
+SQL_PROGRESO = "SELECT id, cliente_id, fecha, peso, medidas, repeticiones, observaciones FROM progresos"
+
+# (tipo, columna) -> (consulta base, expresión ORDER BY); cada orden tiene su índice en ESQUEMA
+ORDEN_SQL = {
+    ("cliente", "nombre"): (SQL_CLIENTE, "c.nombre COLLATE NOCASE"),
+    ("cliente", "objetivos"): (SQL_CLIENTE, "c.objetivos"),
+    ("cliente", "estado"): (SQL_CLIENTE, "c.estado_fisico_inicial"),
+    ("progreso", "fecha"): (SQL_PROGRESO, "fecha"),
+    ("progreso", "peso"): (SQL_PROGRESO, "peso"),
+    ("progreso", "cliente"): ("SELECT p.id, p.cliente_id, p.fecha, p.peso, p.medidas, p.repeticiones, p.observaciones "
+                              "FROM clientes c CROSS JOIN progresos p ON p.cliente_id = c.id", "c.nombre COLLATE NOCASE"),
+}
+
+# Agregados por cliente para el reporte; MIN/MAX devuelven el resto de columnas de esa misma fila
+SQL_AGREGADOS = [
+    "SELECT cliente_id, COUNT(*), MIN(fecha), MAX(fecha) FROM progresos GROUP BY cliente_id",
+    "SELECT cliente_id, COUNT(*), MIN(fecha), peso FROM progresos WHERE peso > 0 GROUP BY cliente_id",
+    "SELECT cliente_id, MAX(fecha), peso FROM progresos WHERE peso > 0 GROUP BY cliente_id",
+    "SELECT cliente_id, COUNT(*), MIN(fecha), json_extract(medidas, '$.cintura') FROM progresos "
+    "WHERE json_extract(medidas, '$.cintura') IS NOT NULL GROUP BY cliente_id",
+    "SELECT cliente_id, MAX(fecha), json_extract(medidas, '$.cintura') FROM progresos "
+    "WHERE json_extract(medidas, '$.cintura') IS NOT NULL GROUP BY cliente_id",
+]
+
+# Lo mismo para un solo cliente, al calcular su ResumenCliente
+SQL_RESUMEN = [
+    "SELECT COUNT(*), MIN(fecha), MAX(fecha) FROM progresos WHERE cliente_id = ?",
+    "SELECT COUNT(*), MIN(fecha), peso FROM progresos WHERE cliente_id = ? AND peso > 0",
+    "SELECT MAX(fecha), peso FROM progresos WHERE cliente_id = ? AND peso > 0",
+    "SELECT COUNT(*), MIN(fecha_creacion) FROM rutinas WHERE cliente_id = ?",
+    "SELECT COUNT(*), MIN(fecha_creacion) FROM planes WHERE cliente_id = ?",
+]
+
+TAMANO_LOTE_PROGRESO = 5000
+TAMANO_GRUPO = 500  # entidades leídas juntas cuyas listas de ids se consultan de una vez (y parámetros de un IN)
+
+
+class TablaSQL(Mapping):
+    # Vista de sólo lectura con la misma interfaz que los dicts de Repositorio;
+    # cada acceso es una consulta por clave primaria en lugar de una carga completa.
+    def __init__(self, repo: "RepositorioSQLite", tabla: str, select: str, alias: str, fabrica):
+        self.repo = repo
+        self.tabla = tabla
+        self.select = select
+        self.alias = alias
+        self.fabrica = fabrica
+
+    def get(self, key, default=None):
+        self.repo._flush()
+        fila = self.repo.con.execute(f"{self.select} WHERE {self.alias}id = ?", (key,)).fetchone()
+        return self.fabrica(fila) if fila else default
+
+    def __getitem__(self, key):
+        obj = self.get(key)
+        if obj is None:
+            raise KeyError(key)
+        return obj
+
+    def __contains__(self, key):
+        self.repo._flush()
+        return self.repo.con.execute(f"SELECT 1 FROM {self.tabla} WHERE id = ?", (key,)).fetchone() is not None
+
+    def __len__(self):
+        self.repo._flush()
+        return self.repo.con.execute(f"SELECT COUNT(*) FROM {self.tabla}").fetchone()[0]
+
+    def __bool__(self):
+        self.repo._flush()
+        return self.repo.con.execute(f"SELECT 1 FROM {self.tabla} LIMIT 1").fetchone() is not None
+
+    def __iter__(self):
+        self.repo._flush()
+        for (id_,) in self.repo.con.execute(f"SELECT id FROM {self.tabla} ORDER BY rowid"):
+            yield id_
+
+    def values(self):
+        self.repo._flush()
+        cursor = self.repo.con.execute(f"{self.select} ORDER BY {self.alias}rowid")
+        while True:
+            grupo = [self.fabrica(f) for f in cursor.fetchmany(TAMANO_GRUPO)]
+            if not grupo:
+                return
+            yield from self.repo._agrupar(grupo)
+
+    def items(self):
+        for obj in self.values():
+            yield obj.id, obj
+
+
+class UsuariosSQL(Mapping):
+    def __init__(self, repo: "RepositorioSQLite"):
+        self.repo = repo
+
+    def get(self, key, default=None):
+        return self.repo.entrenadores.get(key) or self.repo.clientes.get(key) or default
+
+    def __getitem__(self, key):
+        obj = self.get(key)
+        if obj is None:
+            raise KeyError(key)
+        return obj
+
+    def __contains__(self, key):
+        return self.repo.con.execute("SELECT 1 FROM usuarios WHERE id = ?", (key,)).fetchone() is not None
+
+    def __len__(self):
+        return self.repo.con.execute("SELECT COUNT(*) FROM usuarios").fetchone()[0]
+
+    def __iter__(self):
+        for (id_,) in self.repo.con.execute("SELECT id FROM usuarios ORDER BY rowid"):
+            yield id_
+
+    def values(self):
+        yield from self.repo.entrenadores.values()
+        yield from self.repo.clientes.values()
+
+
+class _Ids:
+    # Lista de ids relacionados (rutinas, planes, progresos o clientes) que se consulta la primera vez que
+    # se usa y no al leer la fila, y entonces para todo el grupo con que se leyó (una página, un tramo de
+    # values()) en una sola consulta: recorrer clientes o paginarlos no hace una consulta más por fila.
+    # None significa "sin consultar todavía"
+    def __init__(self, tabla: str, columna: str):
+        self.sql = f"SELECT {columna}, id FROM {tabla} WHERE {columna} IN ({{}}) ORDER BY rowid"
+
+    def __set_name__(self, clase, nombre: str):
+        self.privado = "_" + nombre
+
+    def __get__(self, usr, clase=None):
+        if usr is None:
+            return self
+        ids = getattr(usr, self.privado)
+        if ids is None:
+            usr._repo._cargar_ids(self, usr._grupo or [usr])
+            ids = getattr(usr, self.privado)
+        return ids
+
+    def __set__(self, usr, ids: Optional[List[str]]):
+        setattr(usr, self.privado, ids)
+
+
+class _EntidadSQL:
+    # Se copia, viaja a otro proceso (p.ej. desde una sucursal) y se compara como la entidad común,
+    # con las listas ya consultadas
+    __slots__ = ()
+    _comun: type
+
+    def _datos(self) -> tuple:
+        return tuple(getattr(self, f.name) for f in fields(self))
+
+    def __reduce__(self):
+        return self._comun, self._datos()
+
+    def __eq__(self, otro):
+        if not isinstance(otro, self._comun):
+            return NotImplemented
+        return self._datos() == tuple(getattr(otro, f.name) for f in fields(otro))
+
+    __hash__ = None
+
+
+class ClienteSQL(_EntidadSQL, Cliente):
+    __slots__ = ("_repo", "_grupo", "_rutinas_ids", "_planes_ids", "_progreso_historial")
+    _comun = Cliente
+    rutinas_ids = _Ids("rutinas", "cliente_id")
+    planes_ids = _Ids("planes", "cliente_id")
+    progreso_historial = _Ids("progresos", "cliente_id")
+
+
+class EntrenadorSQL(_EntidadSQL, Entrenador):
+    __slots__ = ("_repo", "_grupo", "_clientes_ids")
+    _comun = Entrenador
+    clientes_ids = _Ids("clientes", "entrenador_id")
+
+
+class RepositorioSQLite(Repositorio):
+    def __init__(self, ruta: str = "gestorgym.db", tamano_lote: int = TAMANO_LOTE_PROGRESO):
+        super().__init__()
+        self.ruta = ruta
+        self.tamano_lote = tamano_lote
+        self.con = sqlite3.connect(ruta, isolation_level=None, check_same_thread=False, cached_statements=256)
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.execute("PRAGMA synchronous=NORMAL")
+        self.con.execute("PRAGMA foreign_keys=ON")
+        self.con.executescript(ESQUEMA)
+        self._profundidad_lote = 0
+        self._progresos_pendientes: List[tuple] = []
+        # las lecturas también vacían el buffer de progresos, y pueden venir de otro hilo
+        self._cerrojo_pendientes = threading.RLock()
+        self._json_plantillas: "weakref.WeakKeyDictionary[DictCongelado, str]" = weakref.WeakKeyDictionary()
+
+        self.entrenadores = TablaSQL(self, "entrenadores", SQL_ENTRENADOR, "e.", self._entrenador_desde_fila)
+        self.clientes = TablaSQL(self, "clientes", SQL_CLIENTE, "c.", self._cliente_desde_fila)
+        self.rutinas = TablaSQL(self, "rutinas", SQL_RUTINA, "", self._rutina_desde_fila)
+        self.planes = TablaSQL(self, "planes", SQL_PLAN, "", self._plan_desde_fila)
+        self.progresos = TablaSQL(self, "progresos", SQL_PROGRESO, "", self._progreso_desde_fila)
+        self.usuarios = UsuariosSQL(self)
+
+    def cerrar(self):
+        self._flush()
+        self.con.close()
+
+
+    def _agrupar(self, entidades: list) -> list:
+        if entidades and isinstance(entidades[0], _EntidadSQL):
+            for e in entidades:
+                e._grupo = entidades
+        return entidades
+
+    @en_lectura
+    def _cargar_ids(self, lista: _Ids, entidades: list):
+        self._flush()
+        pendientes = [e for e in entidades if getattr(e, lista.privado) is None]
+        for i in range(0, len(pendientes), TAMANO_GRUPO):
+            tramo = {e.id: [] for e in pendientes[i:i + TAMANO_GRUPO]}
+            for dueno, id_ in self.con.execute(lista.sql.format(",".join("?" * len(tramo))), list(tramo)):
+                tramo[dueno].append(id_)
+            for e in pendientes[i:i + TAMANO_GRUPO]:
+                setattr(e, lista.privado, tramo[e.id])
+
+    def _entrenador_desde_fila(self, fila) -> Entrenador:
+        id_, username, password, nombre, nivel = fila
+        ent = EntrenadorSQL(id=id_, username=username, password=password, nombre=nombre, nivel_experiencia=nivel,
+                            clientes_ids=None)
+        ent._repo, ent._grupo = self, None
+        return ent
+
+    def _cliente_desde_fila(self, fila) -> Cliente:
+        id_, username, password, nombre, objetivos, estado, entrenador_id = fila
+        cli = ClienteSQL(id=id_, username=username, password=password, nombre=nombre, objetivos=objetivos,
+                         estado_fisico_inicial=estado, entrenador_id=entrenador_id, rutinas_ids=None, planes_ids=None,
+                         progreso_historial=None)
+        cli._repo, cli._grupo = self, None
+        return cli
+
+    def _rutina_desde_fila(self, fila) -> RutinaEjercicio:
+        id_, cliente_id, entrenador_id, semana, fecha, intensidad = fila
+        return RutinaEjercicio(id=id_, cliente_id=cliente_id, entrenador_id=entrenador_id,
+                               ejercicios_semana=json.loads(semana), fecha_creacion=fecha, intensidad=intensidad)
+
+    def _plan_desde_fila(self, fila) -> PlanAlimentacion:
+        id_, cliente_id, comidas, calorias, detalle, fecha, obs = fila
+        return PlanAlimentacion(id=id_, cliente_id=cliente_id, comidas_por_dia=comidas, calorias_diarias=calorias,
+                                detalle_comidas=json.loads(detalle), fecha_creacion=fecha, observaciones=obs)
+
+    def _progreso_desde_fila(self, fila) -> ProgresoFisico:
+        id_, cliente_id, fecha, peso, medidas, repeticiones, obs = fila
+        return ProgresoFisico(id=id_, cliente_id=cliente_id, fecha=fecha, peso=peso, medidas=json.loads(medidas),
+                              repeticiones=json.loads(repeticiones), observaciones=obs)
+
+
+    @contextmanager
+    def lote(self):
+        # Todas las escrituras dentro del bloque van en una sola transacción. La conexión (y con ella la
+        # transacción) es de todos los hilos: el lote va bajo el cerrojo de escritura para que otro hilo no
+        # escriba dentro de él, ni confirme o deshaga lo ajeno, mientras está abierto
+        with self._cerrojo.escribir():
+            if self._profundidad_lote == 0:
+                self.con.execute("BEGIN")
+            self._profundidad_lote += 1
+            confirmado = False
+            try:
+                yield self
+                if self._profundidad_lote == 1:
+                    self._flush()
+                    self.con.execute("COMMIT")
+                confirmado = True
+            finally:
+                self._profundidad_lote -= 1
+                if self._profundidad_lote == 0:
+                    if not confirmado:
+                        with self._cerrojo_pendientes:
+                            self._progresos_pendientes.clear()
+                        self.con.execute("ROLLBACK")
+                    self._terminar_lote(confirmado)
+
+    @property
+    def en_lote(self) -> bool:
+        return self._profundidad_lote > 0
+
+    def _flush(self):
+        with self._cerrojo_pendientes:
+            if self._progresos_pendientes:
+                self.con.executemany(SQL_INSERT_PROGRESO, self._progresos_pendientes)
+                self._progresos_pendientes.clear()
+
+    def _usuario(self, usr: Usuario, tipo: str):
+        with self.lote():
+            self.con.execute(SQL_INSERT_USUARIO, (usr.id, usr.username, usr.password, tipo))
+            if tipo == "entrenador":
+                self.con.execute(SQL_INSERT_ENTRENADOR, (usr.id, usr.nombre, usr.nivel_experiencia))
+            else:
+                self.con.execute(SQL_INSERT_CLIENTE, (usr.id, usr.nombre, usr.objetivos, usr.estado_fisico_inicial, usr.entrenador_id))
+
+    def _guardar_entrenador(self, ent: Entrenador):
+        self._usuario(ent, "entrenador")
+
+    def _guardar_cliente(self, cli: Cliente):
+        self._usuario(cli, "cliente")
+
+    def _borrar(self, sentencias: List[str], id_: str):
+        self._flush()
+        with self.lote():
+            for sql in sentencias:
+                self.con.execute(sql, (id_,))
+
+    def _borrar_cliente(self, cli: Cliente):
+        self._borrar(SQL_BAJA_CLIENTE, cli.id)
+
+    def _borrar_entrenador(self, ent: Entrenador):
+        self._borrar(SQL_BAJA_ENTRENADOR, ent.id)
+
+    @en_lectura
+    def pagina(self, tipo: str, desde: int, cantidad: int, orden: str, descendente: bool = False) -> list:
+        if (tipo, orden) not in ORDEN_SQL:
+            raise ValueError(f"No se puede ordenar {tipo} por {orden}")
+        self._flush()
+        select, expr = ORDEN_SQL[(tipo, orden)]
+        sentido = "DESC" if descendente else "ASC"
+        tabla = getattr(self, COLECCIONES[tipo])
+        filas = self.con.execute(f"{select} ORDER BY {expr} {sentido} LIMIT ? OFFSET ?", (cantidad, desde))
+        return self._agrupar([tabla.fabrica(f) for f in filas])
+
+    def _indexar(self, evento: str, dato):
+        pass  # los índices son los de SQLite
+
+    def reindexar(self):
+        pass
+
+    def _rango_sql(self, desde: Optional[str], hasta: Optional[str]):
+        condiciones, params = [], []
+        if desde:
+            condiciones.append("fecha >= ?")
+            params.append(desde)
+        if hasta:
+            condiciones.append("fecha <= ?")
+            params.append(hasta + " 23:59:59" if len(hasta) == 10 else hasta)
+        return condiciones, params
+
+    @en_lectura
+    def progresos_de(self, cliente_id: str, desde: Optional[str] = None, hasta: Optional[str] = None) -> List[ProgresoFisico]:
+        self._flush()
+        condiciones, params = self._rango_sql(desde, hasta)
+        where = " AND ".join(["cliente_id = ?"] + condiciones)
+        filas = self.con.execute(f"{SQL_PROGRESO} WHERE {where} ORDER BY fecha", [cliente_id] + params)
+        return [self._progreso_desde_fila(f) for f in filas]
+
+    @en_lectura
+    def ultimo_progreso(self, cliente_id: str) -> Optional[ProgresoFisico]:
+        self._flush()
+        fila = self.con.execute(f"{SQL_PROGRESO} WHERE cliente_id = ? ORDER BY fecha DESC LIMIT 1", (cliente_id,)).fetchone()
+        return self._progreso_desde_fila(fila) if fila else None
+
+    @en_lectura
+    def progresos_entre(self, desde: Optional[str] = None, hasta: Optional[str] = None) -> List[ProgresoFisico]:
+        self._flush()
+        condiciones, params = self._rango_sql(desde, hasta)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        return [self._progreso_desde_fila(f) for f in self.con.execute(f"{SQL_PROGRESO} {where} ORDER BY fecha", params)]
+
+    @en_lectura
+    def rutinas_de(self, cliente_id: str) -> List[RutinaEjercicio]:
+        filas = self.con.execute(f"{SQL_RUTINA} WHERE cliente_id = ? ORDER BY fecha_creacion, rowid", (cliente_id,))
+        return [self._rutina_desde_fila(f) for f in filas]
+
+    @en_lectura
+    def planes_de(self, cliente_id: str) -> List[PlanAlimentacion]:
+        filas = self.con.execute(f"{SQL_PLAN} WHERE cliente_id = ? ORDER BY fecha_creacion, rowid", (cliente_id,))
+        return [self._plan_desde_fila(f) for f in filas]
+
+    def _agregados_progreso(self):
+        self._flush()
+        nan = float("nan")
+        totales, pesos_ini, pesos_fin, cint_ini, cint_fin = (
+            self.con.execute(sql).fetchall() for sql in SQL_AGREGADOS)
+        ids = [f[0] for f in totales]
+        pos = {cid: i for i, cid in enumerate(ids)}
+        k = len(ids)
+        ag = {c: [nan] * k for c in ("t_peso_ini", "peso_ini", "t_peso_fin", "peso_fin", "cintura_ini", "cintura_fin")}
+        ag["n"] = [f[1] for f in totales]
+        ag["primer_ts"] = [a_epoch(f[2]) for f in totales]
+        ag["ultimo_ts"] = [a_epoch(f[3]) for f in totales]
+        ag["n_pesos"], ag["n_cintura"] = [0] * k, [0] * k
+        for cid, n, fecha, peso in pesos_ini:
+            i = pos[cid]
+            ag["n_pesos"][i], ag["t_peso_ini"][i], ag["peso_ini"][i] = n, a_epoch(fecha), peso
+        for cid, fecha, peso in pesos_fin:
+            i = pos[cid]
+            ag["t_peso_fin"][i], ag["peso_fin"][i] = a_epoch(fecha), peso
+        for cid, n, _, valor in cint_ini:
+            ag["n_cintura"][pos[cid]], ag["cintura_ini"][pos[cid]] = n, float(valor)
+        for cid, _, valor in cint_fin:
+            ag["cintura_fin"][pos[cid]] = float(valor)
+        return ids, ag
+
+    def _calcular_resumen(self, cliente_id: str) -> ResumenCliente:
+        self._flush()
+        controles, pesos_ini, pesos_fin, rutinas, planes = (
+            self.con.execute(sql, (cliente_id,)).fetchone() for sql in SQL_RESUMEN)
+        res = ResumenCliente(controles=controles[0], rutinas=rutinas[0], planes=planes[0], pesos=pesos_ini[0])
+        if controles[0]:
+            res.actividad(a_epoch(controles[1]))
+            res.ultimo_control = a_epoch(controles[2])
+        if pesos_ini[0]:
+            res.t_primer_peso, res.primer_peso = a_epoch(pesos_ini[1]), pesos_ini[2]
+            res.t_ultimo_peso, res.ultimo_peso = a_epoch(pesos_fin[0]), pesos_fin[1]
+        for n, fecha in (rutinas, planes):
+            if n:
+                res.actividad(a_epoch(fecha))
+        return res
+
+    def find_by_username(self, username: str) -> Optional[Usuario]:
+        fila = self.con.execute("SELECT id FROM usuarios WHERE username = ?", (username,)).fetchone()
+        return self.usuarios.get(fila[0]) if fila else None
+
+    def authenticate(self, username: str, password: str) -> Optional[Usuario]:
+        fila = self.con.execute("SELECT id, password FROM usuarios WHERE username = ?", (username,)).fetchone()
+        if fila and fila[1] == password:
+            return self.usuarios.get(fila[0])
+        return None
+
+    def _guardar_vinculo(self, cli: Cliente, ent: Entrenador):
+        with self.lote():
+            self.con.execute(SQL_VINCULAR, (ent.id, cli.id))
+        cli.entrenador_id = ent.id
+
+    def _nombres(self, tipo: str):
+        # para la búsqueda por nombre basta id y nombre; no hace falta armar cada entidad
+        return self.con.execute(f"SELECT id, nombre FROM {COLECCIONES[tipo]} ORDER BY rowid").fetchall()
+
+    def _cliente_a_actualizar(self, cliente_id: str) -> Optional[Cliente]:
+        # rutinas_ids/planes_ids se leen de la base al usarlas: no hace falta cargar el cliente
+        return None
+
+    def _entrenador_a_actualizar(self, entrenador_id: str) -> Optional[Entrenador]:
+        # clientes_ids también se lee de la base: para vincular alcanza con el entrenador sin su lista,
+        # que con miles de clientes costaría más que el vínculo mismo
+        fila = self.con.execute(f"{SQL_ENTRENADOR} WHERE e.id = ?", (entrenador_id,)).fetchone()
+        if fila is None:
+            return None
+        id_, username, password, nombre, nivel = fila
+        return Entrenador(id=id_, username=username, password=password, nombre=nombre, nivel_experiencia=nivel)
+
+    def _json(self, valor) -> str:
+        # las plantillas son inmutables: su JSON se calcula una vez y se reutiliza en cada insert
+        texto = self._json_plantillas.get(valor) if isinstance(valor, DictCongelado) else None
+        if texto is None:
+            texto = json.dumps(valor, ensure_ascii=False)
+            if isinstance(valor, DictCongelado):
+                self._json_plantillas[valor] = texto
+        return texto
+
+    def _guardar_rutina(self, rutina: RutinaEjercicio, cli: Optional[Cliente]):
+        with self.lote():
+            self.con.execute(SQL_INSERT_RUTINA, (rutina.id, rutina.cliente_id, rutina.entrenador_id,
+                                                 self._json(rutina.ejercicios_semana),
+                                                 rutina.fecha_creacion, rutina.intensidad))
+        if cli:
+            cli.rutinas_ids.append(rutina.id)
+
+    def _guardar_plan(self, plan: PlanAlimentacion, cli: Optional[Cliente]):
+        with self.lote():
+            self.con.execute(SQL_INSERT_PLAN, (plan.id, plan.cliente_id, plan.comidas_por_dia, plan.calorias_diarias,
+                                               self._json(plan.detalle_comidas),
+                                               plan.fecha_creacion, plan.observaciones))
+        if cli:
+            cli.planes_ids.append(plan.id)
+
+    def _guardar_progreso(self, progreso: ProgresoFisico):
+        with self.lote(), self._cerrojo_pendientes:
+            self._progresos_pendientes.append((progreso.id, progreso.cliente_id, progreso.fecha, progreso.peso,
+                                               json.dumps(progreso.medidas), json.dumps(progreso.repeticiones),
+                                               progreso.observaciones))
+            if len(self._progresos_pendientes) >= self.tamano_lote:
+                self._flush()
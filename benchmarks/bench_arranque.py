@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# los que usan scripts, el servidor y las herramientas: ninguno debe arrastrar tkinter
+SIN_TK = ["nucleo", "metricas", "almacenamiento_sqlite", "diario", "importador", "exportacion", "servidor",
+          "replicacion", "admin", "sucursales", "mani"]
+MODULOS = SIN_TK + ["interfaz"]
+CORRIDAS = 7
+
+
+def importtime(modulo: str, entorno: dict) -> dict:
+    # Un intérprete nuevo con -X importtime; cada línea: "import time: propio | acumulado | nombre",
+    # con el nombre sangrado un espacio más dos por nivel de anidamiento
+    salida = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"], cwd=RAIZ,
+                            env=entorno, capture_output=True, text=True, check=True).stderr
+    total = 0
+    hijos = []
+    nombres = set()
+    for linea in salida.splitlines():
+        if not linea.startswith("import time:") or "|" not in linea:
+            continue
+        _, acumulado, nombre = linea[len("import time:"):].split("|")
+        if not acumulado.strip().isdigit():
+            continue  # la cabecera
+        nombres.add(nombre.strip())
+        if nombre == f" {modulo}":
+            total = int(acumulado)
+        elif nombre.startswith("   ") and not nombre.startswith("     "):
+            hijos.append((int(acumulado), nombre.strip()))
+    return {"us": total, "tkinter": "tkinter" in nombres, "hijos": sorted(hijos, reverse=True)}
+
+
+def medir(modulo: str, corridas: int, entorno: dict) -> dict:
+    muestras = [importtime(modulo, entorno) for _ in range(corridas)]
+    mediana = statistics.median(m["us"] for m in muestras)
+    return {"modulo": modulo, "ms": round(mediana / 1000, 2), "tkinter": muestras[0]["tkinter"],
+            "mas_pesados": [(n, round(us / 1000, 2)) for us, n in muestras[0]["hijos"][:4]]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de importación de cada módulo (python -X importtime)")
+    parser.add_argument("modulos", nargs="*", default=MODULOS)
+    parser.add_argument("--corridas", type=int, default=CORRIDAS, help="se informa la mediana")
+    parser.add_argument("--salida", help="guardar los resultados en JSON")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior")
+    parser.add_argument("--umbral", type=float, default=1.5, help="cambio que cuenta como regresión")
+    args = parser.parse_args()
+
+    entorno = dict(os.environ)
+    # con los .pyc ya escritos, como en una instalación normal: una importación previa los genera
+    entorno.pop("PYTHONDONTWRITEBYTECODE", None)
+    for modulo in args.modulos:
+        importtime(modulo, entorno)
+
+    base = {}
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = {r["modulo"]: r for r in json.load(f)}
+    fallos = []
+    resultados = []
+    print(f"{'módulo':<22} {'ms':>8} {'base':>8} {'tkinter':>8}  más pesados (ms acumulados)")
+    for modulo in args.modulos:
+        r = medir(modulo, args.corridas, entorno)
+        resultados.append(r)
+        anterior = base.get(modulo, {}).get("ms")
+        if r["tkinter"] and modulo in SIN_TK:
+            fallos.append(f"{modulo} importa tkinter")
+        if anterior and r["ms"] > anterior * args.umbral:
+            fallos.append(f"{modulo}: {anterior} -> {r['ms']} ms")
+        pesados = ", ".join(f"{n} {ms}" for n, ms in r["mas_pesados"])
+        print(f"{modulo:<22} {r['ms']:>8.1f} {anterior or '-':>8} {'sí' if r['tkinter'] else 'no':>8}  {pesados}")
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+    for fallo in fallos:
+        print(f"REGRESIÓN: {fallo}", file=sys.stderr)
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo import Repositorio, Cliente
+from almacenamiento_sqlite import RepositorioSQLite
+
+OBJETIVOS = ["Ganar fuerza", "Bajar de peso", "Salud general"]
+
+
+def poblar(repo: Repositorio, n: int) -> Repositorio:
+    with repo.lote():
+        for i in range(n):
+            repo.add_cliente(Cliente(username=f"user{i}", password="1234", objetivos=OBJETIVOS[i % 3]))
+    return repo
+
+
+def uno_por_uno(repo: Repositorio):
+    # Lo que hacía la interfaz: una llamada (y una transacción) por cliente
+    for cid in list(repo.clientes):
+        repo.crear_plan_automatico(cid)
+        repo.crear_rutina_automatica(cid)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"{n} clientes, plan y rutina automáticos para cada uno")
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = [("memoria", lambda _: Repositorio()),
+                    ("sqlite", lambda nombre: RepositorioSQLite(os.path.join(tmp, f"{nombre}.db")))]
+        for backend, crear in backends:
+            casos = [("uno por uno", uno_por_uno),
+                     ("asignar_automaticos", lambda r: r.asignar_automaticos())]
+            for i, (nombre, fn) in enumerate(casos):
+                repo = poblar(crear(f"{backend}{i}"), n)
+                inicio = time.perf_counter()
+                fn(repo)
+                t = time.perf_counter() - inicio
+                print(f"{backend:>8} {nombre:<30} {t:6.2f} s ({2 * n / t:,.0f} entidades/s)")
+                if hasattr(repo, "cerrar"):
+                    repo.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo import Repositorio, Cliente
+
+TAMANOS = [10_000, 50_000, 200_000]
+NOMBRES = ["Ana", "José", "María", "Ángel", "Íñigo", "Lucía", "Pedro", "Sofía", "Martín", "Raúl", "Inés", "Tomás",
+           "Valentina", "Joaquín", "Agustina", "Nicolás", "Camila", "Sebastián", "Julián", "Verónica"]
+APELLIDOS = ["Gómez", "Pérez", "Núñez", "García", "López", "Muñoz", "Díaz", "Álvarez", "Fernández", "Ruiz",
+             "Rodríguez", "Martínez", "Sánchez", "Romero", "Suárez", "Benítez", "Acosta", "Medina", "Herrera", "Ibáñez"]
+CONSULTAS = 300
+LIMITE = 50
+
+
+def poblar(repo: Repositorio, n: int, azar: random.Random):
+    with repo.lote():
+        for i in range(n):
+            nombre = f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)} {azar.choice(APELLIDOS)}"
+            repo.add_cliente(Cliente(username=f"user{i}", password="1234", nombre=nombre))
+
+
+def tecleos(azar: random.Random):
+    # lo que se busca al escribir "mun jo" letra por letra, sin tildes y en minúsculas como escribe la gente
+    objetivo = f"{azar.choice(APELLIDOS)[:azar.randint(2, 6)]} {azar.choice(NOMBRES)[:azar.randint(1, 4)]}"
+    objetivo = objetivo.lower().translate(str.maketrans("áéíóúñ", "aeioun"))
+    return [objetivo[:i] for i in range(1, len(objetivo) + 1)]
+
+
+def main():
+    tamanos = [int(x) for x in sys.argv[1:]] or TAMANOS
+    azar = random.Random(42)
+    print(f"{'clientes':>9} {'lista (ms)':>11} {'índice (ms)':>12} {'p50 (ms)':>9} {'p99 (ms)':>9} "
+          f"{'máx (ms)':>9} {'alta (us)':>10}")
+    for n in tamanos:
+        repo = Repositorio()
+        poblar(repo, n, azar)
+        # antes: cada diálogo armaba la lista completa (y la insertaba entera en el Treeview)
+        inicio = time.perf_counter()
+        [(c.id, c.nombre) for c in repo.clientes.values()]
+        t_lista = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        repo.buscar_nombres("cliente", "", 1)
+        t_indice = time.perf_counter() - inicio
+        tiempos = []
+        for _ in range(CONSULTAS // 5):
+            for texto in tecleos(azar):
+                inicio = time.perf_counter()
+                repo.buscar_nombres("cliente", texto, LIMITE)
+                tiempos.append(time.perf_counter() - inicio)
+        tiempos.sort()
+        p = lambda q: tiempos[min(len(tiempos) - 1, int(q * len(tiempos)))] * 1000
+        inicio = time.perf_counter()
+        altas = 1000
+        for i in range(altas):
+            repo.add_cliente(Cliente(username=f"nuevo{i}", password="1234",
+                                     nombre=f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)}"))
+        t_alta = (time.perf_counter() - inicio) / altas
+        print(f"{n:>9} {t_lista * 1000:>11.1f} {t_indice * 1000:>12.1f} {p(0.5):>9.3f} {p(0.99):>9.3f} "
+              f"{tiempos[-1] * 1000:>9.3f} {t_alta * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
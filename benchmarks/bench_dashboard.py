@@ -0,0 +1,114 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import interfaz
+from nucleo import Repositorio, Cliente, Entrenador, ProgresoFisico
+
+TAMANOS = [10_000, 50_000]
+CONTROLES = 5  # progresos por cliente
+PESTANAS = ("entrenador", "cliente", "rutina", "plan", "progreso")
+# las tablas virtuales sólo piden la primera página, ordenada como al abrir el dashboard
+ORDEN = {"cliente": "nombre", "progreso": "fecha"}
+OBJETIVOS = ["Ganar fuerza", "Bajar de peso", "Salud general"]
+
+
+def poblar(repo: Repositorio, n: int, azar: random.Random) -> Entrenador:
+    with repo.lote():
+        entrenadores = [Entrenador(username=f"ent{i}", password="1234", nombre=f"Entrenador {i}")
+                        for i in range(max(1, n // 100))]
+        for ent in entrenadores:
+            repo.add_entrenador(ent)
+        for i in range(n):
+            cli = Cliente(username=f"user{i}", password="1234", nombre=f"Cliente {i}",
+                          objetivos=azar.choice(OBJETIVOS))
+            repo.add_cliente(cli)
+            repo.vincular_cliente_a_entrenador(cli.id, azar.choice(entrenadores).id)
+            repo.crear_rutina_automatica(cli.id)
+            repo.crear_plan_automatico(cli.id)
+            for k in range(CONTROLES):
+                repo.registrar_progreso(ProgresoFisico(cliente_id=cli.id, peso=round(azar.uniform(55, 110), 1),
+                                                       fecha=f"2024-{k + 1:02d}-10 10:00:00"))
+    return entrenadores[0]
+
+
+def sin_tk(repo: Repositorio) -> dict:
+    # Sin pantalla sólo se mide la parte de datos de cada pestaña: las filas que arma el ejecutor y,
+    # en las tablas virtuales, la primera página (que construye el índice de orden)
+    dash = interfaz.FrameDashboard.__new__(interfaz.FrameDashboard)
+    dash.repo = repo
+    dash.tree_ent = dash.tree_rut = dash.tree_plan = None
+    tiempos = {}
+    for tipo in PESTANAS:
+        inicio = time.perf_counter()
+        dash._calcular_refresco(tipo, None)
+        if tipo in ORDEN:
+            repo.contar(tipo)
+            repo.pagina(tipo, 0, 120, ORDEN[tipo])
+        tiempos[tipo] = time.perf_counter() - inicio
+    # un control nuevo con la pestaña Clientes a la vista
+    version = repo.version
+    repo.registrar_progreso(ProgresoFisico(cliente_id=next(iter(repo.clientes)), peso=80.0))
+    inicio = time.perf_counter()
+    dash._calcular_refresco("cliente", version)
+    tiempos["control"] = time.perf_counter() - inicio
+    return tiempos
+
+
+def con_tk(repo: Repositorio, usuario: Entrenador) -> dict:
+    # Login hasta ver la primera pestaña llena, y luego lo que cuesta abrir cada una de las demás
+    app = interfaz.App(repo)
+    dash = app.frame_dashboard
+    pestanas = dict(zip(PESTANAS, (dash.tab_ent, dash.tab_cli, dash.tab_rut, dash.tab_plan, dash.tab_prog)))
+
+    def esperar(tipo: str):
+        while dash._version_vista[tipo] is None or dash._refresco_en_curso:
+            app.update()
+
+    tiempos = {}
+    inicio = time.perf_counter()
+    app.entrar(usuario)
+    esperar("entrenador")
+    tiempos["entrenador"] = time.perf_counter() - inicio
+    for tipo in PESTANAS[1:]:
+        inicio = time.perf_counter()
+        dash.tabs.select(pestanas[tipo])
+        app.update()
+        esperar(tipo)
+        tiempos[tipo] = time.perf_counter() - inicio
+    dash.tabs.select(pestanas["cliente"])
+    esperar("cliente")
+    repo.registrar_progreso(ProgresoFisico(cliente_id=next(iter(repo.clientes)), peso=80.0))
+    inicio = time.perf_counter()
+    dash._refresh_trees()
+    esperar("cliente")
+    tiempos["control"] = time.perf_counter() - inicio
+    app.cerrar()
+    return tiempos
+
+
+def main():
+    tamanos = [int(x) for x in sys.argv[1:]] or TAMANOS
+    try:
+        interfaz.tk.Tk().destroy()
+        medir, modo = con_tk, "con Tk"
+    except interfaz.tk.TclError:
+        medir, modo = (lambda repo, usuario: sin_tk(repo)), "sin pantalla: sólo datos, sin insertar en los Treeview"
+    print(f"login hasta el dashboard ({modo}); antes se llenaban las cinco pestañas, ahora sólo la visible")
+    print(f"{'clientes':>9} {'antes (ms)':>11} {'ahora (ms)':>11} "
+          + " ".join(f"{t + ' (ms)':>16}" for t in PESTANAS[1:]) + f" {'control (ms)':>13}")
+    azar = random.Random(42)
+    for n in tamanos:
+        repo = Repositorio()
+        usuario = poblar(repo, n, azar)
+        t = medir(repo, usuario)
+        antes = sum(t[tipo] for tipo in PESTANAS)
+        print(f"{n:>9} {antes * 1000:>11.1f} {t['entrenador'] * 1000:>11.1f} "
+              + " ".join(f"{t[tipo] * 1000:>16.1f}" for tipo in PESTANAS[1:]) + f" {t['control'] * 1000:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo import Cliente, ProgresoFisico
+from diario import RepositorioDiario
+
+
+def poblar(repo, clientes: int, progresos: int):
+    ids = []
+    for i in range(clientes):
+        cli = Cliente(username=f"cli{i}", password="1234", nombre=f"Cliente {i}", objetivos="Salud")
+        repo.add_cliente(cli)
+        ids.append(cli.id)
+    for i in range(progresos):
+        repo.registrar_progreso(ProgresoFisico(cliente_id=ids[i % clientes], peso=70 + (i % 30), medidas={"cintura": 80.0 + i % 10}))
+
+
+def main():
+    progresos = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    cola = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    directorio = tempfile.mkdtemp(prefix="gestorgym-diario-")
+    try:
+        repo = RepositorioDiario(directorio, fsync="lote", snapshot_cada=None)
+        inicio = time.perf_counter()
+        poblar(repo, 1000, progresos)
+        t_escritura = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        repo.snapshot()
+        t_snapshot = time.perf_counter() - inicio
+        clientes = list(repo.clientes)
+        for i in range(cola):
+            repo.registrar_progreso(ProgresoFisico(cliente_id=clientes[i % len(clientes)], peso=75.0))
+        repo.cerrar()
+        del repo
+
+        inicio = time.perf_counter()
+        repo = RepositorioDiario(directorio, snapshot_cada=None)
+        t_arranque = time.perf_counter() - inicio
+        assert len(repo.progresos) == progresos + cola
+        repo.cerrar()
+
+        print(f"progresos: {progresos} (+{cola} en la cola del diario)")
+        print(f"escritura con diario: {t_escritura:.2f} s ({progresos / t_escritura:,.0f} registros/s)")
+        print(f"snapshot + compactación: {t_snapshot:.2f} s")
+        print(f"arranque (snapshot + cola): {t_arranque:.2f} s")
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo import Repositorio, Cliente, ProgresoFisico
+from exportacion import FORMATOS, TIPOS, exportar
+
+TAMANOS = [2_000, 20_000]
+CONTROLES = 10  # progresos por cliente
+OBJETIVOS = ["Ganar fuerza", "Bajar de peso", "Salud general"]
+
+
+def poblar(repo: Repositorio, n: int, azar: random.Random):
+    with repo.lote():
+        for i in range(n):
+            cli = Cliente(username=f"user{i}", password="1234", nombre=f"Cliente {i}", objetivos=azar.choice(OBJETIVOS))
+            repo.add_cliente(cli)
+            repo.crear_rutina_automatica(cli.id)
+            repo.crear_plan_automatico(cli.id)
+            for k in range(CONTROLES):
+                repo.registrar_progreso(ProgresoFisico(cliente_id=cli.id, peso=round(azar.uniform(55, 110), 1),
+                                                       medidas={"cintura": round(azar.uniform(70, 110), 1)},
+                                                       fecha=f"2024-{k + 1:02d}-10 10:00:00"))
+
+
+def main():
+    tamanos = [int(x) for x in sys.argv[1:]] or TAMANOS
+    azar = random.Random(42)
+    print("todo el gimnasio; CSV sólo progresos, el resto rutinas + planes + progresos")
+    print(f"{'clientes':>9} {'formato':>7} {'docs':>9} {'seg':>6} {'docs/s':>9} {'MB archivo':>11} {'pico (MB)':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in tamanos:
+            repo = Repositorio()
+            poblar(repo, n, azar)
+            for formato in FORMATOS:
+                ruta = os.path.join(tmp, f"export.{formato}")
+                tipos = ["progresos"] if formato == "csv" else TIPOS
+                res = exportar(repo, ruta, formato, tipos)
+                # la memoria en una segunda pasada: tracemalloc enlentece mucho la primera
+                tracemalloc.start()
+                exportar(repo, ruta, formato, tipos)
+                pico = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"{n:>9} {formato:>7} {res.documentos:>9,} {res.segundos:>6.2f} "
+                      f"{res.documentos / res.segundos:>9,.0f} {os.path.getsize(ruta) / 2**20:>11.1f} "
+                      f"{pico / 2**20:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
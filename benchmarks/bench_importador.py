@@ -0,0 +1,61 @@
+import csv
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo import Cliente
+from almacenamiento_sqlite import RepositorioSQLite
+from importador import Importador
+
+CLIENTES = 10_000
+
+
+def generar_csv(ruta: str, n: int):
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["cliente", "fecha", "peso", "medida_cintura", "observaciones"])
+        for i in range(n):
+            w.writerow([f"user{i % CLIENTES}", f"2024-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:00:00",
+                        60 + i % 40, 70 + i % 25 if i % 3 == 0 else "", ""])
+
+
+def rss_mb() -> float:
+    # memoria residente actual (Linux)
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta_csv = os.path.join(tmp, "progresos.csv")
+        generar_csv(ruta_csv, n)
+        print(f"{n:,} filas, {os.path.getsize(ruta_csv) / 2**20:,.0f} MB de CSV")
+        repo = RepositorioSQLite(os.path.join(tmp, "gym.db"))
+        with repo.lote():
+            for i in range(CLIENTES):
+                repo.add_cliente(Cliente(username=f"user{i}", password="1234", nombre=f"Cliente {i}"))
+        muestras = []
+        paso = max(1, n // 10)
+
+        def avance(res):
+            if res.leidas // paso > len(muestras) - 1:
+                muestras.append((res.leidas, rss_mb()))
+
+        inicio = time.perf_counter()
+        res = Importador(repo, al_progreso=avance).importar("progresos", ruta_csv)
+        t = time.perf_counter() - inicio
+        repo.cerrar()
+    print(f"importadas {res.importadas:,} en {t:.1f} s ({res.filas_por_segundo:,.0f} filas/s), errores {res.con_error}")
+    print("memoria residente durante la importación:")
+    for leidas, mb in muestras:
+        print(f"  {leidas:>10,} filas: {mb:7.1f} MB")
+    print(f"pico: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
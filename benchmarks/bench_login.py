@@ -0,0 +1,41 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo import Repositorio, Cliente
+
+
+TAMANOS = [100, 1_000, 10_000, 100_000, 1_000_000]
+CONSULTAS = 20_000
+
+
+def medir_login(repo: Repositorio, usernames):
+    inicio = time.perf_counter()
+    for u in usernames:
+        repo.authenticate(u, "1234")
+    return (time.perf_counter() - inicio) / len(usernames)
+
+
+def main():
+    tamanos = [int(x) for x in sys.argv[1:]] or TAMANOS
+    repo = Repositorio()
+    creados = 0
+    print(f"{'usuarios':>10} {'login (us)':>12} {'registro dup (us)':>18}")
+    for n in tamanos:
+        while creados < n:
+            repo.add_cliente(Cliente(username=f"user{creados}", password="1234", nombre=f"Cliente {creados}"))
+            creados += 1
+        paso = max(1, n // CONSULTAS)
+        usernames = [f"user{i}" for i in range(0, n, paso)][:CONSULTAS]
+        t_login = medir_login(repo, usernames)
+        inicio = time.perf_counter()
+        for u in usernames:
+            repo.find_by_username(u)
+        t_dup = (time.perf_counter() - inicio) / len(usernames)
+        print(f"{n:>10} {t_login * 1e6:>12.3f} {t_dup * 1e6:>18.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import gc
+import os
+import sys
+import tracemalloc
+from dataclasses import MISSING, field, fields, make_dataclass
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo import Entrenador, Cliente, RutinaEjercicio, PlanAlimentacion, ProgresoFisico
+
+OBJETIVOS = ["Bajar de peso", "Ganar fuerza", "Mantenimiento", "Tonificar"]
+ESTADOS = ["Sedentario", "Activo", "Deportista"]
+NIVELES = ["Junior", "Senior", "Experto"]
+DIAS = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+INTENSIDADES = ["Baja", "Media", "Alta"]
+
+
+def copia(texto: str) -> str:
+    # Cadena igual pero nueva, como las que llegan de un Entry, de json.loads o de la base de datos
+    return texto.encode().decode()
+
+
+def sin_slots(cls):
+    # La misma entidad como @dataclass clásico: __dict__ por instancia y sin internar cadenas
+    campos = []
+    for f in fields(cls):
+        extra = {"default": f.default} if f.default is not MISSING else {"default_factory": f.default_factory}
+        campos.append((f.name, f.type, field(**extra)))
+    return make_dataclass(f"{cls.__name__}Dict", campos)
+
+
+def entrenador(cls, i):
+    return cls(username=f"ent{i}", password="1234", nombre=f"Entrenador {i}", nivel_experiencia=copia(NIVELES[i % 3]))
+
+
+def cliente(cls, i):
+    return cls(username=f"user{i}", password="1234", nombre=f"Cliente {i}", objetivos=copia(OBJETIVOS[i % 4]),
+               estado_fisico_inicial=copia(ESTADOS[i % 3]), entrenador_id=None)
+
+
+def rutina(cls, i):
+    semana = {copia(d): [{copia("ejercicio"): copia("Sentadillas"), copia("series"): 3, copia("reps"): copia("10-12")}]
+              for d in DIAS}
+    return cls(cliente_id=f"cliente-{i % 1000}", entrenador_id="", ejercicios_semana=semana,
+               fecha_creacion=copia("2024-05-01"), intensidad=copia(INTENSIDADES[i % 3]))
+
+
+def plan(cls, i):
+    return cls(cliente_id=f"cliente-{i % 1000}", detalle_comidas={copia("Desayuno"): copia("Avena"),
+                                                                  copia("Almuerzo"): copia("Pollo y arroz"),
+                                                                  copia("Cena"): copia("Ensalada")},
+               fecha_creacion=copia("2024-05-01"), observaciones=copia("Plan automático"))
+
+
+def progreso(cls, i):
+    return cls(cliente_id=f"cliente-{i % 1000}", fecha=f"2024-05-{1 + i % 28:02d} 08:00:00", peso=70.0 + i % 30,
+               medidas={copia("cintura"): 80.0, copia("cadera"): 95.0})
+
+
+def medir(constructor, cls, n: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    objetos = [constructor(cls, i) for i in range(n)]
+    gc.collect()
+    usado = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del objetos
+    return usado / n
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{n} registros por entidad")
+    print(f"{'entidad':<18} {'antes (B)':>10} {'después (B)':>12} {'ahorro':>8}")
+    for cls, constructor in ((Entrenador, entrenador), (Cliente, cliente), (RutinaEjercicio, rutina),
+                             (PlanAlimentacion, plan), (ProgresoFisico, progreso)):
+        antes = medir(constructor, sin_slots(cls), n)
+        despues = medir(constructor, cls, n)
+        print(f"{cls.__name__:<18} {antes:>10,.0f} {despues:>12,.0f} {1 - despues / antes:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
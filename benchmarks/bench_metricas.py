@@ -0,0 +1,70 @@
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metricas
+from nucleo import Repositorio, ProgresoFisico
+from interfaz import FrameDashboard
+from generador import PASSWORD, Escenario, poblar
+
+REPETICIONES = 20_000
+RONDAS = 3  # se queda con la mejor: el ruido sólo suma
+
+
+def por_llamada(funcion, argumentos, rondas: int = RONDAS) -> float:
+    mejor = math.inf
+    for _ in range(rondas):
+        inicio = time.perf_counter()
+        for args in argumentos:
+            funcion(*args)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor / len(argumentos) * 1e6
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else REPETICIONES
+    azar = random.Random(7)
+    repo = Repositorio()
+    gen = poblar(repo, Escenario())
+    dash = FrameDashboard.__new__(FrameDashboard)
+    dash.repo = repo
+    usernames = [(azar.choice(gen.usernames), PASSWORD) for _ in range(n)]
+    clientes = [(azar.choice(gen.clientes),) for _ in range(n)]
+    paginas = [("cliente", azar.randrange(4_000), 50, "nombre") for _ in range(n // 10)]
+
+    casos = [
+        ("authenticate", lambda: repo.authenticate, usernames),
+        ("resumen_cliente", lambda: repo.resumen_cliente, clientes),
+        ("pagina (50 filas)", lambda: repo.pagina, paginas),
+        ("registrar_progreso", lambda: repo.registrar_progreso,
+         lambda: [(ProgresoFisico(cliente_id=c, peso=80.0),) for c, in clientes]),
+        ("_texto_detalles (gui)", lambda: dash._texto_detalles, clientes),
+    ]
+    print(f"µs por llamada, {n} llamadas; 'apagado' es el estado normal de la aplicación")
+    print(f"{'operación':<24} {'apagado':>9} {'activo':>9} {'costo':>8}")
+    for _, funcion, argumentos in casos[:3]:
+        por_llamada(funcion(), argumentos)  # resúmenes e índices de orden ya calculados en ambas pasadas
+    for nombre, funcion, argumentos in casos:
+        # las escrituras, con datos nuevos en cada pasada y una sola ronda
+        rondas = 1 if callable(argumentos) else RONDAS
+        lista = argumentos() if callable(argumentos) else argumentos
+        apagado = por_llamada(funcion(), lista, rondas)
+        metricas.activar(repo)
+        lista = argumentos() if callable(argumentos) else argumentos
+        activo = por_llamada(funcion(), lista, rondas)
+        metricas.desactivar(repo)
+        print(f"{nombre:<24} {apagado:>9.2f} {activo:>9.2f} {activo - apagado:>+8.2f}")
+    # apagado, lo único que queda en el camino es la bandera de los decoradores de la interfaz;
+    # sobre una función vacía para que no lo tape el ruido
+    vacia = lambda: None
+    vacias = [()] * (n * 50)
+    costo = por_llamada(metricas.cronometrar("vacia")(vacia), vacias) - por_llamada(vacia, vacias)
+    print(f"decorador de la interfaz, apagado: {costo:+.3f} µs por llamada")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo import Repositorio, Cliente, descongelar
+
+OBJETIVOS = ["Ganar fuerza", "Bajar de peso", "Salud general"]
+
+
+class RepositorioCopias(Repositorio):
+    # Comportamiento anterior: cada rutina/plan automático recibe su propia copia anidada
+    def crear_rutina_automatica(self, cliente_id, entrenador_id=None):
+        rutina = super().crear_rutina_automatica(cliente_id, entrenador_id)
+        object.__setattr__(rutina, "ejercicios_semana", descongelar(rutina.ejercicios_semana))
+        return rutina
+
+    def crear_plan_automatico(self, cliente_id):
+        plan = super().crear_plan_automatico(cliente_id)
+        object.__setattr__(plan, "detalle_comidas", descongelar(plan.detalle_comidas))
+        return plan
+
+
+def poblar(cls, n: int) -> Repositorio:
+    repo = cls()
+    for i in range(n):
+        repo.add_cliente(Cliente(username=f"user{i}", password="1234", objetivos=OBJETIVOS[i % 3]))
+    return repo
+
+
+def asignar(repo: Repositorio):
+    with repo.lote():
+        for cid in list(repo.clientes):
+            repo.crear_rutina_automatica(cid)
+            repo.crear_plan_automatico(cid)
+
+
+def medir(cls, n: int):
+    # el tiempo y la memoria se miden en pasadas separadas: tracemalloc ralentiza mucho las asignaciones
+    repo = poblar(cls, n)
+    inicio = time.perf_counter()
+    asignar(repo)
+    t = time.perf_counter() - inicio
+    repo = poblar(cls, n)
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    asignar(repo)
+    gc.collect()
+    usado = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return t, usado / n
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"{n} clientes: una rutina y un plan automáticos por cliente")
+    t_copias, b_copias = medir(RepositorioCopias, n)
+    t_plant, b_plant = medir(Repositorio, n)
+    print(f"copias por entidad:     {t_copias:6.2f} s, {b_copias:8,.0f} bytes/cliente")
+    print(f"plantillas compartidas: {t_plant:6.2f} s, {b_plant:8,.0f} bytes/cliente")
+    print(f"tiempo {t_copias / t_plant:.1f}x menos, memoria {b_copias / b_plant:.1f}x menos")
+
+
+if __name__ == "__main__":
+    main()
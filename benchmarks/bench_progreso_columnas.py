@@ -0,0 +1,63 @@
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo import ColumnasProgreso, ProgresoFisico, a_epoch
+
+
+def generar(n: int, clientes: int = 1000):
+    ids_clientes = [f"cliente-{i}" for i in range(clientes)]
+    for i in range(n):
+        yield ProgresoFisico(cliente_id=ids_clientes[i % clientes],
+                             fecha=f"2024-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}:00",
+                             peso=60.0 + i % 40, medidas={"cintura": 70.0 + i % 25})
+
+
+def medir(construir, n: int):
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    almacen = construir(generar(n))
+    gc.collect()
+    usado = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return almacen, usado / n
+
+
+def como_dict(progresos):
+    return {p.id: p for p in progresos}
+
+
+def como_columnas(progresos):
+    col = ColumnasProgreso()
+    for p in progresos:
+        col.agregar(p)
+    return col
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    dic, bytes_dict = medir(como_dict, n)
+    col, bytes_col = medir(como_columnas, n)
+    print(f"registros: {n}")
+    print(f"dict de ProgresoFisico: {bytes_dict:,.0f} bytes/registro")
+    print(f"ColumnasProgreso:       {bytes_col:,.0f} bytes/registro ({bytes_dict / bytes_col:.1f}x menos)")
+
+    desde, hasta = a_epoch("2024-03-01"), a_epoch("2024-05-31 23:59:59")
+    col.por_fecha()  # sin NumPy el escaneo usa el índice por fecha; se crea fuera de la medición
+    inicio = time.perf_counter()
+    filtrados = [p for p in dic.values() if "2024-03-01" <= p.fecha <= "2024-05-31 23:59:59" and p.peso >= 80]
+    t_dict = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    filas = col.escanear(desde, hasta, peso_min=80)
+    t_col = time.perf_counter() - inicio
+    assert len(filas) == len(filtrados)
+    print(f"escaneo por rango (fecha + peso): dict {t_dict * 1000:.1f} ms, columnas {t_col * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
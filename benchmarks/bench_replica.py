@@ -0,0 +1,130 @@
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo import Repositorio, ProgresoFisico
+from diario import RepositorioDiario
+from replicacion import Publicador, RepositorioReplica
+from generador import argumentos_escenario, escenario_de, poblar
+
+EVENTOS = 100_000  # atraso a recuperar
+LATENCIAS = 2_000  # eventos sueltos para la latencia de replicación
+
+
+def controles(gen, n: int, azar: random.Random) -> list:
+    return [ProgresoFisico(cliente_id=azar.choice(gen.clientes), peso=round(azar.uniform(55, 110), 1),
+                           medidas={"cintura": 90.0}) for _ in range(n)]
+
+
+def escribir(repo: Repositorio, progresos: list) -> float:
+    inicio = time.perf_counter()
+    for p in progresos:
+        repo.registrar_progreso(p)
+    return time.perf_counter() - inicio
+
+
+def hasta(replica: RepositorioReplica, seq: int, limite: float = 300.0):
+    fin = time.perf_counter() + limite
+    while replica.seq < seq:
+        if time.perf_counter() > fin:
+            raise TimeoutError(f"la réplica quedó en {replica.seq} de {seq}")
+        time.sleep(0.001)
+
+
+def percentil(valores: list, q: float) -> float:
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(q * len(valores)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Réplicas: estado inicial, recuperación de atraso y latencia")
+    argumentos_escenario(parser)
+    parser.add_argument("--eventos", type=int, default=EVENTOS)
+    parser.add_argument("--latencias", type=int, default=LATENCIAS)
+    args = parser.parse_args()
+    esc = escenario_de(args)
+    azar = random.Random(esc.semilla)
+    directorio = tempfile.mkdtemp(prefix="gestorgym-replica-")
+    try:
+        primario = Repositorio()
+        gen = poblar(primario, esc)
+        entidades = len(primario.clientes) + len(primario.entrenadores) + len(primario.rutinas) \
+            + len(primario.planes) + len(primario.progresos)
+        print(f"{esc}: {entidades:,} entidades")
+        print("primario y réplica en el mismo proceso: comparten el GIL, en procesos separados rinde más")
+
+        # costo del publicador en el camino de escritura: rondas alternadas, para que el crecimiento del
+        # almacén de progresos pese igual en las dos mediciones
+        n = args.eventos // 20
+        sin = con = 0.0
+        publicador = Publicador(primario, os.path.join(directorio, "gym.sock"))
+        for _ in range(5):
+            primario.desuscribir(publicador)
+            sin += escribir(primario, controles(gen, n, azar))
+            primario.suscribir(publicador)
+            con += escribir(primario, controles(gen, n, azar))
+        print(f"registrar_progreso: {sin / n / 5 * 1e6:.1f} µs sin publicador, "
+              f"{con / n / 5 * 1e6:.1f} µs con publicador")
+
+        # réplica nueva: recibe el estado completo
+        inicio = time.perf_counter()
+        replica = RepositorioReplica(publicador.direccion)
+        replica.esperar_al_dia()
+        t = time.perf_counter() - inicio
+        print(f"estado inicial por socket: {t:.2f} s ({entidades / t:,.0f} entidades/s)")
+
+        # atraso: una lectura larga en la réplica frena la aplicación mientras el primario sigue escribiendo
+        progresos = controles(gen, args.eventos, azar)
+        with replica.leyendo():
+            escribir(primario, progresos)
+            time.sleep(0.2)
+            demora = replica.demora
+        inicio = time.perf_counter()
+        hasta(replica, publicador.seq)
+        t = time.perf_counter() - inicio
+        print(f"recuperar {args.eventos:,} eventos por socket: {t:.2f} s ({args.eventos / t:,.0f} eventos/s); "
+              f"demora informada al terminar la lectura: {demora:.2f} s")
+
+        # latencia de un cambio suelto, del primario a la réplica
+        aplicado = threading.Event()
+        replica.suscribir(lambda evento, dato: aplicado.set())
+        latencias = []
+        for p in controles(gen, args.latencias, azar):
+            aplicado.clear()
+            inicio = time.perf_counter()
+            primario.registrar_progreso(p)
+            aplicado.wait(10)
+            latencias.append(time.perf_counter() - inicio)
+        print(f"latencia de replicación: p50 {percentil(latencias, 0.5) * 1e6:,.0f} µs, "
+              f"p99 {percentil(latencias, 0.99) * 1e6:,.0f} µs, demora informada {replica.demora * 1e6:,.0f} µs")
+        replica.cerrar()
+        publicador.cerrar()
+
+        # siguiendo el diario: snapshot + cola de segmentos
+        ruta_diario = os.path.join(directorio, "diario")
+        diario = RepositorioDiario(ruta_diario, snapshot_cada=None)
+        gen = poblar(diario, esc)
+        diario.snapshot()
+        escribir(diario, controles(gen, args.eventos, azar))
+        diario.diario.commit()
+        inicio = time.perf_counter()
+        replica = RepositorioReplica(ruta_diario, intervalo=0.01)
+        replica.esperar_al_dia()
+        t = time.perf_counter() - inicio
+        assert replica.seq == diario.diario.seq
+        print(f"réplica desde el diario (snapshot + {args.eventos:,} eventos): {t:.2f} s")
+        replica.cerrar()
+        diario.cerrar()
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
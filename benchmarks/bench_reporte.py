@@ -0,0 +1,63 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo import Repositorio, Cliente, ProgresoFisico, np
+
+HOY = "2024-12-31"
+
+
+def poblar(clientes: int, por_cliente: int) -> Repositorio:
+    repo = Repositorio()
+    rnd = random.Random(8)
+    for i in range(clientes):
+        cli = Cliente(username=f"user{i}", password="1234", nombre=f"Cliente {i}")
+        repo.clientes[cli.id] = cli
+        peso = rnd.uniform(60, 110)
+        for j in range(por_cliente):
+            medidas = {"cintura": round(peso * 0.9, 1)} if j % 4 == 0 else {}
+            repo.progresos.agregar(ProgresoFisico(cliente_id=cli.id, fecha=f"2024-{1 + j % 12:02d}-{1 + j % 28:02d} 08:00:00",
+                                                  peso=round(peso, 1), medidas=medidas))
+            peso += rnd.uniform(-0.6, 0.4)
+    return repo
+
+
+def reporte_por_cliente(repo: Repositorio):
+    # Forma previa: un recorrido de objetos por cliente
+    filas = []
+    for cli in repo.clientes.values():
+        progresos = repo.progresos_de(cli.id)
+        pesos = [p.peso for p in progresos if p.peso > 0]
+        cintura = [p.medidas["cintura"] for p in progresos if "cintura" in p.medidas]
+        filas.append((len(progresos), pesos[-1] - pesos[0] if len(pesos) > 1 else None,
+                      cintura[-1] - cintura[0] if len(cintura) > 1 else None))
+    return filas
+
+
+def main():
+    clientes = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    por_cliente = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    inicio = time.perf_counter()
+    repo = poblar(clientes, por_cliente)
+    print(f"{clientes} clientes x {por_cliente} controles = {len(repo.progresos)} progresos "
+          f"(carga {time.perf_counter() - inicio:.1f} s, NumPy: {'sí' if np is not None else 'no'})")
+
+    inicio = time.perf_counter()
+    previo = reporte_por_cliente(repo)
+    t_previo = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    reporte = repo.reporte_progreso(hoy=HOY)
+    t_reporte = time.perf_counter() - inicio
+    for (n, delta, cintura), r in zip(previo, reporte):
+        assert n == r.controles and (delta is None) == (r.delta_peso is None)
+        assert delta is None or abs(delta - r.delta_peso) < 0.01
+        assert cintura is None or abs(cintura - r.delta_cintura) < 0.01
+    print(f"reporte por cliente (objetos): {t_previo * 1000:,.0f} ms")
+    print(f"reporte_progreso (columnas):   {t_reporte * 1000:,.0f} ms ({t_previo / t_reporte:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
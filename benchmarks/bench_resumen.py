@@ -0,0 +1,60 @@
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo import Repositorio, Cliente, ProgresoFisico
+
+CONTROLES = [10, 100, 1_000, 10_000]  # historial del cliente
+LECTURAS = 200
+
+
+def recalcular(repo: Repositorio, cliente_id: str):
+    # lo que hacía detalles_cliente en cada apertura
+    progresos = repo.progresos_de(cliente_id)
+    fechas = [datetime.strptime(progresos[0].fecha, "%Y-%m-%d %H:%M:%S").date()] if progresos else []
+    for primero in repo.rutinas_de(cliente_id)[:1] + repo.planes_de(cliente_id)[:1]:
+        fechas.append(datetime.fromisoformat(primero.fecha_creacion).date())
+    pesos = [p for p in progresos if p.peso]
+    return min(fechas, default=None), len(pesos), pesos[-1].peso - pesos[0].peso if len(pesos) >= 2 else None
+
+
+def medir(funcion, *args) -> float:
+    inicio = time.perf_counter()
+    for _ in range(LECTURAS):
+        funcion(*args)
+    return (time.perf_counter() - inicio) / LECTURAS
+
+
+def main():
+    azar = random.Random(42)
+    print(f"{'controles':>10} {'recalcular (us)':>16} {'resumen (us)':>13} {'alta sin resumen (us)':>22} "
+          f"{'alta con resumen (us)':>22}")
+    for n in CONTROLES:
+        repo = Repositorio()
+        cli = Cliente(username="c", password="1234", nombre="Cliente")
+        repo.add_cliente(cli)
+        repo.crear_rutina_automatica(cli.id)
+        repo.crear_plan_automatico(cli.id)
+        nuevos = lambda: [ProgresoFisico(cliente_id=cli.id, peso=round(azar.uniform(60, 90), 1),
+                                         fecha=f"20{azar.randint(10, 24)}-{azar.randint(1, 12):02d}-10 10:00:00")
+                          for _ in range(n)]
+        inicio = time.perf_counter()
+        for p in nuevos():
+            repo.registrar_progreso(p)
+        t_sin = (time.perf_counter() - inicio) / n
+        t_recalcular = medir(recalcular, repo, cli.id)
+        repo.resumen_cliente(cli.id)  # desde aquí aplicar lo mantiene
+        t_resumen = medir(repo.resumen_cliente, cli.id)
+        inicio = time.perf_counter()
+        for p in nuevos():
+            repo.registrar_progreso(p)
+        t_con = (time.perf_counter() - inicio) / n
+        print(f"{n:>10} {t_recalcular * 1e6:>16.1f} {t_resumen * 1e6:>13.2f} {t_sin * 1e6:>22.2f} {t_con * 1e6:>22.2f}")
+
+
+if __name__ == "__main__":
+    main()
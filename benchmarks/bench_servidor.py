@@ -0,0 +1,135 @@
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+CLIENTES = 1_000
+CONCURRENCIAS = [1, 10, 100, 500]
+PIPELINE = [1, 8]
+SEGUNDOS = 3.0
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def peticion(metodo: str, ruta: str, token: str, cuerpo=None) -> bytes:
+    datos = json.dumps(cuerpo).encode() if cuerpo is not None else b""
+    return (f"{metodo} {ruta} HTTP/1.1\r\nHost: bench\r\nAuthorization: Bearer {token}\r\n"
+            f"Content-Length: {len(datos)}\r\n\r\n").encode() + datos
+
+
+async def leer_respuesta(lector: asyncio.StreamReader) -> int:
+    estado = int((await lector.readline()).split()[1])
+    largo = 0
+    while (linea := await lector.readline()) != b"\r\n":
+        if linea[:15].lower() == b"content-length:":
+            largo = int(linea[15:])
+    await lector.readexactly(largo)
+    return estado
+
+
+async def llamar(puerto: int, metodo: str, ruta: str, cuerpo=None, token: str = ""):
+    lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+    escritor.write(peticion(metodo, ruta, token, cuerpo).replace(b"HTTP/1.1\r\n", b"HTTP/1.1\r\nConnection: close\r\n", 1))
+    datos = await lector.read()
+    escritor.close()
+    return json.loads(datos.split(b"\r\n\r\n", 1)[1] or b"null")
+
+
+async def poblar(puerto: int, n: int):
+    token = (await llamar(puerto, "POST", "/login", {"username": "bench", "password": "x"}))["token"]
+    ids = []
+    for i in range(n):
+        cli = await llamar(puerto, "POST", "/clientes", {"username": f"c{i}", "password": "x", "nombre": f"Cliente {i}",
+                                                        "objetivos": "Bajar de peso"})
+        ids.append(cli["id"])
+    return token, ids
+
+
+async def trabajador(puerto: int, token: str, ids, profundidad: int, hasta: float, latencias: list, errores: list):
+    # Conexión keep-alive que manda `profundidad` peticiones seguidas y luego lee sus respuestas:
+    # 70% lectura de un cliente, 20% su historial, 10% registro de un control
+    lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+    azar = random.Random(id(lector))
+    while time.perf_counter() < hasta:
+        tanda = []
+        for _ in range(profundidad):
+            cid = azar.choice(ids)
+            r = azar.random()
+            if r < 0.7:
+                tanda.append(peticion("GET", f"/clientes/{cid}", token))
+            elif r < 0.9:
+                tanda.append(peticion("GET", f"/clientes/{cid}/progresos", token))
+            else:
+                tanda.append(peticion("POST", f"/clientes/{cid}/progresos", token,
+                                      {"peso": round(azar.uniform(60, 100), 1), "medidas": {"cintura": 90}}))
+        inicio = time.perf_counter()
+        escritor.write(b"".join(tanda))
+        for _ in range(profundidad):
+            if await leer_respuesta(lector) >= 400:
+                errores.append(1)
+            latencias.append(time.perf_counter() - inicio)
+    escritor.close()
+
+
+async def carga(puerto: int, token: str, ids, conexiones: int, profundidad: int):
+    latencias, errores = [], []
+    inicio = time.perf_counter()
+    hasta = inicio + SEGUNDOS
+    await asyncio.gather(*(trabajador(puerto, token, ids, profundidad, hasta, latencias, errores)
+                           for _ in range(conexiones)))
+    total = time.perf_counter() - inicio
+    latencias.sort()
+    p = lambda q: latencias[min(len(latencias) - 1, int(q * len(latencias)))] * 1000
+    print(f"{conexiones:>8} {profundidad:>9} {len(latencias) / total:>10,.0f} {p(0.5):>9.2f} {p(0.99):>9.2f} "
+          f"{len(errores):>7}")
+
+
+async def principal(puerto: int):
+    for _ in range(100):
+        try:
+            await llamar(puerto, "GET", "/salud")
+            break
+        except OSError:
+            await asyncio.sleep(0.1)
+    token, ids = await poblar(puerto, CLIENTES)
+    print(f"{CLIENTES} clientes, {SEGUNDOS:.0f} s por caso; generador de carga y servidor comparten la máquina")
+    print(f"{'conexiones':>8} {'pipeline':>9} {'pet/s':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {'errores':>7}")
+    for conexiones in CONCURRENCIAS:
+        for profundidad in PIPELINE:
+            await carga(puerto, token, ids, conexiones, profundidad)
+
+
+def main():
+    from diario import RepositorioDiario
+    from nucleo import Entrenador
+
+    puerto = puerto_libre()
+    with tempfile.TemporaryDirectory() as directorio:
+        # la API no da de alta entrenadores sin sesión: el primero se escribe antes en el diario
+        repo = RepositorioDiario(directorio)
+        repo.add_entrenador(Entrenador(username="bench", password="x"))
+        repo.cerrar()
+        # el servidor corre en su propio proceso, como en producción (un núcleo, un bucle asyncio)
+        proceso = subprocess.Popen([sys.executable, os.path.join(RAIZ, "servidor.py"), "--port", str(puerto),
+                                    "--diario", directorio], stdout=subprocess.DEVNULL)
+        try:
+            asyncio.run(principal(puerto))
+        finally:
+            proceso.terminate()
+            proceso.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo import Repositorio, ProgresoFisico
+from sucursales import RepositorioSucursales
+from generador import argumentos_escenario, entidades, escenario_de, poblar
+
+SUCURSALES = 4
+CORRIDAS = 5
+CONSULTAS = ["gom", "ana", "mar gar", "lu", "rodriguez", "jo pe"]
+LLAMADAS = 2_000  # operaciones sueltas para la latencia del ruteo
+
+
+def mediana(funcion, corridas: int) -> float:
+    tiempos = []
+    for _ in range(corridas):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+
+def latencias(funcion, argumentos) -> list:
+    tiempos = []
+    for args in argumentos:
+        inicio = time.perf_counter()
+        funcion(*args)
+        tiempos.append(time.perf_counter() - inicio)
+    tiempos.sort()
+    return [tiempos[len(tiempos) // 2] * 1e6, tiempos[min(len(tiempos) - 1, int(0.99 * len(tiempos)))] * 1e6]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Un Repositorio contra el repositorio repartido por sucursales")
+    argumentos_escenario(parser)
+    parser.add_argument("--sucursales", type=int, default=SUCURSALES)
+    parser.add_argument("--corridas", type=int, default=CORRIDAS)
+    parser.add_argument("--llamadas", type=int, default=LLAMADAS)
+    args = parser.parse_args()
+    esc = escenario_de(args)
+    nombres = [f"sucursal{i}" for i in range(args.sucursales)]
+    # reparto estable por id, como haría una clave de sucursal
+    sucursal_de = lambda cli: nombres[zlib.crc32(cli.id.encode()) % len(nombres)]
+    print(f"{esc}; {args.sucursales} sucursales, {os.cpu_count()} CPU")
+
+    unico = Repositorio()
+    inicio = time.perf_counter()
+    gen = poblar(unico, esc)
+    t_unico = time.perf_counter() - inicio
+    repartido = RepositorioSucursales(nombres)
+    try:
+        inicio = time.perf_counter()
+        eventos = sum(repartido.cargar(entidades(esc), sucursal_de).values())
+        t_repartido = time.perf_counter() - inicio
+        print(f"carga: {t_unico:.2f} s un repositorio, {t_repartido:.2f} s repartido ({eventos:,} eventos enviados)")
+
+        hoy = "2024-06-01"
+        for nombre, f_unico, f_repartido in (
+                ("reporte_progreso", lambda: unico.reporte_progreso(hoy), lambda: repartido.reporte_progreso(hoy)),
+                ("progresos_entre (un mes)", lambda: unico.progresos_entre("2023-03-01", "2023-03-31"),
+                 lambda: repartido.progresos_entre("2023-03-01", "2023-03-31")),
+                ("buscar_nombres x" + str(len(CONSULTAS)),
+                 lambda: [unico.buscar_nombres("cliente", q) for q in CONSULTAS],
+                 lambda: [repartido.buscar_nombres("cliente", q) for q in CONSULTAS])):
+            a, b = mediana(f_unico, args.corridas), mediana(f_repartido, args.corridas)
+            print(f"{nombre:<26} {a * 1000:8.1f} ms un repositorio {b * 1000:8.1f} ms repartido ({a / b:.2f}x)")
+
+        # una operación de un cliente: un viaje de ida y vuelta al proceso de su sucursal
+        azar = random.Random(esc.semilla)
+        elegidos = [(azar.choice(gen.clientes),) for _ in range(args.llamadas)]
+        controles = [(ProgresoFisico(cliente_id=cid, peso=70.0),) for (cid,) in elegidos]
+        for nombre, f_unico, f_repartido, argumentos in (
+                ("resumen_cliente", unico.resumen_cliente, repartido.resumen_cliente, elegidos),
+                ("registrar_progreso", unico.registrar_progreso, repartido.registrar_progreso, controles)):
+            a, b = latencias(f_unico, argumentos), latencias(f_repartido, argumentos)
+            print(f"{nombre:<26} p50/p99 {a[0]:7.1f}/{a[1]:7.1f} µs un repositorio, "
+                  f"{b[0]:7.1f}/{b[1]:7.1f} µs repartido")
+    finally:
+        repartido.cerrar()
+
+
+if __name__ == "__main__":
+    main()
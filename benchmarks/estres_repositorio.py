@@ -0,0 +1,264 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo import Repositorio, Cliente, Entrenador, ProgresoFisico
+from importador import Importador
+
+OBJETIVOS = ["Ganar fuerza", "Bajar de peso", "Salud general"]
+# errores esperables cuando otro hilo borró o re-vinculó la entidad elegida
+ESPERADOS = (ValueError, KeyError, PermissionError)
+
+
+class Deshacer(Exception):
+    pass
+
+
+class Anotaciones:
+    # Lo que los hilos dieron por hecho o por deshecho, para comprobarlo al final
+    def __init__(self):
+        self.altas: list = []  # clientes cuya alta terminó bien
+        self.bajas: set = set()
+        self.deshechos: list = []  # progresos registrados en una transacción que después falló
+
+
+class SinCerrojo:
+    # Para comparar: el mismo repositorio sin sincronización
+    def leer(self):
+        return nullcontext()
+
+    def escribir(self):
+        return nullcontext()
+
+
+def escritor(repo: Repositorio, n: int, operaciones: int, semilla: int, fallos: list, hechas: list,
+             notas: Anotaciones):
+    azar = random.Random(semilla)
+    for i in range(operaciones):
+        try:
+            clientes = list(repo.clientes)
+            entrenadores = list(repo.entrenadores)
+            cid = azar.choice(clientes) if clientes else None
+            r = azar.random()
+            if r < 0.15 or cid is None:
+                cli = Cliente(username=f"w{n}-{i}", password="x", nombre=f"Cliente {n}-{i}",
+                              objetivos=azar.choice(OBJETIVOS))
+                repo.add_cliente(cli)
+                notas.altas.append(cli.id)
+            elif r < 0.18:
+                repo.add_entrenador(Entrenador(username=f"e{n}-{i}", password="x", nombre=f"Entrenador {n}-{i}"))
+            elif r < 0.35 and entrenadores:
+                repo.vincular_cliente_a_entrenador(cid, azar.choice(entrenadores))
+            elif r < 0.45:
+                repo.crear_plan_automatico(cid)
+            elif r < 0.55:
+                repo.crear_rutina_automatica(cid)
+            elif r < 0.60:
+                cli = repo.clientes.get(cid)
+                if cli and cli.entrenador_id:
+                    repo.crear_rutina_personalizada(cli.entrenador_id, cid, {"Lunes": [{"nombre": "Sentadilla"}]})
+            elif r < 0.85:
+                # comprobar y registrar en la misma transacción: el cliente no puede desaparecer en medio.
+                # Una de cada diez falla después de registrar: en SQLite no tiene que quedar nada
+                deshacer = azar.random() < 0.1
+                try:
+                    with repo.transaccion():
+                        if cid in repo.clientes:
+                            p = ProgresoFisico(cliente_id=cid, peso=azar.uniform(50, 120),
+                                               fecha=f"2024-{azar.randint(1, 12):02d}-10 10:00:00")
+                            repo.registrar_progreso(p)
+                            if deshacer:
+                                notas.deshechos.append(p.id)
+                                raise Deshacer()
+                except Deshacer:
+                    pass
+            elif r < 0.97:
+                repo.actualizar_cliente(cid, nombre=f"Renombrado {n}-{i}")
+            else:
+                notas.bajas.add(cid)
+                repo.eliminar_cliente(cid)
+            hechas.append(1)
+        except ESPERADOS:
+            pass
+        except Exception as e:
+            fallos.append(f"escritor {n}: {type(e).__name__}: {e}")
+
+
+def por_lotes(repo: Repositorio, parar: threading.Event, semilla: int, directorio: str, fallos: list,
+              hechas: list):
+    # asignar_automaticos y el importador escriben en un lote largo mientras los demás siguen escribiendo;
+    # la mitad de las asignaciones se cancela a medio camino (en SQLite se deshace su lote)
+    azar = random.Random(semilla)
+    ruta = os.path.join(directorio, "progresos.jsonl")
+    while not parar.is_set():
+        cancelar = azar.random() < 0.5
+
+        def avance(hechos, total):
+            if cancelar and hechos < total:
+                raise Deshacer()
+        try:
+            if azar.random() < 0.5:
+                repo.asignar_automaticos(tamano_bloque=50, al_progreso=avance)
+            else:
+                clientes = list(repo.clientes)
+                if not clientes:
+                    continue
+                with open(ruta, "w") as f:
+                    for _ in range(200):
+                        f.write(json.dumps({"cliente": azar.choice(clientes), "peso": azar.uniform(50, 120),
+                                            "fecha": f"2024-{azar.randint(1, 12):02d}-20"}) + "\n")
+                Importador(repo, tamano_bloque=50).importar("progresos", ruta)
+            hechas.append(1)
+        except (Deshacer, *ESPERADOS):
+            pass
+        except Exception as e:
+            fallos.append(f"por lotes: {type(e).__name__}: {e}")
+
+
+def lector(repo: Repositorio, parar: threading.Event, semilla: int, fallos: list, lecturas: list):
+    azar = random.Random(semilla)
+    while not parar.is_set():
+        try:
+            with repo.leyendo():
+                entrenadores = list(repo.entrenadores.values())
+                if entrenadores:
+                    ent = azar.choice(entrenadores)
+                    for cid in ent.clientes_ids:
+                        cli = repo.clientes.get(cid)
+                        if cli is None or cli.entrenador_id != ent.id:
+                            fallos.append(f"lector: {cid} figura en {ent.id} pero no está vinculado")
+                clientes = list(repo.clientes)
+                if clientes:
+                    cli = repo.clientes.get(azar.choice(clientes))
+                    if cli and {r.id for r in repo.rutinas_de(cli.id)} != set(cli.rutinas_ids):
+                        fallos.append(f"lector: rutinas de {cli.id} desincronizadas")
+                    if cli:
+                        ps = repo.progresos_de(cli.id)
+                        if any(p.cliente_id != cli.id for p in ps) or [p.fecha for p in ps] != sorted(p.fecha for p in ps):
+                            fallos.append(f"lector: historial de {cli.id} inconsistente")
+            nombres = [c.nombre.lower() for c in repo.pagina("cliente", 0, 20, "nombre")]
+            if nombres != sorted(nombres):
+                fallos.append("lector: página de clientes desordenada")
+            lecturas.append(1)
+            # una pausa mínima entre consultas, como un lector real; en un bucle cerrado los lectores
+            # acaparan el GIL y los escritores casi no avanzan (con o sin cerrojo)
+            time.sleep(0.0001)
+        except ESPERADOS:
+            pass
+        except Exception as e:
+            fallos.append(f"lector: {type(e).__name__}: {e}")
+
+
+def verificar(repo: Repositorio, notas: Anotaciones, deshace: bool) -> list:
+    # Invariantes entre entidades una vez terminados todos los hilos
+    errores = []
+    clientes = {c.id: c for c in repo.clientes.values()}
+    perdidas = [cid for cid in notas.altas if cid not in clientes and cid not in notas.bajas]
+    if perdidas:
+        errores.append(f"{len(perdidas)} altas confirmadas que ya no están, p.ej. {perdidas[0]}")
+    # en memoria lo aplicado no se deshace; en SQLite una transacción fallida no deja nada
+    quedaron = [pid for pid in notas.deshechos if pid in repo.progresos] if deshace else []
+    if quedaron:
+        errores.append(f"{len(quedaron)} progresos de transacciones deshechas siguen guardados")
+    entrenadores = {e.id: e for e in repo.entrenadores.values()}
+    for ent in entrenadores.values():
+        if len(ent.clientes_ids) != len(set(ent.clientes_ids)):
+            errores.append(f"{ent.id}: clientes_ids con duplicados")
+        for cid in ent.clientes_ids:
+            if cid not in clientes or clientes[cid].entrenador_id != ent.id:
+                errores.append(f"{ent.id}: {cid} en clientes_ids sin estar vinculado")
+    for cli in clientes.values():
+        if cli.entrenador_id and cli.id not in entrenadores.get(cli.entrenador_id, Entrenador("", "")).clientes_ids:
+            errores.append(f"{cli.id}: vinculado a {cli.entrenador_id} pero no figura en su lista")
+        if set(cli.rutinas_ids) != {r.id for r in repo.rutinas_de(cli.id)}:
+            errores.append(f"{cli.id}: rutinas_ids no coincide con sus rutinas")
+        if set(cli.planes_ids) != {p.id for p in repo.planes_de(cli.id)}:
+            errores.append(f"{cli.id}: planes_ids no coincide con sus planes")
+        if repo.find_by_username(cli.username) is None or repo.find_by_username(cli.username).id != cli.id:
+            errores.append(f"{cli.id}: username {cli.username!r} mal indexado")
+    for coleccion in (repo.rutinas, repo.planes):
+        for obj in coleccion.values():
+            if obj.cliente_id not in clientes:
+                errores.append(f"{obj.id}: de un cliente que no existe")
+    huerfanos = sum(1 for p in repo.progresos.values() if p.cliente_id not in clientes)
+    if huerfanos:
+        errores.append(f"{huerfanos} progresos de clientes que no existen")
+    por_cliente = sum(len(repo.progresos_de(cid)) for cid in clientes)
+    if por_cliente != len(repo.progresos):
+        errores.append(f"historiales suman {por_cliente} pero hay {len(repo.progresos)} progresos")
+    nombres = [c.nombre.lower() for c in repo.pagina("cliente", 0, len(clientes), "nombre")]
+    if len(nombres) != len(clientes) or nombres != sorted(nombres):
+        errores.append("índice por nombre desordenado o incompleto")
+    return errores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lectores y escritores concurrentes sobre un Repositorio")
+    parser.add_argument("--escritores", type=int, default=8)
+    parser.add_argument("--lectores", type=int, default=8)
+    parser.add_argument("--operaciones", type=int, default=2000, help="por escritor")
+    parser.add_argument("--sqlite", action="store_true", help="usar RepositorioSQLite en un archivo temporal")
+    parser.add_argument("--sin-cerrojo", action="store_true", help="desactivar la sincronización para comparar; el estado puede quedar tan roto que no termine")
+    args = parser.parse_args()
+
+    # cambios de hilo muy frecuentes: aumenta la probabilidad de que las carreras se manifiesten
+    sys.setswitchinterval(1e-3)
+    tmp = tempfile.TemporaryDirectory()
+    if args.sqlite:
+        from almacenamiento_sqlite import RepositorioSQLite
+        repo = RepositorioSQLite(os.path.join(tmp.name, "estres.db"))
+    else:
+        repo = Repositorio()
+    if args.sin_cerrojo:
+        repo._cerrojo = SinCerrojo()
+    for i in range(4):
+        repo.add_entrenador(Entrenador(username=f"base{i}", password="x", nombre=f"Base {i}"))
+    repo.pagina("cliente", 0, 1, "nombre")  # el índice por nombre se mantiene con cada alta
+
+    fallos, hechas, lecturas = [], [], []
+    notas = Anotaciones()
+    parar = threading.Event()
+    # los lectores y el hilo de los lotes corren hasta que terminan los escritores
+    fondo = [threading.Thread(target=lector, args=(repo, parar, 1000 + i, fallos, lecturas))
+             for i in range(args.lectores)]
+    fondo.append(threading.Thread(target=por_lotes, args=(repo, parar, 2000, tmp.name, fallos, hechas)))
+    escritores = [threading.Thread(target=escritor, args=(repo, i, args.operaciones, i, fallos, hechas, notas))
+                  for i in range(args.escritores)]
+    inicio = time.perf_counter()
+    for h in fondo + escritores:
+        h.start()
+    for h in escritores:
+        h.join()
+    parar.set()
+    for h in fondo:
+        h.join()
+    segundos = time.perf_counter() - inicio
+
+    try:
+        errores = verificar(repo, notas, args.sqlite)
+    except Exception as e:  # sin cerrojo las estructuras pueden quedar tan rotas que ni se pueden recorrer
+        errores = [f"verificación abortada: {type(e).__name__}: {e}"]
+    print(f"{args.escritores} escritores, {args.lectores} lectores, {'SQLite' if args.sqlite else 'memoria'}"
+          f"{', sin cerrojo' if args.sin_cerrojo else ''}")
+    print(f"{len(hechas):,} escrituras y {len(lecturas):,} lecturas en {segundos:.1f} s")
+    print(f"{len(repo.clientes):,} clientes, {len(repo.rutinas):,} rutinas, {len(repo.planes):,} planes, "
+          f"{len(repo.progresos):,} progresos")
+    for mensaje in (fallos + errores)[:20]:
+        print("  ", mensaje)
+    print(f"{len(fallos)} fallos durante la carga, {len(errores)} invariantes rotos")
+    if hasattr(repo, "cerrar"):
+        repo.cerrar()
+    tmp.cleanup()
+    return 1 if fallos or errores else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
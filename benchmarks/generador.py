@@ -0,0 +1,171 @@
+import argparse
+import json
+import os
+import random
+import sys
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo import Repositorio, Cliente, Entrenador, ProgresoFisico, plan_automatico, rutina_automatica
+
+NOMBRES = ["Ana", "José", "María", "Ángel", "Íñigo", "Lucía", "Pedro", "Sofía", "Martín", "Raúl", "Inés", "Tomás",
+           "Valentina", "Joaquín", "Agustina", "Nicolás", "Camila", "Sebastián", "Julián", "Verónica"]
+APELLIDOS = ["Gómez", "Pérez", "Núñez", "García", "López", "Muñoz", "Díaz", "Álvarez", "Fernández", "Ruiz",
+             "Rodríguez", "Martínez", "Sánchez", "Romero", "Suárez", "Benítez", "Acosta", "Medina", "Herrera", "Ibáñez"]
+OBJETIVOS = ["Ganar fuerza", "Bajar de peso", "Salud general", "Ganar masa muscular", "Mejorar resistencia"]
+NIVELES = ["Inicial", "Intermedio", "Avanzado"]
+ESTADOS = ["Sedentario", "Activo", "Deportista"]
+INICIO = date(2023, 1, 1)
+PASSWORD = "1234"
+
+
+@dataclass
+class Escenario:
+    entrenadores: int = 50
+    clientes: int = 5_000
+    progresos: int = 10  # por cliente
+    rutinas: int = 1
+    planes: int = 1
+    vinculados: float = 0.7  # fracción de clientes con entrenador
+    semilla: int = 42
+
+
+@dataclass
+class Generado:
+    # ids y usernames creados, para que los benchmarks elijan sobre qué operar
+    entrenadores: List[str] = field(default_factory=list)
+    clientes: List[str] = field(default_factory=list)
+    usernames: List[str] = field(default_factory=list)
+
+
+def _id(azar: random.Random) -> str:
+    return str(uuid.UUID(int=azar.getrandbits(128), version=4))
+
+
+def _nombre(azar: random.Random) -> str:
+    return f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)} {azar.choice(APELLIDOS)}"
+
+
+def entidades(esc: Escenario):
+    # (evento, dato) en el orden en que se aplicarían; la misma semilla da exactamente los mismos datos
+    azar = random.Random(esc.semilla)
+    entrenadores = []
+    for i in range(esc.entrenadores):
+        ent = Entrenador(id=_id(azar), username=f"ent{i}", password=PASSWORD, nombre=_nombre(azar),
+                         nivel_experiencia=azar.choice(NIVELES))
+        entrenadores.append(ent.id)
+        yield "entrenador", ent
+    for i in range(esc.clientes):
+        cli = Cliente(id=_id(azar), username=f"cli{i}", password=PASSWORD, nombre=_nombre(azar),
+                      objetivos=azar.choice(OBJETIVOS), estado_fisico_inicial=azar.choice(ESTADOS))
+        yield "cliente", cli
+        entrenador_id = None
+        if entrenadores and azar.random() < esc.vinculados:
+            entrenador_id = azar.choice(entrenadores)
+            yield "vinculo", (cli.id, entrenador_id)
+        alta = INICIO + timedelta(days=azar.randrange(365))
+        for k in range(esc.rutinas):
+            rutina = rutina_automatica(cli.id, cli.objetivos, entrenador_id)
+            rutina.id, rutina.fecha_creacion = _id(azar), (alta + timedelta(days=30 * k)).isoformat()
+            yield "rutina", rutina
+        for k in range(esc.planes):
+            plan = plan_automatico(cli.id, cli.objetivos)
+            plan.id, plan.fecha_creacion = _id(azar), (alta + timedelta(days=30 * k)).isoformat()
+            yield "plan", plan
+        peso = azar.uniform(55, 110)
+        cintura = azar.uniform(70, 110)
+        for k in range(esc.progresos):
+            peso += azar.uniform(-1.2, 0.8)
+            cintura += azar.uniform(-0.8, 0.5)
+            dia = alta + timedelta(days=7 * k + azar.randrange(3))
+            yield "progreso", ProgresoFisico(id=_id(azar), cliente_id=cli.id,
+                                             fecha=f"{dia.isoformat()} {azar.randrange(7, 22):02d}:00:00",
+                                             peso=round(peso, 1), medidas={"cintura": round(cintura, 1)})
+
+
+def poblar(repo: Repositorio, esc: Escenario) -> Generado:
+    # Por el repositorio (con sus oyentes, p.ej. el diario) y en un solo lote, como una importación
+    gen = Generado()
+    with repo.lote():
+        for evento, dato in entidades(esc):
+            if evento == "entrenador":
+                repo.add_entrenador(dato)
+                gen.entrenadores.append(dato.id)
+                gen.usernames.append(dato.username)
+            elif evento == "cliente":
+                repo.add_cliente(dato)
+                gen.clientes.append(dato.id)
+                gen.usernames.append(dato.username)
+            elif evento == "vinculo":
+                repo.vincular_cliente_a_entrenador(*dato)
+            else:
+                # rutinas y planes con id y fecha fijos: las altas públicas generan los suyos
+                repo._cambiar(evento, dato)
+    return gen
+
+
+def escribir_jsonl(esc: Escenario, directorio: str) -> Dict[str, int]:
+    # Los mismos datos como archivos para importador.py (entrenadores, clientes, progresos)
+    os.makedirs(directorio, exist_ok=True)
+    usernames: Dict[str, str] = {}
+    cuentas = {"entrenadores": 0, "clientes": 0, "progresos": 0}
+    archivos = {tipo: open(os.path.join(directorio, f"{tipo}.jsonl"), "w", encoding="utf-8") for tipo in cuentas}
+    try:
+        pendiente = None  # el cliente se escribe al conocer su entrenador
+        for evento, dato in entidades(esc):
+            if evento == "vinculo":
+                pendiente["entrenador"] = usernames[dato[1]]
+                continue
+            if pendiente is not None:
+                archivos["clientes"].write(json.dumps(pendiente, ensure_ascii=False) + "\n")
+                cuentas["clientes"] += 1
+                pendiente = None
+            if evento == "entrenador":
+                usernames[dato.id] = dato.username
+                fila = {"id": dato.id, "username": dato.username, "password": dato.password, "nombre": dato.nombre,
+                        "nivel_experiencia": dato.nivel_experiencia}
+                archivos["entrenadores"].write(json.dumps(fila, ensure_ascii=False) + "\n")
+                cuentas["entrenadores"] += 1
+            elif evento == "cliente":
+                pendiente = {"id": dato.id, "username": dato.username, "password": dato.password,
+                             "nombre": dato.nombre, "objetivos": dato.objetivos,
+                             "estado_fisico_inicial": dato.estado_fisico_inicial}
+            elif evento == "progreso":
+                fila = {"id": dato.id, "cliente_id": dato.cliente_id, "fecha": dato.fecha, "peso": dato.peso,
+                        "medidas": dato.medidas}
+                archivos["progresos"].write(json.dumps(fila, ensure_ascii=False) + "\n")
+                cuentas["progresos"] += 1
+        if pendiente is not None:
+            archivos["clientes"].write(json.dumps(pendiente, ensure_ascii=False) + "\n")
+            cuentas["clientes"] += 1
+    finally:
+        for f in archivos.values():
+            f.close()
+    return cuentas
+
+
+def argumentos_escenario(parser: argparse.ArgumentParser):
+    por_defecto = Escenario()
+    for nombre, valor in asdict(por_defecto).items():
+        parser.add_argument(f"--{nombre}", type=type(valor), default=valor)
+
+
+def escenario_de(args: argparse.Namespace) -> Escenario:
+    return Escenario(**{nombre: getattr(args, nombre) for nombre in asdict(Escenario())})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un gimnasio sintético determinista (JSONL para importador.py)")
+    parser.add_argument("directorio")
+    argumentos_escenario(parser)
+    args = parser.parse_args()
+    cuentas = escribir_jsonl(escenario_de(args), args.directorio)
+    print(json.dumps(cuentas))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from nucleo import Repositorio, Cliente, ProgresoFisico
+from interfaz import FrameDashboard
+from generador import PASSWORD, argumentos_escenario, escenario_de, poblar
+
+OPERACIONES = 2_000  # por benchmark
+REFRESCOS_COMPLETOS = 5
+PESTANAS = ("entrenador", "cliente", "rutina", "plan", "progreso")
+ORDEN = {"cliente": "nombre", "progreso": "fecha"}  # orden inicial de las tablas virtuales
+
+
+def resumen(nombre: str, tiempos: list) -> dict:
+    tiempos = sorted(tiempos)
+    n = len(tiempos)
+    p = lambda q: round(tiempos[min(n - 1, int(q * n))] * 1e6, 3)
+    return {"nombre": nombre, "n": n, "total_s": round(sum(tiempos), 6),
+            "media_us": round(sum(tiempos) / n * 1e6, 3), "p50_us": p(0.5), "p99_us": p(0.99),
+            "max_us": round(tiempos[-1] * 1e6, 3)}
+
+
+def medir(nombre: str, funcion, argumentos) -> dict:
+    gc.collect()
+    reloj = time.perf_counter
+    tiempos = []
+    for args in argumentos:
+        inicio = reloj()
+        funcion(*args)
+        tiempos.append(reloj() - inicio)
+    print(f"  {nombre}", file=sys.stderr)
+    return resumen(nombre, tiempos)
+
+
+# --- dashboard sin pantalla: lo justo para que _refresh_trees corra entero y sincrónico ---
+
+class ArbolFalso:
+    # Treeview: filas por iid
+    def __init__(self):
+        self.filas = {}
+
+    def get_children(self):
+        return list(self.filas)
+
+    def delete(self, *ids):
+        for id_ in ids:
+            del self.filas[id_]
+
+    def exists(self, id_):
+        return id_ in self.filas
+
+    def item(self, id_, values):
+        self.filas[id_] = values
+
+    def insert(self, padre, posicion, iid, values):
+        self.filas[iid] = values
+
+
+class TablaFalsa:
+    # TablaVirtual: al refrescar cuenta y pide la primera página, como la real
+    def __init__(self, repo: Repositorio, tipo: str):
+        self.repo = repo
+        self.tipo = tipo
+
+    def refrescar(self):
+        self.repo.contar(self.tipo)
+        for obj in self.repo.pagina(self.tipo, 0, 120, ORDEN[self.tipo]):
+            pass
+
+
+class PestanasFalsas:
+    seleccionada = "entrenador"
+
+    def select(self):
+        return self.seleccionada
+
+
+class TareasSincronicas:
+    def enviar(self, nombre, funcion, *args, al_terminar=None, al_fallar=None, **kwargs):
+        resultado = funcion(*args)
+        if al_terminar:
+            al_terminar(resultado)
+
+
+class AppFalsa:
+    usuario_actual = object()
+    tareas = TareasSincronicas()
+
+
+def dashboard(repo: Repositorio) -> FrameDashboard:
+    dash = FrameDashboard.__new__(FrameDashboard)
+    dash.repo = repo
+    dash.master = AppFalsa()
+    dash.tabs = PestanasFalsas()
+    dash.after = lambda ms, funcion, *args: funcion(*args)
+    dash.tree_ent, dash.tree_rut, dash.tree_plan = ArbolFalso(), ArbolFalso(), ArbolFalso()
+    dash.tabla_cli, dash.tabla_prog = TablaFalsa(repo, "cliente"), TablaFalsa(repo, "progreso")
+    dash._tipo_pestana = {tipo: tipo for tipo in PESTANAS}
+    dash._version_vista = dict.fromkeys(PESTANAS)
+    dash._refresco_en_curso = dash._refresco_pendiente = False
+    return dash
+
+
+def refrescar(dash: FrameDashboard, tipo: str):
+    dash.tabs.seleccionada = tipo
+    dash._refresh_trees()
+
+
+def revision() -> str:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=RAIZ, capture_output=True,
+                              text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def correr(repo: Repositorio, gen, n: int, azar: random.Random) -> list:
+    resultados = []
+    usernames = [azar.choice(gen.usernames) for _ in range(n)]
+    clientes = [azar.choice(gen.clientes) for _ in range(n)]
+
+    # lecturas
+    resultados.append(medir("login", repo.authenticate, [(u, PASSWORD) for u in usernames]))
+    resultados.append(medir("login_fallido", repo.authenticate, [(u, "otra") for u in usernames]))
+    resultados.append(medir("registro_duplicado", repo.find_by_username, [(u,) for u in usernames]))
+    dash = dashboard(repo)
+    distintos = list(dict.fromkeys(clientes))
+    resultados.append(medir("detalles_cliente_primera", dash._texto_detalles, [(c,) for c in distintos]))
+    resultados.append(medir("detalles_cliente", dash._texto_detalles, [(c,) for c in distintos]))
+    for tipo in PESTANAS:
+        tiempos = []
+        for _ in range(REFRESCOS_COMPLETOS):
+            dash = dashboard(repo)
+            gc.collect()
+            inicio = time.perf_counter()
+            refrescar(dash, tipo)
+            tiempos.append(time.perf_counter() - inicio)
+        resultados.append(resumen(f"refresco_completo_{tipo}", tiempos))
+        print(f"  refresco_completo_{tipo}", file=sys.stderr)
+    resultados.append(medir("refresco_al_dia", refrescar, [(dash, "cliente")] * n))
+
+    # escrituras
+    nuevos = [Cliente(username=f"nuevo{i}", password=PASSWORD, nombre=f"Nuevo {i}") for i in range(n)]
+
+    def registrar(cli: Cliente):
+        if repo.find_by_username(cli.username) is None:
+            repo.add_cliente(cli)
+    resultados.append(medir("registro_cliente", registrar, [(c,) for c in nuevos]))
+    if gen.entrenadores:
+        resultados.append(medir("vincular_cliente_a_entrenador", repo.vincular_cliente_a_entrenador,
+                                [(c, azar.choice(gen.entrenadores)) for c in clientes]))
+    resultados.append(medir("crear_plan_automatico", repo.crear_plan_automatico, [(c,) for c in clientes]))
+    resultados.append(medir("crear_rutina_automatica", repo.crear_rutina_automatica, [(c,) for c in clientes]))
+    controles = [ProgresoFisico(cliente_id=c, peso=round(azar.uniform(55, 110), 1), medidas={"cintura": 90.0},
+                                fecha=f"2024-{azar.randint(1, 12):02d}-{azar.randint(1, 28):02d} 10:00:00")
+                 for c in clientes]
+    resultados.append(medir("registrar_progreso", repo.registrar_progreso, [(p,) for p in controles]))
+
+    # un control nuevo y el refresco de la pestaña visible, la de progresos o la de clientes
+    for tipo in ("progreso", "cliente"):
+        dash = dashboard(repo)
+        refrescar(dash, tipo)
+        tiempos = []
+        for c in clientes[:max(1, n // 10)]:
+            repo.registrar_progreso(ProgresoFisico(cliente_id=c, peso=80.0))
+            inicio = time.perf_counter()
+            refrescar(dash, tipo)
+            tiempos.append(time.perf_counter() - inicio)
+        resultados.append(resumen(f"refresco_tras_control_{tipo}", tiempos))
+    return resultados
+
+
+def comparar(actual: dict, base: dict, umbral: float) -> int:
+    # Compara las medianas con una corrida anterior; devuelve cuántas empeoraron más que `umbral`
+    anteriores = {r["nombre"]: r for r in base["resultados"]}
+    peores = 0
+    print(f"{'benchmark':<34} {'base p50 (us)':>14} {'p50 (us)':>12} {'cambio':>8}")
+    for r in actual["resultados"]:
+        anterior = anteriores.get(r["nombre"])
+        if anterior is None or not anterior["p50_us"]:
+            continue
+        razon = r["p50_us"] / anterior["p50_us"]
+        marca = " <-" if razon > umbral else ""
+        peores += razon > umbral
+        print(f"{r['nombre']:<34} {anterior['p50_us']:>14.2f} {r['p50_us']:>12.2f} {razon:>7.2f}x{marca}")
+    return peores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks de las operaciones frecuentes, salida JSON")
+    argumentos_escenario(parser)
+    parser.add_argument("--operaciones", type=int, default=OPERACIONES, help="por benchmark")
+    parser.add_argument("--sqlite", action="store_true", help="usar RepositorioSQLite en un archivo temporal")
+    parser.add_argument("--salida", help="archivo JSON de resultados (por defecto, la salida estándar)")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para detectar regresiones")
+    parser.add_argument("--umbral", type=float, default=1.25, help="cambio de la mediana que cuenta como regresión")
+    args = parser.parse_args()
+
+    esc = escenario_de(args)
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.sqlite:
+            from almacenamiento_sqlite import RepositorioSQLite
+            repo = RepositorioSQLite(os.path.join(tmp, "suite.db"))
+        else:
+            repo = Repositorio()
+        print(f"generando {esc}", file=sys.stderr)
+        inicio = time.perf_counter()
+        gen = poblar(repo, esc)
+        generacion = time.perf_counter() - inicio
+        resultados = correr(repo, gen, args.operaciones, random.Random(esc.semilla))
+        if args.sqlite:
+            repo.cerrar()
+
+    informe = {
+        "revision": revision(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "backend": "sqlite" if args.sqlite else "memoria",
+        "escenario": asdict(esc),
+        "operaciones": args.operaciones,
+        "generacion_s": round(generacion, 3),
+        "resultados": resultados,
+    }
+    texto = json.dumps(informe, ensure_ascii=False, indent=2)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        return 1 if comparar(informe, base, args.umbral) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,264 @@
+import gc
+import marshal
+import os
+import struct
+import threading
+from dataclasses import fields
+from operator import attrgetter
+from typing import Iterator, List, Optional, Tuple
+
+from nucleo import (Repositorio, COLECCIONES, ColumnasProgreso, Entrenador, Cliente, RutinaEjercicio,
+                  PlanAlimentacion, ProgresoFisico, DictCongelado, descongelar)
+
+
+# Modos de fsync: "siempre" (cada registro), "lote" (cada commit de grupo), "nunca" (lo decide el SO)
+FSYNC_MODOS = ("siempre", "lote", "nunca")
+
+CLASES = {
+    "entrenador": Entrenador,
+    "cliente": Cliente,
+    "rutina": RutinaEjercicio,
+    "plan": PlanAlimentacion,
+    "progreso": ProgresoFisico,
+}
+CAMPOS = {evento: tuple(f.name for f in fields(cls)) for evento, cls in CLASES.items()}
+# todos los campos de una vez (en C) y el único que puede traer una plantilla congelada
+LEER = {evento: attrgetter(*campos) for evento, campos in CAMPOS.items()}
+CONGELADOS = {"rutina": CAMPOS["rutina"].index("ejercicios_semana"), "plan": CAMPOS["plan"].index("detalle_comidas")}
+
+CABECERA = struct.Struct("<I")
+PREFIJO_SEGMENTO = "diario-"
+SNAPSHOT = "snapshot.bin"
+
+
+# eventos cuyo dato no es una entidad: el vínculo (cliente_id, entrenador_id) y las bajas (id)
+BAJAS = ("baja_cliente", "baja_entrenador")
+
+
+def a_tupla(evento: str, dato) -> tuple:
+    if evento == "vinculo":
+        return tuple(dato)
+    if evento in BAJAS:
+        return (dato,)
+    valores = LEER[evento](dato)
+    i = CONGELADOS.get(evento)
+    if i is not None and isinstance(valores[i], DictCongelado):
+        # marshal no admite las plantillas congeladas: se guardan como dict y al leerlas se vuelven a compartir
+        valores = valores[:i] + (descongelar(valores[i]),) + valores[i + 1:]
+    return valores
+
+
+def desde_tupla(evento: str, valores: tuple):
+    if evento == "vinculo":
+        return valores
+    if evento in BAJAS:
+        return valores[0]
+    return CLASES[evento](*valores)
+
+
+def segmentos(directorio: str) -> List[tuple]:
+    # (seq inicial, ruta) ordenados; cada segmento empieza en el registro siguiente al último snapshot
+    segs = []
+    for nombre in os.listdir(directorio):
+        if nombre.startswith(PREFIJO_SEGMENTO) and nombre.endswith(".log"):
+            segs.append((int(nombre[len(PREFIJO_SEGMENTO):-4]), os.path.join(directorio, nombre)))
+    return sorted(segs)
+
+
+def registros(datos: bytes, pos: int = 0) -> Iterator[Tuple[int, tuple]]:
+    # (fin, registro) de cada registro completo desde `pos`; `fin` es donde retomar la lectura
+    while pos + CABECERA.size <= len(datos):
+        (n,) = CABECERA.unpack_from(datos, pos)
+        fin = pos + CABECERA.size + n
+        if fin > len(datos):
+            break  # registro a medio escribir (tras una caída, o todavía escribiéndose)
+        yield fin, marshal.loads(datos[pos + CABECERA.size:fin])
+        pos = fin
+
+
+def leer_snapshot(directorio: str) -> Optional[Tuple[int, dict]]:
+    # (seq, tablas) del último snapshot, o None si todavía no hay
+    ruta = os.path.join(directorio, SNAPSHOT)
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, "rb") as f:
+        return marshal.loads(f.read())
+
+
+def leer_segmento(ruta: str):
+    with open(ruta, "rb") as f:
+        datos = f.read()
+    for _, reg in registros(datos):
+        yield reg
+
+
+# Estado completo por columnas: una lista por campo de cada tabla, en el orden de CAMPOS, y los
+# progresos tal como los guarda ColumnasProgreso. Es el formato del snapshot y el que reciben las réplicas
+TABLAS = ("entrenador", "cliente", "rutina", "plan")
+
+
+def volcar(repo: Repositorio) -> dict:
+    tablas = {}
+    for evento in TABLAS:
+        coleccion = getattr(repo, COLECCIONES[evento])
+        tablas[evento] = [list(col) for col in zip(*(a_tupla(evento, o) for o in coleccion.values()))]
+    progresos = repo.progresos
+    if not isinstance(progresos, ColumnasProgreso):
+        # otro backend (SQLite): se arman las columnas al vuelo
+        progresos = ColumnasProgreso()
+        for p in repo.progresos.values():
+            progresos.agregar(p)
+    tablas["progreso"] = progresos.a_snapshot()
+    return tablas
+
+
+def restaurar(repo: Repositorio, tablas: dict):
+    # Sobre un repositorio en memoria vacío
+    for evento in TABLAS:
+        columnas = tablas[evento]
+        if columnas:
+            ids = columnas[CAMPOS[evento].index("id")]
+            getattr(repo, COLECCIONES[evento]).update(zip(ids, map(CLASES[evento], *columnas)))
+    for usr in (*repo.entrenadores.values(), *repo.clientes.values()):
+        repo.usuarios[usr.id] = usr
+        repo.por_username[usr.username] = usr
+    # los progresos ya están por columnas: se restauran los arrays tal cual, índices incluidos
+    repo.progresos = ColumnasProgreso.desde_snapshot(tablas["progreso"])
+    repo.reindexar()
+
+
+class Diario:
+    def __init__(self, directorio: str, seq: int = 0, fsync: str = "lote",
+                 max_lote: int = 512, intervalo: float = 0.05):
+        if fsync not in FSYNC_MODOS:
+            raise ValueError(f"fsync debe ser uno de {FSYNC_MODOS}")
+        self.directorio = directorio
+        self.seq = seq
+        self.fsync = fsync
+        self.max_lote = max_lote
+        self.intervalo = intervalo
+        self._pendientes: List[bytes] = []
+        self._cerrojo = threading.Lock()
+        self._archivo = None
+        self._abrir_segmento()
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._commit_periodico, name="diario-commit", daemon=True)
+        self._hilo.start()
+
+    def _abrir_segmento(self):
+        if self._archivo:
+            self._archivo.close()
+        ruta = os.path.join(self.directorio, f"{PREFIJO_SEGMENTO}{self.seq + 1:012d}.log")
+        self._archivo = open(ruta, "ab")
+
+    def __call__(self, evento: str, dato):
+        # Oyente de Repositorio: serializa el cambio y lo encola para el próximo commit de grupo
+        reg = marshal.dumps((evento, a_tupla(evento, dato)))
+        with self._cerrojo:
+            self.seq += 1
+            self._pendientes.append(CABECERA.pack(len(reg)) + reg)
+            if self.fsync == "siempre" or len(self._pendientes) >= self.max_lote:
+                self._commit()
+
+    def _commit(self):
+        if not self._pendientes:
+            return
+        self._archivo.write(b"".join(self._pendientes))
+        self._pendientes.clear()
+        self._archivo.flush()
+        if self.fsync != "nunca":
+            os.fsync(self._archivo.fileno())
+
+    def commit(self):
+        with self._cerrojo:
+            self._commit()
+
+    def _commit_periodico(self):
+        while not self._parar.wait(self.intervalo):
+            self.commit()
+
+    def rotar(self):
+        # Cierra el segmento actual; lo siguiente se escribe en uno nuevo que empieza en seq + 1
+        with self._cerrojo:
+            self._commit()
+            self._abrir_segmento()
+
+    def cerrar(self):
+        self._parar.set()
+        self._hilo.join()
+        with self._cerrojo:
+            self._commit()
+            self._archivo.close()
+
+
+class RepositorioDiario(Repositorio):
+    # Repositorio en memoria que se reconstruye con "último snapshot + cola del diario"
+    def __init__(self, directorio: str, fsync: str = "lote", max_lote: int = 512,
+                 intervalo: float = 0.05, snapshot_cada: Optional[int] = 1_000_000):
+        super().__init__()
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+        self.snapshot_cada = snapshot_cada
+        gc_activo = gc.isenabled()
+        gc.disable()  # se crean millones de contenedores de golpe: el GC generacional sólo estorba
+        try:
+            self._seq_snapshot = self._cargar_snapshot()
+            seq = self._reproducir(self._seq_snapshot)
+        finally:
+            if gc_activo:
+                gc.enable()
+        self.diario = Diario(directorio, seq=seq, fsync=fsync, max_lote=max_lote, intervalo=intervalo)
+        self.suscribir(self._tras_cambio)
+
+    def _tras_cambio(self, evento: str, dato):
+        self.diario(evento, dato)
+        if self.snapshot_cada and self.diario.seq - self._seq_snapshot >= self.snapshot_cada:
+            self.snapshot()
+
+    def _reproducir(self, seq: int) -> int:
+        segs = segmentos(self.directorio)
+        for i, (inicio, ruta) in enumerate(segs):
+            with open(ruta, "rb") as f:
+                datos = f.read()
+            n = inicio - 1
+            fin = 0
+            for fin, (evento, valores) in registros(datos):
+                n += 1
+                if n <= seq:
+                    continue
+                self.aplicar(evento, desde_tupla(evento, valores))
+                seq = n
+            if i == len(segs) - 1 and fin < len(datos):
+                # registro a medio escribir al caerse: se corta, para que lo que se agregue a este segmento
+                # no quede detrás de basura que detendría todas las lecturas siguientes
+                with open(ruta, "r+b") as f:
+                    f.truncate(fin)
+                    os.fsync(f.fileno())
+        return seq
+
+    def _cargar_snapshot(self) -> int:
+        leido = leer_snapshot(self.directorio)
+        if leido is None:
+            return 0
+        seq, tablas = leido
+        restaurar(self, tablas)
+        return seq
+
+    def snapshot(self):
+        # Escribe el estado completo y descarta los segmentos que ya recoge (compactación)
+        self.diario.rotar()
+        seq = self.diario.seq
+        tablas = volcar(self)
+        tmp = os.path.join(self.directorio, SNAPSHOT + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(marshal.dumps((seq, tablas)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.directorio, SNAPSHOT))
+        for inicio, ruta in segmentos(self.directorio):
+            if inicio <= seq:
+                os.remove(ruta)
+        self._seq_snapshot = seq
+
+    def cerrar(self):
+        self.diario.cerrar()
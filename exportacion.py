@@ -0,0 +1,311 @@
+import csv
+import io
+import json
+import os
+import time
+from dataclasses import dataclass
+from html import escape
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from nucleo import Repositorio, Cliente, ProgresoFisico, lineas_plan, lineas_rutina
+
+
+TIPOS = ("rutinas", "planes", "progresos")
+FORMATOS = ("csv", "jsonl", "txt", "html")
+EXTENSIONES = {".csv": "csv", ".jsonl": "jsonl", ".txt": "txt", ".html": "html", ".htm": "html"}
+# una fila CSV por ejercicio / comida / control; medidas y repeticiones van como JSON en su columna
+COLUMNAS = {
+    "rutinas": ["id", "cliente_id", "cliente_nombre", "entrenador_id", "fecha_creacion", "intensidad",
+                "dia", "ejercicio", "series", "reps"],
+    "planes": ["id", "cliente_id", "cliente_nombre", "fecha_creacion", "calorias_diarias", "comidas_por_dia",
+               "comida", "detalle", "observaciones"],
+    "progresos": ["id", "cliente_id", "cliente_nombre", "fecha", "peso", "medidas", "repeticiones", "observaciones"],
+}
+EVENTOS = {"rutinas": "rutina", "planes": "plan", "progresos": "progreso"}
+TITULOS = {"rutinas": "Rutinas", "planes": "Planes de alimentación", "progresos": "Historial de progreso"}
+AVISO_CADA = 200  # clientes entre llamadas a al_progreso
+
+HTML_INICIO = """<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>{titulo}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+section.cliente {{ page-break-after: always; }}
+pre {{ background: #f4f4f4; padding: .5em; }}
+table {{ border-collapse: collapse; }}
+td, th {{ border: 1px solid #999; padding: 2px 8px; text-align: left; }}
+</style>
+</head>
+<body>
+"""
+HTML_FIN = "</body>\n</html>\n"
+
+Documento = Tuple[str, Cliente, object]  # (tipo, cliente, rutina/plan/progreso)
+
+
+@dataclass
+class ResultadoExportacion:
+    formato: str
+    total: int = 0  # clientes a recorrer
+    clientes: int = 0
+    documentos: int = 0
+    segundos: float = 0.0
+
+
+def ids_de(repo: Repositorio, cliente_id: Optional[str] = None, entrenador_id: Optional[str] = None) -> List[str]:
+    # Un cliente, los de un entrenador o todo el gimnasio. Sólo se copian los ids: cada cliente se
+    # lee al llegarle el turno, y uno dado de baja mientras tanto simplemente no sale
+    with repo.leyendo():
+        if cliente_id is not None:
+            if cliente_id not in repo.clientes:
+                raise KeyError(cliente_id)
+            return [cliente_id]
+        if entrenador_id is not None:
+            ent = repo.entrenadores.get(entrenador_id)
+            if ent is None:
+                raise KeyError(entrenador_id)
+            return list(ent.clientes_ids)
+        return list(repo.clientes)
+
+
+def _fijar(p) -> ProgresoFisico:
+    # Las vistas de progreso apuntan a filas que cambian si se borra otro cliente: se copian bajo el cerrojo
+    return ProgresoFisico(id=p.id, cliente_id=p.cliente_id, fecha=p.fecha, peso=p.peso, medidas=p.medidas,
+                          repeticiones=p.repeticiones, observaciones=p.observaciones)
+
+
+def documentos(repo: Repositorio, ids: Iterable[str], tipos: Sequence[str] = TIPOS) -> Iterator[Documento]:
+    # Los documentos de cada cliente se leen juntos bajo el cerrojo de lectura y se entregan fuera de él,
+    # así escribir el archivo no frena a los escritores; en memoria sólo está el cliente en curso
+    for id_ in ids:
+        with repo.leyendo():
+            cli = repo.clientes.get(id_)
+            if cli is None:
+                continue
+            lote = []
+            for tipo in tipos:
+                if tipo == "rutinas":
+                    lote.extend((tipo, cli, r) for r in repo.rutinas_de(id_))
+                elif tipo == "planes":
+                    lote.extend((tipo, cli, pl) for pl in repo.planes_de(id_))
+                else:
+                    lote.extend((tipo, cli, _fijar(p)) for p in repo.progresos_de(id_))
+        yield from lote
+
+
+def _filas_csv(tipo: str, cli: Cliente, obj) -> Iterator[list]:
+    if tipo == "rutinas":
+        base = [obj.id, cli.id, cli.nombre, obj.entrenador_id, obj.fecha_creacion, obj.intensidad]
+        vacia = True
+        for dia, ejercicios in obj.ejercicios_semana.items():
+            for ex in ejercicios:
+                vacia = False
+                yield base + [dia, ex.get("ejercicio"), ex.get("series"), ex.get("reps")]
+        if vacia:
+            yield base + ["", "", "", ""]
+    elif tipo == "planes":
+        base = [obj.id, cli.id, cli.nombre, obj.fecha_creacion, obj.calorias_diarias, obj.comidas_por_dia]
+        comidas = obj.detalle_comidas.items() or [("", "")]
+        for comida, detalle in comidas:
+            yield base + [comida, detalle, obj.observaciones]
+    else:
+        yield [obj.id, cli.id, cli.nombre, obj.fecha, obj.peso,
+               json.dumps(obj.medidas, ensure_ascii=False) if obj.medidas else "",
+               json.dumps(obj.repeticiones, ensure_ascii=False) if obj.repeticiones else "", obj.observaciones]
+
+
+def a_csv(tipo: str, docs: Iterable[Documento]) -> Iterator[str]:
+    buf = io.StringIO()
+    escritor = csv.writer(buf, lineterminator="\n")
+    escritor.writerow(COLUMNAS[tipo])
+    for _, cli, obj in docs:
+        escritor.writerows(_filas_csv(tipo, cli, obj))
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    yield buf.getvalue()
+
+
+def registro(tipo: str, cli: Cliente, obj) -> dict:
+    # Documento -> dict para JSON; las plantillas congeladas son dict/list y se serializan tal cual
+    datos = {"tipo": EVENTOS[tipo], "id": obj.id, "cliente_id": cli.id, "cliente_nombre": cli.nombre}
+    if tipo == "rutinas":
+        datos.update(entrenador_id=obj.entrenador_id, fecha_creacion=obj.fecha_creacion, intensidad=obj.intensidad,
+                     ejercicios_semana=obj.ejercicios_semana)
+    elif tipo == "planes":
+        datos.update(fecha_creacion=obj.fecha_creacion, calorias_diarias=obj.calorias_diarias,
+                     comidas_por_dia=obj.comidas_por_dia, detalle_comidas=obj.detalle_comidas,
+                     observaciones=obj.observaciones)
+    else:
+        datos.update(fecha=obj.fecha, peso=obj.peso, medidas=obj.medidas, repeticiones=obj.repeticiones,
+                     observaciones=obj.observaciones)
+    return datos
+
+
+def a_jsonl(docs: Iterable[Documento]) -> Iterator[str]:
+    for doc in docs:
+        yield json.dumps(registro(*doc), ensure_ascii=False) + "\n"
+
+
+def _titulo(tipo: str, obj) -> str:
+    if tipo == "rutinas":
+        return f"Rutina del {obj.fecha_creacion} (intensidad: {obj.intensidad})"
+    return f"Plan de alimentación del {obj.fecha_creacion} - {obj.calorias_diarias} kcal"
+
+
+def _medidas(p: ProgresoFisico) -> str:
+    return ", ".join(f"{k} {v:g}" for k, v in p.medidas.items())
+
+
+def _agrupar(docs: Iterable[Documento]):
+    # Para los formatos imprimibles: marca dónde empieza cada cliente y cada sección de un cliente
+    cliente = seccion = None
+    for tipo, cli, obj in docs:
+        nuevo_cliente = cli.id != cliente
+        nueva_seccion = nuevo_cliente or tipo != seccion
+        cliente, seccion = cli.id, tipo
+        yield nuevo_cliente, nueva_seccion, tipo, cli, obj
+
+
+def a_texto(docs: Iterable[Documento]) -> Iterator[str]:
+    for nuevo_cliente, nueva_seccion, tipo, cli, obj in _agrupar(docs):
+        if nuevo_cliente:
+            yield f"{'=' * 70}\n{cli.nombre} ({cli.username})\n{'=' * 70}\n"
+        if nueva_seccion:
+            yield f"\n{TITULOS[tipo]}\n{'-' * len(TITULOS[tipo])}\n"
+        if tipo == "progresos":
+            yield f"{obj.fecha}  {obj.peso:6.1f} kg  {_medidas(obj)}  {obj.observaciones}".rstrip() + "\n"
+        else:
+            yield f"\n{_titulo(tipo, obj)}\n"
+            yield from (lineas_rutina(obj) if tipo == "rutinas" else lineas_plan(obj))
+
+
+def a_html(docs: Iterable[Documento], titulo: str = "Exportación") -> Iterator[str]:
+    yield HTML_INICIO.format(titulo=escape(titulo))
+    cierre_seccion, cierre_cliente = "", ""
+    for nuevo_cliente, nueva_seccion, tipo, cli, obj in _agrupar(docs):
+        if nueva_seccion:
+            yield cierre_seccion
+            cierre_seccion = ""
+        if nuevo_cliente:
+            yield cierre_cliente
+            yield f'<section class="cliente">\n<h1>{escape(cli.nombre)} ({escape(cli.username)})</h1>\n'
+            cierre_cliente = "</section>\n"
+        if nueva_seccion:
+            yield f"<h2>{TITULOS[tipo]}</h2>\n"
+            if tipo == "progresos":
+                yield "<table>\n<tr><th>Fecha</th><th>Peso (kg)</th><th>Medidas</th><th>Observaciones</th></tr>\n"
+                cierre_seccion = "</table>\n"
+        if tipo == "progresos":
+            celdas = (obj.fecha, f"{obj.peso:g}", _medidas(obj), obj.observaciones)
+            yield "<tr>" + "".join(f"<td>{escape(c)}</td>" for c in celdas) + "</tr>\n"
+        else:
+            lineas = lineas_rutina(obj) if tipo == "rutinas" else lineas_plan(obj)
+            yield f"<h3>{escape(_titulo(tipo, obj))}</h3>\n<pre>{escape(''.join(lineas))}</pre>\n"
+    yield cierre_seccion + cierre_cliente + HTML_FIN
+
+
+def exportar(repo: Repositorio, ruta: str, formato: Optional[str] = None, tipos: Sequence[str] = TIPOS,
+             cliente_id: Optional[str] = None, entrenador_id: Optional[str] = None,
+             al_progreso: Optional[Callable[[ResultadoExportacion], None]] = None) -> ResultadoExportacion:
+    # Escribe en streaming: documento leído, documento escrito. Se escribe a un temporal que sólo
+    # reemplaza a `ruta` al terminar, así un error o una cancelación no dejan un archivo a medias
+    formato = formato or EXTENSIONES.get(os.path.splitext(ruta)[1].lower())
+    if formato not in FORMATOS:
+        raise ValueError(f"formato debe ser uno de {FORMATOS}")
+    tipos = [t for t in TIPOS if t in tipos]
+    if not tipos:
+        raise ValueError(f"tipos debe incluir alguno de {TIPOS}")
+    if formato == "csv" and len(tipos) != 1:
+        raise ValueError("un CSV lleva un solo tipo de documento")
+    ids = ids_de(repo, cliente_id, entrenador_id)
+    res = ResultadoExportacion(formato, total=len(ids))
+    inicio = time.perf_counter()
+
+    def recorridos():
+        for id_ in ids:
+            yield id_
+            res.clientes += 1
+            if al_progreso and res.clientes % AVISO_CADA == 0:
+                res.segundos = time.perf_counter() - inicio
+                al_progreso(res)
+
+    def contados(docs: Iterable[Documento]) -> Iterator[Documento]:
+        for doc in docs:
+            res.documentos += 1
+            yield doc
+
+    docs = contados(documentos(repo, recorridos(), tipos))
+    trozos = {
+        "csv": lambda: a_csv(tipos[0], docs),
+        "jsonl": lambda: a_jsonl(docs),
+        "txt": lambda: a_texto(docs),
+        "html": lambda: a_html(docs, os.path.splitext(os.path.basename(ruta))[0]),
+    }[formato]()
+    temporal = ruta + ".tmp"
+    try:
+        with open(temporal, "w", encoding="utf-8", newline="") as f:
+            for trozo in trozos:
+                f.write(trozo)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    res.segundos = time.perf_counter() - inicio
+    if al_progreso:
+        al_progreso(res)
+    return res
+
+
+def main(argv=None):
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Exporta rutinas, planes y progresos a CSV/JSONL/texto/HTML")
+    parser.add_argument("archivo", help="destino; el formato sale de la extensión si no se indica")
+    parser.add_argument("--formato", choices=FORMATOS)
+    parser.add_argument("--tipos", nargs="+", choices=TIPOS, default=list(TIPOS))
+    alcance = parser.add_mutually_exclusive_group()
+    alcance.add_argument("--cliente", help="id o username de un cliente")
+    alcance.add_argument("--entrenador", help="id o username de un entrenador: exporta todos sus clientes")
+    parser.add_argument("--db", default=os.environ.get("GESTORGYM_DB"), help="base SQLite de origen")
+    parser.add_argument("--diario", help="directorio del diario de origen")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        from almacenamiento_sqlite import RepositorioSQLite
+        repo = RepositorioSQLite(args.db)
+    elif args.diario:
+        from diario import RepositorioDiario
+        repo = RepositorioDiario(args.diario)
+    else:
+        repo = Repositorio()
+
+    def resolver(ref: Optional[str], coleccion) -> Optional[str]:
+        if ref is None:
+            return None
+        usr = coleccion.get(ref) or repo.find_by_username(ref)
+        if usr is None or usr.id not in coleccion:
+            parser.error(f"{ref!r} no encontrado")
+        return usr.id
+
+    def avance(res: ResultadoExportacion):
+        print(f"\r{res.clientes:,} / {res.total:,} clientes, {res.documentos:,} documentos",
+              end="", file=sys.stderr, flush=True)
+
+    try:
+        res = exportar(repo, args.archivo, args.formato, args.tipos, resolver(args.cliente, repo.clientes),
+                       resolver(args.entrenador, repo.entrenadores), al_progreso=avance)
+        print(file=sys.stderr)
+        print(f"{args.archivo}: {res.documentos:,} documentos de {res.clientes:,} clientes en {res.segundos:.1f} s")
+    finally:
+        if hasattr(repo, "cerrar"):
+            repo.cerrar()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,280 @@
+import csv
+import json
+import math
+import os
+import sys
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from nucleo import Repositorio, Entrenador, Cliente, ProgresoFisico, normalizar_fecha
+
+
+TIPOS = ("entrenadores", "clientes", "progresos")
+TAMANO_BLOQUE = 5000
+MAX_ERRORES = 1000
+# columnas CSV de medidas/repeticiones sueltas: "medida_cintura", "rep_sentadillas"...
+PREFIJO_MEDIDA = "medida_"
+PREFIJO_REPETICION = "rep_"
+# las repeticiones se guardan como int64
+MAX_REPETICIONES = 2 ** 63 - 1
+
+
+@dataclass
+class ErrorFila:
+    linea: int
+    mensaje: str
+
+@dataclass
+class ResultadoImportacion:
+    tipo: str
+    leidas: int = 0
+    importadas: int = 0
+    con_error: int = 0
+    segundos: float = 0.0
+    # sólo se conservan los primeros MAX_ERRORES; con_error lleva la cuenta total
+    errores: List[ErrorFila] = field(default_factory=list)
+
+    @property
+    def filas_por_segundo(self) -> float:
+        return self.leidas / self.segundos if self.segundos else 0.0
+
+
+def leer_filas(ruta: str, formato: Optional[str] = None) -> Iterator[Tuple[int, dict]]:
+    # (nº de línea, fila) de un CSV con cabecera o de un JSONL, leyendo el archivo de a una línea;
+    # "-" es la entrada estándar
+    formato = formato or ("csv" if ruta.lower().endswith(".csv") else "jsonl")
+    with nullcontext(sys.stdin) if ruta == "-" else open(ruta, encoding="utf-8-sig", newline="") as f:
+        if formato == "csv":
+            lector = csv.DictReader(f)
+            for fila in lector:
+                yield lector.line_num, fila
+        else:
+            for n, linea in enumerate(f, 1):
+                if linea.strip():
+                    try:
+                        fila = json.loads(linea)
+                    except ValueError as e:
+                        fila = e  # se informa como error de esa línea, sin cortar la importación
+                    yield n, fila
+
+
+def _texto(fila: dict, columna: str) -> str:
+    valor = fila.get(columna)
+    return "" if valor is None else str(valor).strip()
+
+
+def _numeros(fila: dict, columna: str, prefijo: str, tipo) -> Dict[str, float]:
+    # JSONL: {"medidas": {...}}; CSV: una columna por medida con prefijo, o la columna entera
+    # como JSON (así la escribe exportacion.py)
+    valores = fila.get(columna) or {}
+    valores = dict(json.loads(valores) if isinstance(valores, str) else valores)
+    for k, v in fila.items():
+        if k and k.startswith(prefijo) and v not in (None, ""):
+            valores[k[len(prefijo):]] = v
+    return {k: tipo(v) for k, v in valores.items()}
+
+
+class Importador:
+    # Importa en streaming: se leen bloques de `tamano_bloque` filas, se validan y las válidas se escriben
+    # con una única repo.transaccion() por bloque; la memoria no depende del tamaño del archivo
+    def __init__(self, repo: Repositorio, tamano_bloque: int = TAMANO_BLOQUE, max_errores: int = MAX_ERRORES,
+                 al_progreso: Optional[Callable[[ResultadoImportacion], None]] = None):
+        self.repo = repo
+        self.tamano_bloque = tamano_bloque
+        self.max_errores = max_errores
+        self.al_progreso = al_progreso
+        # referencia de cliente (id o username) -> id, resuelta una sola vez por importación
+        self._clientes: Dict[str, str] = {}
+
+    def importar(self, tipo: str, ruta: str, formato: Optional[str] = None) -> ResultadoImportacion:
+        if tipo not in TIPOS:
+            raise ValueError(f"tipo debe ser uno de {TIPOS}")
+        validar, escribir = {
+            "entrenadores": (self._validar_entrenador, self._escribir_usuarios),
+            "clientes": (self._validar_cliente, self._escribir_usuarios),
+            "progresos": (self._validar_progreso, self._escribir_progresos),
+        }[tipo]
+        res = ResultadoImportacion(tipo)
+        self._clientes = {}
+        inicio = time.perf_counter()
+        bloque: List[Tuple[int, dict]] = []
+        for linea, fila in leer_filas(ruta, formato):
+            bloque.append((linea, fila))
+            if len(bloque) >= self.tamano_bloque:
+                self._procesar(bloque, validar, escribir, res, inicio)
+                bloque = []
+        if bloque:
+            self._procesar(bloque, validar, escribir, res, inicio)
+        res.segundos = time.perf_counter() - inicio
+        return res
+
+    def _procesar(self, bloque, validar, escribir, res: ResultadoImportacion, inicio: float):
+        validos = []  # (línea, lo validado)
+        vistos: Dict[str, object] = {}  # usernames/ids nuevos dentro del bloque
+        for linea, fila in bloque:
+            res.leidas += 1
+            try:
+                if not isinstance(fila, dict):
+                    raise ValueError(f"fila inválida: {fila}")
+                validos.append((linea, validar(fila, vistos)))
+            except (ValueError, TypeError, KeyError) as e:
+                self._error(res, linea, str(e))
+        # la validación va sin cerrojo y otro hilo pudo cambiar algo desde entonces (dar de baja al cliente,
+        # usar el username): se escribe bajo el cerrojo y escribir() vuelve a comprobar lo que depende de eso
+        with self.repo.transaccion():
+            rechazadas = escribir(validos)
+        for linea, mensaje in rechazadas:
+            self._error(res, linea, mensaje)
+        res.importadas += len(validos) - len(rechazadas)
+        res.segundos = time.perf_counter() - inicio
+        if self.al_progreso:
+            self.al_progreso(res)
+
+    def _error(self, res: ResultadoImportacion, linea: int, mensaje: str):
+        res.con_error += 1
+        if len(res.errores) < self.max_errores:
+            res.errores.append(ErrorFila(linea, mensaje))
+
+    def _validar_usuario(self, fila: dict, vistos: dict) -> dict:
+        username = _texto(fila, "username")
+        if not username:
+            raise ValueError("falta username")
+        if username in vistos or self.repo.find_by_username(username):
+            raise ValueError(f"el usuario {username!r} ya existe")
+        datos = {"username": username, "password": _texto(fila, "password"), "nombre": _texto(fila, "nombre")}
+        if not datos["password"]:
+            raise ValueError("falta password")
+        id_ = _texto(fila, "id")
+        if id_:
+            if id_ in vistos or self.repo.usuarios.get(id_):
+                raise ValueError(f"el id {id_!r} ya existe")
+            datos["id"] = id_
+            vistos[id_] = True
+        return datos
+
+    def _validar_entrenador(self, fila: dict, vistos: dict):
+        ent = Entrenador(nivel_experiencia=_texto(fila, "nivel_experiencia"), **self._validar_usuario(fila, vistos))
+        vistos[ent.username] = ent
+        return ent, None
+
+    def _validar_cliente(self, fila: dict, vistos: dict):
+        cli = Cliente(objetivos=_texto(fila, "objetivos"), estado_fisico_inicial=_texto(fila, "estado_fisico_inicial"),
+                      **self._validar_usuario(fila, vistos))
+        entrenador = _texto(fila, "entrenador")
+        ent = None
+        if entrenador:
+            ent = self.repo.entrenadores.get(entrenador) or self.repo.find_by_username(entrenador)
+            if not isinstance(ent, Entrenador):
+                raise ValueError(f"entrenador {entrenador!r} no encontrado")
+        vistos[cli.username] = cli
+        return cli, ent
+
+    def _escribir_usuarios(self, validos: list) -> List[Tuple[int, str]]:
+        rechazadas = []
+        for linea, (usr, ent) in validos:
+            if ent is not None and ent.id not in self.repo.entrenadores:
+                rechazadas.append((linea, f"entrenador {ent.username!r} dado de baja"))
+                continue
+            try:
+                if isinstance(usr, Entrenador):
+                    self.repo.add_entrenador(usr)
+                else:
+                    self.repo.add_cliente(usr)
+                    if ent:
+                        self.repo.vincular_cliente_a_entrenador(usr.id, ent.id)
+            except ValueError as e:  # el alta comprueba el username antes de escribir nada
+                rechazadas.append((linea, str(e)))
+        return rechazadas
+
+    def _validar_progreso(self, fila: dict, vistos: dict) -> ProgresoFisico:
+        ref = _texto(fila, "cliente") or _texto(fila, "cliente_id")
+        cliente_id = self._clientes.get(ref)
+        if cliente_id is None:
+            cli = self.repo.clientes.get(ref) or self.repo.find_by_username(ref)
+            if not isinstance(cli, Cliente):
+                raise ValueError(f"cliente {ref!r} no encontrado")
+            cliente_id = self._clientes[ref] = cli.id
+        fecha = normalizar_fecha(_texto(fila, "fecha"))
+        peso_txt = _texto(fila, "peso")
+        try:
+            peso = float(peso_txt) if peso_txt else 0.0
+        except ValueError:
+            raise ValueError(f"peso inválido: {peso_txt!r}") from None
+        if not math.isfinite(peso):
+            raise ValueError(f"peso inválido: {peso_txt!r}")
+        if peso < 0:
+            raise ValueError(f"peso negativo: {peso}")
+        medidas = _numeros(fila, "medidas", PREFIJO_MEDIDA, float)
+        for nombre, valor in medidas.items():
+            if not math.isfinite(valor):
+                raise ValueError(f"medida {nombre!r} inválida: {valor}")
+        repeticiones = _numeros(fila, "repeticiones", PREFIJO_REPETICION, int)
+        for nombre, valor in repeticiones.items():
+            if not -MAX_REPETICIONES - 1 <= valor <= MAX_REPETICIONES:
+                raise ValueError(f"repeticiones {nombre!r} fuera de rango: {valor}")
+        datos = {"cliente_id": cliente_id, "fecha": fecha, "peso": peso, "medidas": medidas,
+                 "repeticiones": repeticiones, "observaciones": _texto(fila, "observaciones")}
+        id_ = _texto(fila, "id")
+        if id_:
+            if id_ in vistos or id_ in self.repo.progresos:
+                raise ValueError(f"el id {id_!r} ya existe")
+            vistos[id_] = True
+            datos["id"] = id_
+        return ProgresoFisico(**datos)
+
+    def _escribir_progresos(self, validos: List[Tuple[int, ProgresoFisico]]) -> List[Tuple[int, str]]:
+        rechazadas = []
+        for linea, p in validos:
+            if p.cliente_id in self.repo.clientes:
+                self.repo.registrar_progreso(p)
+            else:
+                rechazadas.append((linea, f"cliente {p.cliente_id!r} dado de baja"))
+        return rechazadas
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Importa entrenadores, clientes o progresos desde CSV/JSONL")
+    parser.add_argument("tipo", choices=TIPOS)
+    parser.add_argument("archivos", nargs="+", help='"-" lee la entrada estándar')
+    parser.add_argument("--formato", choices=("csv", "jsonl"))
+    parser.add_argument("--db", default=os.environ.get("GESTORGYM_DB"), help="base SQLite de destino")
+    parser.add_argument("--diario", help="directorio del diario de destino")
+    parser.add_argument("--bloque", type=int, default=TAMANO_BLOQUE)
+    args = parser.parse_args(argv)
+
+    if args.db:
+        from almacenamiento_sqlite import RepositorioSQLite
+        repo = RepositorioSQLite(args.db)
+    elif args.diario:
+        from diario import RepositorioDiario
+        repo = RepositorioDiario(args.diario)
+    else:
+        parser.error("indicar --db o --diario: en memoria no quedaría nada importado")
+
+    def avance(res: ResultadoImportacion):
+        print(f"\r{res.leidas:,} filas ({res.filas_por_segundo:,.0f}/s), {res.con_error:,} con error",
+              end="", file=sys.stderr, flush=True)
+
+    importador = Importador(repo, tamano_bloque=args.bloque, al_progreso=avance)
+    errores = 0
+    try:
+        for ruta in args.archivos:
+            res = importador.importar(args.tipo, ruta, args.formato)
+            print(file=sys.stderr)
+            print(f"{ruta}: {res.importadas:,} importadas, {res.con_error:,} con error de {res.leidas:,} filas "
+                  f"en {res.segundos:.1f} s ({res.filas_por_segundo:,.0f} filas/s)")
+            for err in res.errores:
+                print(f"  línea {err.linea}: {err.mensaje}")
+            errores += res.con_error
+    finally:
+        if hasattr(repo, "cerrar"):
+            repo.cerrar()
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
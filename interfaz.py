@@ -0,0 +1,1548 @@
+from typing import List, Dict, Optional, Callable, Tuple
+import tkinter as tk
+from tkinter import ttk, messagebox, simpledialog, filedialog
+from datetime import datetime, date, timezone
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import time
+import queue
+import threading
+
+import metricas
+from nucleo import (Repositorio, Usuario, Entrenador, Cliente, RutinaEjercicio, PlanAlimentacion, ProgresoFisico,
+                    ReporteCliente, IndiceNombres, COLUMNAS_ORDEN, desde_epoch, sin_entrenador, lineas_rutina,
+                    lineas_plan)
+
+
+class TareaCancelada(Exception):
+    pass
+
+
+_hilo_tarea = threading.local()
+
+
+def tarea_actual() -> Optional["Tarea"]:
+    # Tarea que se está ejecutando en este hilo (None fuera del ejecutor); las funciones largas la
+    # usan para comprobar la cancelación o avisar del avance sin cambiar su firma
+    return getattr(_hilo_tarea, "tarea", None)
+
+
+class Tarea:
+    _siguiente = 0
+
+    def __init__(self, nombre: str, cola: "queue.Queue[tuple]"):
+        Tarea._siguiente += 1
+        self.id = Tarea._siguiente
+        self.nombre = nombre
+        self.inicio = time.perf_counter()
+        self.futuro = None
+        self._cola = cola
+        self._cancelada = threading.Event()
+
+    @property
+    def cancelada(self) -> bool:
+        return self._cancelada.is_set()
+
+    def cancelar(self):
+        self._cancelada.set()
+        if self.futuro is not None:
+            self.futuro.cancel()
+
+    def comprobar(self):
+        if self._cancelada.is_set():
+            raise TareaCancelada(self.nombre)
+
+    def avisar(self, *datos):
+        # Desde el hilo de trabajo: el avance se entrega en el hilo de Tk (callback al_avance)
+        self._cola.put(("avance", self, datos))
+
+
+class EjecutorTareas:
+    # Ejecuta el trabajo de repositorio fuera del hilo de Tk. Los resultados vuelven por una cola que
+    # se vacía con after(), y los callbacks (al_terminar, al_fallar, al_avance) corren en el hilo de Tk,
+    # el único que puede tocar widgets. Con un solo hilo de trabajo las tareas que modifican el
+    # repositorio quedan serializadas entre sí.
+    def __init__(self, widget: tk.Misc, hilos: int = 1, intervalo_ms: int = 30, presupuesto_ms: float = 15.0):
+        self.widget = widget
+        self.intervalo_ms = intervalo_ms
+        self.presupuesto_ms = presupuesto_ms
+        self._pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="tarea")
+        self._cola: "queue.Queue[tuple]" = queue.Queue()
+        self._callbacks: Dict[int, Tuple[Optional[Callable], Optional[Callable], Optional[Callable]]] = {}
+        self.en_curso: Dict[int, Tarea] = {}
+        self._oyentes: List[Callable[[], None]] = []
+        self.widget.after(self.intervalo_ms, self._drenar)
+
+    def suscribir(self, oyente: Callable[[], None]):
+        self._oyentes.append(oyente)
+
+    def enviar(self, nombre: str, funcion: Callable, *args, al_terminar: Optional[Callable] = None,
+               al_fallar: Optional[Callable] = None, al_avance: Optional[Callable] = None, **kwargs) -> Tarea:
+        tarea = Tarea(nombre, self._cola)
+        self.en_curso[tarea.id] = tarea
+        self._callbacks[tarea.id] = (al_terminar, al_fallar, al_avance)
+        tarea.futuro = self._pool.submit(self._ejecutar, tarea, funcion, args, kwargs)
+        self._avisar_oyentes()
+        return tarea
+
+    def _ejecutar(self, tarea: Tarea, funcion: Callable, args, kwargs):
+        _hilo_tarea.tarea = tarea
+        perfil = metricas.perfil_de_hilo()
+        try:
+            tarea.comprobar()
+            self._cola.put(("fin", tarea, funcion(*args, **kwargs)))
+        except TareaCancelada:
+            self._cola.put(("cancelada", tarea, None))
+        except Exception as e:
+            self._cola.put(("error", tarea, e))
+        finally:
+            _hilo_tarea.tarea = None
+            if perfil is not None:
+                perfil.disable()
+
+    def cancelar_todas(self):
+        for tarea in list(self.en_curso.values()):
+            tarea.cancelar()
+            if tarea.futuro.cancelled():
+                # no llegó a empezar: no pasará por _ejecutar
+                self._cola.put(("cancelada", tarea, None))
+
+    def _drenar(self):
+        # Entrega resultados hasta agotar la cola o el presupuesto de tiempo, para no bloquear la interfaz
+        try:
+            limite = time.perf_counter() + self.presupuesto_ms / 1000
+            while time.perf_counter() < limite:
+                try:
+                    tipo, tarea, valor = self._cola.get_nowait()
+                except queue.Empty:
+                    break
+                self._entregar(tipo, tarea, valor)
+        finally:
+            self.widget.after(self.intervalo_ms, self._drenar)
+
+    def _entregar(self, tipo: str, tarea: Tarea, valor):
+        al_terminar, al_fallar, al_avance = self._callbacks.get(tarea.id, (None, None, None))
+        if tipo == "avance":
+            if al_avance and not tarea.cancelada:
+                al_avance(*valor)
+            return
+        if self.en_curso.pop(tarea.id, None) is None:
+            return  # ya entregada (p.ej. cancelada antes de empezar)
+        self._callbacks.pop(tarea.id, None)
+        self._avisar_oyentes()
+        if metricas.REGISTRO.activo and tipo != "cancelada":
+            # lo que espera el usuario: desde que se pidió hasta que el resultado llega a la interfaz
+            metricas.REGISTRO.observar(f"tarea.{tarea.nombre}", time.perf_counter() - tarea.inicio, tipo == "error")
+        # cada callback va como evento propio: si abre un diálogo modal la cola se sigue vaciando
+        if tipo == "fin" and al_terminar:
+            self.widget.after(0, al_terminar, valor)
+        elif tipo == "cancelada" and al_fallar:
+            self.widget.after(0, al_fallar, TareaCancelada(tarea.nombre))
+        elif tipo == "error":
+            if al_fallar:
+                self.widget.after(0, al_fallar, valor)
+            else:
+                self.widget.after(0, lambda: messagebox.showerror("Error", f"{tarea.nombre}: {valor}"))
+
+    def _avisar_oyentes(self):
+        for oyente in self._oyentes:
+            oyente()
+
+    def cerrar(self):
+        self.cancelar_todas()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class MonitorLatencia:
+    # Programa un after() cada `intervalo_ms` y mide cuánto llega tarde: ese retraso es el tiempo que
+    # el bucle de eventos de Tk estuvo bloqueado (el peor valor es el "congelamiento" más largo)
+    def __init__(self, widget: tk.Misc, intervalo_ms: int = 50, muestras: int = 1200):
+        self.widget = widget
+        self.intervalo_ms = intervalo_ms
+        self.ultimo_ms = 0.0
+        self.peor_ms = 0.0
+        self._recientes: "deque[float]" = deque(maxlen=muestras)
+        self._esperado = time.perf_counter() + intervalo_ms / 1000
+        self.widget.after(intervalo_ms, self._tic)
+
+    def _tic(self):
+        ahora = time.perf_counter()
+        self.ultimo_ms = max(0.0, (ahora - self._esperado) * 1000)
+        self.peor_ms = max(self.peor_ms, self.ultimo_ms)
+        self._recientes.append(self.ultimo_ms)
+        self._esperado = ahora + self.intervalo_ms / 1000
+        self.widget.after(self.intervalo_ms, self._tic)
+
+    def percentil(self, p: float) -> float:
+        if not self._recientes:
+            return 0.0
+        ordenados = sorted(self._recientes)
+        return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+    def reiniciar(self):
+        self.peor_ms = 0.0
+        self._recientes.clear()
+
+
+class BarraEstado(tk.Frame):
+    def __init__(self, master, tareas: EjecutorTareas, monitor: MonitorLatencia):
+        super().__init__(master, relief="sunken", bd=1)
+        self.tareas = tareas
+        self.monitor = monitor
+        self.lbl_tareas = tk.Label(self, text="Sin tareas en curso", anchor="w")
+        self.lbl_tareas.pack(side="left", padx=6)
+        self.btn_cancelar = tk.Button(self, text="Cancelar tareas", command=tareas.cancelar_todas, state="disabled")
+        self.btn_cancelar.pack(side="left", padx=6)
+        self.lbl_latencia = tk.Label(self, text="", anchor="e")
+        self.lbl_latencia.pack(side="right", padx=6)
+        # doble clic: empieza una medición nueva del peor bloqueo
+        self.lbl_latencia.bind("<Double-Button-1>", lambda e: self.monitor.reiniciar())
+        tareas.suscribir(self.actualizar)
+        self._refrescar_latencia()
+
+    def actualizar(self):
+        en_curso = list(self.tareas.en_curso.values())
+        if en_curso:
+            nombres = ", ".join(t.nombre for t in en_curso[:3]) + ("…" if len(en_curso) > 3 else "")
+            self.lbl_tareas.config(text=f"{len(en_curso)} en curso: {nombres}")
+            self.btn_cancelar.config(state="normal")
+        else:
+            self.lbl_tareas.config(text="Sin tareas en curso")
+            self.btn_cancelar.config(state="disabled")
+
+    def _refrescar_latencia(self):
+        m = self.monitor
+        self.lbl_latencia.config(text=f"UI bloqueada: máx {m.peor_ms:.0f} ms, p99 {m.percentil(99):.0f} ms")
+        self.after(500, self._refrescar_latencia)
+
+
+class App(tk.Tk):
+    def __init__(self, repo: Repositorio):
+        super().__init__()
+        # el repositorio de esta ventana; frames y diálogos lo toman de aquí
+        self.repo = repo
+        self.title("Gestor de Gimnasio")
+        self.geometry("1000x650")
+        self.resizable(False, False)
+        self.usuario_actual: Optional[Usuario] = None
+        self.tareas = EjecutorTareas(self)
+        self.monitor = MonitorLatencia(self)
+        self.barra_estado = BarraEstado(self, self.tareas, self.monitor)
+        self.barra_estado.pack(side="bottom", fill="x")
+        self.protocol("WM_DELETE_WINDOW", self.cerrar)
+        metricas.REGISTRO.medidor("tareas_en_curso", lambda: len(self.tareas.en_curso), "Tareas del ejecutor en curso")
+        metricas.REGISTRO.medidor("ui_bloqueo_max_segundos", lambda: self.monitor.peor_ms / 1000,
+                                  "Bloqueo más largo del bucle de Tk")
+        metricas.REGISTRO.medidor("ui_bloqueo_p99_segundos", lambda: self.monitor.percentil(99) / 1000,
+                                  "Percentil 99 de los bloqueos recientes del bucle de Tk")
+
+        self.frame_login = FrameLogin(self)
+        self.frame_dashboard = FrameDashboard(self)
+
+        self.frame_login.pack(fill="both", expand=True)
+
+    def entrar(self, usuario: Usuario):
+        self.usuario_actual = usuario
+        self.frame_login.pack_forget()
+        self.frame_dashboard.refresh()
+        self.frame_dashboard.pack(fill="both", expand=True)
+
+    def salir(self):
+        self.usuario_actual = None
+        self.frame_dashboard.pack_forget()
+        self.frame_login.clear_fields()
+        self.frame_login.pack(fill="both", expand=True)
+
+    def cerrar(self):
+        self.tareas.cerrar()
+        self.destroy()
+
+
+class FrameLogin(tk.Frame):
+    def __init__(self, master):
+        super().__init__(master)
+        self.repo = master.repo
+        self.master = master
+        tk.Label(self, text="Gestor de Gimnasio", font=("Arial", 20)).pack(pady=16)
+
+        frm = tk.Frame(self)
+        frm.pack(pady=6)
+        tk.Label(frm, text="Usuario:").grid(row=0, column=0, sticky="e", padx=6)
+        tk.Label(frm, text="Contraseña:").grid(row=1, column=0, sticky="e", padx=6)
+        self.ent_user = tk.Entry(frm, width=30)
+        self.ent_pass = tk.Entry(frm, show="*", width=30)
+        self.ent_user.grid(row=0, column=1, pady=6)
+        self.ent_pass.grid(row=1, column=1, pady=6)
+
+        btns = tk.Frame(self)
+        btns.pack(pady=12)
+        tk.Button(btns, text="Iniciar sesión", command=self.login, width=18, height=2).pack(side="left", padx=6)
+        tk.Button(btns, text="Registrar (cliente/entrenador)", command=self.registrar_usuario_dialog, width=24, height=2).pack(side="left", padx=6)
+        tk.Button(btns, text="Salir", command=self.quit, width=10, height=2).pack(side="left", padx=6)
+
+    def clear_fields(self):
+        self.ent_user.delete(0, tk.END)
+        self.ent_pass.delete(0, tk.END)
+
+    def login(self):
+        u = self.ent_user.get().strip()
+        p = self.ent_pass.get().strip()
+        if not u or not p:
+            messagebox.showwarning("Faltan datos", "Ingrese usuario y contraseña.")
+            return
+        found = self.repo.authenticate(u, p)
+        if found:
+            messagebox.showinfo("Bienvenido", f"Sesión iniciada: {u}")
+            self.master.entrar(found)
+        else:
+            messagebox.showerror("Error", "Usuario o contraseña incorrectos.")
+
+    def registrar_usuario_dialog(self):
+        dlg = RegistroUsuarioDialog(self.master)
+        self.wait_window(dlg)
+
+
+class RegistroUsuarioDialog(tk.Toplevel):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.repo = parent.winfo_toplevel().repo
+        self.title("Registrar Usuario")
+        self.geometry("520x420")
+        self.transient(parent)
+        self.grab_set()
+
+        self.tipo_var = tk.StringVar(value="cliente")
+        tk.Label(self, text="Tipo de usuario", font=("Arial", 12)).pack(pady=6)
+        tipo_frame = tk.Frame(self)
+        tipo_frame.pack()
+        tk.Radiobutton(tipo_frame, text="Cliente", variable=self.tipo_var, value="cliente").pack(side="left", padx=10)
+        tk.Radiobutton(tipo_frame, text="Entrenador", variable=self.tipo_var, value="entrenador").pack(side="left", padx=10)
+
+        form = tk.Frame(self)
+        form.pack(pady=10, padx=8, fill="x")
+        tk.Label(form, text="Nombre completo:").grid(row=0, column=0, sticky="e", pady=6)
+        tk.Label(form, text="Usuario (login):").grid(row=1, column=0, sticky="e", pady=6)
+        tk.Label(form, text="Contraseña:").grid(row=2, column=0, sticky="e", pady=6)
+
+        self.e_nombre = tk.Entry(form, width=40); self.e_nombre.grid(row=0, column=1, pady=6)
+        self.e_user = tk.Entry(form, width=40); self.e_user.grid(row=1, column=1, pady=6)
+        self.e_pass = tk.Entry(form, width=40, show="*"); self.e_pass.grid(row=2, column=1, pady=6)
+
+
+        tk.Label(form, text="Objetivo (clientes):").grid(row=3, column=0, sticky="e", pady=6)
+        self.combo_obj = ttk.Combobox(form, values=["Más fuerza", "Bajar de peso", "Salud"], state="readonly", width=37)
+        self.combo_obj.grid(row=3, column=1, pady=6)
+        self.combo_obj.set("Salud")
+
+        tk.Label(form, text="Estado físico inicial:").grid(row=4, column=0, sticky="e", pady=6)
+        self.e_estado = tk.Entry(form, width=40); self.e_estado.grid(row=4, column=1, pady=6)
+
+
+        tk.Label(form, text="Nivel experiencia (entrenadores):").grid(row=5, column=0, sticky="e", pady=6)
+        self.e_nivel = tk.Entry(form, width=40); self.e_nivel.grid(row=5, column=1, pady=6)
+
+        btns = tk.Frame(self)
+        btns.pack(pady=12)
+        tk.Button(btns, text="Registrar", command=self.registrar, width=14, height=2).pack(side="left", padx=8)
+        tk.Button(btns, text="Cancelar", command=self.destroy, width=12, height=2).pack(side="left", padx=8)
+
+    def registrar(self):
+        tipo = self.tipo_var.get()
+        nombre = self.e_nombre.get().strip()
+        user = self.e_user.get().strip()
+        pwd = self.e_pass.get().strip()
+        if not nombre or not user or not pwd:
+            messagebox.showwarning("Datos incompletos", "Complete nombre, usuario y contraseña.")
+            return
+
+        if self.repo.find_by_username(user):
+            messagebox.showerror("Error", "El nombre de usuario ya existe.")
+            return
+        tareas = self.master.winfo_toplevel().tareas
+        # add_cliente/add_entrenador lo vuelven a comprobar al guardar: alguien pudo registrarlo mientras tanto
+        fallo = lambda e: messagebox.showerror("Error", str(e))
+        if tipo == "cliente":
+            objetivo = self.combo_obj.get().strip() or "Salud"
+            cli = Cliente(username=user, password=pwd, nombre=nombre, objetivos=objetivo, estado_fisico_inicial=self.e_estado.get().strip())
+            tareas.enviar("Registrar cliente", self.repo.add_cliente, cli,
+                          al_terminar=lambda _: messagebox.showinfo("Cliente registrado", f"Cliente {nombre} registrado correctamente."),
+                          al_fallar=fallo)
+        else:
+            ent = Entrenador(username=user, password=pwd, nombre=nombre, nivel_experiencia=self.e_nivel.get().strip())
+            tareas.enviar("Registrar entrenador", self.repo.add_entrenador, ent,
+                          al_terminar=lambda _: messagebox.showinfo("Entrenador registrado", f"Entrenador {nombre} registrado correctamente."),
+                          al_fallar=fallo)
+        self.destroy()
+
+
+class FrameDashboard(tk.Frame):
+    def __init__(self, master):
+        super().__init__(master)
+        self.repo = master.repo
+        self.master = master
+
+        header = tk.Frame(self)
+        header.pack(fill="x", pady=8)
+        self.lbl_user = tk.Label(header, text="No autenticado", font=("Arial", 14))
+        self.lbl_user.pack(side="left", padx=8)
+        tk.Button(header, text="Cerrar sesión", command=self.master.salir, width=12, height=1).pack(side="right", padx=8)
+
+        botones = tk.Frame(self)
+        botones.pack(pady=6, fill="x")
+
+
+        tk.Button(botones, text="Registrar Cliente", width=20, height=2, command=self.registrar_cliente).pack(side="left", padx=6)
+        tk.Button(botones, text="Registrar Entrenador", width=20, height=2, command=self.registrar_entrenador).pack(side="left", padx=6)
+        tk.Button(botones, text="Vincular Cliente a Entrenador", width=26, height=2, command=self.vincular_cliente).pack(side="left", padx=6)
+        tk.Button(botones, text="Crear Plan de Alimentación (auto)", width=26, height=2, command=self.crear_plan_auto).pack(side="left", padx=6)
+        tk.Button(botones, text="Crear Rutina (auto)", width=22, height=2, command=self.crear_rutina_auto).pack(side="left", padx=6)
+        tk.Button(botones, text="Ver Progreso de Cliente", width=20, height=2, command=self.ver_progreso).pack(side="left", padx=6)
+        tk.Button(botones, text="Asignación masiva", width=16, height=2, command=self.asignacion_masiva).pack(side="left", padx=6)
+
+
+        self.frame_ent_ops = tk.Frame(self)
+        self.frame_ent_ops.pack(pady=6)
+        tk.Button(self.frame_ent_ops, text="Crear Rutina personalizada (entrenador)", width=30, height=2, command=self.crear_rutina_personalizada).pack(side="left", padx=6)
+        tk.Button(self.frame_ent_ops, text="Crear Plan personalizado (entrenador)", width=30, height=2, command=self.crear_plan_personalizado).pack(side="left", padx=6)
+
+
+        area = tk.Frame(self)
+        area.pack(fill="both", expand=True, padx=8, pady=8)
+
+        self.tabs = ttk.Notebook(area)
+        self.tab_ent = tk.Frame(self.tabs)
+        self.tab_cli = tk.Frame(self.tabs)
+        self.tab_rut = tk.Frame(self.tabs)
+        self.tab_plan = tk.Frame(self.tabs)
+        self.tab_prog = tk.Frame(self.tabs)
+        self.tab_rep = tk.Frame(self.tabs)
+
+        self.tabs.add(self.tab_ent, text="Entrenadores")
+        self.tabs.add(self.tab_cli, text="Clientes")
+        self.tabs.add(self.tab_rut, text="Rutinas")
+        self.tabs.add(self.tab_plan, text="Planes")
+        self.tabs.add(self.tab_prog, text="Progresos")
+        self.tabs.add(self.tab_rep, text="Reporte")
+        self.tabs.pack(fill="both", expand=True)
+        # qué entidad muestra cada pestaña; el reporte no está aquí porque se calcula al pedirlo
+        self._tipo_pestana = {str(self.tab_ent): "entrenador", str(self.tab_cli): "cliente", str(self.tab_rut): "rutina",
+                              str(self.tab_plan): "plan", str(self.tab_prog): "progreso"}
+        self.tabs.bind("<<NotebookTabChanged>>", lambda e: self._refresh_trees())
+
+
+        self.tree_ent = ttk.Treeview(self.tab_ent, columns=("id","nombre","nivel","clientes"), show="headings")
+        for c in ("id","nombre","nivel","clientes"):
+            self.tree_ent.heading(c, text=c)
+        self.tree_ent.pack(fill="both", expand=True)
+
+        self.tabla_cli = TablaVirtual(self.tab_cli, ("id","nombre","objetivos","estado","entrenador"),
+                                      contar=lambda: self.repo.contar("cliente"),
+                                      obtener=lambda desde, n, orden, desc: self.repo.pagina("cliente", desde, n, orden, desc),
+                                      fila=self._fila_cliente, orden="nombre", ordenables=COLUMNAS_ORDEN["cliente"])
+        self.tabla_cli.pack(fill="both", expand=True)
+
+        self.tree_rut = ttk.Treeview(self.tab_rut, columns=("id","cliente","entrenador","fecha","intensidad"), show="headings")
+        for c in ("id","cliente","entrenador","fecha","intensidad"):
+            self.tree_rut.heading(c, text=c)
+        self.tree_rut.pack(fill="both", expand=True)
+
+        self.tree_plan = ttk.Treeview(self.tab_plan, columns=("id","cliente","calorias","comidas","fecha"), show="headings")
+        for c in ("id","cliente","calorias","comidas","fecha"):
+            self.tree_plan.heading(c, text=c)
+        self.tree_plan.pack(fill="both", expand=True)
+
+        self.tabla_prog = TablaVirtual(self.tab_prog, ("id","cliente","fecha","peso","obs"),
+                                       contar=lambda: self.repo.contar("progreso"),
+                                       obtener=lambda desde, n, orden, desc: self.repo.pagina("progreso", desde, n, orden, desc),
+                                       fila=self._fila_progreso, orden="fecha", ordenables=COLUMNAS_ORDEN["progreso"])
+        self.tabla_prog.pack(fill="both", expand=True)
+
+        # el reporte se calcula de una pasada sobre todos los progresos: sólo al pedirlo
+        self._reporte: Dict[str, List[ReporteCliente]] = {"nombre": []}
+        tk.Button(self.tab_rep, text="Actualizar reporte", width=20, command=self.actualizar_reporte).pack(anchor="w", pady=4)
+        columnas_rep = ("nombre", "controles", "delta_peso", "kg_por_semana", "dias_sin_control", "delta_cintura", "adherencia")
+        self.tabla_rep = TablaVirtual(self.tab_rep, columnas_rep, contar=lambda: len(self._reporte["nombre"]),
+                                      obtener=self._pagina_reporte, fila=self._fila_reporte,
+                                      orden="nombre", ordenables=columnas_rep)
+        self.tabla_rep.pack(fill="both", expand=True)
+
+        acciones = tk.Frame(self)
+        acciones.pack(pady=6)
+        tk.Button(acciones, text="Agregar Progreso (cliente)", width=20, height=2, command=self.agregar_progreso).pack(side="left", padx=6)
+        tk.Button(acciones, text="Detalles Cliente", width=18, height=2, command=self.detalles_cliente).pack(side="left", padx=6)
+        tk.Button(acciones, text="Exportar…", width=14, height=2, command=self.exportar).pack(side="left", padx=6)
+        tk.Button(acciones, text="Diagnóstico", width=14, height=2, command=self.diagnostico).pack(side="left", padx=6)
+
+        # versión de repo que refleja cada pestaña; None obliga a una carga completa.
+        # Sólo se pone al día la pestaña visible: las demás quedan atrasadas hasta que se eligen
+        self._version_vista: Dict[str, Optional[int]] = dict.fromkeys(self._tipo_pestana.values())
+        self._refresco_en_curso = False
+        self._refresco_pendiente = False
+        self._diagnostico: Optional[DiagnosticoDialog] = None
+
+    def refresh(self):
+        u = self.master.usuario_actual
+        if isinstance(u, Entrenador):
+            rol = "Entrenador"
+        elif isinstance(u, Cliente):
+            rol = "Cliente"
+        else:
+            rol = "Usuario"
+        self.lbl_user.config(text=f"Usuario: {u.username} ({rol})")
+
+        if not isinstance(u, Entrenador):
+            self.frame_ent_ops.forget()
+        else:
+
+            self.frame_ent_ops.pack(pady=6)
+        self._refresh_trees()
+        # la búsqueda por nombre se arma en segundo plano: el primer diálogo de selección abre sin esperar
+        self.master.tareas.enviar("Índice de nombres",
+                                  lambda: [self.repo.buscar_nombres(tipo, "", 1) for tipo in ("cliente", "entrenador")])
+
+    @metricas.cronometrar("gui._refresh_trees")
+    def _refresh_trees(self):
+        # Sólo pone al día la pestaña visible, y de ella sólo las filas de entidades cambiadas desde
+        # la última vez; el iid de cada fila es el id. Las demás pestañas se ponen al día al elegirlas
+        # (<<NotebookTabChanged>>), así un control nuevo sólo cuesta trabajo en la de Progresos.
+        # Qué cambió y los valores de cada fila se calculan en el ejecutor; aquí sólo se aplican.
+        # Si se pide otro refresco mientras hay uno en curso, se hace uno más al terminar.
+        if self.master.usuario_actual is None:
+            return
+        tipo = self._tipo_pestana.get(str(self.tabs.select()))
+        if tipo is None:
+            return
+        if self._refresco_en_curso:
+            self._refresco_pendiente = True
+            return
+        if self._version_vista[tipo] == self.repo.version:
+            return
+        self._refresco_en_curso = True
+        self.master.tareas.enviar("Actualizar vistas", self._calcular_refresco, tipo, self._version_vista[tipo],
+                                  al_terminar=self._aplicar_refresco, al_fallar=self._refresco_fallido)
+
+    @metricas.cronometrar("gui._calcular_refresco")
+    def _calcular_refresco(self, tipo: str, version: Optional[int]):
+        # Hilo de trabajo: sólo lee el repositorio y arma tuplas, no toca widgets
+        with self.repo.leyendo():
+            nueva = self.repo.version
+            cambios = self.repo.cambios_desde(version) if version is not None else None
+            vistas = self._vistas()
+            if tipo not in vistas:
+                # tabla virtual: basta con saber si hay que volver a pedir la página visible
+                return tipo, nueva, cambios is None or tipo in cambios, []
+            _, coleccion, fila = vistas[tipo]
+            if cambios is None:
+                return tipo, nueva, True, [(obj.id, fila(obj)) for obj in list(coleccion.values())]
+            filas = []
+            for id_ in cambios.get(tipo, ()):
+                obj = coleccion.get(id_)
+                filas.append((id_, fila(obj) if obj is not None else None))
+            return tipo, nueva, False, filas
+
+    @metricas.cronometrar("gui._aplicar_refresco")
+    def _aplicar_refresco(self, resultado, bloque: int = 1000):
+        # Las filas se insertan de a `bloque` por evento para que una carga completa no congele la ventana
+        tipo, nueva, completo, filas = resultado
+        vistas = self._vistas()
+        if tipo not in vistas:
+            if completo:
+                {"cliente": self.tabla_cli, "progreso": self.tabla_prog}[tipo].refrescar()
+            self._version_vista[tipo] = nueva
+            self._fin_refresco()
+            return
+        tree = vistas[tipo][0]
+        if completo:
+            tree.delete(*tree.get_children())
+
+        def aplicar(desde: int):
+            for id_, valores in filas[desde:desde + bloque]:
+                if valores is None:
+                    if tree.exists(id_):
+                        tree.delete(id_)
+                elif tree.exists(id_):
+                    tree.item(id_, values=valores)
+                else:
+                    tree.insert("", "end", iid=id_, values=valores)
+            if desde + bloque < len(filas):
+                self.after(1, aplicar, desde + bloque)
+            else:
+                self._version_vista[tipo] = nueva
+                self._fin_refresco()
+        aplicar(0)
+
+    def _refresco_fallido(self, error):
+        if not isinstance(error, TareaCancelada):
+            messagebox.showerror("Error", f"No se pudieron actualizar las vistas: {error}")
+        self._fin_refresco()
+
+    def _fin_refresco(self):
+        self._refresco_en_curso = False
+        if self._refresco_pendiente:
+            self._refresco_pendiente = False
+            self._refresh_trees()
+
+    def actualizar_reporte(self):
+        self.master.tareas.enviar("Reporte de progreso",
+                                  lambda: sorted(self.repo.reporte_progreso(), key=lambda r: r.nombre.lower()),
+                                  al_terminar=self._mostrar_reporte)
+
+    def _mostrar_reporte(self, filas: List[ReporteCliente]):
+        self._reporte = {"nombre": filas}
+        self.tabla_rep.refrescar()
+
+    def _pagina_reporte(self, desde, cantidad, orden, descendente):
+        ordenados = self._reporte.get(orden)
+        if ordenados is None:
+            # los clientes sin datos (None) quedan siempre al final del orden ascendente
+            ordenados = self._reporte[orden] = sorted(
+                self._reporte["nombre"], key=lambda r: (getattr(r, orden) is None, getattr(r, orden) or 0))
+        if descendente:
+            n = len(ordenados)
+            return ordenados[max(0, n - desde - cantidad):max(0, n - desde)][::-1]
+        return ordenados[desde:desde + cantidad]
+
+    def _fila_reporte(self, r: ReporteCliente):
+        vacio = lambda v: "" if v is None else v
+        return (r.nombre, r.controles, vacio(r.delta_peso), vacio(r.kg_por_semana), vacio(r.dias_sin_control),
+                vacio(r.delta_cintura), "" if r.adherencia is None else f"{r.adherencia:.0%}")
+
+    def _vistas(self):
+        return {
+            "entrenador": (self.tree_ent, self.repo.entrenadores, self._fila_entrenador),
+            "rutina": (self.tree_rut, self.repo.rutinas, self._fila_rutina),
+            "plan": (self.tree_plan, self.repo.planes, self._fila_plan),
+        }
+
+    def _fila_entrenador(self, ent):
+        return (ent.id, ent.nombre, ent.nivel_experiencia, len(ent.clientes_ids))
+
+    def _fila_cliente(self, cli):
+        ent_name = self.repo.entrenadores[cli.entrenador_id].nombre if (cli.entrenador_id and cli.entrenador_id in self.repo.entrenadores) else ""
+        return (cli.id, cli.nombre, cli.objetivos, cli.estado_fisico_inicial, ent_name)
+
+    def _fila_rutina(self, r):
+        ent_name = self.repo.entrenadores[r.entrenador_id].nombre if r.entrenador_id in self.repo.entrenadores else r.entrenador_id
+        cli_name = self.repo.clientes[r.cliente_id].nombre if r.cliente_id in self.repo.clientes else r.cliente_id
+        return (r.id, cli_name, ent_name, r.fecha_creacion, r.intensidad)
+
+    def _fila_plan(self, p):
+        cli_name = self.repo.clientes[p.cliente_id].nombre if p.cliente_id in self.repo.clientes else p.cliente_id
+        return (p.id, cli_name, p.calorias_diarias, p.comidas_por_dia, p.fecha_creacion)
+
+    def _fila_progreso(self, pr):
+        cli_name = self.repo.clientes[pr.cliente_id].nombre if pr.cliente_id in self.repo.clientes else pr.cliente_id
+        return (pr.id, cli_name, pr.fecha, pr.peso, pr.observaciones)
+
+
+    def registrar_cliente(self):
+        dlg = RegistroUsuarioDialog(self.master)
+        self.wait_window(dlg)
+        self._refresh_trees()
+
+    def registrar_entrenador(self):
+        dlg = RegistroUsuarioDialog(self.master)
+        self.wait_window(dlg)
+        self._refresh_trees()
+
+    def vincular_cliente(self):
+        if not self.repo.clientes:
+            messagebox.showwarning("Sin clientes", "No hay clientes registrados.")
+            return
+        if not self.repo.entrenadores:
+            messagebox.showwarning("Sin entrenadores", "No hay entrenadores registrados.")
+            return
+        sel_cli = SelectionDialog(self, "Seleccionar Cliente", buscar=functools.partial(self.repo.buscar_nombres, "cliente"))
+        self.wait_window(sel_cli)
+        if not sel_cli.selected_id:
+            return
+        sel_ent = SelectionDialog(self, "Seleccionar Entrenador", buscar=functools.partial(self.repo.buscar_nombres, "entrenador"))
+        self.wait_window(sel_ent)
+        if not sel_ent.selected_id:
+            return
+        def hecho(ok):
+            self._refresh_trees()
+            if ok:
+                messagebox.showinfo("Vinculado", "Cliente vinculado correctamente al entrenador.")
+            else:
+                messagebox.showerror("Error", "No se pudo vincular.")
+        self.master.tareas.enviar("Vincular cliente", self.repo.vincular_cliente_a_entrenador,
+                                  sel_cli.selected_id, sel_ent.selected_id, al_terminar=hecho)
+
+    def crear_plan_auto(self):
+        if not self.repo.clientes:
+            messagebox.showwarning("Sin clientes", "No hay clientes registrados.")
+            return
+        sel = SelectionDialog(self, "Seleccionar Cliente para Plan automático", buscar=functools.partial(self.repo.buscar_nombres, "cliente"))
+        self.wait_window(sel)
+        if not sel.selected_id:
+            return
+        cli = self.repo.clientes[sel.selected_id]
+
+        if cli.entrenador_id:
+
+            resp = messagebox.askyesno("Cliente con entrenador", "Este cliente tiene entrenador asignado. ¿Deseas crear un plan automático igualmente? (Se recomienda que el entrenador cree uno personalizado).")
+            if not resp:
+                return
+        self.master.tareas.enviar("Plan automático", self.repo.crear_plan_automatico, sel.selected_id,
+                                  al_terminar=self._mostrar_plan)
+
+    def _mostrar_plan(self, plan: PlanAlimentacion):
+        self._refresh_trees()
+        MostrarPlanDialog(self, plan)
+
+    def crear_rutina_auto(self):
+        if not self.repo.clientes:
+            messagebox.showwarning("Sin clientes", "No hay clientes registrados.")
+            return
+        sel = SelectionDialog(self, "Seleccionar Cliente para Rutina automática", buscar=functools.partial(self.repo.buscar_nombres, "cliente"))
+        self.wait_window(sel)
+        if not sel.selected_id:
+            return
+        cli = self.repo.clientes[sel.selected_id]
+        if cli.entrenador_id:
+            resp = messagebox.askyesno("Cliente con entrenador", "Este cliente tiene entrenador asignado. ¿Deseas crear una rutina automática igualmente? (Se recomienda que el entrenador cree una personalizada).")
+            if not resp:
+                return
+        self.master.tareas.enviar("Rutina automática", self.repo.crear_rutina_automatica, sel.selected_id,
+                                  cli.entrenador_id, al_terminar=self._mostrar_rutina)
+
+    def _mostrar_rutina(self, rutina: RutinaEjercicio):
+        self._refresh_trees()
+        MostrarRutinaDialog(self, rutina)
+
+    def asignacion_masiva(self):
+        if not self.repo.clientes:
+            messagebox.showwarning("Sin clientes", "No hay clientes registrados.")
+            return
+        AsignacionMasivaDialog(self).wait_window()
+        self._refresh_trees()
+
+    def exportar(self):
+        if not self.repo.clientes:
+            messagebox.showwarning("Sin clientes", "No hay clientes registrados.")
+            return
+        ExportarDialog(self).wait_window()
+
+    def diagnostico(self):
+        if self._diagnostico is not None and self._diagnostico.winfo_exists():
+            self._diagnostico.lift()
+        else:
+            self._diagnostico = DiagnosticoDialog(self)
+
+    def ver_progreso(self):
+        if not self.repo.clientes:
+            messagebox.showwarning("Sin clientes", "No hay clientes registrados.")
+            return
+        sel = SelectionDialog(self, "Seleccionar Cliente para ver Progreso", buscar=functools.partial(self.repo.buscar_nombres, "cliente"))
+        self.wait_window(sel)
+        if not sel.selected_id:
+            return
+        cliente = self.repo.clientes[sel.selected_id]
+        dlg = VerProgresoDialog(self, cliente)
+        self.wait_window(dlg)
+
+    def agregar_progreso(self):
+        if not self.repo.clientes:
+            messagebox.showwarning("Sin clientes", "No hay clientes registrados.")
+            return
+        sel = SelectionDialog(self, "Seleccionar Cliente para agregar Progreso", buscar=functools.partial(self.repo.buscar_nombres, "cliente"))
+        self.wait_window(sel)
+        if not sel.selected_id:
+            return
+        cliente = self.repo.clientes[sel.selected_id]
+        peso = simpledialog.askfloat("Peso", "Ingrese peso (kg):", parent=self, minvalue=0.0)
+        if peso is None:
+            return
+        obs = simpledialog.askstring("Observaciones", "Observaciones (opcional):", parent=self)
+        medidas = {}
+        m_cint = simpledialog.askfloat("Medida - cintura (cm)", "Cintura (cm):", parent=self, minvalue=0.0)
+        if m_cint is not None:
+            medidas["cintura"] = m_cint
+        prog = ProgresoFisico(cliente_id=cliente.id, peso=peso, medidas=medidas, observaciones=obs or "")
+
+        def hecho(_):
+            self._refresh_trees()
+            messagebox.showinfo("Registrado", "Progreso registrado correctamente.")
+        self.master.tareas.enviar("Registrar progreso", self.repo.registrar_progreso, prog, al_terminar=hecho)
+
+    def detalles_cliente(self):
+        sel = SelectionDialog(self, "Seleccionar Cliente para Detalles", buscar=functools.partial(self.repo.buscar_nombres, "cliente"))
+        self.wait_window(sel)
+        if not sel.selected_id:
+            return
+        self.master.tareas.enviar("Detalles de cliente", self._texto_detalles, sel.selected_id,
+                                  al_terminar=lambda texto: messagebox.showinfo("Detalles del Cliente", texto))
+
+    @metricas.cronometrar("gui._texto_detalles")
+    def _texto_detalles(self, cliente_id: str) -> str:
+        cli = self.repo.clientes[cliente_id]
+        res = self.repo.resumen_cliente(cliente_id)
+        textos = []
+        textos.append(f"Nombre: {cli.nombre}")
+        textos.append(f"Objetivo: {cli.objetivos}")
+        textos.append(f"Estado inicial: {cli.estado_fisico_inicial}")
+        textos.append(f"Entrenador: {self.repo.entrenadores[cli.entrenador_id].nombre if (cli.entrenador_id and cli.entrenador_id in self.repo.entrenadores) else 'No asignado'}")
+        textos.append(f"Rutinas: {res.rutinas}")
+        textos.append(f"Planes: {res.planes}")
+        if res.primera_actividad is not None:
+            primera = datetime.fromtimestamp(res.primera_actividad, timezone.utc).date()
+            dias = (date.today() - primera).days
+            textos.append(f"Tiempo entrenando (aprox): {dias} días (desde {primera.isoformat()})")
+        else:
+            textos.append("Tiempo entrenando: Sin registros aún.")
+        if res.ultimo_control is not None:
+            textos.append(f"Último control: {desde_epoch(res.ultimo_control)[:10]} ({res.controles} en total)")
+        if res.pesos >= 2:
+            cambio = res.ultimo_peso - res.primer_peso
+            textos.append(f"Cambio de peso desde primer control: {cambio:+.2f} kg")
+        elif res.pesos == 1:
+            textos.append("Sólo hay un registro de peso — no es posible evaluar tendencia aún.")
+        else:
+            textos.append("No hay registros de peso.")
+        return "\n".join(textos)
+
+
+    def _entrenador_actual(self) -> Optional[Entrenador]:
+        # El del login es una copia de ese momento (con --db, una fila leída entonces): sus clientes_ids
+        # no ven los vínculos posteriores, así que se vuelve a leer del repositorio
+        ent = self.repo.entrenadores.get(self.master.usuario_actual.id)
+        if ent is None:
+            messagebox.showerror("Error", "Tu usuario de entrenador ya no existe.")
+        return ent
+
+    def crear_rutina_personalizada(self):
+        # Solo visible/usable si usuario actual es entrenador
+        if not isinstance(self.master.usuario_actual, Entrenador):
+            messagebox.showerror("Acceso denegado", "Sólo los entrenadores pueden crear rutinas personalizadas.")
+            return
+        ent = self._entrenador_actual()
+        if ent is None:
+            return
+        if not ent.clientes_ids:
+            messagebox.showwarning("Sin clientes vinculados", "No tienes clientes vinculados.")
+            return
+
+        opciones = [(cid, self.repo.clientes[cid].nombre) for cid in ent.clientes_ids if cid in self.repo.clientes]
+        sel = SelectionDialog(self, "Seleccionar cliente (para rutina personalizada)", opciones)
+        self.wait_window(sel)
+        if not sel.selected_id:
+            return
+        dlg = RutinaPersonalizadaDialog(self, ent, self.repo.clientes[sel.selected_id])
+        self.wait_window(dlg)
+        if dlg.result:
+            ejercicios_semana, intensidad = dlg.result
+            self.master.tareas.enviar("Rutina personalizada", self.repo.crear_rutina_personalizada, ent.id, sel.selected_id,
+                                      ejercicios_semana, intensidad=intensidad, al_terminar=self._mostrar_rutina,
+                                      al_fallar=lambda e: messagebox.showerror("Error", str(e)))
+
+    def crear_plan_personalizado(self):
+        if not isinstance(self.master.usuario_actual, Entrenador):
+            messagebox.showerror("Acceso denegado", "Sólo los entrenadores pueden crear planes personalizados.")
+            return
+        ent = self._entrenador_actual()
+        if ent is None:
+            return
+        if not ent.clientes_ids:
+            messagebox.showwarning("Sin clientes vinculados", "No tienes clientes vinculados.")
+            return
+        opciones = [(cid, self.repo.clientes[cid].nombre) for cid in ent.clientes_ids if cid in self.repo.clientes]
+        sel = SelectionDialog(self, "Seleccionar cliente (para plan personalizado)", opciones)
+        self.wait_window(sel)
+        if not sel.selected_id:
+            return
+        dlg = PlanPersonalizadoDialog(self, ent, self.repo.clientes[sel.selected_id])
+        self.wait_window(dlg)
+        if dlg.result:
+            detalle_comidas, calorias, comidas_por_dia, observaciones = dlg.result
+            self.master.tareas.enviar("Plan personalizado", self.repo.crear_plan_personalizado, ent.id, sel.selected_id,
+                                      detalle_comidas, calorias, comidas_por_dia, observaciones,
+                                      al_terminar=self._mostrar_plan,
+                                      al_fallar=lambda e: messagebox.showerror(
+                                          "Permiso" if isinstance(e, PermissionError) else "Error", str(e)))
+
+
+class AsignacionMasivaDialog(tk.Toplevel):
+    # Lanza repo.asignar_automaticos en el ejecutor de tareas; el avance llega como callbacks en el hilo de Tk
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.repo = parent.winfo_toplevel().repo
+        self.title("Asignación automática masiva")
+        self.geometry("460x300")
+        self.transient(parent)
+        self.grab_set()
+        self._tarea: Optional[Tarea] = None
+
+        tk.Label(self, text="Crear planes y rutinas automáticos para:", font=("Arial", 12)).pack(pady=8)
+        self.var_filtro = tk.StringVar(value="sin_entrenador")
+        frm = tk.Frame(self)
+        frm.pack(anchor="w", padx=16)
+        tk.Radiobutton(frm, text="Todos los clientes", variable=self.var_filtro, value="todos").pack(anchor="w")
+        tk.Radiobutton(frm, text="Clientes sin entrenador", variable=self.var_filtro, value="sin_entrenador").pack(anchor="w")
+        fila = tk.Frame(frm)
+        fila.pack(anchor="w")
+        tk.Radiobutton(fila, text="Sin plan o con plan de más de", variable=self.var_filtro, value="plan_vencido").pack(side="left")
+        self.ent_dias = tk.Entry(fila, width=5)
+        self.ent_dias.insert(0, "30")
+        self.ent_dias.pack(side="left")
+        tk.Label(fila, text="días").pack(side="left")
+
+        self.var_planes = tk.BooleanVar(value=True)
+        self.var_rutinas = tk.BooleanVar(value=True)
+        opciones = tk.Frame(self)
+        opciones.pack(pady=4)
+        tk.Checkbutton(opciones, text="Planes", variable=self.var_planes).pack(side="left", padx=6)
+        tk.Checkbutton(opciones, text="Rutinas", variable=self.var_rutinas).pack(side="left", padx=6)
+
+        self.barra = ttk.Progressbar(self, length=400, mode="determinate")
+        self.barra.pack(pady=6)
+        self.lbl_estado = tk.Label(self, text="")
+        self.lbl_estado.pack()
+        btns = tk.Frame(self)
+        btns.pack(pady=6)
+        self.btn_iniciar = tk.Button(btns, text="Iniciar", command=self.iniciar, width=12, height=2)
+        self.btn_iniciar.pack(side="left", padx=6)
+        self.btn_cancelar = tk.Button(btns, text="Cancelar", command=self.cancelar, width=10, height=2, state="disabled")
+        self.btn_cancelar.pack(side="left", padx=6)
+        tk.Button(btns, text="Cerrar", command=self.cerrar, width=10, height=2).pack(side="left", padx=6)
+        self.protocol("WM_DELETE_WINDOW", self.cerrar)
+
+    def iniciar(self):
+        filtro = {"todos": None, "sin_entrenador": sin_entrenador}.get(self.var_filtro.get())
+        if self.var_filtro.get() == "plan_vencido":
+            try:
+                filtro = self.repo.plan_anterior_a(int(self.ent_dias.get()))
+            except ValueError:
+                messagebox.showerror("Error", "Días debe ser un número entero.")
+                return
+        if not self.var_planes.get() and not self.var_rutinas.get():
+            messagebox.showwarning("Nada que crear", "Marca planes, rutinas o ambos.")
+            return
+        self.btn_iniciar.config(state="disabled")
+        self.btn_cancelar.config(state="normal")
+        planes, rutinas = self.var_planes.get(), self.var_rutinas.get()
+
+        def trabajo():
+            tarea = tarea_actual()
+
+            def progreso(hechos, total):
+                tarea.comprobar()  # cancelar aborta el lote (en SQLite se deshace la transacción)
+                tarea.avisar(hechos, total)
+            return self.repo.asignar_automaticos(filtro, planes=planes, rutinas=rutinas, al_progreso=progreso)
+
+        self._tarea = self.master.winfo_toplevel().tareas.enviar(
+            "Asignación masiva", trabajo, al_terminar=self._terminado, al_fallar=self._fallo, al_avance=self._avance)
+
+    def _avance(self, hechos, total):
+        self.barra.config(maximum=max(total, 1), value=hechos)
+        self.lbl_estado.config(text=f"{hechos} / {total} clientes revisados")
+
+    def _terminado(self, r):
+        self._tarea = None
+        self.btn_cancelar.config(state="disabled")
+        self.lbl_estado.config(text=f"{r['clientes']} clientes: {r['planes']} planes y {r['rutinas']} rutinas creados")
+
+    def _fallo(self, error):
+        self._tarea = None
+        self.btn_cancelar.config(state="disabled")
+        self.btn_iniciar.config(state="normal")
+        if isinstance(error, TareaCancelada):
+            self.lbl_estado.config(text="Asignación cancelada")
+        else:
+            messagebox.showerror("Error", str(error))
+
+    def cancelar(self):
+        if self._tarea is not None:
+            self._tarea.cancelar()
+
+    def cerrar(self):
+        if self._tarea is not None:
+            messagebox.showinfo("En curso", "Espera a que termine la asignación o cancélala.")
+            return
+        self.destroy()
+
+
+class ExportarDialog(tk.Toplevel):
+    # Lanza exportacion.exportar en el ejecutor de tareas; el archivo se escribe en streaming y
+    # el avance llega como callbacks en el hilo de Tk
+    FORMATOS = {"csv": "CSV", "jsonl": "JSONL", "txt": "Texto", "html": "HTML (imprimible)"}
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.repo = parent.winfo_toplevel().repo
+        self.title("Exportar")
+        self.geometry("480x340")
+        self.transient(parent)
+        self.grab_set()
+        self._tarea: Optional[Tarea] = None
+        usuario = parent.winfo_toplevel().usuario_actual
+        self._entrenador_id = usuario.id if isinstance(usuario, Entrenador) else None
+
+        tk.Label(self, text="Exportar documentos de:", font=("Arial", 12)).pack(pady=8)
+        self.var_alcance = tk.StringVar(value="entrenador" if self._entrenador_id else "gimnasio")
+        frm = tk.Frame(self)
+        frm.pack(anchor="w", padx=16)
+        tk.Radiobutton(frm, text="Un cliente…", variable=self.var_alcance, value="cliente").pack(anchor="w")
+        if self._entrenador_id:
+            tk.Radiobutton(frm, text="Mis clientes", variable=self.var_alcance, value="entrenador").pack(anchor="w")
+        tk.Radiobutton(frm, text="Todo el gimnasio", variable=self.var_alcance, value="gimnasio").pack(anchor="w")
+
+        self.vars_tipos = {t: tk.BooleanVar(value=True) for t in ("rutinas", "planes", "progresos")}
+        tipos = tk.Frame(self)
+        tipos.pack(pady=4)
+        for t, var in self.vars_tipos.items():
+            tk.Checkbutton(tipos, text=t.capitalize(), variable=var).pack(side="left", padx=6)
+        self.var_formato = tk.StringVar(value="html")
+        formatos = tk.Frame(self)
+        formatos.pack(pady=4)
+        for valor, texto in self.FORMATOS.items():
+            tk.Radiobutton(formatos, text=texto, variable=self.var_formato, value=valor).pack(side="left", padx=4)
+
+        self.barra = ttk.Progressbar(self, length=400, mode="determinate")
+        self.barra.pack(pady=6)
+        self.lbl_estado = tk.Label(self, text="")
+        self.lbl_estado.pack()
+        btns = tk.Frame(self)
+        btns.pack(pady=6)
+        self.btn_iniciar = tk.Button(btns, text="Exportar", command=self.iniciar, width=12, height=2)
+        self.btn_iniciar.pack(side="left", padx=6)
+        self.btn_cancelar = tk.Button(btns, text="Cancelar", command=self.cancelar, width=10, height=2, state="disabled")
+        self.btn_cancelar.pack(side="left", padx=6)
+        tk.Button(btns, text="Cerrar", command=self.cerrar, width=10, height=2).pack(side="left", padx=6)
+        self.protocol("WM_DELETE_WINDOW", self.cerrar)
+
+    def iniciar(self):
+        import exportacion  # sólo al exportar: la mayoría de las sesiones no lo necesita
+        tipos = [t for t, var in self.vars_tipos.items() if var.get()]
+        formato = self.var_formato.get()
+        if not tipos:
+            messagebox.showwarning("Nada que exportar", "Marca rutinas, planes o progresos.", parent=self)
+            return
+        if formato == "csv" and len(tipos) != 1:
+            messagebox.showwarning("CSV", "Un CSV lleva un solo tipo: marca sólo rutinas, planes o progresos.", parent=self)
+            return
+        cliente_id = entrenador_id = None
+        if self.var_alcance.get() == "cliente":
+            sel = SelectionDialog(self, "Cliente a exportar", buscar=functools.partial(self.repo.buscar_nombres, "cliente"))
+            self.wait_window(sel)
+            self.grab_set()
+            if not sel.selected_id:
+                return
+            cliente_id = sel.selected_id
+        elif self.var_alcance.get() == "entrenador":
+            entrenador_id = self._entrenador_id
+        ruta = filedialog.asksaveasfilename(parent=self, defaultextension=f".{formato}",
+                                            filetypes=[(self.FORMATOS[formato], f"*.{formato}")])
+        if not ruta:
+            return
+        self.btn_iniciar.config(state="disabled")
+        self.btn_cancelar.config(state="normal")
+
+        def trabajo():
+            tarea = tarea_actual()
+
+            def progreso(res):
+                tarea.comprobar()  # cancelar borra el archivo temporal y deja el destino como estaba
+                tarea.avisar(res.clientes, res.total, res.documentos)
+            return exportacion.exportar(self.repo, ruta, formato, tipos, cliente_id, entrenador_id, al_progreso=progreso)
+
+        self._tarea = self.master.winfo_toplevel().tareas.enviar(
+            "Exportación", trabajo, al_terminar=self._terminado, al_fallar=self._fallo, al_avance=self._avance)
+
+    def _avance(self, clientes, total, documentos):
+        self.barra.config(maximum=max(total, 1), value=clientes)
+        self.lbl_estado.config(text=f"{clientes} / {total} clientes, {documentos} documentos")
+
+    def _terminado(self, res):
+        self._tarea = None
+        self.btn_cancelar.config(state="disabled")
+        self.btn_iniciar.config(state="normal")
+        self.barra.config(maximum=max(res.total, 1), value=res.total)
+        self.lbl_estado.config(text=f"{res.documentos} documentos de {res.clientes} clientes en {res.segundos:.1f} s")
+
+    def _fallo(self, error):
+        self._tarea = None
+        self.btn_cancelar.config(state="disabled")
+        self.btn_iniciar.config(state="normal")
+        if isinstance(error, TareaCancelada):
+            self.lbl_estado.config(text="Exportación cancelada")
+        else:
+            messagebox.showerror("Error", str(error), parent=self)
+
+    def cancelar(self):
+        if self._tarea is not None:
+            self._tarea.cancelar()
+
+    def cerrar(self):
+        if self._tarea is not None:
+            messagebox.showinfo("En curso", "Espera a que termine la exportación o cancélala.", parent=self)
+            return
+        self.destroy()
+
+
+class DiagnosticoDialog(tk.Toplevel):
+    # Lo que mide metricas.REGISTRO: operaciones (repo.*, gui.*, tarea.*) ordenadas por tiempo total y
+    # los medidores (entidades, memoria, bloqueos de la interfaz). Se actualiza sola mientras está abierta.
+    # Los tiempos de un método incluyen los de los que llama, y los percentiles se estiman por cubos.
+    COLUMNAS = ("operacion", "llamadas", "errores", "total_ms", "media_us", "p50_us", "p99_us", "max_ms")
+    INTERVALO_MS = 1000
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.repo = parent.winfo_toplevel().repo
+        self.title("Diagnóstico")
+        self.geometry("900x520")
+        self.transient(parent)
+
+        arriba = tk.Frame(self)
+        arriba.pack(fill="x", padx=8, pady=6)
+        self.var_activo = tk.BooleanVar(value=metricas.REGISTRO.activo)
+        tk.Checkbutton(arriba, text="Instrumentación activa", variable=self.var_activo,
+                       command=self.alternar).pack(side="left")
+        tk.Button(arriba, text="Reiniciar", width=10, command=self.reiniciar).pack(side="left", padx=6)
+        tk.Button(arriba, text="Guardar…", width=10, command=self.guardar).pack(side="left", padx=6)
+        self.lbl_medidores = tk.Label(self, text="", justify="left", anchor="w")
+        self.lbl_medidores.pack(fill="x", padx=8)
+
+        self.tree = ttk.Treeview(self, columns=self.COLUMNAS, show="headings")
+        for c in self.COLUMNAS:
+            self.tree.heading(c, text=c)
+            self.tree.column(c, width=300 if c == "operacion" else 80, anchor="w" if c == "operacion" else "e")
+        self.tree.pack(fill="both", expand=True, padx=8, pady=6)
+        self._after: Optional[str] = None
+        self.protocol("WM_DELETE_WINDOW", self.cerrar)
+        self.actualizar()
+
+    def alternar(self):
+        if self.var_activo.get():
+            metricas.activar(self.repo)
+        else:
+            metricas.desactivar(self.repo)
+        self.actualizar()
+
+    def reiniciar(self):
+        metricas.REGISTRO.reiniciar()
+        self.actualizar()
+
+    def guardar(self):
+        ruta = filedialog.asksaveasfilename(parent=self, defaultextension=".json",
+                                            filetypes=[("JSON", "*.json"), ("Prometheus", "*.prom")])
+        if not ruta:
+            return
+        try:
+            metricas.guardar(ruta)
+        except OSError as e:
+            messagebox.showerror("Error", f"No se pudo guardar: {e}", parent=self)
+
+    def actualizar(self):
+        if self._after is not None:
+            self.after_cancel(self._after)
+        filas = sorted(metricas.REGISTRO.histogramas.items(), key=lambda x: x[1].total, reverse=True)
+        self.tree.delete(*self.tree.get_children())
+        for nombre, hist in filas:
+            d = hist.a_dict()
+            if not d["llamadas"]:
+                continue
+            self.tree.insert("", "end", values=(
+                nombre, d["llamadas"], d["errores"], f"{d['total_s'] * 1e3:.1f}",
+                f"{d['total_s'] / d['llamadas'] * 1e6:.1f}", f"{d['p50_s'] * 1e6:.0f}", f"{d['p99_s'] * 1e6:.0f}",
+                f"{d['max_s'] * 1e3:.2f}"))
+        v = metricas.REGISTRO.valores()
+        lineas = []
+        if "entidades" in v:
+            lineas.append("Entidades: " + ", ".join(f"{t} {n}" for t, n in v["entidades"].items())
+                          + f" · versión {v.get('repositorio_version', '?')}")
+        lineas.append(f"Memoria: {v.get('memoria_residente_bytes', 0) / 2**20:.0f} MB"
+                      f" (pico {v.get('memoria_pico_bytes', 0) / 2**20:.0f} MB) · hilos {v.get('hilos', '?')}"
+                      f" · tareas en curso {v.get('tareas_en_curso', 0)}")
+        if "ui_bloqueo_max_segundos" in v:
+            lineas.append(f"UI bloqueada: máx {v['ui_bloqueo_max_segundos'] * 1e3:.0f} ms,"
+                          f" p99 {v.get('ui_bloqueo_p99_segundos', 0) * 1e3:.0f} ms")
+        if not metricas.REGISTRO.activo:
+            lineas.append("Instrumentación apagada: no se registran nuevas llamadas.")
+        self.lbl_medidores.config(text="\n".join(lineas))
+        self._after = self.after(self.INTERVALO_MS, self.actualizar)
+
+    def cerrar(self):
+        if self._after is not None:
+            self.after_cancel(self._after)
+        self.destroy()
+
+
+class SelectionDialog(tk.Toplevel):
+    # Elegir un cliente/entrenador escribiendo parte del nombre. `buscar(texto, limite)` devuelve los primeros
+    # (id, nombre) que coinciden (p.ej. repo.buscar_nombres); con `opciones` se busca en esa lista.
+    def __init__(self, parent, title, opciones=None, buscar=None, limite=50):
+        super().__init__(parent)
+        self.title(title)
+        self.geometry("480x400")
+        self.transient(parent)
+        self.grab_set()
+        self.selected_id = None
+        self.buscar = buscar or IndiceNombres(opciones or ()).buscar
+        self.limite = limite
+        tk.Label(self, text=title, font=("Arial", 12)).pack(pady=8)
+        self.texto = tk.StringVar()
+        entrada = tk.Entry(self, textvariable=self.texto)
+        entrada.pack(fill="x", padx=8)
+        entrada.focus_set()
+        entrada.bind("<Return>", lambda e: self.seleccionar())
+        entrada.bind("<Down>", self._ir_a_lista)
+        self.tree = ttk.Treeview(self, columns=("id","nombre"), show="headings")
+        self.tree.heading("id", text="ID")
+        self.tree.heading("nombre", text="Nombre")
+        self.tree.pack(fill="both", expand=True, padx=8, pady=8)
+        self.tree.bind("<Double-1>", lambda e: self.seleccionar())
+        self.tree.bind("<Return>", lambda e: self.seleccionar())
+        self.aviso = tk.Label(self, text="", fg="gray")
+        self.aviso.pack()
+        btns = tk.Frame(self)
+        btns.pack(pady=6)
+        tk.Button(btns, text="Seleccionar", command=self.seleccionar, width=12, height=2).pack(side="left", padx=6)
+        tk.Button(btns, text="Cancelar", command=self.destroy, width=10, height=2).pack(side="left", padx=6)
+        self.texto.trace_add("write", lambda *_: self._filtrar())
+        self._filtrar()
+
+    def _filtrar(self):
+        # Cada tecla reemplaza la lista por los primeros `limite` resultados; la lista nunca crece más que eso
+        resultados = self.buscar(self.texto.get(), self.limite)
+        self.tree.delete(*self.tree.get_children())
+        for id_, nom in resultados:
+            self.tree.insert("", "end", iid=id_, values=(id_, nom))
+        if resultados:
+            self.tree.selection_set(resultados[0][0])
+        if len(resultados) >= self.limite:
+            self.aviso.config(text=f"Primeros {self.limite} resultados; escriba más para acotar")
+        else:
+            self.aviso.config(text=f"{len(resultados)} resultado(s)")
+
+    def _ir_a_lista(self, _evento):
+        hijos = self.tree.get_children()
+        if hijos:
+            self.tree.focus_set()
+            self.tree.focus(self.tree.selection()[0] if self.tree.selection() else hijos[0])
+
+    def seleccionar(self):
+        sel = self.tree.selection()
+        if not sel:
+            messagebox.showwarning("Nada seleccionado", "Seleccione un elemento.")
+            return
+        vals = self.tree.item(sel[0], "values")
+        self.selected_id = vals[0]
+        self.destroy()
+
+
+class TablaVirtual(tk.Frame):
+    # Treeview que sólo contiene las filas visibles; el resto se pide por páginas a `obtener`
+    # (desde, cantidad, orden, descendente) y la barra de desplazamiento se calcula con `contar`.
+    def __init__(self, parent, columnas, contar, obtener, fila, orden=None, ordenables=(), margen=50):
+        super().__init__(parent)
+        self.contar = contar
+        self.obtener = obtener
+        self.fila = fila
+        self.orden = orden
+        self.descendente = False
+        self.margen = margen
+        self.filas = 20
+        self.desde = 0
+        self.total = 0
+        self._cache_desde = 0
+        self._cache: list = []
+
+        self.tree = ttk.Treeview(self, columns=columnas, show="headings", height=self.filas)
+        for c in columnas:
+            if c in ordenables:
+                self.tree.heading(c, text=c, command=lambda c=c: self.ordenar(c))
+            else:
+                self.tree.heading(c, text=c)
+        self.sb = ttk.Scrollbar(self, orient="vertical", command=self._scroll)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.sb.pack(side="right", fill="y")
+        self.tree.bind("<MouseWheel>", lambda e: self._scroll("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda e: self._scroll("scroll", -1, "units"))
+        self.tree.bind("<Button-5>", lambda e: self._scroll("scroll", 1, "units"))
+        self.tree.bind("<Configure>", self._redimensionar)
+
+    def selection(self):
+        return self.tree.selection()
+
+    def refrescar(self):
+        self.total = self.contar()
+        self._cache = []
+        self._render()
+
+    def ordenar(self, columna):
+        if columna == self.orden:
+            self.descendente = not self.descendente
+        else:
+            self.orden, self.descendente = columna, False
+        self.desde = 0
+        self.refrescar()
+
+    def _redimensionar(self, event):
+        alto_fila = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        filas = max(1, (event.height - 25) // alto_fila)
+        if filas != self.filas:
+            self.filas = filas
+            self.tree.configure(height=filas)
+            self._render()
+
+    def _scroll(self, accion, cantidad, unidad=None):
+        if accion == "moveto":
+            self.desde = int(float(cantidad) * self.total)
+        else:
+            self.desde += int(cantidad) * (self.filas if unidad == "pages" else 1)
+        self._render()
+
+    def _render(self):
+        self.desde = max(0, min(self.desde, self.total - self.filas))
+        fin = self.desde + self.filas
+        if self.desde < self._cache_desde or fin > self._cache_desde + len(self._cache):
+            self._cache_desde = max(0, self.desde - self.margen)
+            self._cache = self.obtener(self._cache_desde, self.filas + 2 * self.margen, self.orden, self.descendente)
+        seleccion = set(self.tree.selection())
+        self.tree.delete(*self.tree.get_children())
+        for obj in self._cache[self.desde - self._cache_desde:fin - self._cache_desde]:
+            self.tree.insert("", "end", iid=obj.id, values=self.fila(obj))
+            if obj.id in seleccion:
+                self.tree.selection_add(obj.id)
+        if self.total:
+            self.sb.set(self.desde / self.total, min(1.0, fin / self.total))
+        else:
+            self.sb.set(0.0, 1.0)
+
+
+class MostrarRutinaDialog(tk.Toplevel):
+    def __init__(self, parent, rutina: RutinaEjercicio):
+        super().__init__(parent)
+        self.repo = parent.winfo_toplevel().repo
+        self.title(f"Rutina - {self.repo.clientes[rutina.cliente_id].nombre if rutina.cliente_id in self.repo.clientes else rutina.cliente_id}")
+        self.geometry("700x520")
+        self.transient(parent)
+        self.grab_set()
+
+        lbl = tk.Label(self, text=f"Rutina (intensidad: {rutina.intensidad})", font=("Arial", 12))
+        lbl.pack(pady=6)
+
+        frm = tk.Frame(self)
+        frm.pack(fill="both", expand=True, padx=8, pady=8)
+        txt = tk.Text(frm, wrap="word")
+        sb = ttk.Scrollbar(frm, orient="vertical", command=txt.yview)
+        txt.configure(yscrollcommand=sb.set)
+        txt.pack(side="left", fill="both", expand=True)
+        sb.pack(side="right", fill="y")
+
+        txt.insert("1.0", "".join(lineas_rutina(rutina)))
+        txt.config(state="disabled")
+        tk.Button(self, text="Cerrar", command=self.destroy, width=12, height=2).pack(pady=6)
+
+
+class MostrarPlanDialog(tk.Toplevel):
+    def __init__(self, parent, plan: PlanAlimentacion):
+        super().__init__(parent)
+        self.repo = parent.winfo_toplevel().repo
+        cliente_nom = self.repo.clientes[plan.cliente_id].nombre if plan.cliente_id in self.repo.clientes else plan.cliente_id
+        self.title(f"Plan - {cliente_nom}")
+        self.geometry("700x520")
+        self.transient(parent)
+        self.grab_set()
+
+        lbl = tk.Label(self, text=f"Plan de Alimentación - {plan.calorias_diarias} kcal", font=("Arial", 12))
+        lbl.pack(pady=6)
+        frm = tk.Frame(self)
+        frm.pack(fill="both", expand=True, padx=8, pady=8)
+        txt = tk.Text(frm, wrap="word")
+        sb = ttk.Scrollbar(frm, orient="vertical", command=txt.yview)
+        txt.configure(yscrollcommand=sb.set)
+        txt.pack(side="left", fill="both", expand=True)
+        sb.pack(side="right", fill="y")
+        txt.insert("1.0", "".join(lineas_plan(plan)))
+        txt.config(state="disabled")
+        tk.Button(self, text="Cerrar", command=self.destroy, width=12, height=2).pack(pady=6)
+
+
+class VerProgresoDialog(tk.Toplevel):
+    def __init__(self, parent, cliente: Cliente):
+        super().__init__(parent)
+        self.repo = parent.winfo_toplevel().repo
+        self.title(f"Progreso - {cliente.nombre}")
+        self.geometry("720x460")
+        self.transient(parent)
+        self.grab_set()
+        tk.Label(self, text=f"Historial de progreso - {cliente.nombre}", font=("Arial", 12)).pack(pady=6)
+        frm = tk.Frame(self)
+        frm.pack(fill="both", expand=True, padx=8, pady=8)
+        self.cliente = cliente
+        # por fecha ya vienen ordenados del índice del repositorio; otros órdenes se calculan al pedirlos
+        self._ordenados = {"fecha": self.repo.progresos_de(cliente.id)}
+        tabla = TablaVirtual(frm, ("fecha","peso","medidas","obs"), contar=lambda: len(self._ordenados["fecha"]),
+                             obtener=self._pagina, fila=self._fila, orden="fecha", ordenables=("fecha", "peso"))
+        tabla.pack(fill="both", expand=True)
+        tabla.refrescar()
+        tk.Button(self, text="Cerrar", command=self.destroy, width=12, height=2).pack(pady=6)
+
+    def _pagina(self, desde, cantidad, orden, descendente):
+        ordenados = self._ordenados.get(orden)
+        if ordenados is None:
+            ordenados = self._ordenados[orden] = sorted(self._ordenados["fecha"], key=lambda p: getattr(p, orden))
+        if descendente:
+            n = len(ordenados)
+            return ordenados[max(0, n - desde - cantidad):max(0, n - desde)][::-1]
+        return ordenados[desde:desde + cantidad]
+
+    def _fila(self, p):
+        medidas_text = ", ".join([f"{k}:{v}" for k,v in p.medidas.items()]) if p.medidas else ""
+        return (p.fecha, p.peso, medidas_text, p.observaciones)
+
+
+class RutinaPersonalizadaDialog(tk.Toplevel):
+    def __init__(self, parent, entrenador: Entrenador, cliente: Cliente):
+        super().__init__(parent)
+        self.title(f"Crear Rutina personalizada - Entrenador: {entrenador.nombre} -> Cliente: {cliente.nombre}")
+        self.geometry("820x560")
+        self.transient(parent)
+        self.grab_set()
+        self.result = None
+
+        tk.Label(self, text="Crear Rutina Personalizada (rellenar por días)", font=("Arial", 12)).pack(pady=6)
+
+        frm_top = tk.Frame(self)
+        frm_top.pack(pady=4)
+        tk.Label(frm_top, text="Intensidad:").pack(side="left")
+        self.cmb_int = ttk.Combobox(frm_top, values=["Baja", "Media", "Alta", "Personalizada"], state="readonly", width=15)
+        self.cmb_int.pack(side="left", padx=6)
+        self.cmb_int.set("Personalizada")
+
+        tab_parent = ttk.Notebook(self)
+        dias = ["Lunes","Martes","Miércoles","Jueves","Viernes","Sábado","Domingo"]
+        self.textareas = {}
+        self.ejercicios_data = {d: [] for d in dias}
+        for d in dias:
+            frame = tk.Frame(tab_parent)
+            tab_parent.add(frame, text=d)
+
+            tree = ttk.Treeview(frame, columns=("ejercicio","series","reps","nota"), show="headings", height=10)
+            for c, h in [("ejercicio","Ejercicio"),("series","Series"),("reps","Reps"),("nota","Nota")]:
+                tree.heading(c, text=h)
+                tree.column(c, width=150)
+            tree.pack(fill="both", expand=True, padx=6, pady=6)
+            self.textareas[d] = tree
+
+            addfrm = tk.Frame(frame)
+            addfrm.pack(fill="x", pady=4, padx=6)
+            self.ej_name = tk.Entry(addfrm, width=25); self.ej_name.pack(side="left", padx=4)
+            self.ej_name.insert(0, "Nombre ejercicio")
+            self.ej_series = tk.Entry(addfrm, width=8); self.ej_series.pack(side="left", padx=4)
+            self.ej_series.insert(0, "3")
+            self.ej_reps = tk.Entry(addfrm, width=10); self.ej_reps.pack(side="left", padx=4)
+            self.ej_reps.insert(0, "10-12")
+            self.ej_note = tk.Entry(addfrm, width=20); self.ej_note.pack(side="left", padx=4)
+            self.ej_note.insert(0, "Opcional")
+
+            def make_add(day):
+                def add():
+                    nombre = self.ej_name.get().strip()
+                    series = self.ej_series.get().strip()
+                    reps = self.ej_reps.get().strip()
+                    nota = self.ej_note.get().strip()
+                    if not nombre:
+                        messagebox.showwarning("Faltan datos", "Ingrese nombre del ejercicio.")
+                        return
+                    self.textareas[day].insert("", "end", values=(nombre, series, reps, nota))
+                return add
+            b = tk.Button(addfrm, text="Agregar ejercicio", command=make_add(d), width=16)
+            b.pack(side="left", padx=6)
+
+            def make_del(day):
+                def delete():
+                    sel = self.textareas[day].selection()
+                    if not sel:
+                        messagebox.showwarning("Nada seleccionado", "Selecciona una fila para eliminar.")
+                        return
+                    for s in sel:
+                        self.textareas[day].delete(s)
+                return delete
+            tk.Button(addfrm, text="Eliminar seleccionado", command=make_del(d), width=18).pack(side="left", padx=6)
+
+        tab_parent.pack(fill="both", expand=True, padx=8, pady=8)
+
+        btns = tk.Frame(self)
+        btns.pack(pady=6)
+        tk.Button(btns, text="Crear rutina y guardar", command=self.crear, width=18, height=2).pack(side="left", padx=6)
+        tk.Button(btns, text="Cancelar", command=self.destroy, width=12, height=2).pack(side="left", padx=6)
+
+    def crear(self):
+
+        ejercicios_semana = {}
+        for dia, tree in self.textareas.items():
+            filas = []
+            for iid in tree.get_children():
+                vals = tree.item(iid, "values")
+                filas.append({"ejercicio": vals[0], "series": vals[1], "reps": vals[2], "nota": vals[3]})
+            ejercicios_semana[dia] = filas
+        intensidad = self.cmb_int.get() or "Personalizada"
+        self.result = (ejercicios_semana, intensidad)
+        self.destroy()
+
+
+class PlanPersonalizadoDialog(tk.Toplevel):
+    def __init__(self, parent, entrenador: Entrenador, cliente: Cliente):
+        super().__init__(parent)
+        self.title(f"Crear Plan personalizado - {entrenador.nombre} -> {cliente.nombre}")
+        self.geometry("780x520")
+        self.transient(parent)
+        self.grab_set()
+        self.result = None
+
+        tk.Label(self, text="Plan personalizado (complete comidas)", font=("Arial", 12)).pack(pady=6)
+        frm = tk.Frame(self)
+        frm.pack(fill="both", expand=True, padx=8, pady=6)
+
+
+        top = tk.Frame(frm)
+        top.pack(fill="x", pady=4)
+        tk.Label(top, text="Calorías totales:").pack(side="left")
+        self.e_cal = tk.Entry(top, width=10); self.e_cal.pack(side="left", padx=6)
+        self.e_cal.insert(0, "2000")
+        tk.Label(top, text="Comidas por día:").pack(side="left", padx=10)
+        self.e_com = tk.Entry(top, width=6); self.e_com.pack(side="left", padx=6)
+        self.e_com.insert(0, "5")
+
+
+        self.comidas = {}
+        labels = ["Desayuno","Media mañana","Almuerzo","Merienda","Cena"]
+        for lab in labels:
+            sub = tk.Frame(frm)
+            sub.pack(fill="x", pady=4)
+            tk.Label(sub, text=f"{lab}:", width=14, anchor="w").pack(side="left")
+            txt = tk.Text(sub, height=3)
+            txt.pack(side="left", fill="x", expand=True, padx=6)
+            self.comidas[lab] = txt
+
+        tk.Label(frm, text="Observaciones:").pack(anchor="w", pady=4)
+        self.txt_obs = tk.Text(frm, height=4)
+        self.txt_obs.pack(fill="both", expand=False, padx=8)
+
+        btns = tk.Frame(self)
+        btns.pack(pady=6)
+        tk.Button(btns, text="Crear plan y guardar", command=self.crear, width=18, height=2).pack(side="left", padx=6)
+        tk.Button(btns, text="Cancelar", command=self.destroy, width=12, height=2).pack(side="left", padx=6)
+
+    def crear(self):
+        try:
+            calorias = int(self.e_cal.get().strip())
+        except:
+            messagebox.showwarning("Dato inválido", "Ingrese un número válido de calorías.")
+            return
+        try:
+            comidas_por_dia = int(self.e_com.get().strip())
+        except:
+            messagebox.showwarning("Dato inválido", "Ingrese número válido de comidas por día.")
+            return
+        detalle = {}
+        for lab, txt in self.comidas.items():
+            detalle[lab] = txt.get("1.0", "end").strip() or "-"
+        obs = self.txt_obs.get("1.0", "end").strip()
+        self.result = (detalle, calorias, comidas_por_dia, obs)
+        self.destroy()
@@ -0,0 +1,373 @@
+import functools
+import gc
+import json
+import math
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import cProfile
+
+try:
+    import resource
+except ImportError:  # no existe en Windows: sin pico de memoria del proceso
+    resource = None
+
+PREFIJO = "gestorgym"
+# límites superiores de los cubos de los histogramas, en segundos (de 10 µs a 10 s)
+LIMITES = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CADA = 15.0  # segundos entre volcados a archivo
+LINEAS_PERFIL = 30
+
+
+class Histograma:
+    # Llamadas, errores, suma y máximo, y cuántas duraciones cayeron en cada cubo de LIMITES (+ el de +Inf)
+    __slots__ = ("cubos", "llamadas", "errores", "total", "maximo", "_cerrojo")
+
+    def __init__(self):
+        self._cerrojo = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.cubos = [0] * (len(LIMITES) + 1)
+        self.llamadas = 0
+        self.errores = 0
+        self.total = 0.0
+        self.maximo = 0.0
+
+    def observar(self, segundos: float, error: bool = False):
+        i = bisect_left(LIMITES, segundos)
+        with self._cerrojo:
+            self.cubos[i] += 1
+            self.llamadas += 1
+            self.errores += error
+            self.total += segundos
+            if segundos > self.maximo:
+                self.maximo = segundos
+
+    def percentil(self, p: float) -> float:
+        # Estimado por cubos: el límite superior del cubo en que cae (nunca más que el máximo visto)
+        if not self.llamadas:
+            return 0.0
+        objetivo = self.llamadas * p / 100
+        acumulado = 0
+        for limite, cuenta in zip(LIMITES, self.cubos):
+            acumulado += cuenta
+            if acumulado >= objetivo:
+                return min(limite, self.maximo)
+        return self.maximo
+
+    def a_dict(self) -> dict:
+        with self._cerrojo:
+            return {"llamadas": self.llamadas, "errores": self.errores, "total_s": self.total,
+                    "max_s": self.maximo, "p50_s": self.percentil(50), "p99_s": self.percentil(99),
+                    "cubos": list(self.cubos)}
+
+
+class Registro:
+    def __init__(self):
+        # apagado, las operaciones instrumentadas sólo comprueban esta bandera
+        self.activo = False
+        self.histogramas: Dict[str, Histograma] = {}
+        # nombre -> (función, ayuda, etiqueta); la función devuelve un número o {valor de etiqueta: número}
+        self.medidores: Dict[str, Tuple[Callable[[], object], str, Optional[str]]] = {}
+        self._cerrojo = threading.Lock()
+
+    def histograma(self, nombre: str) -> Histograma:
+        hist = self.histogramas.get(nombre)
+        if hist is None:
+            with self._cerrojo:
+                hist = self.histogramas.setdefault(nombre, Histograma())
+        return hist
+
+    def observar(self, nombre: str, segundos: float, error: bool = False):
+        self.histograma(nombre).observar(segundos, error)
+
+    def medidor(self, nombre: str, funcion: Callable[[], object], ayuda: str = "", etiqueta: Optional[str] = None):
+        self.medidores[nombre] = (funcion, ayuda, etiqueta)
+
+    def reiniciar(self):
+        # En el lugar: las operaciones instrumentadas guardan su histograma
+        for hist in list(self.histogramas.values()):
+            with hist._cerrojo:
+                hist.reiniciar()
+
+    def valores(self) -> Dict[str, object]:
+        valores = {}
+        for nombre, (funcion, _, _) in list(self.medidores.items()):
+            try:
+                valores[nombre] = funcion()
+            except Exception:
+                continue  # p.ej. la base ya cerrada: se omite en esta lectura
+        return valores
+
+    def a_dict(self) -> dict:
+        return {"fecha": datetime.now().isoformat(timespec="seconds"), "activo": self.activo,
+                "limites_s": list(LIMITES),
+                "operaciones": {nombre: hist.a_dict() for nombre, hist in sorted(self.histogramas.items())},
+                "medidores": self.valores()}
+
+    def a_prometheus(self) -> str:
+        # Formato de texto de Prometheus (sirve para el textfile collector de node_exporter)
+        lineas = [f"# HELP {PREFIJO}_operacion_segundos Duración de las operaciones instrumentadas",
+                  f"# TYPE {PREFIJO}_operacion_segundos histogram"]
+        errores = []
+        for nombre, hist in sorted(self.histogramas.items()):
+            datos = hist.a_dict()
+            etiqueta = f'operacion="{_escapar(nombre)}"'
+            acumulado = 0
+            for limite, cuenta in zip(LIMITES + (math.inf,), datos["cubos"]):
+                acumulado += cuenta
+                le = "+Inf" if limite == math.inf else repr(limite)
+                lineas.append(f'{PREFIJO}_operacion_segundos_bucket{{{etiqueta},le="{le}"}} {acumulado}')
+            lineas.append(f"{PREFIJO}_operacion_segundos_sum{{{etiqueta}}} {datos['total_s']!r}")
+            lineas.append(f"{PREFIJO}_operacion_segundos_count{{{etiqueta}}} {datos['llamadas']}")
+            errores.append(f"{PREFIJO}_operacion_errores_total{{{etiqueta}}} {datos['errores']}")
+        lineas += [f"# HELP {PREFIJO}_operacion_errores_total Operaciones que terminaron con una excepción",
+                   f"# TYPE {PREFIJO}_operacion_errores_total counter"] + errores
+        valores = self.valores()
+        for nombre, (_, ayuda, etiqueta) in sorted(self.medidores.items()):
+            if nombre not in valores:
+                continue
+            metrica = f"{PREFIJO}_{nombre}"
+            lineas += [f"# HELP {metrica} {ayuda}", f"# TYPE {metrica} gauge"]
+            valor = valores[nombre]
+            if isinstance(valor, dict):
+                lineas += [f'{metrica}{{{etiqueta}="{_escapar(str(k))}"}} {v}' for k, v in valor.items()]
+            else:
+                lineas.append(f"{metrica} {valor}")
+        return "\n".join(lineas) + "\n"
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# --- memoria y proceso ---
+
+def memoria_pico() -> int:
+    if resource is None:
+        return 0
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico if sys.platform == "darwin" else pico * 1024  # en Linux viene en KiB
+
+
+def memoria_residente() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return memoria_pico()
+
+
+def _medidores_proceso(registro: Registro):
+    registro.medidor("memoria_residente_bytes", memoria_residente, "Memoria residente del proceso")
+    registro.medidor("memoria_pico_bytes", memoria_pico, "Pico de memoria residente del proceso")
+    registro.medidor("hilos", threading.active_count, "Hilos vivos")
+    registro.medidor("gc_colecciones", lambda: {i: g["collections"] for i, g in enumerate(gc.get_stats())},
+                     "Recolecciones del gc por generación", "generacion")
+
+
+REGISTRO = Registro()
+_medidores_proceso(REGISTRO)
+
+
+# --- instrumentación ---
+
+def _cronometrado(funcion: Callable, hist: Histograma) -> Callable:
+    reloj = time.perf_counter
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        inicio = reloj()
+        fallo = True
+        try:
+            resultado = funcion(*args, **kwargs)
+            fallo = False
+            return resultado
+        finally:
+            hist.observar(reloj() - inicio, fallo)
+    envoltura._metrica = hist
+    return envoltura
+
+
+def cronometrar(nombre: str, registro: Optional[Registro] = None):
+    # Decorador para puntos fijos (acciones de la interfaz, tareas): apagado sólo cuesta mirar la bandera
+    registro = registro or REGISTRO
+
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not registro.activo:
+                return funcion(*args, **kwargs)
+            inicio = time.perf_counter()
+            fallo = True
+            try:
+                resultado = funcion(*args, **kwargs)
+                fallo = False
+                return resultado
+            finally:
+                registro.observar(nombre, time.perf_counter() - inicio, fallo)
+        return envoltura
+    return decorador
+
+
+def metodos_de(clase: type) -> List[str]:
+    # Los métodos de la clase y sus bases, sin los especiales ni los generadores (de un generador o un
+    # contextmanager sólo se mediría su creación)
+    import inspect
+    nombres = {nombre for base in clase.__mro__[:-1] for nombre, valor in vars(base).items()
+               if not nombre.startswith("__") and inspect.isfunction(valor)}
+    return sorted(nombre for nombre in nombres
+                  if not inspect.isgeneratorfunction(inspect.unwrap(getattr(clase, nombre))))
+
+
+def instrumentar(objeto, nombres: Iterable[str], prefijo: str, registro: Optional[Registro] = None) -> int:
+    # Reemplaza los métodos de esta instancia por versiones cronometradas; las demás instancias y la
+    # clase no cambian, y sin instrumentar no queda ningún costo
+    registro = registro or REGISTRO
+    hechos = 0
+    for nombre in nombres:
+        actual = getattr(objeto, nombre)
+        if getattr(actual, "_metrica", None) is not None:
+            continue
+        setattr(objeto, nombre, _cronometrado(actual, registro.histograma(f"{prefijo}.{nombre}")))
+        hechos += 1
+    return hechos
+
+
+def desinstrumentar(objeto):
+    for nombre, valor in list(vars(objeto).items()):
+        if getattr(valor, "_metrica", None) is not None:
+            delattr(objeto, nombre)
+
+
+def activar(repo, registro: Optional[Registro] = None):
+    from nucleo import COLECCIONES
+
+    registro = registro or REGISTRO
+    instrumentar(repo, metodos_de(type(repo)), "repo", registro)
+    registro.medidor("entidades", lambda: {tipo: repo.contar(tipo) for tipo in COLECCIONES},
+                     "Entidades en el repositorio", "tipo")
+    registro.medidor("repositorio_version", lambda: repo.version, "Cambios aplicados al repositorio")
+    registro.activo = True
+
+
+def desactivar(repo, registro: Optional[Registro] = None):
+    (registro or REGISTRO).activo = False
+    desinstrumentar(repo)
+
+
+# --- volcado a archivo ---
+
+def guardar(ruta: str, registro: Optional[Registro] = None):
+    # .prom y .txt en el formato de texto de Prometheus, cualquier otra extensión en JSON
+    registro = registro or REGISTRO
+    if os.path.splitext(ruta)[1].lower() in (".prom", ".txt"):
+        texto = registro.a_prometheus()
+    else:
+        texto = json.dumps(registro.a_dict(), ensure_ascii=False, indent=2) + "\n"
+    temporal = ruta + ".tmp"
+    try:
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write(texto)
+        os.replace(temporal, ruta)  # quien lo lea nunca ve un archivo a medio escribir
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+class Volcador:
+    # Guarda el registro en `ruta` cada `cada` segundos desde un hilo aparte; al cerrar, una última vez
+    def __init__(self, ruta: str, cada: float = CADA, registro: Optional[Registro] = None):
+        self.ruta = ruta
+        self.cada = cada
+        self.registro = registro or REGISTRO
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, name="metricas", daemon=True)
+        self._hilo.start()
+
+    def volcar(self):
+        guardar(self.ruta, self.registro)
+
+    def _bucle(self):
+        while not self._parar.wait(self.cada):
+            try:
+                self.volcar()
+            except OSError as e:
+                print(f"metricas: no se pudo escribir {self.ruta}: {e}", file=sys.stderr)
+
+    def cerrar(self):
+        self._parar.set()
+        self._hilo.join()
+        self.volcar()
+
+
+def desde_entorno(repo, entorno=os.environ) -> Optional[Volcador]:
+    # GESTORGYM_METRICAS=1 activa la instrumentación; GESTORGYM_METRICAS_ARCHIVO además vuelca el
+    # registro a ese archivo cada GESTORGYM_METRICAS_CADA segundos
+    ruta = entorno.get("GESTORGYM_METRICAS_ARCHIVO")
+    if not ruta and entorno.get("GESTORGYM_METRICAS", "0") in ("", "0"):
+        return None
+    activar(repo)
+    if ruta:
+        return Volcador(ruta, float(entorno.get("GESTORGYM_METRICAS_CADA", CADA)))
+    return None
+
+
+# --- cProfile ---
+
+# cProfile sólo sigue al hilo que lo activa: mientras se perfila, cada hilo de trabajo activa el suyo
+# (perfil_de_hilo) y al final se suman todos. cProfile y pstats se importan sólo al perfilar.
+_perfilando = False
+_perfiles: List["cProfile.Profile"] = []
+_perfil_hilo = threading.local()
+
+
+def perfil_de_hilo() -> Optional["cProfile.Profile"]:
+    # Activa (y devuelve, para desactivarlo al terminar) el perfilador de este hilo; None si no se perfila
+    if not _perfilando:
+        return None
+    import cProfile
+    perfil = getattr(_perfil_hilo, "perfil", None) or cProfile.Profile()
+    try:
+        perfil.enable()
+    except ValueError:
+        return None  # desde Python 3.12 el perfilador principal ya sigue a todos los hilos
+    if getattr(_perfil_hilo, "perfil", None) is None:
+        _perfil_hilo.perfil = perfil
+        _perfiles.append(perfil)
+    return perfil
+
+
+def ejecutar(funcion: Callable, *args, entorno=os.environ):
+    # Corre funcion; con GESTORGYM_PERFIL=ruta, bajo cProfile: guarda las estadísticas en ruta (para
+    # `python -m pstats ruta`) y muestra en stderr las funciones con más tiempo acumulado
+    global _perfilando
+    ruta = entorno.get("GESTORGYM_PERFIL")
+    if not ruta:
+        return funcion(*args)
+    import cProfile
+    import pstats
+    principal = cProfile.Profile()
+    _perfilando = True
+    principal.enable()
+    try:
+        return funcion(*args)
+    finally:
+        principal.disable()
+        _perfilando = False
+        estadisticas = pstats.Stats(principal, stream=sys.stderr)
+        for perfil in _perfiles:
+            estadisticas.add(perfil)
+        _perfiles.clear()
+        estadisticas.dump_stats(ruta)
+        estadisticas.sort_stats("cumulative").print_stats(LINEAS_PERFIL)
+        print(f"perfil guardado en {ruta}", file=sys.stderr)
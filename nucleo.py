@@ -0,0 +1,1693 @@
+from dataclasses import dataclass, field, replace
+from contextlib import contextmanager
+from typing import List, Dict, Iterable, Iterator, Optional, Callable, Set, Tuple
+from datetime import datetime, date, timedelta, timezone
+from array import array
+import uuid
+import hashlib
+import weakref
+import bisect
+import functools
+import math
+import re
+import sys
+import time
+import unicodedata
+import threading
+
+try:
+    import numpy as np
+except ImportError:  # opcional: sólo acelera los recorridos por columnas
+    np = None
+
+
+def _inmutable(self, *args, **kwargs):
+    raise TypeError("Plantilla inmutable: usa descongelar() para obtener una copia editable")
+
+
+class DictCongelado(dict):
+    # dict de sólo lectura compartido por todas las rutinas/planes con el mismo contenido
+    __slots__ = ("huella", "__weakref__")
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _inmutable
+
+    def __hash__(self):
+        return hash(self.huella)
+
+    def __reduce__(self):
+        return congelar, (descongelar(self),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class ListaCongelada(list):
+    __slots__ = ()
+    __setitem__ = __delitem__ = append = extend = insert = pop = remove = clear = sort = reverse = _inmutable
+    __iadd__ = __imul__ = _inmutable
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __reduce__(self):
+        return ListaCongelada, (list(self),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+# huella del contenido -> plantilla viva; cuando ninguna entidad la usa desaparece sola
+_PLANTILLAS: "weakref.WeakValueDictionary[bytes, DictCongelado]" = weakref.WeakValueDictionary()
+
+
+def _congelar_anidado(valor):
+    # Las cadenas se internan: días, comidas y ejercicios se repiten en todas las plantillas
+    if isinstance(valor, dict):
+        d = dict.__new__(DictCongelado)
+        dict.update(d, ((sys.intern(k) if isinstance(k, str) else k, _congelar_anidado(v)) for k, v in valor.items()))
+        return d
+    if isinstance(valor, list):
+        return ListaCongelada(_congelar_anidado(v) for v in valor)
+    return sys.intern(valor) if isinstance(valor, str) else valor
+
+
+def congelar(valor: dict) -> DictCongelado:
+    # Devuelve la plantilla inmutable con ese contenido (orden incluido), creándola sólo la primera vez
+    if isinstance(valor, DictCongelado):
+        return valor
+    huella = hashlib.blake2b(repr(valor).encode(), digest_size=16).digest()
+    plantilla = _PLANTILLAS.get(huella)
+    if plantilla is None:
+        plantilla = _congelar_anidado(valor)
+        plantilla.huella = huella
+        _PLANTILLAS[huella] = plantilla
+    return plantilla
+
+
+def descongelar(valor):
+    # Copia editable (dict/list normales); es el "copy" del copy-on-write al personalizar una plantilla
+    if isinstance(valor, dict):
+        return {k: descongelar(v) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [descongelar(v) for v in valor]
+    return valor
+
+
+@dataclass(slots=True)
+class Usuario:
+    username: str
+    password: str
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+
+@dataclass(slots=True)
+class Entrenador(Usuario):
+    nombre: str = ""
+    nivel_experiencia: str = ""
+    clientes_ids: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.nivel_experiencia = sys.intern(self.nivel_experiencia)
+
+@dataclass(slots=True)
+class Cliente(Usuario):
+    nombre: str = ""
+    objetivos: str = ""
+    estado_fisico_inicial: str = ""
+    entrenador_id: Optional[str] = None
+    rutinas_ids: List[str] = field(default_factory=list)
+    planes_ids: List[str] = field(default_factory=list)
+    progreso_historial: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.objetivos = sys.intern(self.objetivos)
+        self.estado_fisico_inicial = sys.intern(self.estado_fisico_inicial)
+
+@dataclass(slots=True)
+class RutinaEjercicio:
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    cliente_id: str = ""
+    entrenador_id: str = ""
+    ejercicios_semana: Dict[str, List[Dict]] = field(default_factory=dict)  # dia -> list ejercicios
+    fecha_creacion: str = field(default_factory=lambda: date.today().isoformat())
+    intensidad: str = "Media"
+
+    def __post_init__(self):
+        self.cliente_id = sys.intern(self.cliente_id)
+        self.entrenador_id = sys.intern(self.entrenador_id)
+        self.ejercicios_semana = congelar(self.ejercicios_semana)
+        self.fecha_creacion = sys.intern(self.fecha_creacion)
+        self.intensidad = sys.intern(self.intensidad)
+
+@dataclass(slots=True)
+class PlanAlimentacion:
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    cliente_id: str = ""
+    comidas_por_dia: int = 3
+    calorias_diarias: int = 2000
+    detalle_comidas: Dict[str, str] = field(default_factory=dict)  # 'Desayuno': '...'
+    fecha_creacion: str = field(default_factory=lambda: date.today().isoformat())
+    observaciones: str = ""
+
+    def __post_init__(self):
+        self.cliente_id = sys.intern(self.cliente_id)
+        self.detalle_comidas = congelar(self.detalle_comidas)
+        self.fecha_creacion = sys.intern(self.fecha_creacion)
+        self.observaciones = sys.intern(self.observaciones)
+
+@dataclass(slots=True)
+class ProgresoFisico:
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    cliente_id: str = ""
+    fecha: str = field(default_factory=lambda: datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    peso: float = 0.0
+    medidas: Dict[str, float] = field(default_factory=dict)
+    repeticiones: Dict[str, int] = field(default_factory=dict)
+    observaciones: str = ""
+
+    def __post_init__(self):
+        if self.medidas:
+            self.medidas = {sys.intern(k): v for k, v in self.medidas.items()}
+        if self.repeticiones:
+            self.repeticiones = {sys.intern(k): v for k, v in self.repeticiones.items()}
+
+@dataclass(slots=True)
+class ReporteCliente:
+    id: str
+    nombre: str
+    controles: int = 0
+    delta_peso: Optional[float] = None
+    kg_por_semana: Optional[float] = None
+    dias_sin_control: Optional[float] = None
+    delta_cintura: Optional[float] = None
+    adherencia: Optional[float] = None
+
+
+@dataclass(slots=True)
+class ResumenCliente:
+    # Agregados de un cliente que se actualizan con cada escritura, sin recorrer su historial.
+    # Los instantes son epoch (ver a_epoch): al leerlos no hay que interpretar fechas.
+    controles: int = 0
+    rutinas: int = 0
+    planes: int = 0
+    primera_actividad: Optional[float] = None
+    ultimo_control: Optional[float] = None
+    pesos: int = 0
+    t_primer_peso: float = math.inf
+    primer_peso: Optional[float] = None
+    t_ultimo_peso: float = -math.inf
+    ultimo_peso: Optional[float] = None
+
+    def actividad(self, ts: float):
+        if self.primera_actividad is None or ts < self.primera_actividad:
+            self.primera_actividad = ts
+
+    def sumar_rutina(self, ts: float):
+        self.rutinas += 1
+        self.actividad(ts)
+
+    def sumar_plan(self, ts: float):
+        self.planes += 1
+        self.actividad(ts)
+
+    def sumar_control(self, ts: float, peso: float):
+        # con fechas repetidas manda el orden de llegada, como en progresos_de
+        self.controles += 1
+        self.actividad(ts)
+        if self.ultimo_control is None or ts > self.ultimo_control:
+            self.ultimo_control = ts
+        if peso:
+            self.pesos += 1
+            if ts < self.t_primer_peso:
+                self.t_primer_peso, self.primer_peso = ts, peso
+            if ts >= self.t_ultimo_peso:
+                self.t_ultimo_peso, self.ultimo_peso = ts, peso
+
+
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+DIA = 86400.0
+SEMANA = 7 * DIA
+
+
+def a_epoch(fecha: str) -> float:
+    # Las fechas son hora local "de pared"; se guardan como si fueran UTC para que la ida y vuelta sea exacta
+    dt = datetime.fromisoformat(fecha)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def normalizar_fecha(fecha: str) -> str:
+    # Fecha de entrada (API, importación) -> FORMATO_FECHA: las fechas se comparan como texto, así que
+    # "2024-01-15T10:00" o "2024-01-15" se guardan como "2024-01-15 10:00:00" / "2024-01-15 00:00:00".
+    # Con zona horaria se rechaza: se guarda la hora local, sin zona, y convertirla la cambiaría
+    try:
+        dt = datetime.fromisoformat(fecha)
+    except (TypeError, ValueError):
+        raise ValueError(f"Fecha inválida: {fecha!r}") from None
+    if dt.tzinfo is not None:
+        raise ValueError(f"Fecha con zona horaria: {fecha!r}; se espera la hora local")
+    # = strftime(FORMATO_FECHA), pero con el año siempre en cuatro cifras
+    return dt.isoformat(sep=" ", timespec="seconds")
+
+
+def desde_epoch(ts: float) -> str:
+    return time.strftime(FORMATO_FECHA, time.gmtime(ts))
+
+
+def _limites(desde: Optional[str], hasta: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
+    if hasta and len(hasta) == 10:
+        hasta += " 23:59:59"
+    return (a_epoch(desde) if desde else None), (a_epoch(hasta) if hasta else None)
+
+
+def _uuid_a_bytes(id_) -> Optional[bytes]:
+    # Sólo ids en forma canónica (minúsculas con guiones), para que id_de devuelva exactamente el mismo texto
+    if not isinstance(id_, str) or len(id_) != 36 or id_ != id_.lower() or id_[8] != "-" or id_[13] != "-" \
+            or id_[18] != "-" or id_[23] != "-":
+        return None
+    try:
+        crudo = bytes.fromhex(id_.replace("-", ""))
+    except ValueError:
+        return None
+    return crudo if len(crudo) == 16 else None
+
+
+class VistaProgreso:
+    # Fila de ColumnasProgreso con la misma interfaz de lectura que ProgresoFisico
+    __slots__ = ("_col", "_fila")
+
+    def __init__(self, col: "ColumnasProgreso", fila: int):
+        self._col = col
+        self._fila = fila
+
+    @property
+    def id(self) -> str:
+        return self._col.id_de(self._fila)
+
+    @property
+    def cliente_id(self) -> str:
+        return self._col.clientes[self._col.cliente[self._fila]]
+
+    @property
+    def ts(self) -> float:
+        return self._col.ts[self._fila]
+
+    @property
+    def fecha(self) -> str:
+        return desde_epoch(self._col.ts[self._fila])
+
+    @property
+    def peso(self) -> float:
+        return self._col.peso[self._fila]
+
+    @property
+    def medidas(self) -> Dict[str, float]:
+        return self._col.dispersas(self._col.medidas, self._fila)
+
+    @property
+    def repeticiones(self) -> Dict[str, int]:
+        return self._col.dispersas(self._col.repeticiones, self._fila)
+
+    @property
+    def observaciones(self) -> str:
+        return self._col.observaciones.get(self._fila, "")
+
+    def __repr__(self):
+        return (f"VistaProgreso(id={self.id!r}, cliente_id={self.cliente_id!r}, fecha={self.fecha!r}, "
+                f"peso={self.peso!r}, medidas={self.medidas!r})")
+
+
+class ColumnasProgreso:
+    # Almacén por columnas de ProgresoFisico: arrays paralelos indexados por fila, el cliente codificado
+    # como entero, medidas/repeticiones como columnas dispersas (sólo las filas que tienen valor) y el
+    # UUID en 16 bytes con una tabla hash abierta (fila o -1) para buscar por id.
+    def __init__(self):
+        self.ts = array("d")
+        self.peso = array("d")
+        self.cliente = array("i")
+        self.uuid = bytearray()
+        self.codigos: Dict[str, int] = {}
+        self.clientes: List[str] = []
+        self.observaciones: Dict[int, str] = {}
+        self.medidas: Dict[str, Tuple[array, array]] = {}
+        self.repeticiones: Dict[str, Tuple[array, array]] = {}
+        # ids que no son UUID (p.ej. importados de otro sistema) van aparte
+        self._ids_texto: Dict[str, int] = {}
+        self._texto_de_fila: Dict[int, str] = {}
+        self._tabla = array("q", [-1]) * 16
+        # código de cliente -> filas ordenadas por ts; orden global por ts, creado al pedirlo
+        self.por_cliente: List[array] = []
+        self._por_fecha: Optional[array] = None
+
+    def __len__(self):
+        return len(self.ts)
+
+    def agregar(self, p: ProgresoFisico) -> int:
+        # Primero se valida y convierte todo: un valor inválido no puede dejar las columnas desfasadas
+        if self.fila(p.id) is not None:
+            raise ValueError(f"Progreso repetido: {p.id}")
+        try:
+            ts = a_epoch(p.fecha)
+            peso = array("d", [p.peso])
+            medidas = [(nombre, array("d", [valor])) for nombre, valor in p.medidas.items()]
+            repeticiones = [(nombre, array("q", [valor])) for nombre, valor in p.repeticiones.items()]
+        except (TypeError, OverflowError) as e:
+            raise ValueError(f"Valor inválido en el progreso: {e}") from None
+        crudo = _uuid_a_bytes(p.id)
+        fila = len(self.ts)
+        codigo = self.codigos.get(p.cliente_id)
+        if codigo is None:
+            codigo = self.codigos[p.cliente_id] = len(self.clientes)
+            self.clientes.append(p.cliente_id)
+            self.por_cliente.append(array("i"))
+        if crudo is None:
+            self.uuid += bytes(16)
+            self._ids_texto[p.id] = fila
+            self._texto_de_fila[fila] = p.id
+        else:
+            self.uuid += crudo
+            self._insertar_hash(fila)
+        self.ts.append(ts)
+        self.peso.extend(peso)
+        self.cliente.append(codigo)
+        if p.observaciones:
+            self.observaciones[fila] = p.observaciones
+        for nombre, valor in medidas:
+            self._agregar_disperso(self.medidas, "d", nombre, fila, valor)
+        for nombre, valor in repeticiones:
+            self._agregar_disperso(self.repeticiones, "q", nombre, fila, valor)
+        clave = self.ts.__getitem__
+        bisect.insort(self.por_cliente[codigo], fila, key=clave)
+        if self._por_fecha is not None:
+            bisect.insort(self._por_fecha, fila, key=clave)
+        return fila
+
+    @staticmethod
+    def _agregar_disperso(columnas: Dict[str, Tuple[array, array]], tipo: str, nombre: str, fila: int,
+                          valor: array):
+        col = columnas.get(nombre)
+        if col is None:
+            col = columnas[sys.intern(nombre)] = (array("i"), array(tipo))
+        col[0].append(fila)
+        col[1].extend(valor)
+
+    @staticmethod
+    def dispersas(columnas: Dict[str, Tuple[array, array]], fila: int) -> dict:
+        valores = {}
+        for nombre, (filas, datos) in columnas.items():
+            i = bisect.bisect_left(filas, fila)
+            if i < len(filas) and filas[i] == fila:
+                valores[nombre] = datos[i]
+        return valores
+
+    def _hash(self, fila: int) -> int:
+        return int.from_bytes(self.uuid[fila * 16:fila * 16 + 8], "little")
+
+    def _insertar_hash(self, fila: int):
+        if (fila + 1) * 2 > len(self._tabla):
+            self._tabla = array("q", [-1]) * (len(self._tabla) * 2)
+            for f in range(fila):
+                if f not in self._texto_de_fila:
+                    self._colocar(f)
+        self._colocar(fila)
+
+    def _colocar(self, fila: int):
+        mascara = len(self._tabla) - 1
+        i = self._hash(fila) & mascara
+        while self._tabla[i] != -1:
+            i = (i + 1) & mascara
+        self._tabla[i] = fila
+
+    def fila(self, id_: str) -> Optional[int]:
+        crudo = _uuid_a_bytes(id_)
+        if crudo is None:
+            return self._ids_texto.get(id_)
+        mascara = len(self._tabla) - 1
+        i = int.from_bytes(crudo[:8], "little") & mascara
+        while True:
+            f = self._tabla[i]
+            if f == -1:
+                return None
+            if self.uuid[f * 16:f * 16 + 16] == crudo:
+                return f
+            i = (i + 1) & mascara
+
+    def id_de(self, fila: int) -> str:
+        texto = self._texto_de_fila.get(fila)
+        if texto is not None:
+            return texto
+        h = self.uuid[fila * 16:fila * 16 + 16].hex()
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+    def vista(self, fila: int) -> VistaProgreso:
+        return VistaProgreso(self, fila)
+
+    # Interfaz de dict id -> progreso, para el código que usaba repo.progresos directamente
+    def get(self, id_: str, default=None):
+        fila = self.fila(id_)
+        return default if fila is None else VistaProgreso(self, fila)
+
+    def __getitem__(self, id_: str) -> VistaProgreso:
+        fila = self.fila(id_)
+        if fila is None:
+            raise KeyError(id_)
+        return VistaProgreso(self, fila)
+
+    def __contains__(self, id_) -> bool:
+        return self.fila(id_) is not None
+
+    def __iter__(self):
+        return (self.id_de(f) for f in range(len(self.ts)))
+
+    def values(self):
+        return (VistaProgreso(self, f) for f in range(len(self.ts)))
+
+    def items(self):
+        return ((v.id, v) for v in self.values())
+
+    def filas_de(self, cliente_id: str) -> array:
+        codigo = self.codigos.get(cliente_id)
+        return self.por_cliente[codigo] if codigo is not None else array("i")
+
+    def por_fecha(self) -> array:
+        if self._por_fecha is None:
+            self._por_fecha = array("i", sorted(range(len(self.ts)), key=self.ts.__getitem__))
+        return self._por_fecha
+
+    def rango(self, filas: array, desde: Optional[float], hasta: Optional[float]) -> slice:
+        # filas ordenadas por ts -> tramo con desde <= ts <= hasta, por búsqueda binaria
+        clave = self.ts.__getitem__
+        inicio = bisect.bisect_left(filas, desde, key=clave) if desde is not None else 0
+        fin = bisect.bisect_right(filas, hasta, key=clave) if hasta is not None else len(filas)
+        return slice(inicio, fin)
+
+    def escanear(self, desde: Optional[float] = None, hasta: Optional[float] = None,
+                 peso_min: Optional[float] = None, peso_max: Optional[float] = None) -> List[int]:
+        # Filtro por rangos sobre columnas completas; con NumPy es una sola pasada vectorizada
+        if np is not None:
+            mascara = np.ones(len(self.ts), dtype=bool)
+            ts = np.frombuffer(self.ts, dtype=np.float64)
+            peso = np.frombuffer(self.peso, dtype=np.float64)
+            if desde is not None:
+                mascara &= ts >= desde
+            if hasta is not None:
+                mascara &= ts <= hasta
+            if peso_min is not None:
+                mascara &= peso >= peso_min
+            if peso_max is not None:
+                mascara &= peso <= peso_max
+            return np.flatnonzero(mascara).tolist()
+        # sin NumPy: el índice por fecha acota el tramo y sólo se filtra el peso de esas filas
+        if desde is not None or hasta is not None:
+            orden = self.por_fecha()
+            candidatas = sorted(orden[self.rango(orden, desde, hasta)])
+        else:
+            candidatas = range(len(self.ts))
+        peso_min = -math.inf if peso_min is None else peso_min
+        peso_max = math.inf if peso_max is None else peso_max
+        peso = self.peso
+        return [f for f in candidatas if peso_min <= peso[f] <= peso_max]
+
+    def reindexar(self):
+        self.por_cliente = [array("i") for _ in self.clientes]
+        for fila, codigo in enumerate(self.cliente):
+            self.por_cliente[codigo].append(fila)
+        clave = self.ts.__getitem__
+        for i, filas in enumerate(self.por_cliente):
+            self.por_cliente[i] = array("i", sorted(filas, key=clave))
+        self._por_fecha = None
+
+    def quitar_cliente(self, cliente_id: str) -> int:
+        # Borra las filas del cliente compactando las columnas; el resto cambia de número de fila
+        # pero conserva su orden, así que por_cliente sólo se renumera. El código del cliente queda sin filas.
+        codigo = self.codigos.get(cliente_id)
+        if codigo is None or not self.por_cliente[codigo]:
+            return 0
+        n = len(self.ts)
+        quedan = array("i", (f for f in range(n) if self.cliente[f] != codigo))
+        nueva = array("i", [-1]) * n
+        for i, f in enumerate(quedan):
+            nueva[f] = i
+        self.ts = array("d", (self.ts[f] for f in quedan))
+        self.peso = array("d", (self.peso[f] for f in quedan))
+        self.cliente = array("i", (self.cliente[f] for f in quedan))
+        self.uuid = bytearray(b"".join(self.uuid[f * 16:f * 16 + 16] for f in quedan))
+        self.observaciones = {nueva[f]: t for f, t in self.observaciones.items() if nueva[f] != -1}
+        for columnas in (self.medidas, self.repeticiones):
+            for nombre, (filas, valores) in list(columnas.items()):
+                conservar = [i for i, f in enumerate(filas) if nueva[f] != -1]
+                columnas[nombre] = (array("i", (nueva[filas[i]] for i in conservar)),
+                                    array(valores.typecode, (valores[i] for i in conservar)))
+        self._ids_texto = {t: nueva[f] for t, f in self._ids_texto.items() if nueva[f] != -1}
+        self._texto_de_fila = {f: t for t, f in self._ids_texto.items()}
+        self._rehacer_tabla()
+        self.por_cliente[codigo] = array("i")
+        self.por_cliente = [array("i", (nueva[f] for f in filas)) for filas in self.por_cliente]
+        self._por_fecha = None
+        return n - len(quedan)
+
+    def _rehacer_tabla(self):
+        tamano = 16
+        while tamano < 2 * len(self.ts):
+            tamano *= 2
+        self._tabla = array("q", [-1]) * tamano
+        for f in range(len(self.ts)):
+            if f not in self._texto_de_fila:
+                self._colocar(f)
+
+    def extraer(self, filas: Iterable[int]) -> "ColumnasProgreso":
+        # Almacén nuevo con sólo esas filas, en ese orden, copiando columnas: el resultado de una consulta
+        # que viaja a otro proceso sin crear un ProgresoFisico por fila (ver sucursales.py)
+        sub = ColumnasProgreso()
+        filas = array("i", filas)
+        nueva = {f: i for i, f in enumerate(filas)}
+        ts, peso, cliente, clientes, uuid_ = self.ts, self.peso, self.cliente, self.clientes, self.uuid
+        sub.ts = array("d", [ts[f] for f in filas])
+        sub.peso = array("d", [peso[f] for f in filas])
+        for f in filas:
+            cliente_id = clientes[cliente[f]]
+            codigo = sub.codigos.get(cliente_id)
+            if codigo is None:
+                codigo = sub.codigos[cliente_id] = len(sub.clientes)
+                sub.clientes.append(cliente_id)
+            sub.cliente.append(codigo)
+        sub.uuid = bytearray(b"".join([uuid_[f * 16:f * 16 + 16] for f in filas]))
+        sub.observaciones = {nueva[f]: t for f, t in self.observaciones.items() if f in nueva}
+        for destino, origen in ((sub.medidas, self.medidas), (sub.repeticiones, self.repeticiones)):
+            for nombre, (filas_col, valores) in origen.items():
+                # búsqueda binaria por fila pedida: la columna puede ser mucho más larga que la consulta
+                nuevas, elegidos = array("i"), array(valores.typecode)
+                for i, f in enumerate(filas):
+                    j = bisect.bisect_left(filas_col, f)
+                    if j < len(filas_col) and filas_col[j] == f:
+                        nuevas.append(i)
+                        elegidos.append(valores[j])
+                if nuevas:
+                    destino[nombre] = (nuevas, elegidos)
+        sub._ids_texto = {t: nueva[f] for t, f in self._ids_texto.items() if f in nueva}
+        sub._texto_de_fila = {f: t for t, f in sub._ids_texto.items()}
+        sub._rehacer_tabla()
+        sub.reindexar()
+        return sub
+
+    def a_snapshot(self) -> dict:
+        dispersas = lambda cols: {n: (f.tobytes(), v.tobytes()) for n, (f, v) in cols.items()}
+        return {
+            "ts": self.ts.tobytes(), "peso": self.peso.tobytes(), "cliente": self.cliente.tobytes(),
+            "uuid": bytes(self.uuid), "clientes": self.clientes, "observaciones": self.observaciones,
+            "medidas": dispersas(self.medidas), "repeticiones": dispersas(self.repeticiones),
+            "ids_texto": self._ids_texto, "tabla": self._tabla.tobytes(),
+            "por_cliente": [f.tobytes() for f in self.por_cliente],
+        }
+
+    @classmethod
+    def desde_snapshot(cls, datos: dict) -> "ColumnasProgreso":
+        col = cls()
+        for nombre in ("ts", "peso", "cliente"):
+            getattr(col, nombre).frombytes(datos[nombre])
+        col.uuid = bytearray(datos["uuid"])
+        col.clientes = datos["clientes"]
+        col.codigos = {c: i for i, c in enumerate(col.clientes)}
+        col.observaciones = datos["observaciones"]
+        for destino, tipo, origen in ((col.medidas, "d", datos["medidas"]), (col.repeticiones, "q", datos["repeticiones"])):
+            for nombre, (filas, valores) in origen.items():
+                destino[sys.intern(nombre)] = (array("i", filas), array(tipo, valores))
+        col._ids_texto = datos["ids_texto"]
+        col._texto_de_fila = {f: t for t, f in col._ids_texto.items()}
+        col._tabla = array("q", datos["tabla"])
+        col.por_cliente = [array("i", f) for f in datos["por_cliente"]]
+        return col
+
+
+def _extremos_np(codigos, ts, valores, k: int):
+    # Para cada código 0..k-1: cantidad de filas y (ts, valor) de la primera y la última según ts
+    cuenta = np.bincount(codigos, minlength=k).astype(np.float64)
+    t_ini, v_ini, t_fin, v_fin = (np.full(k, np.nan) for _ in range(4))
+    if len(codigos):
+        orden = np.lexsort((ts, codigos))
+        c = codigos[orden]
+        inicios = np.flatnonzero(np.r_[True, c[1:] != c[:-1]])
+        finales = np.r_[inicios[1:], len(c)] - 1
+        cod = c[inicios]
+        t_ini[cod], v_ini[cod] = ts[orden[inicios]], valores[orden[inicios]]
+        t_fin[cod], v_fin[cod] = ts[orden[finales]], valores[orden[finales]]
+    return cuenta, t_ini, v_ini, t_fin, v_fin
+
+
+_SEPARADORES = re.compile(r"[\W_]+")
+
+
+# marcas diacríticas combinantes (tildes, diéresis, la virgulilla de la ñ...) que deja NFKD
+_SIN_DIACRITICOS = dict.fromkeys(range(0x300, 0x370))
+
+
+def normalizar(texto: str) -> str:
+    # Minúsculas y sin tildes ni diéresis: "Muñoz", "MUNOZ" y "muñoz" se buscan igual
+    if texto.isascii():
+        return texto.lower()
+    return unicodedata.normalize("NFKD", texto).translate(_SIN_DIACRITICOS).casefold()
+
+
+def palabras(texto: str) -> List[str]:
+    return [p for p in _SEPARADORES.split(normalizar(texto)) if p]
+
+
+class IndiceNombres:
+    # Búsqueda por prefijos de palabra: lista ordenada de (palabra, nombre normalizado, id), así todas las
+    # palabras que empiezan con un prefijo forman un tramo contiguo que se encuentra por búsqueda binaria,
+    # ya ordenado por nombre. "gom an" encuentra a "Ana Gómez" y a "Andrés Gómez Ruiz".
+    def __init__(self, nombres: Iterable[Tuple[str, str]] = ()):
+        self.nombres: Dict[str, str] = {}
+        self._palabras: Dict[str, Tuple[str, ...]] = {}
+        self._claves: Dict[str, str] = {}
+        entradas = []
+        for id_, nombre in nombres:
+            clave = self._registrar(id_, nombre)
+            entradas.extend((p, clave, id_) for p in self._palabras[id_])
+        entradas.sort()
+        self._entradas: List[Tuple[str, str, str]] = entradas
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def _registrar(self, id_: str, nombre: str) -> str:
+        self.nombres[id_] = nombre
+        self._palabras[id_] = tuple(dict.fromkeys(palabras(nombre)))
+        clave = self._claves[id_] = "".join(" " + p for p in self._palabras[id_])
+        return clave
+
+    def agregar(self, id_: str, nombre: str):
+        # Alta o cambio de nombre
+        if id_ in self.nombres:
+            if self.nombres[id_] == nombre:
+                return
+            self.quitar(id_)
+        clave = self._registrar(id_, nombre)
+        for p in self._palabras[id_]:
+            bisect.insort(self._entradas, (p, clave, id_))
+
+    def quitar(self, id_: str):
+        clave = self._claves.pop(id_, None)
+        for p in self._palabras.pop(id_, ()):
+            i = bisect.bisect_left(self._entradas, (p, clave, id_))
+            if i < len(self._entradas) and self._entradas[i][2] == id_:
+                del self._entradas[i]
+        self.nombres.pop(id_, None)
+
+    def _tramo(self, prefijo: str) -> Tuple[int, int]:
+        return (bisect.bisect_left(self._entradas, (prefijo,)),
+                bisect.bisect_left(self._entradas, (prefijo + "\U0010ffff",)))
+
+    def buscar(self, texto: str, limite: int = 50) -> List[Tuple[str, str]]:
+        # Los primeros `limite` (id, nombre) cuyas palabras empiezan con cada palabra de `texto`
+        consulta = palabras(texto)
+        if not consulta:
+            consulta = [""]
+        tramos = [self._tramo(q) for q in consulta]
+        # el tramo más corto propone candidatos y las demás palabras se comprueban en cada uno
+        guia = min(range(len(consulta)), key=lambda i: tramos[i][1] - tramos[i][0])
+        # la clave es " palabra palabra ...": " q" en ella <=> alguna palabra empieza con q
+        resto = [" " + q for q in consulta[:guia] + consulta[guia + 1:]]
+        vistos: Set[str] = set()
+        resultado = []
+        entradas = self._entradas
+        for i in range(*tramos[guia]):
+            _, clave, id_ = entradas[i]
+            if id_ in vistos:
+                continue
+            vistos.add(id_)
+            if resto and not all(q in clave for q in resto):
+                continue
+            resultado.append((id_, self.nombres[id_]))
+            if len(resultado) >= limite:
+                break
+        return resultado
+
+
+MAX_CAMBIOS = 200_000
+
+COLECCIONES = {
+    "entrenador": "entrenadores",
+    "cliente": "clientes",
+    "rutina": "rutinas",
+    "plan": "planes",
+    "progreso": "progresos",
+}
+# columnas por las que se puede paginar ordenado -> atributo de la entidad
+# (None: se calcula aparte, p.ej. el nombre del cliente de un progreso)
+COLUMNAS_ORDEN = {
+    "cliente": {"nombre": "nombre", "objetivos": "objetivos", "estado": "estado_fisico_inicial"},
+    "progreso": {"fecha": "fecha", "peso": "peso", "cliente": None},
+}
+# campos que se pueden cambiar con actualizar_cliente/actualizar_entrenador; los vínculos
+# y las listas de ids tienen sus propias operaciones
+CAMPOS_EDITABLES_CLIENTE = ("username", "password", "nombre", "objetivos", "estado_fisico_inicial")
+CAMPOS_EDITABLES_ENTRENADOR = ("username", "password", "nombre", "nivel_experiencia")
+
+
+# Catálogo de rutinas y planes automáticos por objetivo: cada uno se construye una sola vez como
+# plantilla inmutable y todas las entidades creadas a partir de él la comparten por referencia
+RUTINAS_AUTOMATICAS: Dict[str, Tuple[str, DictCongelado]] = {
+    "fuerza": ("Alta", congelar({
+        "Lunes": [
+            {"ejercicio": "Press banca", "series": 4, "reps": "6-8"},
+            {"ejercicio": "Fondos", "series": 3, "reps": "6-8"},
+            {"ejercicio": "Press inclinado", "series": 3, "reps": "6-8"}
+        ],
+        "Martes": [
+            {"ejercicio": "Peso muerto", "series": 4, "reps": "5-6"},
+            {"ejercicio": "Remo con barra", "series": 4, "reps": "6-8"}
+        ],
+        "Miércoles": [
+            {"ejercicio": "Sentadillas", "series": 4, "reps": "6-8"},
+            {"ejercicio": "Prensa", "series": 3, "reps": "6-8"}
+        ],
+        "Jueves": [
+            {"ejercicio": "Press militar", "series": 3, "reps": "6-8"},
+            {"ejercicio": "Elevaciones laterales", "series": 3, "reps": "8-10"}
+        ],
+        "Viernes": [
+            {"ejercicio": "Curl bíceps", "series": 3, "reps": "6-8"},
+            {"ejercicio": "Tríceps polea", "series": 3, "reps": "6-8"}
+        ],
+        "Sábado": [{"ejercicio": "Cardio ligero", "series": 1, "reps": "20-30 min"}],
+        "Domingo": [{"ejercicio": "Descanso", "series": 0, "reps": ""}]
+    })),
+    "bajar": ("Alta", congelar({
+        "Lunes": [
+            {"ejercicio": "Circuito (sentadillas, flexiones, salto)", "series": 3, "reps": "15-20 cada ejercicio"},
+            {"ejercicio": "Cardio HIIT", "series": 1, "reps": "15-20 min"}
+        ],
+        "Martes": [
+            {"ejercicio": "Entrenamiento full body", "series": 3, "reps": "12-15"}
+        ],
+        "Miércoles": [
+            {"ejercicio": "Cardio moderado", "series": 1, "reps": "30-40 min"}
+        ],
+        "Jueves": [
+            {"ejercicio": "Circuito + core", "series": 3, "reps": "15-20"}
+        ],
+        "Viernes": [
+            {"ejercicio": "HIIT + fuerza ligera", "series": 3, "reps": "12-15"}
+        ],
+        "Sábado": [{"ejercicio": "Caminata larga", "series": 1, "reps": "45-60 min"}],
+        "Domingo": [{"ejercicio": "Descanso activo (yoga)"}]
+    })),
+    "salud": ("Baja-Media", congelar({
+        "Lunes": [
+            {"ejercicio": "Full body ligero", "series": 3, "reps": "10-12"},
+            {"ejercicio": "Caminata", "series": 1, "reps": "30 min"}
+        ],
+        "Martes": [
+            {"ejercicio": "Movilidad y yoga", "series": 1, "reps": "30-40 min"}
+        ],
+        "Miércoles": [
+            {"ejercicio": "Entrenamiento funcional", "series": 3, "reps": "10-12"}
+        ],
+        "Jueves": [
+            {"ejercicio": "Caminata ligera", "series": 1, "reps": "30 min"}
+        ],
+        "Viernes": [
+            {"ejercicio": "Circuito suave", "series": 3, "reps": "12-15"}
+        ],
+        "Sábado": [{"ejercicio": "Actividad recreativa", "series": 1, "reps": "60 min"}],
+        "Domingo": [{"ejercicio": "Descanso"}]
+    })),
+}
+
+PLANES_AUTOMATICOS: Dict[str, Tuple[int, int, DictCongelado, str]] = {
+    "fuerza": (2800, 5, congelar({
+        "Desayuno": "Avena, 3 huevos, banana, leche",
+        "Media mañana": "Batido proteína + frutos secos",
+        "Almuerzo": "Arroz integral, pollo a la plancha, aguacate, ensalada",
+        "Merienda": "Yogur griego + granola",
+        "Cena": "Carne magra, papas asadas, vegetales"
+    }), "Enfocado en superávit calórico y proteínas para fuerza."),
+    "bajar": (1700, 5, congelar({
+        "Desayuno": "Claras revueltas, avena (porción pequeña), manzana",
+        "Media mañana": "Yogur natural o té",
+        "Almuerzo": "Pechuga de pollo, ensalada abundante, quinoa pequeña",
+        "Merienda": "Frutos secos (porción pequeña)",
+        "Cena": "Pescado al vapor, vegetales al vapor"
+    }), "Déficit moderado con proteína suficiente."),
+    "salud": (2100, 5, congelar({
+        "Desayuno": "Yogur natural, granola, frutas",
+        "Media mañana": "Fruta y nueces",
+        "Almuerzo": "Pollo a la plancha, arroz integral, ensalada",
+        "Merienda": "Batido de frutas",
+        "Cena": "Sopa ligera, pan integral, vegetales"
+    }), "Balanceado, enfocado en calidad de alimentos."),
+}
+
+
+def categoria_objetivo(objetivos: str) -> str:
+    objetivo = (objetivos or "").lower()
+    if "fuerza" in objetivo:
+        return "fuerza"
+    if "bajar" in objetivo or "peso" in objetivo:
+        return "bajar"
+    return "salud"
+
+
+def plan_automatico(cliente_id: str, objetivos: str) -> PlanAlimentacion:
+    calorias, comidas, detalle, obs = PLANES_AUTOMATICOS[categoria_objetivo(objetivos)]
+    return PlanAlimentacion(
+        cliente_id=cliente_id,
+        comidas_por_dia=comidas,
+        calorias_diarias=calorias,
+        detalle_comidas=detalle,
+        observaciones=obs
+    )
+
+
+def rutina_automatica(cliente_id: str, objetivos: str, entrenador_id: Optional[str] = None) -> RutinaEjercicio:
+    intensidad, semana = RUTINAS_AUTOMATICAS[categoria_objetivo(objetivos)]
+    return RutinaEjercicio(cliente_id=cliente_id, entrenador_id=entrenador_id or "", ejercicios_semana=semana, intensidad=intensidad)
+
+
+def _generar_automaticos(bloque: List[Tuple[str, str, Optional[str]]], planes: bool,
+                         rutinas: bool) -> List[Tuple[str, List[Tuple[str, object]]]]:
+    # Sólo construye entidades a partir de datos copiados: no toca el repositorio
+    creados = []
+    for cliente_id, objetivos, entrenador_id in bloque:
+        entidades = []
+        if planes:
+            entidades.append(("plan", plan_automatico(cliente_id, objetivos)))
+        if rutinas:
+            entidades.append(("rutina", rutina_automatica(cliente_id, objetivos, entrenador_id)))
+        creados.append((cliente_id, entidades))
+    return creados
+
+
+def sin_entrenador(cli: Cliente) -> bool:
+    return not cli.entrenador_id
+
+
+# Texto de rutinas y planes, línea a línea: lo muestran los diálogos y lo escriben las exportaciones
+def lineas_rutina(rutina: RutinaEjercicio) -> Iterator[str]:
+    for dia, ejercicios in rutina.ejercicios_semana.items():
+        yield f"{dia}:\n"
+        for ex in ejercicios:
+            yield f"  - {ex.get('ejercicio')}: {ex.get('series')} x {ex.get('reps')}\n"
+        yield "\n"
+
+
+def lineas_plan(plan: PlanAlimentacion) -> Iterator[str]:
+    yield f"Calorías diarias: {plan.calorias_diarias}\nComidas por día: {plan.comidas_por_dia}\n\n"
+    for comida, detalle in plan.detalle_comidas.items():
+        yield f"{comida}: {detalle}\n"
+    if plan.observaciones:
+        yield f"\nObservaciones:\n{plan.observaciones}\n"
+
+
+class _Seccion:
+    # with cerrojo.leer()/escribir(): sin generador de por medio, que en lecturas cortas pesa más que el cerrojo
+    __slots__ = ("_adquirir", "_soltar")
+
+    def __init__(self, adquirir: Callable[[], None], soltar: Callable[[], None]):
+        self._adquirir = adquirir
+        self._soltar = soltar
+
+    def __enter__(self):
+        self._adquirir()
+
+    def __exit__(self, *exc):
+        self._soltar()
+
+
+class CerrojoLectorEscritor:
+    # Varios lectores a la vez o un único escritor. Es reentrante por hilo: quien escribe puede volver a
+    # escribir o leer, y quien lee puede volver a leer aunque haya escritores esperando. Pasar de lectura
+    # a escritura no se permite (dos lectores que lo intentaran a la vez se bloquearían mutuamente).
+    # Los escritores tienen prioridad: con uno esperando no entran lectores nuevos.
+    def __init__(self):
+        # el mutex se toma directamente (es C); la condición sobre el mismo mutex sólo para esperar/avisar
+        self._mutex = threading.Lock()
+        self._condicion = threading.Condition(self._mutex)
+        self._lectores: Dict[int, int] = {}  # hilo -> profundidad de lectura
+        self._escritor: Optional[int] = None
+        self._profundidad = 0
+        self._esperando = 0
+        self._lectura = _Seccion(self.adquirir_lectura, self.soltar_lectura)
+        self._escritura = _Seccion(self.adquirir_escritura, self.soltar_escritura)
+
+    def leer(self) -> _Seccion:
+        return self._lectura
+
+    def escribir(self) -> _Seccion:
+        return self._escritura
+
+    def adquirir_lectura(self):
+        yo = threading.get_ident()
+        with self._mutex:
+            if self._escritor != yo and yo not in self._lectores:
+                while self._escritor is not None or self._esperando:
+                    self._condicion.wait()
+            self._lectores[yo] = self._lectores.get(yo, 0) + 1
+
+    def soltar_lectura(self):
+        yo = threading.get_ident()
+        with self._mutex:
+            n = self._lectores.pop(yo) - 1
+            if n:
+                self._lectores[yo] = n
+            elif not self._lectores:
+                self._condicion.notify_all()
+
+    def adquirir_escritura(self):
+        yo = threading.get_ident()
+        with self._mutex:
+            if self._escritor != yo:
+                if yo in self._lectores:
+                    raise RuntimeError("No se puede pasar de lectura a escritura sin soltar la lectura")
+                self._esperando += 1
+                try:
+                    while self._escritor is not None or self._lectores:
+                        self._condicion.wait()
+                finally:
+                    self._esperando -= 1
+                self._escritor = yo
+            self._profundidad += 1
+
+    def soltar_escritura(self):
+        with self._mutex:
+            self._profundidad -= 1
+            if not self._profundidad:
+                self._escritor = None
+                self._condicion.notify_all()
+
+
+def en_lectura(metodo):
+    # Métodos de consulta que recorren varias estructuras: se ejecutan con el cerrojo de lectura
+    @functools.wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        self._cerrojo.adquirir_lectura()
+        try:
+            return metodo(self, *args, **kwargs)
+        finally:
+            self._cerrojo.soltar_lectura()
+    return envoltura
+
+
+def en_transaccion(metodo):
+    # Operaciones "comprobar y cambiar": la validación y los cambios van en una misma transacción
+    @functools.wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        with self.transaccion():
+            return metodo(self, *args, **kwargs)
+    return envoltura
+
+
+class Repositorio:
+    def __init__(self):
+        self.usuarios: Dict[str, Usuario] = {}
+        self.entrenadores: Dict[str, Entrenador] = {}
+        self.clientes: Dict[str, Cliente] = {}
+        self.rutinas: Dict[str, RutinaEjercicio] = {}
+        self.planes: Dict[str, PlanAlimentacion] = {}
+        self.progresos = ColumnasProgreso()
+        # username -> usuario, para login y registro sin recorrer todos los usuarios
+        self.por_username: Dict[str, Usuario] = {}
+        # funciones (evento, dato) avisadas tras cada cambio, p.ej. el diario de escrituras
+        self._oyentes: List[Callable[[str, object], None]] = []
+        # funciones (confirmado) avisadas al terminar cada transacción de un backend que puede deshacerla,
+        # p.ej. el publicador de réplicas, que no publica lo que después se deshace
+        self._oyentes_lote: List[Callable[[bool], None]] = []
+        # registro de cambios (tipo, id); la versión n corresponde a self._cambios[n - 1 - _version_base]
+        self.version = 0
+        self._version_base = 0
+        self._cambios: List[Tuple[str, str]] = []
+        # (tipo, columna) -> (claves ordenadas por esa columna, función clave); se crean al pedirlos.
+        # Las claves son ids, salvo en progresos, donde son filas de ColumnasProgreso
+        self._indices_orden: Dict[Tuple[str, str], Tuple[list, Callable]] = {}
+        # cliente_id -> ids ordenados por fecha de creación; los progresos los indexa su propio almacén
+        self._rutinas_por_cliente: Dict[str, List[str]] = {}
+        self._planes_por_cliente: Dict[str, List[str]] = {}
+        # tipo ("cliente"/"entrenador") -> búsqueda por nombre; se crea en la primera búsqueda
+        self._indices_nombres: Dict[str, IndiceNombres] = {}
+        # cliente_id -> ResumenCliente; se calcula la primera vez que se pide y desde ahí lo
+        # mantiene aplicar en O(1) por escritura
+        self._resumenes: Dict[str, ResumenCliente] = {}
+        # lectores en paralelo, un escritor a la vez (ver transaccion)
+        self._cerrojo = CerrojoLectorEscritor()
+
+
+    def suscribir(self, oyente: Callable[[str, object], None]):
+        self._oyentes.append(oyente)
+
+    def desuscribir(self, oyente: Callable[[str, object], None]):
+        # bajo el cerrojo: no se quita un oyente mientras se recorre la lista para notificar
+        with self._cerrojo.escribir():
+            self._oyentes.remove(oyente)
+
+    def suscribir_lote(self, oyente: Callable[[bool], None]):
+        self._oyentes_lote.append(oyente)
+
+    def desuscribir_lote(self, oyente: Callable[[bool], None]):
+        with self._cerrojo.escribir():
+            self._oyentes_lote.remove(oyente)
+
+    @property
+    def en_lote(self) -> bool:
+        # Hay cambios ya notificados que todavía pueden deshacerse. En memoria nunca: lo aplicado queda
+        return False
+
+    def _terminar_lote(self, confirmado: bool):
+        for oyente in self._oyentes_lote:
+            oyente(confirmado)
+
+    def _notificar(self, evento: str, dato):
+        for oyente in self._oyentes:
+            oyente(evento, dato)
+
+    def _cambiar(self, evento: str, dato):
+        # Cada cambio se aplica y se notifica bajo el cerrojo de escritura: los lectores nunca ven un
+        # vínculo a medias y los oyentes (el diario) reciben los cambios en el mismo orden en que se aplicaron
+        with self._cerrojo.escribir():
+            self.aplicar(evento, dato)
+            self._notificar(evento, dato)
+
+    @contextmanager
+    def transaccion(self):
+        # Varios cambios como una unidad: nadie lee ni escribe en medio y, en los backends persistentes,
+        # se confirman juntos o no se confirma ninguno. Las operaciones validan antes de cambiar nada.
+        with self._cerrojo.escribir(), self.lote():
+            yield self
+
+    def leyendo(self):
+        # Para lecturas que combinan varias colecciones y tienen que ver un estado coherente
+        return self._cerrojo.leer()
+
+    def aplicar(self, evento: str, dato):
+        # Guarda un cambio y lo marca como pendiente para las vistas; el diario y las réplicas
+        # lo usan para reproducir cambios ya ocurridos sin volver a notificarlos
+        if evento == "entrenador":
+            self._guardar_entrenador(dato)
+            self._nombre_cambiado(evento, dato.id, dato.nombre)
+        elif evento == "cliente":
+            if self._indices_orden and dato.id in self.clientes:
+                # modificación: se saca del orden con los valores viejos y se vuelve a insertar abajo
+                self._quitar_de_indices("cliente", dato.id)
+                self._indices_orden.pop(("progreso", "cliente"), None)
+            self._guardar_cliente(dato)
+            self._nombre_cambiado(evento, dato.id, dato.nombre)
+        elif evento == "baja_cliente":
+            cli = self.clientes.get(dato)
+            if cli:
+                borrados = ([("rutina", r.id) for r in self.rutinas_de(cli.id)]
+                            + [("plan", pl.id) for pl in self.planes_de(cli.id)]
+                            + [("progreso", p.id) for p in self.progresos_de(cli.id)])
+                self._quitar_de_indices("cliente", cli.id)
+                self._borrar_cliente(cli)
+                self._resumenes.pop(cli.id, None)
+                self._nombre_cambiado("cliente", cli.id, None)
+                for clave in [k for k in self._indices_orden if k[0] == "progreso"]:
+                    del self._indices_orden[clave]  # las filas de progreso se renumeraron
+                self._marcar("cliente", cli.id)
+                if cli.entrenador_id:
+                    self._marcar("entrenador", cli.entrenador_id)
+                for tipo, id_ in borrados:
+                    self._marcar(tipo, id_)
+            return
+        elif evento == "baja_entrenador":
+            ent = self.entrenadores.get(dato)
+            if ent:
+                self._borrar_entrenador(ent)
+                self._nombre_cambiado("entrenador", ent.id, None)
+                self._marcar("entrenador", ent.id)
+                for cid in ent.clientes_ids:
+                    self._marcar("cliente", cid)
+            return
+        elif evento == "vinculo":
+            cli = self.clientes.get(dato[0])
+            ent = self._entrenador_a_actualizar(dato[1])
+            if cli and ent:
+                anterior = cli.entrenador_id
+                self._guardar_vinculo(cli, ent)
+                self._marcar("cliente", cli.id)
+                self._marcar("entrenador", ent.id)
+                if anterior and anterior != ent.id:
+                    self._marcar("entrenador", anterior)
+            return
+        elif evento == "rutina":
+            ts = a_epoch(dato.fecha_creacion)  # una fecha inválida se rechaza antes de guardar nada
+            self._guardar_rutina(dato, self._cliente_a_actualizar(dato.cliente_id))
+            res = self._resumenes.get(dato.cliente_id)
+            if res is not None:
+                res.sumar_rutina(ts)
+        elif evento == "plan":
+            ts = a_epoch(dato.fecha_creacion)
+            self._guardar_plan(dato, self._cliente_a_actualizar(dato.cliente_id))
+            res = self._resumenes.get(dato.cliente_id)
+            if res is not None:
+                res.sumar_plan(ts)
+        elif evento == "progreso":
+            self._guardar_progreso(dato)
+            res = self._resumenes.get(dato.cliente_id)
+            if res is not None:
+                res.sumar_control(a_epoch(dato.fecha), dato.peso)
+        else:
+            raise ValueError(f"Evento desconocido: {evento}")
+        self._indexar(evento, dato)
+        self._marcar(evento, dato.id)
+
+    def _nombre_cambiado(self, tipo: str, id_: str, nombre: Optional[str]):
+        # Mantiene la búsqueda por nombre si ya se creó (None: baja)
+        indice = self._indices_nombres.get(tipo)
+        if indice is not None:
+            if nombre is None:
+                indice.quitar(id_)
+            else:
+                indice.agregar(id_, nombre)
+
+    def _nombres(self, tipo: str) -> Iterable[Tuple[str, str]]:
+        return ((o.id, o.nombre) for o in getattr(self, COLECCIONES[tipo]).values())
+
+    @en_lectura
+    def buscar_nombres(self, tipo: str, texto: str, limite: int = 50) -> List[Tuple[str, str]]:
+        # (id, nombre) de clientes o entrenadores cuyo nombre contiene palabras que empiezan
+        # con las de `texto`, sin distinguir mayúsculas ni tildes
+        indice = self._indices_nombres.get(tipo)
+        if indice is None:
+            indice = self._indices_nombres[tipo] = IndiceNombres(self._nombres(tipo))
+        return indice.buscar(texto, limite)
+
+    def _cliente_a_actualizar(self, cliente_id: str) -> Optional[Cliente]:
+        # Cliente cuyas listas rutinas_ids/planes_ids hay que actualizar al guardar una rutina o plan
+        return self.clientes.get(cliente_id)
+
+    def _entrenador_a_actualizar(self, entrenador_id: str) -> Optional[Entrenador]:
+        # Entrenador cuya lista clientes_ids hay que actualizar al vincularle un cliente
+        return self.entrenadores.get(entrenador_id)
+
+    def _indexar(self, evento: str, dato):
+        if evento == "rutina":
+            ids = self._rutinas_por_cliente.setdefault(dato.cliente_id, [])
+            bisect.insort(ids, dato.id, key=self._fecha_rutina)
+        elif evento == "plan":
+            ids = self._planes_por_cliente.setdefault(dato.cliente_id, [])
+            bisect.insort(ids, dato.id, key=self._fecha_plan)
+        if evento in COLUMNAS_ORDEN:
+            # los progresos sólo se añaden al final: su fila es la última
+            elemento = len(self.progresos) - 1 if evento == "progreso" else dato.id
+            for (t, columna), (claves, clave) in self._indices_orden.items():
+                if t == evento and claves is not self.progresos._por_fecha:
+                    bisect.insort(claves, elemento, key=clave)
+
+    def reindexar(self):
+        # Para cargas masivas que llenan las colecciones sin pasar por aplicar (p.ej. un snapshot).
+        # ColumnasProgreso mantiene y guarda sus propios índices (ver ColumnasProgreso.reindexar)
+        self._indices_orden.clear()
+        self._indices_nombres.clear()
+        self._resumenes.clear()
+        self._rutinas_por_cliente.clear()
+        self._planes_por_cliente.clear()
+        for r in self.rutinas.values():
+            self._rutinas_por_cliente.setdefault(r.cliente_id, []).append(r.id)
+        for pl in self.planes.values():
+            self._planes_por_cliente.setdefault(pl.cliente_id, []).append(pl.id)
+        for ids in self._rutinas_por_cliente.values():
+            ids.sort(key=self._fecha_rutina)
+        for ids in self._planes_por_cliente.values():
+            ids.sort(key=self._fecha_plan)
+
+    @en_lectura
+    def resumen_cliente(self, cliente_id: str) -> ResumenCliente:
+        # Una copia: el resumen guardado sigue cambiando con cada escritura
+        res = self._resumenes.get(cliente_id)
+        if res is None:
+            if cliente_id not in self.clientes:
+                raise KeyError(cliente_id)
+            res = self._resumenes[cliente_id] = self._calcular_resumen(cliente_id)
+        return replace(res)
+
+    def _calcular_resumen(self, cliente_id: str) -> ResumenCliente:
+        # Sólo la primera vez por cliente (o tras reindexar); las filas ya están ordenadas por fecha
+        res = ResumenCliente()
+        col = self.progresos
+        for fila in col.filas_de(cliente_id):
+            res.sumar_control(col.ts[fila], col.peso[fila])
+        rutinas = self._rutinas_por_cliente.get(cliente_id, ())
+        planes = self._planes_por_cliente.get(cliente_id, ())
+        res.rutinas, res.planes = len(rutinas), len(planes)
+        if rutinas:
+            res.actividad(a_epoch(self._fecha_rutina(rutinas[0])))
+        if planes:
+            res.actividad(a_epoch(self._fecha_plan(planes[0])))
+        return res
+
+    def _fecha_rutina(self, id_: str) -> str:
+        return self.rutinas[id_].fecha_creacion
+
+    def _fecha_plan(self, id_: str) -> str:
+        return self.planes[id_].fecha_creacion
+
+    @en_lectura
+    def progresos_de(self, cliente_id: str, desde: Optional[str] = None, hasta: Optional[str] = None) -> List[ProgresoFisico]:
+        # Progresos del cliente ordenados por fecha, opcionalmente acotados (fechas "YYYY-MM-DD[ HH:MM:SS]")
+        filas = self.progresos.filas_de(cliente_id)
+        return [self.progresos.vista(f) for f in filas[self.progresos.rango(filas, *_limites(desde, hasta))]]
+
+    @en_lectura
+    def ultimo_progreso(self, cliente_id: str) -> Optional[ProgresoFisico]:
+        filas = self.progresos.filas_de(cliente_id)
+        return self.progresos.vista(filas[-1]) if filas else None
+
+    @en_lectura
+    def progresos_entre(self, desde: Optional[str] = None, hasta: Optional[str] = None) -> List[ProgresoFisico]:
+        # Todos los progresos del rango usando el índice global por fecha
+        filas = self.progresos.por_fecha()
+        return [self.progresos.vista(f) for f in filas[self.progresos.rango(filas, *_limites(desde, hasta))]]
+
+    @en_lectura
+    def rutinas_de(self, cliente_id: str) -> List[RutinaEjercicio]:
+        return [self.rutinas[i] for i in self._rutinas_por_cliente.get(cliente_id, [])]
+
+    @en_lectura
+    def planes_de(self, cliente_id: str) -> List[PlanAlimentacion]:
+        return [self.planes[i] for i in self._planes_por_cliente.get(cliente_id, [])]
+
+    @en_lectura
+    def reporte_progreso(self, hoy: Optional[str] = None, controles_por_semana: float = 1.0) -> List[ReporteCliente]:
+        # Evolución de todos los clientes: cambio de peso, kg/semana, días desde el último control,
+        # cambio de cintura y adherencia (controles hechos / esperados desde el primero, máx. 1)
+        ahora = a_epoch(hoy) if hoy else a_epoch(datetime.now().isoformat(sep=" ", timespec="seconds"))
+        ids, ag = self._agregados_progreso()
+        if np is not None:
+            ag = {k: np.asarray(v, dtype=np.float64) for k, v in ag.items()}
+            with np.errstate(invalid="ignore", divide="ignore"):
+                delta = np.where(ag["n_pesos"] >= 2, ag["peso_fin"] - ag["peso_ini"], np.nan)
+                semanas = (ag["t_peso_fin"] - ag["t_peso_ini"]) / SEMANA
+                kg_semana = np.where(semanas > 0, delta / semanas, np.nan)
+                dias = (ahora - ag["ultimo_ts"]) / DIA
+                cintura = np.where(ag["n_cintura"] >= 2, ag["cintura_fin"] - ag["cintura_ini"], np.nan)
+                esperados = np.maximum(1.0, (ahora - ag["primer_ts"]) / SEMANA) * controles_por_semana
+                adherencia = np.minimum(1.0, ag["n"] / esperados)
+            columnas = [c.tolist() for c in (ag["n"], delta, kg_semana, dias, cintura, adherencia)]
+        else:
+            nan = math.nan
+            columnas = [[], [], [], [], [], []]
+            for i in range(len(ids)):
+                delta = ag["peso_fin"][i] - ag["peso_ini"][i] if ag["n_pesos"][i] >= 2 else nan
+                semanas = (ag["t_peso_fin"][i] - ag["t_peso_ini"][i]) / SEMANA
+                esperados = max(1.0, (ahora - ag["primer_ts"][i]) / SEMANA) * controles_por_semana
+                for lista, valor in zip(columnas, (
+                        ag["n"][i], delta, delta / semanas if semanas > 0 else nan, (ahora - ag["ultimo_ts"][i]) / DIA,
+                        ag["cintura_fin"][i] - ag["cintura_ini"][i] if ag["n_cintura"][i] >= 2 else nan,
+                        min(1.0, ag["n"][i] / esperados))):
+                    lista.append(valor)
+        posicion = {cid: i for i, cid in enumerate(ids)}
+        limpio = lambda v: None if v != v else round(v, 2)  # NaN -> None
+        filas = []
+        for cli in self.clientes.values():
+            i = posicion.get(cli.id)
+            if i is None:
+                filas.append(ReporteCliente(id=cli.id, nombre=cli.nombre))
+                continue
+            n, delta, kg_semana, dias, cintura, adherencia = (c[i] for c in columnas)
+            filas.append(ReporteCliente(id=cli.id, nombre=cli.nombre, controles=int(n), delta_peso=limpio(delta),
+                                        kg_por_semana=limpio(kg_semana), dias_sin_control=limpio(dias),
+                                        delta_cintura=limpio(cintura), adherencia=limpio(adherencia)))
+        return filas
+
+    def _agregados_progreso(self) -> Tuple[List[str], Dict[str, list]]:
+        # Por cliente (en el orden de la lista devuelta): nº de controles, primer/último ts, primer/último
+        # peso no nulo con su ts y primera/última cintura. Con NumPy es una sola pasada ordenada.
+        col = self.progresos
+        k = len(col.clientes)
+        if np is not None and len(col):
+            codigos = np.frombuffer(col.cliente, dtype=np.int32)
+            ts = np.frombuffer(col.ts, dtype=np.float64)
+            peso = np.frombuffer(col.peso, dtype=np.float64)
+            n, primer_ts, _, ultimo_ts, _ = _extremos_np(codigos, ts, ts, k)
+            con_peso = np.flatnonzero(peso > 0)
+            n_pesos, t_ini, peso_ini, t_fin, peso_fin = _extremos_np(codigos[con_peso], ts[con_peso], peso[con_peso], k)
+            filas_c, valores_c = col.medidas.get("cintura", (array("i"), array("d")))
+            filas_c = np.frombuffer(filas_c, dtype=np.int32)
+            n_cint, _, cint_ini, _, cint_fin = _extremos_np(codigos[filas_c], ts[filas_c],
+                                                          np.frombuffer(valores_c, dtype=np.float64), k)
+            return col.clientes, {"n": n, "primer_ts": primer_ts, "ultimo_ts": ultimo_ts, "n_pesos": n_pesos,
+                                  "t_peso_ini": t_ini, "peso_ini": peso_ini, "t_peso_fin": t_fin, "peso_fin": peso_fin,
+                                  "n_cintura": n_cint, "cintura_ini": cint_ini, "cintura_fin": cint_fin}
+        nan = math.nan
+        ag = {c: [nan] * k for c in ("primer_ts", "ultimo_ts", "t_peso_ini", "peso_ini", "t_peso_fin", "peso_fin",
+                                     "cintura_ini", "cintura_fin")}
+        ag["n"], ag["n_pesos"], ag["n_cintura"] = [0] * k, [0] * k, [0] * k
+        ts, peso = col.ts, col.peso
+        for codigo, filas in enumerate(col.por_cliente):
+            if not filas:
+                continue
+            ag["n"][codigo] = len(filas)
+            ag["primer_ts"][codigo] = ts[filas[0]]
+            ag["ultimo_ts"][codigo] = ts[filas[-1]]
+            con_peso = [f for f in filas if peso[f] > 0]
+            if con_peso:
+                ag["n_pesos"][codigo] = len(con_peso)
+                ag["t_peso_ini"][codigo], ag["peso_ini"][codigo] = ts[con_peso[0]], peso[con_peso[0]]
+                ag["t_peso_fin"][codigo], ag["peso_fin"][codigo] = ts[con_peso[-1]], peso[con_peso[-1]]
+        t_cint_ini, t_cint_fin = [math.inf] * k, [-math.inf] * k
+        for fila, valor in zip(*col.medidas.get("cintura", ((), ()))):
+            codigo, t = col.cliente[fila], ts[fila]
+            ag["n_cintura"][codigo] += 1
+            if t < t_cint_ini[codigo]:
+                t_cint_ini[codigo], ag["cintura_ini"][codigo] = t, valor
+            if t >= t_cint_fin[codigo]:
+                t_cint_fin[codigo], ag["cintura_fin"][codigo] = t, valor
+        return col.clientes, ag
+
+    def _marcar(self, tipo: str, id_: str):
+        self.version += 1
+        self._cambios.append((tipo, id_))
+        if len(self._cambios) > MAX_CAMBIOS:
+            recorte = len(self._cambios) // 2
+            del self._cambios[:recorte]
+            self._version_base += recorte
+
+    @en_lectura
+    def cambios_desde(self, version: int) -> Optional[Dict[str, Set[str]]]:
+        # ids cambiados por tipo de entidad desde `version`; None si ese tramo ya se descartó
+        # y la vista tiene que recargarse entera
+        if version < self._version_base:
+            return None
+        cambios: Dict[str, Set[str]] = {}
+        for tipo, id_ in self._cambios[version - self._version_base:]:
+            cambios.setdefault(tipo, set()).add(id_)
+        return cambios
+
+    def contar(self, tipo: str) -> int:
+        return len(getattr(self, COLECCIONES[tipo]))
+
+    @en_lectura
+    def pagina(self, tipo: str, desde: int, cantidad: int, orden: str, descendente: bool = False) -> list:
+        # Una ventana de `cantidad` entidades ordenadas por `orden`, sin recorrer la colección
+        claves, _ = self._indice_orden(tipo, orden)
+        n = len(claves)
+        if descendente:
+            tramo = claves[max(0, n - desde - cantidad):max(0, n - desde)][::-1]
+        else:
+            tramo = claves[desde:desde + cantidad]
+        if tipo == "progreso":
+            return [self.progresos.vista(f) for f in tramo]
+        coleccion = getattr(self, COLECCIONES[tipo])
+        return [coleccion[id_] for id_ in tramo]
+
+    def _clave_orden(self, tipo: str, columna: str) -> Callable:
+        coleccion = getattr(self, COLECCIONES[tipo])
+        atributo = COLUMNAS_ORDEN[tipo][columna]
+        if tipo == "progreso":
+            # progresos: las claves son filas y se leen directamente de las columnas
+            if atributo is None:
+                def clave(fila):
+                    cli = self.clientes.get(coleccion.clientes[coleccion.cliente[fila]])
+                    return cli.nombre.lower() if cli else ""
+                return clave
+            return getattr(coleccion, "ts" if atributo == "fecha" else atributo).__getitem__
+        if atributo is None:
+            def clave(id_):
+                cli = self.clientes.get(coleccion[id_].cliente_id)
+                return cli.nombre.lower() if cli else ""
+        else:
+            def clave(id_):
+                valor = getattr(coleccion[id_], atributo)
+                return valor.lower() if isinstance(valor, str) else valor
+        return clave
+
+    def _indice_orden(self, tipo: str, columna: str) -> Tuple[List[str], Callable]:
+        if columna not in COLUMNAS_ORDEN.get(tipo, {}):
+            raise ValueError(f"No se puede ordenar {tipo} por {columna}")
+        indice = self._indices_orden.get((tipo, columna))
+        if indice is None:
+            clave = self._clave_orden(tipo, columna)
+            if (tipo, columna) == ("progreso", "fecha"):
+                claves = self.progresos.por_fecha()  # lo mantiene el propio almacén
+            elif tipo == "progreso":
+                claves = array("i", sorted(range(len(self.progresos)), key=clave))
+            else:
+                claves = sorted(getattr(self, COLECCIONES[tipo]), key=clave)
+            indice = self._indices_orden[(tipo, columna)] = (claves, clave)
+        return indice
+
+    def add_entrenador(self, ent: Entrenador):
+        # comprobar y guardar bajo el mismo cerrojo: dos altas simultáneas no se llevan el mismo username
+        with self._cerrojo.escribir():
+            self._comprobar_username(ent)
+            self._cambiar("entrenador", ent)
+
+    def add_cliente(self, cli: Cliente):
+        with self._cerrojo.escribir():
+            self._comprobar_username(cli)
+            self._cambiar("cliente", cli)
+
+    def _comprobar_username(self, usr: Usuario):
+        # El username es único: sólo lo puede repetir el mismo usuario (un alta que reemplaza a otra)
+        otro = self.find_by_username(usr.username)
+        if otro is not None and otro.id != usr.id:
+            raise ValueError("El usuario ya existe")
+
+    def _guardar_entrenador(self, ent: Entrenador):
+        self._soltar_username(ent)
+        self.entrenadores[ent.id] = ent
+        self.usuarios[ent.id] = ent
+        self.por_username[ent.username] = ent
+
+    def _guardar_cliente(self, cli: Cliente):
+        self._soltar_username(cli)
+        self.clientes[cli.id] = cli
+        self.usuarios[cli.id] = cli
+        self.por_username[cli.username] = cli
+
+    def _soltar_username(self, usr: Usuario):
+        anterior = self.usuarios.get(usr.id)
+        if anterior is not None and anterior.username != usr.username:
+            self._quitar_username(anterior)
+
+    def _quitar_username(self, usr: Usuario):
+        # sólo si el username es de este usuario: nunca se borra la entrada de otro
+        if getattr(self.por_username.get(usr.username), "id", None) == usr.id:
+            del self.por_username[usr.username]
+
+    def _quitar_de_indices(self, tipo: str, id_: str):
+        # Antes de cambiar o borrar la entidad, mientras la clave todavía da el valor viejo
+        for (t, _), (claves, clave) in self._indices_orden.items():
+            if t != tipo:
+                continue
+            i = bisect.bisect_left(claves, clave(id_), key=clave)
+            while i < len(claves) and claves[i] != id_:
+                i += 1
+            if i < len(claves):
+                del claves[i]
+
+    @en_transaccion
+    def actualizar_cliente(self, cliente_id: str, **campos) -> Cliente:
+        return self._actualizar_usuario(self.clientes, "cliente", cliente_id, CAMPOS_EDITABLES_CLIENTE, campos)
+
+    @en_transaccion
+    def actualizar_entrenador(self, entrenador_id: str, **campos) -> Entrenador:
+        return self._actualizar_usuario(self.entrenadores, "entrenador", entrenador_id,
+                                        CAMPOS_EDITABLES_ENTRENADOR, campos)
+
+    def _actualizar_usuario(self, coleccion, evento: str, id_: str, editables, campos: dict):
+        usr = coleccion.get(id_)
+        if not usr:
+            raise KeyError(id_)
+        desconocidos = set(campos) - set(editables)
+        if desconocidos:
+            raise ValueError(f"Campos no editables: {', '.join(sorted(desconocidos))}")
+        username = campos.get("username", usr.username)
+        if username != usr.username and self.find_by_username(username):
+            raise ValueError("El usuario ya existe")
+        # la entidad nueva reemplaza a la vieja con el mismo evento que el alta (es un upsert)
+        nuevo = replace(usr, **campos)
+        self._cambiar(evento, nuevo)
+        return nuevo
+
+    @en_transaccion
+    def eliminar_cliente(self, cliente_id: str) -> bool:
+        if cliente_id not in self.clientes:
+            return False
+        self._cambiar("baja_cliente", cliente_id)
+        return True
+
+    @en_transaccion
+    def eliminar_entrenador(self, entrenador_id: str) -> bool:
+        if entrenador_id not in self.entrenadores:
+            return False
+        self._cambiar("baja_entrenador", entrenador_id)
+        return True
+
+    def _borrar_cliente(self, cli: Cliente):
+        # Baja en cascada: rutinas, planes y progresos del cliente, y su lugar en el entrenador
+        ent = self.entrenadores.get(cli.entrenador_id) if cli.entrenador_id else None
+        if ent and cli.id in ent.clientes_ids:
+            ent.clientes_ids.remove(cli.id)
+        for rid in self._rutinas_por_cliente.pop(cli.id, []):
+            del self.rutinas[rid]
+        for pid in self._planes_por_cliente.pop(cli.id, []):
+            del self.planes[pid]
+        self.progresos.quitar_cliente(cli.id)
+        del self.clientes[cli.id]
+        del self.usuarios[cli.id]
+        self._quitar_username(cli)
+
+    def _borrar_entrenador(self, ent: Entrenador):
+        # Sus clientes quedan sin entrenador; las rutinas que firmó se conservan
+        for cid in ent.clientes_ids:
+            cli = self.clientes.get(cid)
+            if cli:
+                cli.entrenador_id = None
+        del self.entrenadores[ent.id]
+        del self.usuarios[ent.id]
+        self._quitar_username(ent)
+
+    def find_by_username(self, username: str) -> Optional[Usuario]:
+        return self.por_username.get(username)
+
+    def authenticate(self, username: str, password: str) -> Optional[Usuario]:
+        usr = self.por_username.get(username)
+        if usr and usr.password == password:
+            return usr
+        return None
+
+
+    @en_transaccion
+    def vincular_cliente_a_entrenador(self, cliente_id: str, entrenador_id: str):
+        if cliente_id not in self.clientes or entrenador_id not in self.entrenadores:
+            return False
+        self._cambiar("vinculo", (cliente_id, entrenador_id))
+        return True
+
+    def _guardar_vinculo(self, cli: Cliente, ent: Entrenador):
+        if cli.entrenador_id and cli.entrenador_id in self.entrenadores:
+            prev = self.entrenadores[cli.entrenador_id]
+            if cli.id in prev.clientes_ids:
+                prev.clientes_ids.remove(cli.id)
+        cli.entrenador_id = ent.id
+        if cli.id not in ent.clientes_ids:
+            ent.clientes_ids.append(cli.id)
+
+
+    @en_transaccion
+    def crear_plan_automatico(self, cliente_id: str) -> PlanAlimentacion:
+        cli = self.clientes.get(cliente_id)
+        if not cli:
+            raise ValueError("Cliente no encontrado")
+        plan = plan_automatico(cliente_id, cli.objetivos)
+        self._cambiar("plan", plan)
+        return plan
+
+
+    @en_transaccion
+    def crear_rutina_automatica(self, cliente_id: str, entrenador_id: Optional[str] = None) -> RutinaEjercicio:
+        cli = self.clientes.get(cliente_id)
+        if not cli:
+            raise ValueError("Cliente no encontrado")
+        rutina = rutina_automatica(cliente_id, cli.objetivos, entrenador_id)
+        self._cambiar("rutina", rutina)
+        return rutina
+
+    def plan_anterior_a(self, dias: int) -> Callable[[Cliente], bool]:
+        # Filtro para asignar_automaticos: clientes sin plan o cuyo último plan tiene más de `dias` días
+        limite = (date.today() - timedelta(days=dias)).isoformat()
+
+        def filtro(cli: Cliente) -> bool:
+            planes = self.planes_de(cli.id)
+            return not planes or planes[-1].fecha_creacion[:10] < limite
+        return filtro
+
+    def asignar_automaticos(self, filtro: Optional[Callable[[Cliente], bool]] = None, planes: bool = True,
+                            rutinas: bool = True, tamano_bloque: int = 1000,
+                            al_progreso: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+        # Plan y/o rutina automáticos para todos los clientes que pasan `filtro` (todos si es None).
+        # Los clientes se recorren por bloques: cada bloque se construye fuera del cerrojo y se escribe
+        # entero bajo él, así en memoria entre bloques pueden entrar los lectores. Todo va en un único lote
+        # (una sola transacción en los backends persistentes, que la tienen bajo el cerrojo hasta el final).
+        # al_progreso(clientes revisados, total) se llama tras cada bloque.
+        total = len(self.clientes)
+        hechos = 0
+        resumen = {"clientes": 0, "planes": 0, "rutinas": 0}
+
+        def guardar(bloque, revisados):
+            nonlocal hechos
+            creados = _generar_automaticos(bloque, planes, rutinas)
+            with self._cerrojo.escribir():
+                for cliente_id, entidades in creados:
+                    # pudo darse de baja mientras se armaba el bloque
+                    if cliente_id not in self.clientes:
+                        continue
+                    resumen["clientes"] += 1
+                    for evento, obj in entidades:
+                        self._cambiar(evento, obj)
+                        resumen["planes" if evento == "plan" else "rutinas"] += 1
+            hechos += revisados
+            if al_progreso:
+                al_progreso(hechos, total)
+
+        with self.lote():
+            bloque = []
+            revisados = 0
+            for cli in list(self.clientes.values()):
+                revisados += 1
+                if filtro is None or filtro(cli):
+                    bloque.append((cli.id, cli.objetivos, cli.entrenador_id))
+                if revisados >= tamano_bloque:
+                    guardar(bloque, revisados)
+                    bloque, revisados = [], 0
+            if revisados:
+                guardar(bloque, revisados)
+        return resumen
+
+
+    def registrar_progreso(self, progreso: ProgresoFisico):
+        self._cambiar("progreso", progreso)
+
+    def _guardar_rutina(self, rutina: RutinaEjercicio, cli: Optional[Cliente]):
+        self.rutinas[rutina.id] = rutina
+        if cli:
+            cli.rutinas_ids.append(rutina.id)
+
+    def _guardar_plan(self, plan: PlanAlimentacion, cli: Optional[Cliente]):
+        self.planes[plan.id] = plan
+        if cli:
+            cli.planes_ids.append(plan.id)
+
+    def _guardar_progreso(self, progreso: ProgresoFisico):
+        # En memoria el historial de cada cliente es progresos.filas_de(cliente_id);
+        # no se duplica en Cliente.progreso_historial
+        self.progresos.agregar(progreso)
+
+    @contextmanager
+    def lote(self):
+        # En memoria no hay nada que confirmar; los backends persistentes agrupan aquí sus escrituras
+        yield self
+
+
+    @en_transaccion
+    def crear_rutina_personalizada(self, entrenador_id: str, cliente_id: str, ejercicios_semana: Dict[str, List[Dict]], intensidad: str="Personalizada") -> RutinaEjercicio:
+        ent = self.entrenadores.get(entrenador_id)
+        cli = self.clientes.get(cliente_id)
+        if not ent or not cli:
+            raise ValueError("Entrenador o cliente no encontrado")
+
+        if cliente_id not in ent.clientes_ids:
+            raise PermissionError("Entrenador no está vinculado a este cliente")
+        rutina = RutinaEjercicio(cliente_id=cliente_id, entrenador_id=entrenador_id, ejercicios_semana=ejercicios_semana, intensidad=intensidad)
+        self._cambiar("rutina", rutina)
+        return rutina
+
+
+    @en_transaccion
+    def crear_plan_personalizado(self, entrenador_id: str, cliente_id: str, detalle_comidas: Dict[str, str], calorias: int, comidas_por_dia: int, observaciones: str="") -> PlanAlimentacion:
+        ent = self.entrenadores.get(entrenador_id)
+        cli = self.clientes.get(cliente_id)
+        if not ent or not cli:
+            raise ValueError("Entrenador o cliente no encontrado")
+        if cliente_id not in ent.clientes_ids:
+            raise PermissionError("Entrenador no está vinculado a este cliente")
+        plan = PlanAlimentacion(cliente_id=cliente_id, comidas_por_dia=comidas_por_dia, calorias_diarias=calorias, detalle_comidas=detalle_comidas, observaciones=observaciones)
+        self._cambiar("plan", plan)
+        return plan
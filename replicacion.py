@@ -0,0 +1,410 @@
+import gc
+import marshal
+import os
+import socket
+import stat
+import threading
+import time
+import uuid
+from typing import Iterator, List, Optional, Tuple
+
+import metricas
+from diario import CABECERA, a_tupla, desde_tupla, leer_snapshot, registros, restaurar, segmentos, volcar
+from nucleo import Repositorio
+
+# Flujo de cambios (CDC) para réplicas de sólo lectura en otros procesos. El primario publica cada evento que
+# notifica su Repositorio con un número de secuencia; cada réplica aplica los eventos en ese orden sobre una
+# copia en memoria. Mensajes: marshal con prefijo de longitud, como los registros del diario. No hay
+# autenticación: sólo para la máquina local (socket Unix) o una red de confianza.
+#
+#   réplica -> primario: ("desde", origen, seq)            origen y seq del último evento aplicado
+#   primario -> réplica: ("estado", origen, seq, tablas)   estado completo (ver diario.volcar)
+#                        ("lote", seq, ts, [registro...])  eventos siguientes; vacío, es un latido
+#   registro: marshal de (seq, ts, evento, valores), con ts la hora del cambio en el primario
+
+RETENER = 200_000  # eventos recientes en memoria para las réplicas que se atrasan o se reconectan
+MAX_LOTE = 1000  # eventos por mensaje, y por toma del cerrojo de escritura en la réplica
+LATIDO = 1.0  # segundos sin cambios entre latidos
+ESPERA_LOTE = 0.05  # segundos entre intentos de tomar el estado completo mientras el primario tiene un lote abierto
+
+
+def _direccion(direccion: str) -> Tuple[int, object]:
+    # "host:puerto" es TCP; cualquier otra cosa, la ruta de un socket Unix
+    host, separador, puerto = direccion.rpartition(":")
+    if separador and puerto.isdigit():
+        return socket.AF_INET, (host or "127.0.0.1", int(puerto))
+    return socket.AF_UNIX, direccion
+
+
+def _mensaje(obj) -> bytes:
+    datos = marshal.dumps(obj)
+    return CABECERA.pack(len(datos)) + datos
+
+
+def _mensajes(con: socket.socket) -> Iterator[tuple]:
+    with con.makefile("rb") as f:
+        while True:
+            cabecera = f.read(CABECERA.size)
+            if len(cabecera) < CABECERA.size:
+                return
+            (n,) = CABECERA.unpack(cabecera)
+            datos = f.read(n)
+            if len(datos) < n:
+                return
+            yield marshal.loads(datos)
+
+
+class Publicador:
+    # Oyente del repositorio primario que numera sus eventos y los sirve a las réplicas. Cada evento queda en
+    # memoria (los últimos `retener`) y cada réplica conectada tiene un hilo que le envía lo que le falta: los
+    # escritores sólo agregan a una lista, una réplica lenta o caída nunca los frena. Una réplica nueva, de
+    # otro primario o más atrasada que lo retenido recibe primero el estado completo.
+    def __init__(self, repo: Repositorio, direccion: str, seq: int = 0, retener: int = RETENER,
+                 latido: float = LATIDO):
+        self.repo = repo
+        self.direccion = direccion
+        # identifica esta secuencia: un primario reiniciado empieza otra y sus réplicas se recargan
+        self.origen = uuid.uuid4().hex
+        self.seq = seq
+        self.retener = retener
+        self.latido = latido
+        self._base = seq  # seq del evento anterior al primero retenido
+        self._registros: List[bytes] = []
+        # (evento, tupla) del lote abierto en el repositorio: se publican al confirmarse, no antes
+        self._en_lote: List[Tuple[str, tuple]] = []
+        self._condicion = threading.Condition()
+        self._conexiones = set()
+        self._parar = threading.Event()
+        familia, self._dir = _direccion(direccion)
+        if familia == socket.AF_UNIX and os.path.exists(self._dir) and stat.S_ISSOCK(os.stat(self._dir).st_mode):
+            os.remove(self._dir)  # de una ejecución anterior
+        self._servidor = socket.socket(familia, socket.SOCK_STREAM)
+        if familia != socket.AF_UNIX:
+            self._servidor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._servidor.bind(self._dir)
+        self._servidor.listen()
+        self._servidor.settimeout(0.5)  # para ver _parar; accept no se despierta al cerrar el socket
+        repo.suscribir(self)
+        repo.suscribir_lote(self._fin_de_lote)
+        self._hilo = threading.Thread(target=self._aceptar, name="publicador", daemon=True)
+        self._hilo.start()
+
+    @property
+    def replicas(self) -> int:
+        return len(self._conexiones)
+
+    def __call__(self, evento: str, dato):
+        # Se llama bajo el cerrojo de escritura del repositorio: el orden de seq es el de los cambios. Dentro
+        # de un lote el cambio espera a que se confirme: si se deshace, las réplicas nunca lo ven
+        cambio = (evento, a_tupla(evento, dato))
+        if self.repo.en_lote:
+            self._en_lote.append(cambio)
+        else:
+            self._publicar([cambio])
+
+    def _fin_de_lote(self, confirmado: bool):
+        cambios, self._en_lote = self._en_lote, []
+        if confirmado and cambios:
+            self._publicar(cambios)
+
+    def _publicar(self, cambios: List[Tuple[str, tuple]]):
+        with self._condicion:
+            ts = time.time()
+            for evento, tupla in cambios:
+                self.seq += 1
+                self._registros.append(marshal.dumps((self.seq, ts, evento, tupla)))
+            if len(self._registros) > 2 * self.retener:
+                recorte = len(self._registros) - self.retener
+                del self._registros[:recorte]
+                self._base += recorte
+            self._condicion.notify_all()
+
+    def _aceptar(self):
+        while not self._parar.is_set():
+            try:
+                con, _ = self._servidor.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            con.settimeout(None)
+            threading.Thread(target=self._atender, args=(con,), name="publicador-replica", daemon=True).start()
+
+    def _atender(self, con: socket.socket):
+        self._conexiones.add(con)
+        try:
+            _, origen, pos = next(_mensajes(con))
+            if origen != self.origen:
+                pos = None
+            primero = True
+            while not self._parar.is_set():
+                if pos is None or not self._base <= pos <= self.seq:
+                    # bajo el cerrojo de lectura seq no se mueve: el estado enviado es exactamente el de seq.
+                    # Con un lote abierto el estado tiene cambios aún sin publicar: se espera a que termine
+                    tablas = None
+                    while tablas is None and not self._parar.is_set():
+                        with self.repo.leyendo():
+                            if not self.repo.en_lote:
+                                pos = self.seq
+                                tablas = volcar(self.repo)
+                        if tablas is None:
+                            self._parar.wait(ESPERA_LOTE)
+                    if tablas is None:
+                        break
+                    con.sendall(_mensaje(("estado", self.origen, pos, tablas)))
+                    del tablas
+                    continue
+                with self._condicion:
+                    if pos == self.seq and not primero:
+                        self._condicion.wait(self.latido)
+                    if pos < self._base:
+                        continue  # se descartó lo que faltaba mientras esperaba
+                    desde = pos - self._base
+                    lote = self._registros[desde:desde + MAX_LOTE]
+                    seq = self.seq
+                con.sendall(_mensaje(("lote", seq, time.time(), lote)))
+                pos += len(lote)
+                primero = False
+        except (OSError, StopIteration, ValueError, EOFError):
+            pass  # la réplica se desconectó o no habla el protocolo
+        finally:
+            self._conexiones.discard(con)
+            con.close()
+
+    def cerrar(self):
+        self._parar.set()
+        self.repo.desuscribir(self)
+        self.repo.desuscribir_lote(self._fin_de_lote)
+        with self._condicion:
+            self._condicion.notify_all()
+        self._hilo.join()
+        self._servidor.close()
+        for con in list(self._conexiones):
+            try:
+                con.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if isinstance(self._dir, str) and os.path.exists(self._dir):
+            os.remove(self._dir)
+
+
+class RepositorioReplica(Repositorio):
+    # Copia en memoria y de sólo lectura de un primario: sigue su Publicador ("host:puerto" o la ruta de un
+    # socket Unix) o el directorio de su diario. Un hilo recibe los cambios y los aplica en lotes bajo el
+    # cerrojo de escritura, así los lectores ven siempre un estado por el que pasó el primario. Reportes,
+    # exportaciones y búsquedas pesadas corren aquí, en otro proceso, sin disputarle el cerrojo al que escribe.
+    def __init__(self, origen: str, reintento: float = 1.0, intervalo: float = 0.05):
+        super().__init__()
+        self.origen = origen
+        self.reintento = reintento
+        self.intervalo = intervalo  # sondeo del diario
+        self.seq = 0  # último evento aplicado
+        self.seq_primario = 0  # último evento del primario que se conoce (el de su último mensaje)
+        self._demora = 0.0
+        self._pendiente_desde: Optional[float] = None  # hora en el primario del primer evento sin aplicar
+        self.conectada = False
+        self._origen_primario = ""
+        self._avance = threading.Condition()
+        self._parar = threading.Event()
+        self._con: Optional[socket.socket] = None
+        metricas.REGISTRO.medidor("replica_retraso_eventos", lambda: self.retraso_eventos,
+                                  "Eventos del primario todavía no aplicados en la réplica")
+        metricas.REGISTRO.medidor("replica_demora_segundos", lambda: self.demora,
+                                  "Segundos entre un cambio en el primario y su aplicación en la réplica")
+        seguir = self._seguir_diario if os.path.isdir(origen) else self._seguir_publicador
+        self._hilo = threading.Thread(target=seguir, name="replica", daemon=True)
+        self._hilo.start()
+
+    @property
+    def retraso_eventos(self) -> int:
+        # de lo recibido: con la aplicación frenada, lo que el primario siguió escribiendo aún no llegó
+        return max(0, self.seq_primario - self.seq)
+
+    @property
+    def demora(self) -> float:
+        # Segundos entre un cambio en el primario y su aplicación aquí. Con un lote recibido y sin aplicar es
+        # la edad de su primer evento, que sigue creciendo aunque una lectura larga frene la aplicación;
+        # si no, la del último evento aplicado (0 si desde entonces sólo llegaron latidos)
+        pendiente = self._pendiente_desde
+        if pendiente is not None:
+            return max(0.0, time.time() - pendiente)
+        return self._demora
+
+    def _cambiar(self, evento: str, dato):
+        raise PermissionError("Réplica de sólo lectura: los cambios se hacen en el primario")
+
+    def esperar_al_dia(self, timeout: Optional[float] = None) -> bool:
+        # Hasta haber aplicado todo lo que el primario tenía en el último contacto
+        with self._avance:
+            return self._avance.wait_for(lambda: self.conectada and self.seq >= self.seq_primario, timeout)
+
+    def _avanzar(self, seq_primario: int, ts: Optional[float], conectada: bool = True):
+        with self._avance:
+            self.conectada = conectada
+            self.seq_primario = max(seq_primario, self.seq)
+            self._pendiente_desde = None
+            if ts is not None:
+                self._demora = max(0.0, time.time() - ts)
+            elif not self.retraso_eventos:
+                self._demora = 0.0
+            self._avance.notify_all()
+        if ts is not None and metricas.REGISTRO.activo:
+            metricas.REGISTRO.observar("replica.demora", self._demora)
+
+    def _aplicar_eventos(self, eventos: List[Tuple[int, str, tuple]]):
+        with self._cerrojo.escribir():
+            for seq, evento, valores in eventos:
+                if seq <= self.seq:
+                    continue  # repetido tras una reconexión
+                dato = desde_tupla(evento, valores)
+                self.aplicar(evento, dato)
+                self._notificar(evento, dato)  # oyentes locales, p.ej. un Publicador en cascada
+                self.seq = seq
+
+    def _vaciar(self):
+        # Todo de nuevo menos el cerrojo (lo tiene este hilo), los oyentes y la versión, que sólo avanza:
+        # las vistas abiertas encuentran su tramo de cambios descartado y se recargan enteras
+        cerrojo, oyentes, version = self._cerrojo, self._oyentes, self.version
+        Repositorio.__init__(self)
+        self._cerrojo, self._oyentes = cerrojo, oyentes
+        self.version = self._version_base = version + 1
+
+    def _cargar_estado(self, seq: int, tablas: dict):
+        gc_activo = gc.isenabled()
+        gc.disable()  # millones de contenedores de golpe, como al arrancar el diario
+        try:
+            with self._cerrojo.escribir():
+                self._vaciar()
+                restaurar(self, tablas)
+                self.seq = seq
+        finally:
+            if gc_activo:
+                gc.enable()
+
+    def _seguir_publicador(self):
+        familia, direccion = _direccion(self.origen)
+        while not self._parar.is_set():
+            try:
+                with socket.socket(familia, socket.SOCK_STREAM) as con:
+                    con.connect(direccion)
+                    self._con = con
+                    con.sendall(_mensaje(("desde", self._origen_primario, self.seq)))
+                    for mensaje in _mensajes(con):
+                        if mensaje[0] == "lote":
+                            _, seq_primario, _, lote = mensaje
+                            with self._avance:
+                                # antes de aplicar: el retraso se ve aunque una lectura larga frene la aplicación
+                                self.seq_primario = max(self.seq_primario, seq_primario)
+                            ts = None
+                            eventos = []
+                            for reg in lote:
+                                seq, ts, evento, valores = marshal.loads(reg)
+                                if not eventos:
+                                    self._pendiente_desde = ts
+                                eventos.append((seq, evento, valores))
+                            if eventos:  # un latido no toma el cerrojo: no queda detrás de una lectura larga
+                                self._aplicar_eventos(eventos)
+                            self._avanzar(seq_primario, ts)
+                        else:
+                            _, origen, seq, tablas = mensaje
+                            # si la carga se corta a medias, la próxima conexión vuelve a pedir el estado
+                            self._origen_primario = ""
+                            self._cargar_estado(seq, tablas)
+                            self._origen_primario = origen
+                            self._avanzar(seq, None)
+            except (OSError, ValueError, EOFError):
+                pass  # primario caído o todavía no levantado: se reintenta
+            finally:
+                self._con = None
+            with self._avance:
+                self.conectada = False
+            self._parar.wait(self.reintento)
+
+    def _seguir_diario(self):
+        # Sondea el directorio del diario: el snapshot al empezar (y si la compactación ya borró lo que faltaba
+        # leer), después los registros nuevos de cada segmento, retomando donde quedó. El diario no guarda la
+        # hora de cada cambio: la demora se estima con la fecha de modificación del segmento.
+        ruta, pos = None, 0
+        while not self._parar.is_set():
+            try:
+                segs = segmentos(self.origen)
+                siguiente = self.seq + 1
+                candidatos = [(i, r) for i, r in segs if i <= siguiente]
+                if not candidatos or (ruta is None and self.seq == 0):
+                    leido = leer_snapshot(self.origen)
+                    if leido is not None and leido[0] > self.seq:
+                        self._cargar_estado(*leido)
+                        self._avanzar(self.seq, None, conectada=False)
+                        ruta = None
+                        continue
+                    if not candidatos:
+                        self._avanzar(self.seq, None)
+                        self._parar.wait(self.intervalo)
+                        continue
+                inicio, actual = candidatos[-1]
+                if actual != ruta:
+                    # segmento nuevo: se cuentan sus registros desde el principio para ubicar seq
+                    ruta, pos, n = actual, 0, inicio - 1
+                else:
+                    n = self.seq
+                with open(ruta, "rb") as f:
+                    f.seek(pos)
+                    datos = f.read()
+                mtime = os.path.getmtime(ruta)
+                if len(datos) > CABECERA.size:
+                    self._pendiente_desde = mtime
+                eventos = []
+                fin = 0
+                for fin, (evento, valores) in registros(datos):
+                    n += 1
+                    if n > self.seq:
+                        eventos.append((n, evento, valores))
+                    if len(eventos) >= MAX_LOTE:
+                        self._aplicar_eventos(eventos)
+                        eventos = []
+                if eventos:
+                    self._aplicar_eventos(eventos)
+                pos += fin
+                hay_siguiente = any(i == self.seq + 1 for i, _ in segs)
+                if hay_siguiente:
+                    continue  # este segmento ya se cerró: a por el próximo sin esperar
+                self._avanzar(self.seq, mtime if fin else None)
+            except (OSError, ValueError, EOFError):
+                pass  # segmento borrado por la compactación mientras se leía: se reintenta
+            self._parar.wait(self.intervalo)
+
+    def cerrar(self):
+        self._parar.set()
+        con = self._con
+        if con is not None:
+            try:
+                con.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self._hilo.join()
+
+
+def main(argv=None):
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Sigue a un primario y muestra el retraso de la réplica")
+    parser.add_argument("origen", help='"host:puerto", ruta del socket Unix o directorio del diario')
+    parser.add_argument("--cada", type=float, default=1.0, help="segundos entre líneas")
+    args = parser.parse_args(argv)
+
+    repo = RepositorioReplica(args.origen)
+    try:
+        while True:
+            time.sleep(args.cada)
+            estado = "conectada" if repo.conectada else "sin conexión"
+            print(f"{estado}: seq {repo.seq:,} de {repo.seq_primario:,}, {repo.retraso_eventos:,} eventos detrás, "
+                  f"demora {repo.demora * 1000:.1f} ms, {len(repo.clientes):,} clientes", flush=True)
+    except KeyboardInterrupt:
+        print(file=sys.stderr)
+    finally:
+        repo.cerrar()
+
+
+if __name__ == "__main__":
+    main()
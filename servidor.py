@@ -0,0 +1,590 @@
+import asyncio
+import json
+import math
+import os
+import re
+import secrets
+import time
+from dataclasses import dataclass, fields
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import metricas
+from nucleo import (Repositorio, Usuario, Entrenador, Cliente, ProgresoFisico, VistaProgreso, FORMATO_FECHA,
+                  normalizar_fecha, CAMPOS_EDITABLES_CLIENTE, CAMPOS_EDITABLES_ENTRENADOR)
+
+
+HOST = "127.0.0.1"
+PUERTO = 8080
+MAX_CABECERA = 64 * 1024
+MAX_CUERPO = 1024 * 1024
+TIEMPO_INACTIVO = 60.0
+PAGINA = 50
+MAX_PAGINA = 1000
+
+RAZONES = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 401: "Unauthorized",
+           403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed", 409: "Conflict",
+           413: "Payload Too Large", 431: "Request Header Fields Too Large", 500: "Internal Server Error",
+           501: "Not Implemented", 505: "HTTP Version Not Supported"}
+CAMPOS_PROGRESO = tuple(f.name for f in fields(ProgresoFisico))
+
+
+class ErrorHTTP(Exception):
+    def __init__(self, estado: int, mensaje: str):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+@dataclass(slots=True)
+class Peticion:
+    metodo: str
+    ruta: str
+    consulta: Dict[str, str]
+    cabeceras: Dict[str, str]
+    cuerpo: bytes
+    mantener: bool  # keep-alive tras responder
+
+    def json(self) -> dict:
+        if not self.cuerpo:
+            return {}
+        try:
+            datos = json.loads(self.cuerpo)
+        except ValueError:
+            raise ErrorHTTP(400, "El cuerpo no es JSON válido") from None
+        if not isinstance(datos, dict):
+            raise ErrorHTTP(400, "El cuerpo debe ser un objeto JSON")
+        return datos
+
+
+def publico(obj) -> dict:
+    # Entidad -> dict para JSON, sin la contraseña; las plantillas congeladas son dict/list y se serializan tal cual
+    campos = CAMPOS_PROGRESO if isinstance(obj, VistaProgreso) else (f.name for f in fields(obj))
+    return {c: getattr(obj, c) for c in campos if c != "password"}
+
+
+def _tipo(usr: Usuario) -> str:
+    return "entrenador" if isinstance(usr, Entrenador) else "cliente"
+
+
+def _campo(datos: dict, nombre: str, tipo, defecto=None, obligatorio: bool = False):
+    valor = datos.get(nombre, defecto)
+    if valor is None:
+        if obligatorio:
+            raise ErrorHTTP(400, f"Falta el campo {nombre!r}")
+        return None
+    if tipo is float and isinstance(valor, int) and not isinstance(valor, bool):
+        try:
+            valor = float(valor)
+        except OverflowError:
+            raise ErrorHTTP(400, f"El campo {nombre!r} está fuera de rango") from None
+    if not isinstance(valor, tipo) or isinstance(valor, bool) and tipo is not bool:
+        raise ErrorHTTP(400, f"El campo {nombre!r} debe ser {tipo.__name__}")
+    return valor
+
+
+def _entero(consulta: Dict[str, str], nombre: str, defecto: int, maximo: Optional[int] = None) -> int:
+    try:
+        valor = int(consulta.get(nombre, defecto))
+    except ValueError:
+        raise ErrorHTTP(400, f"{nombre} debe ser un entero") from None
+    if valor < 0:
+        raise ErrorHTTP(400, f"{nombre} no puede ser negativo")
+    return min(valor, maximo) if maximo is not None else valor
+
+
+def _fecha(datos: dict) -> str:
+    fecha = _campo(datos, "fecha", str)
+    if fecha is None:
+        return datetime.now().strftime(FORMATO_FECHA)
+    try:
+        return normalizar_fecha(fecha)
+    except ValueError as e:
+        raise ErrorHTTP(400, str(e)) from None
+
+
+class API:
+    # Rutas JSON sobre un Repositorio. Los manejadores son síncronos: el repositorio trabaja en memoria
+    # (o en SQLite local) y cada petición se resuelve sin ceder el bucle, en el orden en que llegó.
+    def __init__(self, repo: Repositorio):
+        self.repo = repo
+        # token -> id de usuario; las sesiones viven mientras corre el servidor
+        self.sesiones: Dict[str, str] = {}
+        # (método, patrón, manejador, requiere sesión)
+        self.rutas: List[Tuple[str, "re.Pattern", Callable, bool]] = []
+        for metodo, patron, manejador, sesion in (
+                ("GET", r"/salud", self.salud, False),
+                ("GET", r"/metricas", self.ver_metricas, False),
+                ("POST", r"/login", self.login, False),
+                ("POST", r"/logout", self.logout, True),
+                ("GET", r"/yo", self.yo, True),
+                ("GET", r"/clientes", self.listar_clientes, True),
+                ("POST", r"/clientes", self.alta_cliente, False),
+                ("GET", r"/clientes/([^/]+)", self.ver_cliente, True),
+                ("PATCH", r"/clientes/([^/]+)", self.modificar_cliente, True),
+                ("PUT", r"/clientes/([^/]+)", self.modificar_cliente, True),
+                ("DELETE", r"/clientes/([^/]+)", self.baja_cliente, True),
+                ("PUT", r"/clientes/([^/]+)/entrenador", self.vincular, True),
+                ("POST", r"/clientes/([^/]+)/plan-automatico", self.plan_automatico, True),
+                ("POST", r"/clientes/([^/]+)/rutina-automatica", self.rutina_automatica, True),
+                ("GET", r"/clientes/([^/]+)/planes", self.listar_planes, True),
+                ("POST", r"/clientes/([^/]+)/planes", self.plan_personalizado, True),
+                ("GET", r"/clientes/([^/]+)/rutinas", self.listar_rutinas, True),
+                ("POST", r"/clientes/([^/]+)/rutinas", self.rutina_personalizada, True),
+                ("GET", r"/clientes/([^/]+)/progresos", self.listar_progresos, True),
+                ("POST", r"/clientes/([^/]+)/progresos", self.registrar_progreso, True),
+                ("GET", r"/entrenadores", self.listar_entrenadores, True),
+                ("POST", r"/entrenadores", self.alta_entrenador, True),
+                ("GET", r"/entrenadores/([^/]+)", self.ver_entrenador, True),
+                ("PATCH", r"/entrenadores/([^/]+)", self.modificar_entrenador, True),
+                ("PUT", r"/entrenadores/([^/]+)", self.modificar_entrenador, True),
+                ("DELETE", r"/entrenadores/([^/]+)", self.baja_entrenador, True),
+                ("GET", r"/entrenadores/([^/]+)/clientes", self.clientes_de_entrenador, True)):
+            self.rutas.append((metodo, re.compile(patron + "/?"), manejador, sesion))
+
+    def atender(self, pet: Peticion) -> Tuple[int, object]:
+        # (estado, cuerpo JSON o None); los errores del dominio se traducen a su código HTTP
+        try:
+            manejador, args, sesion = self._resolver(pet.metodo, pet.ruta)
+            usuario = self._usuario(pet) if sesion else None
+            if not metricas.REGISTRO.activo:
+                return manejador(pet, usuario, *args)
+            inicio = time.perf_counter()
+            estado = 500
+            try:
+                estado, cuerpo = manejador(pet, usuario, *args)
+                return estado, cuerpo
+            finally:
+                metricas.REGISTRO.observar(f"http.{manejador.__name__}", time.perf_counter() - inicio, estado >= 400)
+        except ErrorHTTP as e:
+            return e.estado, {"error": str(e)}
+        except PermissionError as e:
+            return 403, {"error": str(e)}
+        except KeyError as e:
+            return 404, {"error": f"No existe: {e.args[0] if e.args else ''}"}
+        except ValueError as e:
+            return 400, {"error": str(e)}
+
+    def _resolver(self, metodo: str, ruta: str):
+        permitidos = []
+        for m, patron, manejador, sesion in self.rutas:
+            coincide = patron.fullmatch(ruta)
+            if coincide:
+                if m == metodo:
+                    return manejador, [unquote(g) for g in coincide.groups()], sesion
+                permitidos.append(m)
+        if permitidos:
+            raise ErrorHTTP(405, f"Método no permitido; usar {', '.join(permitidos)}")
+        raise ErrorHTTP(404, f"Ruta desconocida: {ruta}")
+
+    def _usuario(self, pet: Peticion) -> Usuario:
+        autorizacion = pet.cabeceras.get("authorization", "")
+        token = autorizacion[7:] if autorizacion[:7].lower() == "bearer " else ""
+        usr = self.repo.usuarios.get(self.sesiones.get(token, ""))
+        if usr is None:
+            raise ErrorHTTP(401, "Sesión inválida o vencida")
+        return usr
+
+    # Permisos: un entrenador ve y atiende a cualquier cliente, pero sólo modifica o da de baja a los suyos;
+    # un cliente sólo se ve y se modifica a sí mismo. Usuario y contraseña sólo los cambia su dueño
+
+    def _cliente(self, usr: Usuario, cliente_id: str) -> Cliente:
+        if isinstance(usr, Cliente) and usr.id != cliente_id:
+            raise ErrorHTTP(403, "Un cliente sólo puede acceder a sus propios datos")
+        cli = self.repo.clientes.get(cliente_id)
+        if cli is None:
+            raise ErrorHTTP(404, "Cliente no encontrado")
+        return cli
+
+    def _cliente_a_cargo(self, usr: Usuario, cliente_id: str) -> Cliente:
+        cli = self._cliente(usr, cliente_id)
+        if isinstance(usr, Entrenador) and cli.entrenador_id != usr.id:
+            raise ErrorHTTP(403, "El cliente no está vinculado a este entrenador")
+        return cli
+
+    def _entrenador(self, usr: Usuario) -> Entrenador:
+        if not isinstance(usr, Entrenador):
+            raise ErrorHTTP(403, "Sólo para entrenadores")
+        return usr
+
+    def _propio(self, usr: Usuario, entrenador_id: str) -> Entrenador:
+        if usr.id != entrenador_id:
+            raise ErrorHTTP(403, "Un entrenador sólo puede modificarse a sí mismo")
+        return self._buscar_entrenador(entrenador_id)
+
+    def _buscar_entrenador(self, entrenador_id: str) -> Entrenador:
+        ent = self.repo.entrenadores.get(entrenador_id)
+        if ent is None:
+            raise ErrorHTTP(404, "Entrenador no encontrado")
+        return ent
+
+    # Sesión
+
+    def salud(self, pet, usr):
+        return 200, {"estado": "ok", "version": self.repo.version}
+
+    def ver_metricas(self, pet, usr):
+        # El registro de metricas.py como JSON (sin operaciones si la instrumentación no está activa)
+        return 200, metricas.REGISTRO.a_dict()
+
+    def login(self, pet, usr):
+        datos = pet.json()
+        usr = self.repo.authenticate(_campo(datos, "username", str, obligatorio=True),
+                                     _campo(datos, "password", str, obligatorio=True))
+        if usr is None:
+            raise ErrorHTTP(401, "Credenciales inválidas")
+        token = secrets.token_urlsafe(24)
+        self.sesiones[token] = usr.id
+        return 200, {"token": token, "id": usr.id, "tipo": _tipo(usr)}
+
+    def logout(self, pet, usr):
+        self.sesiones.pop(pet.cabeceras["authorization"][7:], None)
+        return 204, None
+
+    def yo(self, pet, usr):
+        return 200, dict(publico(usr), tipo=_tipo(usr))
+
+    # Altas: la de cliente, como en la ventana de registro, no pide sesión; a un entrenador lo da de alta
+    # otro entrenador (el primero, desde la aplicación o con admin.py registrar)
+
+    def _datos_usuario(self, datos: dict) -> dict:
+        username = _campo(datos, "username", str, obligatorio=True).strip()
+        password = _campo(datos, "password", str, obligatorio=True)
+        if not username or not password:
+            raise ErrorHTTP(400, "Usuario y contraseña no pueden estar vacíos")
+        if self.repo.find_by_username(username):
+            raise ErrorHTTP(409, "El usuario ya existe")
+        return {"username": username, "password": password, "nombre": _campo(datos, "nombre", str, "")}
+
+    def alta_cliente(self, pet, usr):
+        datos = pet.json()
+        cli = Cliente(objetivos=_campo(datos, "objetivos", str, ""),
+                      estado_fisico_inicial=_campo(datos, "estado_fisico_inicial", str, ""),
+                      **self._datos_usuario(datos))
+        self._alta(self.repo.add_cliente, cli)
+        return 201, publico(cli)
+
+    def alta_entrenador(self, pet, usr):
+        self._entrenador(usr)
+        datos = pet.json()
+        ent = Entrenador(nivel_experiencia=_campo(datos, "nivel_experiencia", str, ""), **self._datos_usuario(datos))
+        self._alta(self.repo.add_entrenador, ent)
+        return 201, publico(ent)
+
+    def _alta(self, agregar, usr):
+        # el repositorio vuelve a comprobar el username bajo su cerrojo: otra alta pudo ganarle la carrera
+        try:
+            agregar(usr)
+        except ValueError as e:
+            raise ErrorHTTP(409, str(e)) from None
+
+    # Clientes
+
+    def listar_clientes(self, pet, usr):
+        self._entrenador(usr)
+        desde = _entero(pet.consulta, "desde", 0)
+        cantidad = _entero(pet.consulta, "cantidad", PAGINA, MAX_PAGINA)
+        if "q" in pet.consulta:
+            return 200, {"clientes": self._buscar("cliente", pet.consulta["q"], cantidad)}
+        orden = pet.consulta.get("orden", "nombre")
+        descendente = pet.consulta.get("desc", "0") not in ("0", "false", "")
+        clientes = self.repo.pagina("cliente", desde, cantidad, orden, descendente)
+        return 200, {"total": self.repo.contar("cliente"), "desde": desde, "clientes": [publico(c) for c in clientes]}
+
+    def _buscar(self, tipo: str, texto: str, cantidad: int) -> List[dict]:
+        # ?q=: búsqueda por nombre (prefijos de palabra, sin tildes); sólo id y nombre, como en la interfaz
+        return [{"id": id_, "nombre": nombre} for id_, nombre in self.repo.buscar_nombres(tipo, texto, cantidad)]
+
+    def ver_cliente(self, pet, usr, cliente_id):
+        return 200, publico(self._cliente(usr, cliente_id))
+
+    def _modificar(self, usr: Usuario, actualizar, editables, id_: str, datos: dict):
+        campos = {k: _campo(datos, k, str, obligatorio=True) for k in datos}
+        desconocidos = set(campos) - set(editables)
+        if desconocidos:
+            raise ErrorHTTP(400, f"Campos no editables: {', '.join(sorted(desconocidos))}")
+        if usr.id != id_ and ("username" in campos or "password" in campos):
+            raise ErrorHTTP(403, "Usuario y contraseña sólo los cambia su dueño")
+        if "username" in campos and campos["username"] != self.repo.usuarios[id_].username \
+                and self.repo.find_by_username(campos["username"]):
+            raise ErrorHTTP(409, "El usuario ya existe")
+        return publico(actualizar(id_, **campos))
+
+    def modificar_cliente(self, pet, usr, cliente_id):
+        self._cliente_a_cargo(usr, cliente_id)
+        return 200, self._modificar(usr, self.repo.actualizar_cliente, CAMPOS_EDITABLES_CLIENTE, cliente_id,
+                                    pet.json())
+
+    def baja_cliente(self, pet, usr, cliente_id):
+        self._cliente_a_cargo(usr, cliente_id)
+        self.repo.eliminar_cliente(cliente_id)
+        return 204, None
+
+    def vincular(self, pet, usr, cliente_id):
+        # Un entrenador se vincula a sí mismo si no indica otro
+        self._entrenador(usr)
+        self._cliente(usr, cliente_id)
+        entrenador_id = _campo(pet.json(), "entrenador_id", str, usr.id)
+        self._buscar_entrenador(entrenador_id)
+        self.repo.vincular_cliente_a_entrenador(cliente_id, entrenador_id)
+        return 200, publico(self.repo.clientes[cliente_id])
+
+    def plan_automatico(self, pet, usr, cliente_id):
+        self._cliente(usr, cliente_id)
+        return 201, publico(self.repo.crear_plan_automatico(cliente_id))
+
+    def rutina_automatica(self, pet, usr, cliente_id):
+        cli = self._cliente(usr, cliente_id)
+        entrenador_id = usr.id if isinstance(usr, Entrenador) else cli.entrenador_id
+        return 201, publico(self.repo.crear_rutina_automatica(cliente_id, entrenador_id))
+
+    def listar_planes(self, pet, usr, cliente_id):
+        self._cliente(usr, cliente_id)
+        return 200, {"planes": [publico(p) for p in self.repo.planes_de(cliente_id)]}
+
+    def plan_personalizado(self, pet, usr, cliente_id):
+        ent = self._entrenador(usr)
+        datos = pet.json()
+        plan = self.repo.crear_plan_personalizado(
+            ent.id, cliente_id, _campo(datos, "detalle_comidas", dict, obligatorio=True),
+            _campo(datos, "calorias", int, obligatorio=True), _campo(datos, "comidas_por_dia", int, 3),
+            _campo(datos, "observaciones", str, ""))
+        return 201, publico(plan)
+
+    def listar_rutinas(self, pet, usr, cliente_id):
+        self._cliente(usr, cliente_id)
+        return 200, {"rutinas": [publico(r) for r in self.repo.rutinas_de(cliente_id)]}
+
+    def rutina_personalizada(self, pet, usr, cliente_id):
+        ent = self._entrenador(usr)
+        datos = pet.json()
+        semana = _campo(datos, "ejercicios_semana", dict, obligatorio=True)
+        if not all(isinstance(v, list) and all(isinstance(e, dict) for e in v) for v in semana.values()):
+            raise ErrorHTTP(400, "ejercicios_semana debe ser {día: [ejercicio, ...]}")
+        rutina = self.repo.crear_rutina_personalizada(ent.id, cliente_id, semana,
+                                                      _campo(datos, "intensidad", str, "Personalizada"))
+        return 201, publico(rutina)
+
+    def listar_progresos(self, pet, usr, cliente_id):
+        self._cliente(usr, cliente_id)
+        try:
+            progresos = self.repo.progresos_de(cliente_id, pet.consulta.get("desde"), pet.consulta.get("hasta"))
+        except ValueError:
+            raise ErrorHTTP(400, "desde/hasta deben ser fechas YYYY-MM-DD[ HH:MM:SS]") from None
+        return 200, {"progresos": [publico(p) for p in progresos]}
+
+    def registrar_progreso(self, pet, usr, cliente_id):
+        self._cliente(usr, cliente_id)
+        datos = pet.json()
+        peso = _campo(datos, "peso", float, 0.0)
+        if not math.isfinite(peso):
+            raise ErrorHTTP(400, "El peso debe ser un número finito")
+        if peso < 0:
+            raise ErrorHTTP(400, "El peso no puede ser negativo")
+        medidas = _campo(datos, "medidas", dict, {})
+        repeticiones = _campo(datos, "repeticiones", dict, {})
+        try:
+            medidas = {str(k): float(v) for k, v in medidas.items()}
+            repeticiones = {str(k): int(v) for k, v in repeticiones.items()}
+        except (TypeError, ValueError, OverflowError):
+            raise ErrorHTTP(400, "medidas y repeticiones deben ser numéricas") from None
+        if not all(math.isfinite(v) for v in medidas.values()):
+            raise ErrorHTTP(400, "Las medidas deben ser números finitos")
+        # las repeticiones se guardan como int64
+        if not all(-2 ** 63 <= v < 2 ** 63 for v in repeticiones.values()):
+            raise ErrorHTTP(400, "Repeticiones fuera de rango")
+        progreso = ProgresoFisico(cliente_id=cliente_id, fecha=_fecha(datos), peso=peso, medidas=medidas,
+                                  repeticiones=repeticiones, observaciones=_campo(datos, "observaciones", str, ""))
+        self.repo.registrar_progreso(progreso)
+        return 201, publico(progreso)
+
+    # Entrenadores
+
+    def listar_entrenadores(self, pet, usr):
+        desde = _entero(pet.consulta, "desde", 0)
+        cantidad = _entero(pet.consulta, "cantidad", PAGINA, MAX_PAGINA)
+        if "q" in pet.consulta:
+            return 200, {"entrenadores": self._buscar("entrenador", pet.consulta["q"], cantidad)}
+        entrenadores = islice(self.repo.entrenadores.values(), desde, desde + cantidad)
+        return 200, {"total": len(self.repo.entrenadores), "desde": desde,
+                     "entrenadores": [publico(e) for e in entrenadores]}
+
+    def ver_entrenador(self, pet, usr, entrenador_id):
+        return 200, publico(self._buscar_entrenador(entrenador_id))
+
+    def modificar_entrenador(self, pet, usr, entrenador_id):
+        self._propio(usr, entrenador_id)
+        return 200, self._modificar(usr, self.repo.actualizar_entrenador, CAMPOS_EDITABLES_ENTRENADOR,
+                                    entrenador_id, pet.json())
+
+    def baja_entrenador(self, pet, usr, entrenador_id):
+        self._propio(usr, entrenador_id)
+        self.repo.eliminar_entrenador(entrenador_id)
+        return 204, None
+
+    def clientes_de_entrenador(self, pet, usr, entrenador_id):
+        self._entrenador(usr)
+        ent = self._buscar_entrenador(entrenador_id)
+        return 200, {"clientes": [publico(c) for c in map(self.repo.clientes.get, ent.clientes_ids) if c]}
+
+
+def respuesta(estado: int, cuerpo, mantener: bool) -> bytes:
+    datos = b"" if cuerpo is None else json.dumps(cuerpo, ensure_ascii=False).encode()
+    cabecera = (f"HTTP/1.1 {estado} {RAZONES.get(estado, '')}\r\n"
+                f"Content-Length: {len(datos)}\r\n"
+                + ("Content-Type: application/json; charset=utf-8\r\n" if datos else "")
+                + ("Connection: keep-alive\r\n" if mantener else "Connection: close\r\n")
+                + "\r\n")
+    return cabecera.encode("latin-1") + datos
+
+
+class ConexionHTTP(asyncio.Protocol):
+    # HTTP/1.1 con keep-alive y pipelining: cada bloque recibido puede traer varias peticiones
+    # (o media); se atienden en orden y sus respuestas salen juntas en una sola escritura.
+    def __init__(self, api: API, tiempo_inactivo: float = TIEMPO_INACTIVO):
+        self.api = api
+        self.tiempo_inactivo = tiempo_inactivo
+        self.transporte: Optional[asyncio.Transport] = None
+        self.buffer = bytearray()
+        self._temporizador: Optional[asyncio.TimerHandle] = None
+        self._cerrando = False
+
+    def connection_made(self, transporte):
+        self.transporte = transporte
+        self._rearmar()
+
+    def connection_lost(self, exc):
+        if self._temporizador:
+            self._temporizador.cancel()
+        self.transporte = None
+
+    def _rearmar(self):
+        if self._temporizador:
+            self._temporizador.cancel()
+        self._temporizador = asyncio.get_running_loop().call_later(self.tiempo_inactivo, self._vencida)
+
+    def _vencida(self):
+        if self.transporte:
+            self.transporte.close()
+
+    # si el cliente no lee sus respuestas se deja de leer lo que envía
+    def pause_writing(self):
+        self.transporte.pause_reading()
+
+    def resume_writing(self):
+        self.transporte.resume_reading()
+
+    def data_received(self, datos: bytes):
+        if self._cerrando:
+            return
+        self._rearmar()
+        self.buffer += datos
+        salidas = []
+        while True:
+            try:
+                pet = self._leer_peticion()
+            except ErrorHTTP as e:
+                salidas.append(respuesta(e.estado, {"error": str(e)}, False))
+                self._cerrando = True
+                break
+            if pet is None:
+                break
+            try:
+                estado, cuerpo = self.api.atender(pet)
+            except Exception as e:  # un fallo inesperado no debe tumbar la conexión ni el servidor
+                estado, cuerpo = 500, {"error": f"{type(e).__name__}: {e}"}
+            salidas.append(respuesta(estado, cuerpo, pet.mantener))
+            if not pet.mantener:
+                self._cerrando = True
+                break
+        if salidas:
+            self.transporte.write(b"".join(salidas))
+        if self._cerrando:
+            self.transporte.close()
+
+    def _leer_peticion(self) -> Optional[Peticion]:
+        fin = self.buffer.find(b"\r\n\r\n")
+        if fin < 0:
+            if len(self.buffer) > MAX_CABECERA:
+                raise ErrorHTTP(431, "Cabecera demasiado grande")
+            return None
+        try:
+            lineas = self.buffer[:fin].decode("latin-1").split("\r\n")
+            metodo, destino, version = lineas[0].split(" ")
+        except ValueError:
+            raise ErrorHTTP(400, "Línea de petición inválida") from None
+        if version not in ("HTTP/1.1", "HTTP/1.0"):
+            raise ErrorHTTP(505, "Sólo HTTP/1.0 y HTTP/1.1")
+        cabeceras = {}
+        for linea in lineas[1:]:
+            nombre, _, valor = linea.partition(":")
+            cabeceras[nombre.strip().lower()] = valor.strip()
+        if "chunked" in cabeceras.get("transfer-encoding", "").lower():
+            raise ErrorHTTP(501, "Transfer-Encoding chunked no soportado; enviar Content-Length")
+        try:
+            largo = int(cabeceras.get("content-length", 0))
+        except ValueError:
+            raise ErrorHTTP(400, "Content-Length inválido") from None
+        if largo < 0 or largo > MAX_CUERPO:
+            raise ErrorHTTP(413, "Cuerpo demasiado grande")
+        inicio = fin + 4
+        if len(self.buffer) < inicio + largo:
+            return None  # el cuerpo todavía no llegó entero
+        cuerpo = bytes(self.buffer[inicio:inicio + largo])
+        del self.buffer[:inicio + largo]
+        conexion = cabeceras.get("connection", "").lower()
+        mantener = conexion != "close" if version == "HTTP/1.1" else conexion == "keep-alive"
+        partes = urlsplit(destino)
+        return Peticion(metodo, partes.path, dict(parse_qsl(partes.query)), cabeceras, cuerpo, mantener)
+
+
+async def iniciar(repo: Repositorio, host: str = HOST, puerto: int = PUERTO, backlog: int = 1024) -> asyncio.AbstractServer:
+    api = API(repo)
+    return await asyncio.get_running_loop().create_server(lambda: ConexionHTTP(api), host, puerto, backlog=backlog)
+
+
+def servir(repo: Repositorio, host: str = HOST, puerto: int = PUERTO):
+    async def principal():
+        servidor = await iniciar(repo, host, puerto)
+        direcciones = ", ".join(f"http://{s.getsockname()[0]}:{s.getsockname()[1]}" for s in servidor.sockets)
+        print(f"Escuchando en {direcciones} (Ctrl+C para salir)", flush=True)
+        async with servidor:
+            await servidor.serve_forever()
+
+    try:
+        asyncio.run(principal())
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="API JSON sobre HTTP del gestor de gimnasio")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PUERTO)
+    parser.add_argument("--db", default=os.environ.get("GESTORGYM_DB"), help="base SQLite")
+    parser.add_argument("--diario", help="directorio del diario")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        from almacenamiento_sqlite import RepositorioSQLite
+        repo = RepositorioSQLite(args.db)
+    elif args.diario:
+        from diario import RepositorioDiario
+        repo = RepositorioDiario(args.diario)
+    else:
+        repo = Repositorio()
+    volcador = metricas.desde_entorno(repo)
+    try:
+        metricas.ejecutar(servir, repo, args.host, args.port)
+    finally:
+        if volcador is not None:
+            volcador.cerrar()
+        if hasattr(repo, "cerrar"):
+            repo.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,646 @@
+import functools
+import heapq
+import os
+import pickle
+import signal
+import threading
+from contextlib import ExitStack
+from dataclasses import replace
+from operator import attrgetter
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from nucleo import (Repositorio, Cliente, ColumnasProgreso, Entrenador, PlanAlimentacion, ProgresoFisico,
+                    ReporteCliente, ResumenCliente, RutinaEjercicio, Usuario, VistaProgreso, normalizar)
+
+# Repositorio repartido por sucursal. Cada sucursal es un Repositorio propio en su proceso, con sus clientes
+# y todo lo que cuelga de ellos (rutinas, planes, progresos); este proceso sólo sabe en qué sucursal está
+# cada cliente. Las operaciones de un cliente van a su sucursal y las consultas de todo el gimnasio se piden
+# a todas las sucursales a la vez, que las resuelven en paralelo, y se juntan las respuestas.
+#
+# Los entrenadores atienden en varias sucursales: están en todas (altas, cambios y bajas se mandan a todas)
+# y en cada una clientes_ids lista sólo los clientes de esa sucursal. Vincular, las rutinas y planes
+# personalizados y la baja de un entrenador son así operaciones locales de la sucursal del cliente; la
+# vista completa del entrenador (entrenador(), find_by_username) une las listas de todas.
+#
+#   principal -> sucursal: (método, args, kwargs), o None para terminar
+#   sucursal -> principal: ("ok", resultado) o ("error", excepción)
+
+TAMANO_BLOQUE = 1000  # eventos por mensaje (y por transacción en la sucursal) en cargar()
+ESPERA_CIERRE = 10.0  # segundos para que una sucursal termine antes de forzarla
+
+
+def en_memoria(sucursal: str) -> Repositorio:
+    return Repositorio()
+
+
+def _abrir_diario(directorio: str, sucursal: str) -> Repositorio:
+    from diario import RepositorioDiario  # sólo en el proceso de la sucursal
+    return RepositorioDiario(os.path.join(directorio, sucursal))
+
+
+def _abrir_sqlite(directorio: str, sucursal: str) -> Repositorio:
+    from almacenamiento_sqlite import RepositorioSQLite  # sólo en el proceso de la sucursal
+    os.makedirs(directorio, exist_ok=True)
+    return RepositorioSQLite(os.path.join(directorio, f"{sucursal}.db"))
+
+
+# Fábricas de sucursales persistentes: cada una en su subdirectorio (diario) o su base (SQLite) de `directorio`
+def diario_por_sucursal(directorio: str) -> Callable[[str], Repositorio]:
+    return functools.partial(_abrir_diario, directorio)
+
+
+def sqlite_por_sucursal(directorio: str) -> Callable[[str], Repositorio]:
+    return functools.partial(_abrir_sqlite, directorio)
+
+
+class _Progresos:
+    # Las vistas de una consulta apuntan al almacén de su sucursal: viajan sus filas copiadas a un almacén
+    # propio (ColumnasProgreso.extraer) y del otro lado vuelven a ser vistas, como las de Repositorio
+    __slots__ = ("col", "unico")
+
+    def __init__(self, col: ColumnasProgreso, unico: bool):
+        self.col = col
+        self.unico = unico
+
+    def vistas(self):
+        if self.unico:
+            return self.col.vista(0)
+        return [self.col.vista(f) for f in range(len(self.col))]
+
+
+def _transportable(valor):
+    if isinstance(valor, VistaProgreso):
+        return _Progresos(valor._col.extraer([valor._fila]), True)
+    if isinstance(valor, list) and valor and isinstance(valor[0], VistaProgreso):
+        return _Progresos(valor[0]._col.extraer([v._fila for v in valor]), False)
+    return valor
+
+
+def _resultado(estado: str, valor):
+    if estado == "error":
+        raise valor
+    return valor.vistas() if isinstance(valor, _Progresos) else valor
+
+
+# --- lo que corre en la sucursal, además de los métodos públicos de Repositorio ---
+
+def _ids_clientes(repo: Repositorio) -> List[str]:
+    return list(repo.clientes)
+
+
+def _cliente(repo: Repositorio, cliente_id: str) -> Optional[Cliente]:
+    return repo.clientes.get(cliente_id)
+
+
+def _clientes(repo: Repositorio) -> List[Cliente]:
+    return list(repo.clientes.values())
+
+
+def _entrenador(repo: Repositorio, entrenador_id: str) -> Optional[Entrenador]:
+    return repo.entrenadores.get(entrenador_id)
+
+
+def _entrenadores(repo: Repositorio) -> List[Entrenador]:
+    return list(repo.entrenadores.values())
+
+
+def _alta_entrenador(repo: Repositorio, ent: Entrenador):
+    # Alta o reemplazo: cada sucursal conserva su propia lista de clientes del entrenador
+    with repo.transaccion():
+        actual = repo.entrenadores.get(ent.id)
+        repo.add_entrenador(replace(ent, clientes_ids=list(actual.clientes_ids) if actual else []))
+
+
+def _completar_entrenadores(repo: Repositorio, entrenadores: List[Entrenador]) -> int:
+    # Los que falten, p.ej. en una sucursal nueva junto a otras persistentes que ya tenían entrenadores
+    with repo.transaccion():
+        faltan = [ent for ent in entrenadores if ent.id not in repo.entrenadores]
+        for ent in faltan:
+            repo.add_entrenador(replace(ent, clientes_ids=[]))
+    return len(faltan)
+
+
+def _aplicar_lote(repo: Repositorio, eventos: List[Tuple[str, object]]) -> int:
+    # Por _cambiar, con sus oyentes (el diario de la sucursal), en una sola transacción
+    with repo.transaccion():
+        for evento, dato in eventos:
+            repo._cambiar(evento, dato)
+    return len(eventos)
+
+
+_EN_SUCURSAL: Dict[str, Callable] = {f.__name__: f for f in (
+    _ids_clientes, _cliente, _clientes, _entrenador, _entrenadores, _alta_entrenador, _completar_entrenadores,
+    _aplicar_lote)}
+
+
+def _atender(repo: Repositorio, metodo: str, args: tuple, kwargs: dict) -> Tuple[str, object]:
+    try:
+        funcion = _EN_SUCURSAL.get(metodo)
+        valor = funcion(repo, *args, **kwargs) if funcion else getattr(repo, metodo)(*args, **kwargs)
+        return "ok", _transportable(valor)
+    except Exception as e:
+        return "error", e
+
+
+def _trabajar(conexion, fabrica: Callable[[str], Repositorio], sucursal: str):
+    # Proceso de una sucursal: abre su repositorio, avisa y atiende pedidos hasta recibir None o perder el
+    # pipe. Ctrl+C lo recibe el proceso principal, que es quien cierra las sucursales.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        repo = fabrica(sucursal)
+    except Exception as e:
+        conexion.send(("error", e))
+        return
+    conexion.send(("ok", None))
+    try:
+        while True:
+            try:
+                pedido = conexion.recv()
+            except EOFError:
+                break
+            if pedido is None:
+                break
+            respuesta = _atender(repo, *pedido)
+            try:
+                conexion.send(respuesta)
+            except Exception as e:  # resultado o excepción que no se puede serializar
+                conexion.send(("error", RuntimeError(f"{pedido[0]}: {e!r}")))
+    finally:
+        if hasattr(repo, "cerrar"):
+            repo.cerrar()
+
+
+class _Particion:
+    # Una sucursal en su proceso. Un pedido a la vez por el pipe: quien lo usa toma `cerrojo` entre enviar
+    # y recibir (llamar lo hace solo); las dispersiones envían a todas y después reciben de todas.
+    def __init__(self, contexto, nombre: str, fabrica: Callable[[str], Repositorio]):
+        self.nombre = nombre
+        self.cerrojo = threading.Lock()
+        self.conexion, remota = contexto.Pipe()
+        self.proceso = contexto.Process(target=_trabajar, args=(remota, fabrica, nombre),
+                                        name=f"sucursal-{nombre}", daemon=True)
+        self.proceso.start()
+        remota.close()
+
+    def enviar(self, metodo: str, args: tuple = (), kwargs: Optional[dict] = None):
+        try:
+            self.conexion.send((metodo, args, kwargs or {}))
+        except OSError as e:
+            raise ConnectionError(f"Se perdió el proceso de la sucursal {self.nombre}") from e
+
+    def recibir(self):
+        try:
+            estado, valor = self.conexion.recv()
+        except (EOFError, OSError) as e:
+            raise ConnectionError(f"Se perdió el proceso de la sucursal {self.nombre}") from e
+        return _resultado(estado, valor)
+
+    def llamar(self, metodo: str, *args, **kwargs):
+        with self.cerrojo:
+            self.enviar(metodo, args, kwargs)
+            return self.recibir()
+
+    def cerrar(self):
+        with self.cerrojo:
+            if self.conexion.closed:
+                return
+            try:
+                self.conexion.send(None)
+            except OSError:
+                pass
+            self.proceso.join(ESPERA_CIERRE)
+            if self.proceso.is_alive():
+                self.proceso.terminate()
+                self.proceso.join()
+            self.conexion.close()
+
+
+class _ParticionLocal:
+    # La misma sucursal sin proceso aparte (procesos=False), para depurar o para gimnasios chicos. Pedidos
+    # y respuestas se copian como si viajaran por el pipe: nada se comparte entre sucursales ni con quien llama.
+    def __init__(self, nombre: str, fabrica: Callable[[str], Repositorio]):
+        self.nombre = nombre
+        self.cerrojo = threading.Lock()
+        try:
+            self.repo = fabrica(nombre)
+            self._respuesta = ("ok", None)
+        except Exception as e:
+            self.repo = None
+            self._respuesta = ("error", e)
+
+    def enviar(self, metodo: str, args: tuple = (), kwargs: Optional[dict] = None):
+        args, kwargs = pickle.loads(pickle.dumps((args, kwargs or {})))
+        self._respuesta = pickle.loads(pickle.dumps(_atender(self.repo, metodo, args, kwargs)))
+
+    def recibir(self):
+        estado, valor = self._respuesta
+        self._respuesta = None
+        return _resultado(estado, valor)
+
+    def llamar(self, metodo: str, *args, **kwargs):
+        with self.cerrojo:
+            self.enviar(metodo, args, kwargs)
+            return self.recibir()
+
+    def cerrar(self):
+        if hasattr(self.repo, "cerrar"):
+            self.repo.cerrar()
+        self.repo = None
+
+
+def _unir_entrenadores(copias: Iterable[Optional[Entrenador]]) -> Optional[Entrenador]:
+    # Las copias de un entrenador en cada sucursal -> una con los clientes de todas, en el orden de las sucursales
+    unido = None
+    for ent in copias:
+        if ent is None:
+            continue
+        if unido is None:
+            unido = replace(ent, clientes_ids=list(ent.clientes_ids))
+        else:
+            unido.clientes_ids.extend(ent.clientes_ids)
+    return unido
+
+
+def eventos_de(repo: Repositorio) -> Iterator[Tuple[str, object]]:
+    # Todo un repositorio como eventos para cargar(): para pasar a sucursales un gimnasio de una sola base.
+    # Los vínculos van aparte y después de sus entrenadores; las listas de ids las rehace cada sucursal.
+    with repo.leyendo():
+        for ent in repo.entrenadores.values():
+            yield "entrenador", replace(ent, clientes_ids=[])
+        for cli in repo.clientes.values():
+            yield "cliente", replace(cli, entrenador_id=None, rutinas_ids=[], planes_ids=[], progreso_historial=[])
+            if cli.entrenador_id:
+                yield "vinculo", (cli.id, cli.entrenador_id)
+            for rutina in repo.rutinas_de(cli.id):
+                yield "rutina", rutina
+            for plan in repo.planes_de(cli.id):
+                yield "plan", plan
+            for p in repo.progresos_de(cli.id):
+                if isinstance(p, VistaProgreso):
+                    p = ProgresoFisico(id=p.id, cliente_id=p.cliente_id, fecha=p.fecha, peso=p.peso,
+                                       medidas=p.medidas, repeticiones=p.repeticiones, observaciones=p.observaciones)
+                yield "progreso", p
+
+
+class RepositorioSucursales:
+    def __init__(self, sucursales: Iterable[str], fabrica: Callable[[str], Repositorio] = en_memoria,
+                 procesos: bool = True):
+        # fabrica(sucursal) abre el repositorio de cada sucursal dentro de su proceso: tiene que poder
+        # serializarse (una función de módulo o un functools.partial, ver diario_por_sucursal)
+        nombres = list(sucursales)
+        if not nombres or not all(nombres) or len(set(nombres)) != len(nombres):
+            raise ValueError("Hacen falta nombres de sucursal distintos y no vacíos")
+        self._particiones: Dict[str, object] = {}
+        try:
+            if procesos:
+                import multiprocessing  # sólo aquí: importarlo pesa más que el resto del módulo
+                # spawn: un intérprete limpio por sucursal, sin heredar hilos ni cerrojos del proceso principal
+                contexto = multiprocessing.get_context("spawn")
+                for nombre in nombres:
+                    self._particiones[nombre] = _Particion(contexto, nombre, fabrica)
+            else:
+                for nombre in nombres:
+                    self._particiones[nombre] = _ParticionLocal(nombre, fabrica)
+            # las sucursales arrancan en paralelo: se espera el aviso de cada una
+            for particion in self._particiones.values():
+                particion.recibir()
+            # cliente_id -> sucursal; las sucursales persistentes ya traen sus clientes
+            self._sucursal_de: Dict[str, str] = {}
+            # altas y cambios de username: comprobar en todo el gimnasio, escribir en la sucursal y anotar
+            # _sucursal_de van como un solo paso. Se toma antes que los cerrojos de las particiones
+            self._cerrojo_altas = threading.Lock()
+            for nombre, ids in self._dispersar("_ids_clientes").items():
+                for cid in ids:
+                    otra = self._sucursal_de.setdefault(cid, nombre)
+                    if otra != nombre:
+                        raise ValueError(f"El cliente {cid} está en las sucursales {otra} y {nombre}")
+            self._completar_entrenadores()
+        except BaseException:
+            self.cerrar()
+            raise
+
+    def _completar_entrenadores(self):
+        todos: Dict[str, Entrenador] = {}
+        por_sucursal = self._dispersar("_entrenadores")
+        for ents in por_sucursal.values():
+            for ent in ents:
+                todos.setdefault(ent.id, ent)
+        for nombre, ents in por_sucursal.items():
+            if len(ents) < len(todos):
+                self._particiones[nombre].llamar("_completar_entrenadores", list(todos.values()))
+
+    def cerrar(self):
+        for particion in self._particiones.values():
+            particion.cerrar()
+
+    @property
+    def sucursales(self) -> List[str]:
+        return list(self._particiones)
+
+    def sucursal_de(self, cliente_id: str) -> Optional[str]:
+        return self._sucursal_de.get(cliente_id)
+
+    def _particion(self, sucursal: str):
+        particion = self._particiones.get(sucursal)
+        if particion is None:
+            raise ValueError(f"Sucursal desconocida: {sucursal}")
+        return particion
+
+    def _de_cliente(self, cliente_id: str):
+        nombre = self._sucursal_de.get(cliente_id)
+        return self._particiones[nombre] if nombre is not None else None
+
+    def _dispersar(self, metodo: str, args: tuple = (), kwargs: Optional[dict] = None,
+                   sucursales: Optional[Iterable[str]] = None) -> Dict[str, object]:
+        # El mismo pedido a todas las sucursales (o a las indicadas): se envía a todas antes de esperar
+        # ninguna respuesta, así trabajan en paralelo. Los cerrojos se toman siempre en el mismo orden para
+        # que dos dispersiones simultáneas no se bloqueen entre sí.
+        if sucursales is None:
+            particiones = list(self._particiones.values())
+        else:
+            elegidas = set(sucursales)
+            for nombre in elegidas:
+                self._particion(nombre)
+            particiones = [p for n, p in self._particiones.items() if n in elegidas]
+        respuestas = {}
+        error = None
+        with ExitStack() as pila:
+            for particion in particiones:
+                pila.enter_context(particion.cerrojo)
+            enviadas = []
+            for particion in particiones:
+                try:
+                    particion.enviar(metodo, args, kwargs)
+                except ConnectionError as e:
+                    error = e
+                    break
+                enviadas.append(particion)
+            # se recibe de todas aunque alguna falle: cada pipe queda listo para el pedido siguiente
+            for particion in enviadas:
+                try:
+                    respuestas[particion.nombre] = particion.recibir()
+                except Exception as e:
+                    error = error or e
+        if error is not None:
+            raise error
+        return respuestas
+
+    # --- entrenadores: en todas las sucursales ---
+
+    def add_entrenador(self, ent: Entrenador):
+        with self._cerrojo_altas:
+            self._comprobar_username(ent.username, ent.id)
+            self._dispersar("_alta_entrenador", (ent,))
+
+    def actualizar_entrenador(self, entrenador_id: str, **campos) -> Entrenador:
+        with self._cerrojo_altas:
+            if campos.get("username") is not None:
+                self._comprobar_username(campos["username"], entrenador_id)
+            return _unir_entrenadores(self._dispersar("actualizar_entrenador", (entrenador_id,), campos).values())
+
+    def eliminar_entrenador(self, entrenador_id: str) -> bool:
+        # cada sucursal deja sin entrenador a sus propios clientes
+        return any(self._dispersar("eliminar_entrenador", (entrenador_id,)).values())
+
+    def entrenador(self, entrenador_id: str) -> Optional[Entrenador]:
+        return _unir_entrenadores(self._dispersar("_entrenador", (entrenador_id,)).values())
+
+    def entrenadores(self) -> List[Entrenador]:
+        copias: Dict[str, List[Entrenador]] = {}
+        for ents in self._dispersar("_entrenadores").values():
+            for ent in ents:
+                copias.setdefault(ent.id, []).append(ent)
+        return [_unir_entrenadores(c) for c in copias.values()]
+
+    def sucursales_de_entrenador(self, entrenador_id: str) -> List[str]:
+        # donde tiene clientes
+        return [nombre for nombre, ent in self._dispersar("_entrenador", (entrenador_id,)).items()
+                if ent is not None and ent.clientes_ids]
+
+    # --- clientes: cada uno en su sucursal ---
+
+    def add_cliente(self, cli: Cliente, sucursal: str):
+        particion = self._particion(sucursal)
+        with self._cerrojo_altas:
+            actual = self._sucursal_de.get(cli.id)
+            if actual is not None and actual != sucursal:
+                raise ValueError(f"El cliente ya está en la sucursal {actual}")
+            self._comprobar_username(cli.username, cli.id)
+            particion.llamar("add_cliente", cli)
+            self._sucursal_de[cli.id] = sucursal
+
+    def actualizar_cliente(self, cliente_id: str, **campos) -> Cliente:
+        with self._cerrojo_altas:
+            particion = self._de_cliente(cliente_id)
+            if particion is None:
+                raise KeyError(cliente_id)
+            if campos.get("username") is not None:
+                self._comprobar_username(campos["username"], cliente_id)
+            return particion.llamar("actualizar_cliente", cliente_id, **campos)
+
+    def eliminar_cliente(self, cliente_id: str) -> bool:
+        with self._cerrojo_altas:
+            particion = self._de_cliente(cliente_id)
+            if particion is None:
+                return False
+            borrado = particion.llamar("eliminar_cliente", cliente_id)
+            self._sucursal_de.pop(cliente_id, None)
+            return borrado
+
+    def cliente(self, cliente_id: str) -> Optional[Cliente]:
+        particion = self._de_cliente(cliente_id)
+        return particion.llamar("_cliente", cliente_id) if particion is not None else None
+
+    def clientes(self, sucursales: Optional[Iterable[str]] = None) -> List[Cliente]:
+        return [cli for clis in self._dispersar("_clientes", sucursales=sucursales).values() for cli in clis]
+
+    def find_by_username(self, username: str) -> Optional[Usuario]:
+        encontrados = [u for u in self._dispersar("find_by_username", (username,)).values() if u is not None]
+        if encontrados and isinstance(encontrados[0], Entrenador):
+            return _unir_entrenadores(encontrados)
+        return encontrados[0] if encontrados else None
+
+    def _comprobar_username(self, username: str, id_: str):
+        # el username es único en todo el gimnasio, no sólo en la sucursal
+        usr = self.find_by_username(username)
+        if usr is not None and usr.id != id_:
+            raise ValueError("El usuario ya existe")
+
+    def authenticate(self, username: str, password: str) -> Optional[Usuario]:
+        usr = self.find_by_username(username)
+        if usr and usr.password == password:
+            return usr
+        return None
+
+    def vincular_cliente_a_entrenador(self, cliente_id: str, entrenador_id: str) -> bool:
+        # El entrenador está en todas las sucursales: el vínculo (y el cambio de entrenador) se resuelve
+        # entero en la del cliente, que saca al cliente de la lista local del entrenador anterior
+        particion = self._de_cliente(cliente_id)
+        if particion is None:
+            return False
+        return particion.llamar("vincular_cliente_a_entrenador", cliente_id, entrenador_id)
+
+    def crear_plan_automatico(self, cliente_id: str) -> PlanAlimentacion:
+        particion = self._de_cliente(cliente_id)
+        if particion is None:
+            raise ValueError("Cliente no encontrado")
+        return particion.llamar("crear_plan_automatico", cliente_id)
+
+    def crear_rutina_automatica(self, cliente_id: str, entrenador_id: Optional[str] = None) -> RutinaEjercicio:
+        particion = self._de_cliente(cliente_id)
+        if particion is None:
+            raise ValueError("Cliente no encontrado")
+        return particion.llamar("crear_rutina_automatica", cliente_id, entrenador_id)
+
+    def crear_rutina_personalizada(self, entrenador_id: str, cliente_id: str, ejercicios_semana: Dict[str, List[Dict]],
+                                   intensidad: str = "Personalizada") -> RutinaEjercicio:
+        particion = self._de_cliente(cliente_id)
+        if particion is None:
+            raise ValueError("Entrenador o cliente no encontrado")
+        return particion.llamar("crear_rutina_personalizada", entrenador_id, cliente_id, ejercicios_semana, intensidad)
+
+    def crear_plan_personalizado(self, entrenador_id: str, cliente_id: str, detalle_comidas: Dict[str, str],
+                                 calorias: int, comidas_por_dia: int, observaciones: str = "") -> PlanAlimentacion:
+        particion = self._de_cliente(cliente_id)
+        if particion is None:
+            raise ValueError("Entrenador o cliente no encontrado")
+        return particion.llamar("crear_plan_personalizado", entrenador_id, cliente_id, detalle_comidas, calorias,
+                                comidas_por_dia, observaciones)
+
+    def registrar_progreso(self, progreso: ProgresoFisico):
+        # sin sucursal no hay dónde guardarlo: a diferencia de Repositorio, el cliente tiene que existir
+        particion = self._de_cliente(progreso.cliente_id)
+        if particion is None:
+            raise ValueError("Cliente no encontrado")
+        particion.llamar("registrar_progreso", progreso)
+
+    def resumen_cliente(self, cliente_id: str) -> ResumenCliente:
+        particion = self._de_cliente(cliente_id)
+        if particion is None:
+            raise KeyError(cliente_id)
+        return particion.llamar("resumen_cliente", cliente_id)
+
+    def progresos_de(self, cliente_id: str, desde: Optional[str] = None, hasta: Optional[str] = None) -> List[ProgresoFisico]:
+        particion = self._de_cliente(cliente_id)
+        return particion.llamar("progresos_de", cliente_id, desde, hasta) if particion is not None else []
+
+    def ultimo_progreso(self, cliente_id: str) -> Optional[ProgresoFisico]:
+        particion = self._de_cliente(cliente_id)
+        return particion.llamar("ultimo_progreso", cliente_id) if particion is not None else None
+
+    def rutinas_de(self, cliente_id: str) -> List[RutinaEjercicio]:
+        particion = self._de_cliente(cliente_id)
+        return particion.llamar("rutinas_de", cliente_id) if particion is not None else []
+
+    def planes_de(self, cliente_id: str) -> List[PlanAlimentacion]:
+        particion = self._de_cliente(cliente_id)
+        return particion.llamar("planes_de", cliente_id) if particion is not None else []
+
+    # --- consultas de todo el gimnasio: a todas las sucursales en paralelo ---
+
+    def contar(self, tipo: str, sucursales: Optional[Iterable[str]] = None) -> int:
+        if tipo == "entrenador":
+            return next(iter(self._particiones.values())).llamar("contar", tipo)
+        return sum(self._dispersar("contar", (tipo,), sucursales=sucursales).values())
+
+    def buscar_nombres(self, tipo: str, texto: str, limite: int = 50,
+                       sucursales: Optional[Iterable[str]] = None) -> List[Tuple[str, str]]:
+        if tipo == "entrenador":
+            # los mismos en todas: basta con una
+            return next(iter(self._particiones.values())).llamar("buscar_nombres", tipo, texto, limite)
+        # los primeros `limite` de cada sucursal alcanzan para los primeros `limite` en total; cada
+        # sucursal ordena según su propio índice, así que se reordenan por nombre
+        encontrados = [r for rs in self._dispersar("buscar_nombres", (tipo, texto, limite), sucursales=sucursales).values()
+                       for r in rs]
+        encontrados.sort(key=lambda r: (normalizar(r[1]), r[0]))
+        return encontrados[:limite]
+
+    def reporte_progreso(self, hoy: Optional[str] = None, controles_por_semana: float = 1.0,
+                         sucursales: Optional[Iterable[str]] = None) -> List[ReporteCliente]:
+        # el mismo "hoy" en todas las sucursales; las filas, sucursal por sucursal
+        hoy = hoy or datetime.now().isoformat(sep=" ", timespec="seconds")
+        partes = self._dispersar("reporte_progreso", (hoy, controles_por_semana), sucursales=sucursales)
+        return [fila for filas in partes.values() for fila in filas]
+
+    def progresos_entre(self, desde: Optional[str] = None, hasta: Optional[str] = None,
+                        sucursales: Optional[Iterable[str]] = None) -> List[ProgresoFisico]:
+        # cada sucursal los devuelve ordenados por fecha: se intercalan sin reordenar
+        partes = self._dispersar("progresos_entre", (desde, hasta), sucursales=sucursales)
+        return list(heapq.merge(*partes.values(), key=attrgetter("fecha")))
+
+    def asignar_automaticos(self, filtro: Optional[Callable[[Cliente], bool]] = None, planes: bool = True,
+                            rutinas: bool = True, tamano_bloque: int = 1000,
+                            sucursales: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        # Cada sucursal asigna a sus clientes, todas a la vez. El filtro se ejecuta en las sucursales: tiene
+        # que poder serializarse (p.ej. nucleo.sin_entrenador)
+        resumen = {"clientes": 0, "planes": 0, "rutinas": 0}
+        kwargs = {"filtro": filtro, "planes": planes, "rutinas": rutinas, "tamano_bloque": tamano_bloque}
+        for parcial in self._dispersar("asignar_automaticos", kwargs=kwargs, sucursales=sucursales).values():
+            for clave, n in parcial.items():
+                resumen[clave] += n
+        return resumen
+
+    def cargar(self, eventos: Iterable[Tuple[str, object]], sucursal_de: Callable[[Cliente], str],
+               tamano_bloque: int = TAMANO_BLOQUE) -> Dict[str, int]:
+        # Carga masiva de (evento, dato), p.ej. de eventos_de o de un generador: cada cliente nuevo va a la
+        # sucursal que diga sucursal_de(cliente) y lo suyo lo sigue; los entrenadores van a todas. Viaja por
+        # bloques (una transacción por bloque en la sucursal) y cada sucursal aplica un bloque mientras aquí
+        # se arma el siguiente. Sin validaciones, como una restauración: para cargas iniciales.
+        # Devuelve los eventos aplicados por sucursal.
+        bloques: Dict[str, list] = {nombre: [] for nombre in self._particiones}
+        aplicados = dict.fromkeys(self._particiones, 0)
+        en_vuelo = set()
+
+        def enviar(nombre: str):
+            particion = self._particiones[nombre]
+            if nombre in en_vuelo:
+                en_vuelo.discard(nombre)
+                particion.recibir()
+            particion.enviar("_aplicar_lote", (bloques[nombre],))
+            en_vuelo.add(nombre)
+            aplicados[nombre] += len(bloques[nombre])
+            bloques[nombre] = []
+
+        error = None
+        with ExitStack() as pila:
+            pila.enter_context(self._cerrojo_altas)
+            for particion in self._particiones.values():
+                pila.enter_context(particion.cerrojo)
+            try:
+                for evento, dato in eventos:
+                    if evento in ("entrenador", "baja_entrenador"):
+                        if evento == "entrenador":
+                            dato = replace(dato, clientes_ids=[])
+                        destinos = list(bloques)
+                    else:
+                        if evento == "cliente":
+                            nombre = self._sucursal_de.get(dato.id) or sucursal_de(dato)
+                            self._particion(nombre)
+                            self._sucursal_de[dato.id] = nombre
+                        else:
+                            cliente_id = dato[0] if evento == "vinculo" else dato if evento == "baja_cliente" \
+                                else dato.cliente_id
+                            nombre = self._sucursal_de.get(cliente_id)
+                            if nombre is None:
+                                raise ValueError(f"{evento} de un cliente sin sucursal: {cliente_id}")
+                            if evento == "baja_cliente":
+                                del self._sucursal_de[cliente_id]
+                        destinos = [nombre]
+                    for nombre in destinos:
+                        bloques[nombre].append((evento, dato))
+                        if len(bloques[nombre]) >= tamano_bloque:
+                            enviar(nombre)
+                for nombre, bloque in bloques.items():
+                    if bloque:
+                        enviar(nombre)
+            finally:
+                # las respuestas pendientes se reciben siempre, aunque la carga se corte
+                for nombre in en_vuelo:
+                    try:
+                        self._particiones[nombre].recibir()
+                    except Exception as e:
+                        error = error or e
+        if error is not None:
+            raise error
+        return aplicados
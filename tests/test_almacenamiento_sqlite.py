@@ -0,0 +1,76 @@
+import copy
+import os
+import pickle
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo import Cliente, Entrenador, ProgresoFisico
+from almacenamiento_sqlite import RepositorioSQLite
+
+
+class IdsPerezosos(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.repo = RepositorioSQLite(os.path.join(self.directorio.name, "gym.db"))
+        self.ent = Entrenador(username="eva", password="x")
+        self.repo.add_entrenador(self.ent)
+        self.cli = Cliente(username="ana", password="x")
+        self.repo.add_cliente(self.cli)
+        self.repo.vincular_cliente_a_entrenador(self.cli.id, self.ent.id)
+        self.rutina = self.repo.crear_rutina_automatica(self.cli.id)
+        self.plan = self.repo.crear_plan_automatico(self.cli.id)
+        self.progreso = ProgresoFisico(cliente_id=self.cli.id, peso=80)
+        self.repo.registrar_progreso(self.progreso)
+
+    def tearDown(self):
+        self.repo.con.close()
+        self.directorio.cleanup()
+
+    def consultas(self, funcion) -> int:
+        hechas = []
+        self.repo.con.set_trace_callback(hechas.append)
+        try:
+            funcion()
+        finally:
+            self.repo.con.set_trace_callback(None)
+        return len(hechas)
+
+    def test_listar_clientes_no_consulta_por_fila(self):
+        for i in range(20):
+            self.repo.add_cliente(Cliente(username=f"c{i}", password="x"))
+        clientes = []
+        self.assertEqual(self.consultas(lambda: clientes.extend(self.repo.clientes.values())), 1)
+        self.assertEqual(len(clientes), 21)
+        # la primera lista que se usa se consulta para todo el grupo: una consulta por lista, no por cliente
+        historiales = {}
+        self.assertEqual(self.consultas(lambda: historiales.update((c.id, c.progreso_historial) for c in clientes)), 1)
+        self.assertEqual(historiales[self.cli.id], [self.progreso.id])
+        self.assertEqual(sum(map(len, historiales.values())), 1)
+
+        pagina = self.repo.pagina("cliente", 0, 10, "nombre")
+        self.assertEqual(self.consultas(lambda: [(c.rutinas_ids, c.planes_ids) for c in pagina]), 2)
+
+    def test_listas_al_usarlas(self):
+        cli = self.repo.clientes[self.cli.id]
+        self.assertEqual(cli.rutinas_ids, [self.rutina.id])
+        self.assertEqual(cli.planes_ids, [self.plan.id])
+        self.assertEqual(cli.progreso_historial, [self.progreso.id])
+        self.assertEqual(cli.entrenador_id, self.ent.id)
+        self.assertEqual(self.repo.entrenadores[self.ent.id].clientes_ids, [self.cli.id])
+
+    def test_copias_son_entidades_comunes(self):
+        cli = self.repo.clientes[self.cli.id]
+        for copia in (pickle.loads(pickle.dumps(cli)), copy.deepcopy(cli)):
+            self.assertIs(type(copia), Cliente)
+            self.assertEqual(copia, cli)
+            self.assertEqual(copia.planes_ids, [self.plan.id])
+        ent = pickle.loads(pickle.dumps(self.repo.entrenadores[self.ent.id]))
+        self.assertIs(type(ent), Entrenador)
+        self.assertEqual(ent.clientes_ids, [self.cli.id])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo import Repositorio, Cliente
+from almacenamiento_sqlite import RepositorioSQLite
+from importador import Importador
+
+
+class FechasImportadas(unittest.TestCase):
+    def importar(self, repo: Repositorio, filas: list):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, "progresos.jsonl")
+            with open(ruta, "w") as f:
+                f.write("\n".join(json.dumps(fila) for fila in filas))
+            return Importador(repo).importar("progresos", ruta)
+
+    def comprobar(self, repo: Repositorio):
+        cli = Cliente(username="ana", password="x")
+        repo.add_cliente(cli)
+        res = self.importar(repo, [
+            {"cliente": "ana", "fecha": "2024-01-15T10:00", "peso": 80},
+            {"cliente": "ana", "fecha": "2024-01-15", "peso": 81},
+            {"cliente": "ana", "fecha": "2024-01-15 12:00+05:00", "peso": 82},
+            {"cliente": "ana", "fecha": "2024-01-15T12:00:00Z", "peso": 83},
+        ])
+        self.assertEqual(res.importadas, 2)
+        self.assertEqual([e.linea for e in res.errores], [3, 4])
+        self.assertTrue(all("zona horaria" in e.mensaje for e in res.errores))
+        # normalizadas, los filtros por fecha (que en SQLite comparan texto) las encuentran
+        hasta = [(p.fecha, p.peso) for p in repo.progresos_de(cli.id, hasta="2024-01-15")]
+        self.assertEqual(sorted(hasta), [("2024-01-15 00:00:00", 81.0), ("2024-01-15 10:00:00", 80.0)])
+        desde = [p.fecha for p in repo.progresos_de(cli.id, desde="2024-01-15 09:00:00")]
+        self.assertEqual(desde, ["2024-01-15 10:00:00"])
+
+    def test_memoria(self):
+        self.comprobar(Repositorio())
+
+    def test_sqlite(self):
+        repo = RepositorioSQLite(":memory:")
+        try:
+            self.comprobar(repo)
+        finally:
+            repo.cerrar()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo import Repositorio, Cliente, Entrenador
+from servidor import API, Peticion
+
+
+class PermisosAPI(unittest.TestCase):
+    def setUp(self):
+        self.repo = Repositorio()
+        self.api = API(self.repo)
+        self.ent = Entrenador(username="ent", password="x")
+        self.otro = Entrenador(username="otro", password="x")
+        self.ana = Cliente(username="ana", password="x")
+        for usr in (self.ent, self.otro):
+            self.repo.add_entrenador(usr)
+        self.repo.add_cliente(self.ana)
+        self.repo.vincular_cliente_a_entrenador(self.ana.id, self.ent.id)
+
+    def pedir(self, metodo: str, ruta: str, cuerpo=None, usuario=None):
+        cabeceras = {}
+        if usuario is not None:
+            _, sesion = self.pedir("POST", "/login", {"username": usuario, "password": "x"})
+            cabeceras["authorization"] = "Bearer " + sesion["token"]
+        datos = json.dumps(cuerpo).encode() if cuerpo is not None else b""
+        return self.api.atender(Peticion(metodo, ruta, {}, cabeceras, datos, False))
+
+    def test_alta_de_entrenador_pide_sesion_de_entrenador(self):
+        estado, _ = self.pedir("POST", "/entrenadores", {"username": "intruso", "password": "x"})
+        self.assertEqual(estado, 401)
+        estado, _ = self.pedir("POST", "/entrenadores", {"username": "intruso", "password": "x"}, usuario="ana")
+        self.assertEqual(estado, 403)
+        estado, _ = self.pedir("POST", "/entrenadores", {"username": "nuevo", "password": "x"}, usuario="ent")
+        self.assertEqual(estado, 201)
+        self.assertIsNone(self.repo.find_by_username("intruso"))
+
+    def test_otro_entrenador_no_modifica_ni_borra(self):
+        estado, _ = self.pedir("PATCH", f"/clientes/{self.ana.id}", {"nombre": "x"}, usuario="otro")
+        self.assertEqual(estado, 403)
+        estado, _ = self.pedir("DELETE", f"/clientes/{self.ana.id}", usuario="otro")
+        self.assertEqual(estado, 403)
+        self.assertIn(self.ana.id, self.repo.clientes)
+
+    def test_usuario_y_clave_solo_los_cambia_su_dueno(self):
+        for campos in ({"password": "pwned"}, {"username": "robada"}):
+            estado, _ = self.pedir("PATCH", f"/clientes/{self.ana.id}", campos, usuario="ent")
+            self.assertEqual(estado, 403)
+        estado, _ = self.pedir("PATCH", f"/entrenadores/{self.otro.id}", {"password": "pwned"}, usuario="ent")
+        self.assertEqual(estado, 403)
+        self.assertIsNone(self.repo.authenticate("ana", "pwned"))
+        self.assertIsNone(self.repo.authenticate("otro", "pwned"))
+
+    def test_permitidos(self):
+        estado, _ = self.pedir("PATCH", f"/clientes/{self.ana.id}", {"nombre": "Ana"}, usuario="ent")
+        self.assertEqual(estado, 200)
+        estado, _ = self.pedir("PATCH", f"/clientes/{self.ana.id}", {"password": "nueva"}, usuario="ana")
+        self.assertEqual(estado, 200)
+        self.assertIsNotNone(self.repo.authenticate("ana", "nueva"))
+        estado, _ = self.pedir("DELETE", f"/clientes/{self.ana.id}", usuario="ent")
+        self.assertEqual(estado, 204)
+        self.assertNotIn(self.ana.id, self.repo.clientes)
+
+    def test_fechas_de_progreso(self):
+        ruta = f"/clientes/{self.ana.id}/progresos"
+        estado, cuerpo = self.pedir("POST", ruta, {"peso": 70, "fecha": "2024-01-15T10:00"}, usuario="ana")
+        self.assertEqual((estado, cuerpo["fecha"]), (201, "2024-01-15 10:00:00"))
+        for fecha in ("2024-01-15 12:00+05:00", "2024-01-15T12:00:00Z"):
+            estado, _ = self.pedir("POST", ruta, {"peso": 70, "fecha": fecha}, usuario="ana")
+            self.assertEqual(estado, 400)
+        self.assertEqual([p.fecha for p in self.repo.progresos_de(self.ana.id)], ["2024-01-15 10:00:00"])
+
+
+if __name__ == "__main__":
+    unittest.main()